@@ -1,13 +1,31 @@
 import streamlit as st
-import pandas as pd
-import altair as alt
 import locale
-
-# --- CONSTANTES DE SIMULAÇÃO GLOBAIS ---
-TAXA_DESEMPENHO = 0.80
-POTENCIA_PAINEL_WP = 550
-AREA_PAINEL_M2 = 2.3
-FATOR_EMISSAO_CO2_KWH = 0.075
+import os
+
+# --- CONSTANTES, BASES DE DADOS E FUNÇÕES DE CÁLCULO (pacote solarsim, sem UI) ---
+from solarsim.constantes import TAXA_DESEMPENHO, CIDADE_PADRAO, POTENCIA_PAINEL_WP
+from solarsim.municipios import abrir_base
+from solarsim.calculos import (
+    formatar_reais, calcular_sistema_solar, calcular_sistema_por_orcamento,
+    estimar_consumo_casa_nova, formatar_payback, formatar_meses, premissas_simulacao,
+)
+from solarsim.fluxo_caixa import (
+    calcular_fluxo_caixa, ANOS_PADRAO, REAJUSTE_TARIFA_ANUAL, DEGRADACAO_ANUAL,
+    TAXA_DESCONTO_ANUAL, ANO_TROCA_INVERSOR,
+)
+from solarsim.monte_carlo import simular_monte_carlo, distribuicoes_padrao, AMOSTRAS_PADRAO
+from solarsim.otimizador import otimizar_sistema
+from solarsim.rendimento import Face, perfil_horario_telhado, simular_telhado
+from solarsim.equipamentos import configurar_sistema
+from solarsim.graficos import montar_comparativo, montar_comparativo_cenarios
+from solarsim.cenarios import ColecaoCenarios, EntradasCenario
+from solarsim.medicao import carregar_medicao, perfil_em_cache
+from solarsim.aparelhos import perfil_casa_nova, fracao_diurna
+from solarsim.horario import somar_por_mes
+from solarsim.tarifas import carregar_tabela, DISTRIBUIDORA_PADRAO
+from solarsim.cache import CACHE_SIMULACAO, normalizar, exportar_metricas
+from solarsim.instrumentacao import iniciar_rerun, span
+from solarsim.sessao import abrir_armazem, restaurar_sessao, salvar_sessao
 
 # --- URLs DAS IMAGENS DE AJUDA (JÁ HOSPEDADAS) ---
 URL_AJUDA_CONSUMO = "https://i.imgur.com/kSrxp2s.png"
@@ -17,12 +35,23 @@ URL_AJUDA_TARIFA = "https://i.imgur.com/iREm1kY.png"
 # --- CONFIGURAÇÃO DA PÁGINA ---
 st.set_page_config(page_title="SolarSim | Simulador Solar", page_icon="☀", layout="wide")
 
+# --- INSTRUMENTAÇÃO (tempos por etapa; painel de depuração com ?debug=1 ou SOLARSIM_DEBUG=1) ---
+DEBUG_ATIVO = os.environ.get("SOLARSIM_DEBUG") == "1" or st.query_params.get("debug") == "1"
+rerun = iniciar_rerun(st.session_state, perfil=DEBUG_ATIVO and st.session_state.get("debug_perfil", False))
+rerun.etapa("session_state")
+
+# --- ESTADO EXTERNO (SOLARSIM_SESSOES: resultado e tarifas fora do processo, id da sessão em ?sessao=) ---
+armazem_sessoes = abrir_armazem()
+if armazem_sessoes is not None:
+    restaurar_sessao(st.session_state, st.query_params, armazem_sessoes)
+
 # --- INICIALIZAÇÃO DO SESSION STATE ---
 if "tamanho_fonte" not in st.session_state:
     st.session_state.tamanho_fonte = "Padrão"
 if "tarifas_list" not in st.session_state:
     st.session_state.tarifas_list = [0.85]
 
+rerun.etapa("sidebar")
 # --- SIDEBAR DE ACESSIBILIDADE ---
 st.sidebar.title("♿ Opções de Acessibilidade")
 st.sidebar.markdown("Use esta opção caso tenha dificuldade de leitura.")
@@ -56,127 +85,22 @@ CSS_MUITO_GRANDE = """
 </style>
 """
 
+rerun.etapa("css")
 if st.session_state.tamanho_fonte == "Grande":
     st.markdown(CSS_GRANDE, unsafe_allow_html=True)
 elif st.session_state.tamanho_fonte == "Muito Grande":
     st.markdown(CSS_MUITO_GRANDE, unsafe_allow_html=True)
 
 
+rerun.etapa("locale")
 # --- LOCALE (com fallback) ---
 try:
     locale.setlocale(locale.LC_ALL, 'pt_BR.UTF-8')
 except:
     pass
 
-def formatar_reais(valor: float) -> str:
-    """Formata um float para o padrão R$ X.XXX,XX com fallback."""
-    try:
-        return locale.currency(valor, grouping=True)
-    except:
-        return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-
-# --- BASES DE DADOS (Foco em Rio das Ostras) ---
-HSP_CAPITAIS = { "Rio das Ostras (RJ)": 4.98 }
-CUSTO_WP_CAPITAIS = { "Rio das Ostras (RJ)": 2.49 }
-
-
-# --- FUNÇÕES DE CÁLCULO (COM ESTRATIFICAÇÃO E INVERSOR) ---
-
-def calcular_sistema_solar(consumo_kwh, tarifa, hsp, custo_wp_regional):
-    """Calculadora por Consumo (kWh -> R$)"""
-    consumo_diario_kwh = consumo_kwh / 30
-    potencia_necessaria_kwp = consumo_diario_kwh / (hsp * TAXA_DESEMPENHO)
-    potencia_necessaria_wp = potencia_necessaria_kwp * 1000
-
-    numero_paineis = max(1, round(potencia_necessaria_wp / POTENCIA_PAINEL_WP))
-    potencia_final_sistema_wp = numero_paineis * POTENCIA_PAINEL_WP
-    potencia_kwp_final = potencia_final_sistema_wp / 1000
-    area_total_m2 = numero_paineis * AREA_PAINEL_M2
-    inversor_kw_rec = potencia_kwp_final / 1.25
-
-    geracao_diaria_kwh = potencia_kwp_final * hsp * TAXA_DESEMPENHO
-    geracao_mensal_kwh = geracao_diaria_kwh * 30
-    custo_total_estimado = potencia_final_sistema_wp * custo_wp_regional
-    economia_mensal_reais = min(geracao_mensal_kwh, consumo_kwh) * tarifa
-    geracao_anual_kwh = geracao_mensal_kwh * 12
-    co2_evitado_anual_kg = geracao_anual_kwh * FATOR_EMISSAO_CO2_KWH
-
-    custos_detalhados = {
-        "Painéis Fotovoltaicos": custo_total_estimado * 0.40,
-        "Inversor(es)": custo_total_estimado * 0.20,
-        "Estruturas, Cabos e Proteções": custo_total_estimado * 0.15,
-        "Mão de Obra e Projeto": custo_total_estimado * 0.25
-    }
-
-    return {
-        "potencia_kwp": round(potencia_kwp_final, 2),
-        "inversor_kw_recomendado": round(inversor_kw_rec, 2),
-        "numero_paineis": numero_paineis,
-        "area_m2": round(area_total_m2, 2),
-        "custo_total_estimado_site": custo_total_estimado,
-        "economia_mensal_reais": economia_mensal_reais,
-        "co2_evitado_kg": round(co2_evitado_anual_kg, 2),
-        "geracao_mensal": round(geracao_mensal_kwh, 2),
-        "custos_detalhados": custos_detalhados
-    }
-
-def calcular_sistema_por_orcamento(orcamento, custo_wp_regional, consumo_kwh, tarifa, hsp):
-    """Calculadora por Orçamento (R$ -> kWh)"""
-    
-    potencia_final_sistema_wp = orcamento / custo_wp_regional
-    potencia_kwp_final = potencia_final_sistema_wp / 1000
-    inversor_kw_rec = potencia_kwp_final / 1.25
-    numero_paineis = max(1, round(potencia_final_sistema_wp / POTENCIA_PAINEL_WP))
-    area_total_m2 = numero_paineis * AREA_PAINEL_M2
-
-    geracao_diaria_kwh = potencia_kwp_final * hsp * TAXA_DESEMPENHO
-    geracao_mensal_kwh = geracao_diaria_kwh * 30
-    economia_mensal_reais = min(geracao_mensal_kwh, consumo_kwh) * tarifa
-    geracao_anual_kwh = geracao_mensal_kwh * 12
-    co2_evitado_anual_kg = geracao_anual_kwh * FATOR_EMISSAO_CO2_KWH
-
-    custos_detalhados = {
-        "Painéis Fotovoltaicos": orcamento * 0.40,
-        "Inversor(es)": orcamento * 0.20,
-        "Estruturas, Cabos e Proteções": orcamento * 0.15,
-        "Mão de Obra e Projeto": orcamento * 0.25
-    }
-
-    return {
-        "potencia_kwp": round(potencia_kwp_final, 2),
-        "inversor_kw_recomendado": round(inversor_kw_rec, 2),
-        "numero_paineis": numero_paineis,
-        "area_m2": round(area_total_m2, 2),
-        "custo_total_estimado_site": orcamento,
-        "economia_mensal_reais": economia_mensal_reais,
-        "co2_evitado_kg": round(co2_evitado_anual_kg, 2),
-        "geracao_mensal": round(geracao_mensal_kwh, 2),
-        "custos_detalhados": custos_detalhados
-    }
-
-def estimar_consumo_casa_nova(pessoas, chuveiros, ar_cond, freezer, home_office):
-    """Estima o consumo para uma casa nova (simulação)."""
-    consumo_base_pessoas = pessoas * 60
-    consumo_chuveiros = chuveiros * 70
-    consumo_ar = ar_cond * 100
-    consumo_freezer = freezer * 40
-    consumo_home_office = home_office * 60
-    
-    return consumo_base_pessoas + consumo_chuveiros + consumo_ar + consumo_freezer + consumo_home_office
-
-def formatar_payback(custo, economia_mensal):
-    """Calcula e formata o payback em anos e meses."""
-    if economia_mensal > 0:
-        payback_anos = custo / (economia_mensal * 12)
-    else:
-        return "Não aplicável"
-    anos = int(payback_anos)
-    meses = round((payback_anos - anos) * 12)
-    if meses == 12:
-        anos += 1
-        meses = 0
-    return f"~ {anos} anos e {meses} meses" if anos else f"~ {meses} meses"
 
+rerun.etapa("cabecalho")
 # ========= INTERFACE =========
 
 st.title("☀ SolarSim: Simulador Solar Residencial")
@@ -196,6 +120,7 @@ modo_simulacao = st.radio(
     key="modo_simulacao"
 )
 
+rerun.etapa("entradas_consumo")
 # 1) Inputs (Consumo e Localização)
 col1, col2 = st.columns(2)
 with col1:
@@ -218,6 +143,33 @@ with col1:
             ![Exemplo Conta de Luz](https://raw.githubusercontent.com/felipaofelipao/solar-sim-app/refs/heads/main/Imagem%20do%20WhatsApp%20de%202025-11-09%20%C3%Aà(s)%2017.36.05_52053dd3.JPG)
             """
         )
+
+        # Exportação do medidor (leituras de 15 min): o perfil real substitui o consumo médio
+        arquivo_medidor = st.file_uploader(
+            "Opcional: exportação do medidor (CSV com leituras de 15 min)", type=["csv", "txt"], key="arquivo_medidor",
+            help="Arquivo com uma coluna de data/hora e uma de consumo (kWh por intervalo), como os exportados pela distribuidora. O perfil real substitui o consumo médio acima."
+        )
+        if arquivo_medidor is None:
+            st.session_state.pop("medicao_hash", None)
+        elif st.session_state.get("medicao_arquivo_id") != arquivo_medidor.file_id:
+            st.session_state.medicao_arquivo_id = arquivo_medidor.file_id
+            st.session_state.pop("medicao_hash", None)
+            try:
+                with st.spinner("Lendo as leituras do medidor..."):
+                    perfil_medidor = carregar_medicao(arquivo_medidor)
+                CACHE_SIMULACAO.guardar(("medicao", perfil_medidor.hash), perfil_medidor)
+                st.session_state.medicao_hash = perfil_medidor.hash
+            except (ValueError, UnicodeDecodeError) as erro:
+                st.error(f"Não foi possível ler o arquivo do medidor: {erro}")
+        perfil_medidor = None
+        if st.session_state.get("medicao_hash"):
+            perfil_medidor = CACHE_SIMULACAO.obter(("medicao", st.session_state.medicao_hash)) or perfil_em_cache(st.session_state.medicao_hash)
+        if perfil_medidor is not None:
+            consumo = round(perfil_medidor.consumo_medio_mensal)
+            leituras_fmt = f"{perfil_medidor.leituras:,}".replace(",", ".")
+            st.info(f"Perfil do medidor: {leituras_fmt} leituras de {perfil_medidor.inicio[:10]} a {perfil_medidor.fim[:10]}, consumo médio de {consumo} kWh/mês.")
+            if perfil_medidor.descartadas:
+                st.warning(f"{perfil_medidor.descartadas:,} linhas do arquivo foram descartadas por não terem data ou consumo numérico.".replace(",", "."))
         
         # MUDANÇA: Texto de ajuda para quem TEM conta
         help_texto_tarifa = "Some todos os valores de 'Tarifa de Energia (TE)' e 'Tarifa de Uso (TUSD)' da sua conta. Use o botão '+' para adicionar quantos campos precisar."
@@ -232,58 +184,84 @@ with col1:
         
         consumo = estimar_consumo_casa_nova(c_pessoas, c_chuveiros, c_ar, c_freezer, c_home_office)
         st.info(f"Seu consumo estimado é de {consumo} kWh/mês.")
+        # Perfil hora a hora por aparelho (em cache por combinação de quantidades)
+        perfil_casa = perfil_casa_nova(c_pessoas, c_chuveiros, c_ar, c_freezer, c_home_office)
+        consumo_meses = somar_por_mes(perfil_casa)
+        st.caption(f"Pelo uso típico de cada aparelho, o consumo varia de {consumo_meses.min():.0f} a {consumo_meses.max():.0f} kWh/mês ao longo do ano, e {fracao_diurna(perfil_casa):.0%} dele acontece entre 6h e 18h, quando os painéis geram.")
 
         # MUDANÇA: Texto de ajuda para quem NÃO TEM conta
-        help_texto_tarifa = "Como você ainda não tem uma conta, usamos um valor padrão (R$ 0,85). Você pode pesquisar a tarifa residencial média da Enel Rio das Ostras e alterar este valor para uma simulação mais precisa."
+        help_texto_tarifa = "Como você ainda não tem uma conta, usamos um valor padrão (R$ 0,85). Você pode pesquisar a tarifa residencial média da Enel Rio das Ostras e alterar este valor, ou marcar a opção de calcular pela tabela da distribuidora."
 
 
+    rerun.etapa("tarifas")
     # --- CAMPO DE TARIFA ITERATIVO (COM AJUDA DINÂMICA) ---
     st.markdown("Tarifa de Energia (R$/kWh):")
 
-    # Loop para exibir os campos de tarifa existentes
-    for i in range(len(st.session_state.tarifas_list)):
+    tarifa_pela_tabela = st.checkbox(
+        f"Calcular pela tabela da {DISTRIBUIDORA_PADRAO} (bandeiras e impostos incluídos)", value=False, key="tarifa_tabela",
+        help="Usa as tarifas homologadas (TE + TUSD), as bandeiras acionadas e o ICMS/PIS/COFINS dos últimos 12 meses para a faixa do seu consumo, em vez dos valores digitados."
+    )
+    if tarifa_pela_tabela:
+        tabela_tarifas = carregar_tabela()
+        conta_tabela = CACHE_SIMULACAO.obter_ou_calcular(
+            ("tarifa_tabela", DISTRIBUIDORA_PADRAO, normalizar(float(consumo))),
+            lambda: tabela_tarifas.fatura(float(consumo), tabela_tarifas.ultimos_meses(), DISTRIBUIDORA_PADRAO)
+        )
+        kwh_12m = float(conta_tabela.kwh_faturado.sum())
+        tarifa_calculada = float(conta_tabela.total.sum()) / kwh_12m
+        st.caption(
+            f"Últimos 12 meses da tabela, por kWh: energia (TE + TUSD) {formatar_reais(float(conta_tabela.energia.sum()) / kwh_12m)}, "
+            f"bandeiras {formatar_reais(float(conta_tabela.bandeira.sum()) / kwh_12m)}, "
+            f"ICMS/PIS/COFINS {formatar_reais(float(conta_tabela.tributos.sum()) / kwh_12m)}."
+        )
+    else:
+        # Loop para exibir os campos de tarifa existentes
+        for i in range(len(st.session_state.tarifas_list)):
         
-        help_tarifa_final = None
-        if i == 0: # Adiciona o help SÓ no primeiro campo
+            help_tarifa_final = None
+            if i == 0: # Adiciona o help SÓ no primeiro campo
             
-            # MUDANÇA: O texto de ajuda agora é dinâmico
-            help_tarifa_final = f"""
-            {help_texto_tarifa}
+                # MUDANÇA: O texto de ajuda agora é dinâmico
+                help_tarifa_final = f"""
+                {help_texto_tarifa}
             
-            Exemplo de onde encontrar (se tiver conta):
+                Exemplo de onde encontrar (se tiver conta):
             
-            ![Exemplo Conta de Luz](https://raw.githubusercontent.com/felipaofelipao/solar-sim-app/refs/heads/main/Imagem%20do%20WhatsApp%20de%202025-11-09%20%C3%Aà(s)%2017.36.05_00537b91.JPG)
-            """
+                ![Exemplo Conta de Luz](https://raw.githubusercontent.com/felipaofelipao/solar-sim-app/refs/heads/main/Imagem%20do%20WhatsApp%20de%202025-11-09%20%C3%Aà(s)%2017.36.05_00537b91.JPG)
+                """
         
-        st.session_state.tarifas_list[i] = st.number_input(
-            f"Valor {i+1} (TE ou TUSD)", 
-            min_value=0.00, 
-            max_value=3.00,
-            value=st.session_state.tarifas_list[i], 
-            step=0.01, 
-            format="%.2f", 
-            key=f"tarifa_input_{i}",
-            help=help_tarifa_final # O 'help' agora é dinâmico
-        )
+            st.session_state.tarifas_list[i] = st.number_input(
+                f"Valor {i+1} (TE ou TUSD)", 
+                min_value=0.00, 
+                max_value=3.00,
+                value=st.session_state.tarifas_list[i], 
+                step=0.01, 
+                format="%.2f", 
+                key=f"tarifa_input_{i}",
+                help=help_tarifa_final # O 'help' agora é dinâmico
+            )
     
-    if st.button("Adicionar outro valor (+)", key="add_tarifa"):
-        st.session_state.tarifas_list.append(0.0)
+        if st.button("Adicionar outro valor (+)", key="add_tarifa"):
+            st.session_state.tarifas_list.append(0.0)
 
-    tarifa_calculada = sum(st.session_state.tarifas_list)
+        tarifa_calculada = sum(st.session_state.tarifas_list)
     st.info(f"Sua Tarifa Total: {formatar_reais(tarifa_calculada)} / kWh")
 
 
+rerun.etapa("localizacao")
 with col2:
     st.subheader("⿣ Sua Localização")
-    cidades_ordenadas = sorted(HSP_CAPITAIS.keys())
+    base_municipios = abrir_base()
+    cidades_ordenadas = base_municipios.rotulos()  # montada uma vez por processo
         
     cidade_selecionada = st.selectbox(
         "Localização da Simulação:", 
         cidades_ordenadas,
-        index=0, 
-        key="cidade",
-        disabled=True
+        index=base_municipios.posicao_rotulo(CIDADE_PADRAO) or 0, 
+        key="cidade"
     )
+    if len(cidades_ordenadas) == 1:
+        st.caption("A base nacional de municípios ainda não foi importada: por enquanto só esta cidade está disponível.")
 
     st.markdown("---") 
     st.subheader("Tipo de Conexão (Enel)")
@@ -297,11 +275,17 @@ with col2:
         help="Isso define a taxa mínima (custo de disponibilidade) que você sempre pagará, mesmo gerando 100% da sua energia."
     )
 
+rerun.etapa("calculo_previo")
 # Cálculo temporário
-hsp = HSP_CAPITAIS[cidade_selecionada]
-custo_wp = CUSTO_WP_CAPITAIS[cidade_selecionada]
-resultados_tmp = calcular_sistema_solar(consumo, tarifa_calculada, hsp, custo_wp) 
+municipio = base_municipios.buscar(cidade_selecionada)
+hsp = municipio.hsp
+custo_wp = municipio.custo_wp
+resultados_tmp = CACHE_SIMULACAO.obter_ou_calcular(
+    ("consumo", normalizar(float(consumo)), normalizar(tarifa_calculada), cidade_selecionada),
+    lambda: calcular_sistema_solar(consumo, tarifa_calculada, hsp, custo_wp)
+)
 
+rerun.etapa("orcamento")
 # 2) Orçamento
 st.divider()
 st.subheader("⿤ Orçamento e Investimento")
@@ -322,11 +306,15 @@ with col_val:
         custo_final = resultados_tmp["custo_total_estimado_site"]
 
 
+rerun.etapa("simular")
 # 3) Botão Calcular
 if st.button("⚡ Simular meu sistema solar", type="primary", use_container_width=True):
     
+    medicao_atual = aparelhos_atual = None
     if st.session_state.modo_simulacao == "Com base na minha conta de luz (Já moro no local)":
         consumo_atual = st.session_state.consumo
+        if perfil_medidor is not None:
+            consumo_atual, medicao_atual = consumo, perfil_medidor.hash
     else:
         consumo_atual = estimar_consumo_casa_nova(
             st.session_state.c_pessoas, 
@@ -335,12 +323,15 @@ if st.button("⚡ Simular meu sistema solar", type="primary", use_container_widt
             st.session_state.c_freezer,
             st.session_state.c_home_office
         )
+        aparelhos_atual = (st.session_state.c_pessoas, st.session_state.c_chuveiros, st.session_state.c_ar,
+                           st.session_state.c_freezer, st.session_state.c_home_office)
         
-    tarifa_atual = sum(st.session_state.tarifas_list)
+    tarifa_atual = tarifa_calculada
     
     cidade_atual = st.session_state.cidade
-    hsp_atual = HSP_CAPITAIS[cidade_atual]
-    custo_wp_atual = CUSTO_WP_CAPITAIS[cidade_atual]
+    municipio_atual = base_municipios.buscar(cidade_atual)
+    hsp_atual = municipio_atual.hsp
+    custo_wp_atual = municipio_atual.custo_wp
     escolha_atual = st.session_state.escolha_orc
     
     conexao_atual = st.session_state.tipo_conexao
@@ -353,12 +344,19 @@ if st.button("⚡ Simular meu sistema solar", type="primary", use_container_widt
     
     if escolha_atual == 'Inserir meu Orçamento Personalizado':
         custo_final_atual = st.session_state.custo_pers
-        dados_finais = calcular_sistema_por_orcamento(
-            custo_final_atual, custo_wp_atual, consumo_atual, tarifa_atual, hsp_atual
+        dados_finais = CACHE_SIMULACAO.obter_ou_calcular(
+            ("orcamento", normalizar(float(custo_final_atual)), normalizar(float(consumo_atual)),
+             normalizar(tarifa_atual), cidade_atual),
+            lambda: calcular_sistema_por_orcamento(
+                custo_final_atual, custo_wp_atual, consumo_atual, tarifa_atual, hsp_atual
+            )
         )
     else:
-        dados_finais = calcular_sistema_solar(
-            consumo_atual, tarifa_atual, hsp_atual, custo_wp_atual
+        dados_finais = CACHE_SIMULACAO.obter_ou_calcular(
+            ("consumo", normalizar(float(consumo_atual)), normalizar(tarifa_atual), cidade_atual),
+            lambda: calcular_sistema_solar(
+                consumo_atual, tarifa_atual, hsp_atual, custo_wp_atual
+            )
         )
         custo_final_atual = dados_finais["custo_total_estimado_site"]
         
@@ -368,15 +366,22 @@ if st.button("⚡ Simular meu sistema solar", type="primary", use_container_widt
     st.session_state.res = {
         "cidade": cidade_atual,
         "hsp": hsp_atual,
+        "custo_wp": custo_wp_atual,
+        "fatores_mensais": municipio_atual.fatores_mensais,
         "consumo": consumo_atual,
         "tarifa": tarifa_atual,
         "custo_final": custo_final_atual,
         "dados": dados_finais,
         "payback": payback_final_str,
         "minimo_kwh": minimo_kwh_atual,
-        "saldo_kwh": saldo_kwh_final
+        "saldo_kwh": saldo_kwh_final,
+        "orcamento_personalizado": escolha_atual == 'Inserir meu Orçamento Personalizado',
+        "medicao": medicao_atual,
+        "aparelhos": aparelhos_atual,
+        "tarifa_tabela": tarifa_pela_tabela
     }
 
+rerun.etapa("resultados_metricas")
 # 4) Mostrar resultados
 if "res" in st.session_state:
     R = st.session_state.res
@@ -385,22 +390,47 @@ if "res" in st.session_state:
     st.divider()
     st.subheader(f"✅ Resultados da Simulação — {R['cidade']}")
 
+    # Configuração mais barata do catálogo com a mesma potência simulada (nem um painel a mais)
+    materiais = CACHE_SIMULACAO.obter_ou_calcular(
+        ("equipamentos", normalizar(float(dados["potencia_kwp"]))),
+        lambda: configurar_sistema(dados["potencia_kwp"] * 1000, potencia_maxima_wp=dados["potencia_kwp"] * 1000)
+    )
+    custos_exibidos = materiais.custos_detalhados(R["custo_final"]) if materiais else dados["custos_detalhados"]
+
     c1, c2, c3 = st.columns(3)
     with c1:
         st.metric("Investimento Total Considerado", formatar_reais(R["custo_final"]))
         st.markdown("Estimativa de Custos:")
-        for item, valor in dados["custos_detalhados"].items():
+        for item, valor in custos_exibidos.items():
             st.markdown(f"- {item}: {formatar_reais(valor)}")
+        if materiais:
+            st.caption(
+                f"Equipamentos: {materiais.numero_paineis}× {materiais.painel} ({materiais.potencia_painel_wp:.0f} W) e "
+                f"{materiais.quantidade_inversores}× {materiais.inversor}; {materiais.descricao_strings()} painéis "
+                f"(até {materiais.tensao_string_max_v:.0f} V no frio)."
+            )
+            if materiais.custo_equipamentos > R["custo_final"]:
+                st.warning("Os equipamentos do catálogo custam mais que o investimento considerado; revise o orçamento.")
+        else:
+            st.caption(f"Nenhuma combinação do catálogo de equipamentos fecha as strings com exatamente "
+                       f"{dados['numero_paineis']} painéis; os valores acima são a repartição média.")
     
     with c2:
         st.metric("Potência do Sistema (Painéis)", f"{dados['potencia_kwp']} kWp")
-        st.metric(
-            "Inversor Recomendado (Tamanho CA)", 
-            f"~ {dados['inversor_kw_recomendado']} kW",
-            help="Este é o tamanho nominal (em CA) do inversor, considerando um 'oversizing' padrão de 125% da potência dos painéis (em CC)."
-        )
+        if materiais:
+            st.metric(
+                "Inversor Recomendado (Tamanho CA)",
+                f"{materiais.quantidade_inversores * materiais.potencia_ca_kw:g} kW",
+                help=f"{materiais.quantidade_inversores}× {materiais.inversor}: o inversor mais barato do catálogo que aceita as strings dos painéis (tensão e corrente de cada MPPT), com relação CC/CA de {materiais.relacao_cc_ca:.0%}."
+            )
+        else:
+            st.metric(
+                "Inversor Recomendado (Tamanho CA)", 
+                f"~ {dados['inversor_kw_recomendado']} kW",
+                help="Este é o tamanho nominal (em CA) do inversor, considerando um 'oversizing' padrão de 125% da potência dos painéis (em CC)."
+            )
         st.metric("Quantidade de Painéis", f"{dados['numero_paineis']}")
-        st.metric("Área Mínima Necessária", f"{dados['area_m2']} m²")
+        st.metric("Área Mínima Necessária", f"{round(materiais.area_m2, 1) if materiais else dados['area_m2']} m²")
 
     with c3:
         st.metric(
@@ -426,6 +456,57 @@ if "res" in st.session_state:
             st.metric("Créditos Gerados", f"{creditos_kwh:.0f} kWh / mês")
 
         st.metric("Retorno do Investimento (Payback)", R["payback"])
+
+    rerun.etapa("fluxo_caixa")
+    with st.expander(f"💰 Análise Financeira em {ANOS_PADRAO} anos (reajuste da tarifa, degradação e Lei 14.300)"):
+        fluxo = CACHE_SIMULACAO.obter_ou_calcular(
+            ("fluxo_caixa", normalizar(float(R["custo_final"])), normalizar(dados["geracao_mensal"]),
+             normalizar(float(R["consumo"])), R["minimo_kwh"], normalizar(R["tarifa"]), R["cidade"]),
+            lambda: calcular_fluxo_caixa(
+                R["custo_final"], dados["geracao_mensal"], R["consumo"], R["tarifa"], R["minimo_kwh"],
+                fatores_mensais=R["fatores_mensais"]
+            )
+        )
+        tir = float(fluxo.tir_anual[0])
+        f1, f2, f3 = st.columns(3)
+        f1.metric(
+            "Valor Presente Líquido (VPL)", formatar_reais(float(fluxo.vpl[0])),
+            help=f"Soma de todas as economias futuras, trazidas a valor de hoje com desconto de {TAXA_DESCONTO_ANUAL:.0%} ao ano, menos o investimento."
+        )
+        f2.metric("Taxa Interna de Retorno (TIR)", f"{tir:.1%} ao ano".replace(".", ",") if tir == tir else "Não aplicável")
+        f3.metric("Payback Descontado", formatar_meses(float(fluxo.payback_descontado_meses[0])))
+        st.caption(
+            f"Premissas: tarifa reajustada {REAJUSTE_TARIFA_ANUAL:.0%} ao ano, perda de {DEGRADACAO_ANUAL:.1%} ao ano na geração dos painéis, "
+            f"troca do inversor no ano {ANO_TROCA_INVERSOR} e cobrança escalonada do Fio B sobre a energia compensada (Lei 14.300)."
+        )
+
+    rerun.etapa("otimizador")
+    with st.expander("🧮 Tamanho Ideal do Sistema"):
+        st.markdown("O dimensionamento acima cobre o consumo. Aqui testamos vários tamanhos considerando a taxa mínima, o vencimento dos créditos e o Fio B.")
+        criterio = st.radio(
+            "Otimizar por", ("vpl", "payback"), horizontal=True, key="otim_criterio",
+            format_func={"vpl": "Maior VPL", "payback": "Menor payback descontado"}.get
+        )
+        orcamento_maximo = R["custo_final"] if R.get("orcamento_personalizado", False) else None
+        otimizacao = CACHE_SIMULACAO.obter_ou_calcular(
+            ("otimizador", normalizar(float(R["consumo"])), R["minimo_kwh"], normalizar(R["tarifa"]), R["cidade"],
+             criterio, normalizar(orcamento_maximo)),
+            lambda: otimizar_sistema(
+                R["consumo"], R["tarifa"], R["hsp"], R["custo_wp"], R["minimo_kwh"], criterio,
+                orcamento_maximo=orcamento_maximo, fatores_mensais=R["fatores_mensais"]
+            )
+        )
+        otimo = otimizacao.resumo()
+        if otimo is None:
+            st.warning(f"Nenhum tamanho de sistema cabe no seu orçamento de {formatar_reais(orcamento_maximo)}: "
+                       f"o menor avaliado ({int(otimizacao.numero_paineis.min())} painel) custa {formatar_reais(float(otimizacao.custo.min()))}.")
+        else:
+            o1, o2, o3 = st.columns(3)
+            o1.metric("Painéis (tamanho ideal)", otimo["numero_paineis"], delta=otimo["numero_paineis"] - dados["numero_paineis"])
+            o2.metric("VPL do tamanho ideal", formatar_reais(otimo["vpl"]), delta=formatar_reais(otimo["vpl"] - float(fluxo.vpl[0])))
+            o3.metric("Payback Descontado", formatar_meses(otimo["payback_descontado_meses"]))
+            st.caption(f"Sistema de {otimo['potencia_kwp']} kWp, investimento de {formatar_reais(otimo['custo_total_estimado_site'])}"
+                       + (" (limitado ao seu orçamento)." if orcamento_maximo is not None else "."))
         
     st.info(
         """
@@ -440,45 +521,192 @@ if "res" in st.session_state:
         """
     )
 
-    st.success(f"🌳 Benefício Ambiental: Este sistema evita cerca de {dados['co2_evitado_kg']} kg de CO₂/ano — o equivalente a {dados['co2_evitado_kg']/150:.0f} árvores!")
+    rerun.etapa("telhado")
+    with st.expander("🧭 Orientação do Telhado (modelo físico)"):
+        st.markdown("A estimativa acima supõe painéis bem orientados e desempenho fixo de "
+                    f"{int(TAXA_DESEMPENHO*100)}%. Informe as águas do seu telhado para calcular a geração pela "
+                    "irradiação no plano de cada face e pelas perdas com o calor.")
+        municipio_res = base_municipios.buscar(R["cidade"])
+        faces_padrao = [{"Água": "Principal", "Inclinação (°)": round(abs(municipio_res.latitude)), "Azimute (°)": 0,
+                         "Painéis": int(dados["numero_paineis"])}]
+        faces_editadas = st.data_editor(
+            faces_padrao,
+            num_rows="dynamic", key="telhado_faces", use_container_width=True,
+            column_config={
+                "Inclinação (°)": st.column_config.NumberColumn(min_value=0, max_value=90, step=1),
+                "Azimute (°)": st.column_config.NumberColumn(
+                    min_value=0, max_value=359, step=1, help="Para onde a face está voltada: 0 = Norte, 90 = Leste, 180 = Sul, 270 = Oeste."),
+                "Painéis": st.column_config.NumberColumn(min_value=0, step=1),
+            },
+        )
+        faces = tuple(
+            Face(float(f["Inclinação (°)"] or 0), float(f["Azimute (°)"] or 0),
+                 int(f["Painéis"] or 0) * POTENCIA_PAINEL_WP / 1000, str(f["Água"] or f"Água {i + 1}"))
+            for i, f in enumerate(faces_editadas) if f.get("Painéis")
+        )
+        # Telhado editado pelo usuário: o comparativo hora a hora usa a geração das faces informadas
+        telhado_informado = bool(faces) and list(faces_editadas) != faces_padrao
+        if faces:
+            telhado = CACHE_SIMULACAO.obter_ou_calcular(
+                ("telhado", R["cidade"], faces),
+                lambda: simular_telhado(faces, municipio_res.latitude, municipio_res.hsp_mensal)
+            )
+            geracao_telhado = float(telhado.geracao_anual.sum()) / 12
+            t1, t2 = st.columns(2)
+            t1.metric("Geração média com o seu telhado", f"{geracao_telhado:.0f} kWh/mês",
+                      delta=f"{geracao_telhado - dados['geracao_mensal']:+.0f} kWh vs. estimativa padrão")
+            t2.metric("Desempenho estimado (PR)", f"{telhado.taxa_desempenho_conjunto:.0%}")
+            st.dataframe(
+                [{"Água": f.nome, "kWp": round(f.kwp, 2), "kWh/ano": round(float(g)), "kWh/kWp/ano": round(float(g) / f.kwp),
+                  "Perda com calor": f"{float(p.mean()):.1%}"}
+                 for f, g, p in zip(faces, telhado.geracao_anual, telhado.perda_temperatura)],
+                hide_index=True, use_container_width=True
+            )
 
-    st.subheader("📈 Comparativo Mensal: Consumo x Geração") 
+    st.success(f"🌳 Benefício Ambiental: Este sistema evita cerca de {dados['co2_evitado_kg']} kg de CO₂/ano — o equivalente a {dados['co2_evitado_kg']/150:.0f} árvores!")
 
-    meses = ["Jan","Fev","Mar","Abr","Mai","Jun","Jul","Ago","Set","Out","Nov","Dez"]
-    fator_sazonal_correto = [1.118, 1.223, 1.052, 1.014, 0.912, 0.890, 0.881, 1.014, 0.960, 0.984, 0.918, 1.042]
-    
-    geracao_mensal = [dados["geracao_mensal"] * f for f in fator_sazonal_correto]
+    rerun.etapa("cenarios")
+    if "cenarios" not in st.session_state:
+        st.session_state.cenarios = ColecaoCenarios()
+    cenarios = st.session_state.cenarios
+    with st.expander(f"🗂 Comparar Cenários ({len(cenarios)} salvos)", expanded=len(cenarios) > 1):
+        st.markdown("Salve esta simulação e faça outras (conta de luz x estimativa, orçamento médio x do instalador) "
+                    "para compará-las lado a lado. Edite as entradas na tabela: só o que depende delas é recalculado.")
+        c_nome, c_salvar = st.columns([3, 1])
+        nome_cenario = c_nome.text_input("Nome do cenário", value=cenarios.nome_livre(), key="cenario_nome")
+        if nome_cenario.strip() in cenarios:
+            c_nome.caption(f"Já existe um cenário \"{nome_cenario.strip()}\": salvar vai substituir as entradas dele.")
+        if c_salvar.button("💾 Salvar cenário atual", use_container_width=True) and nome_cenario.strip():
+            cenarios.salvar(nome_cenario.strip(), EntradasCenario(
+                float(R["consumo"]), float(R["tarifa"]), R["cidade"], int(R["minimo_kwh"]),
+                float(R["custo_final"]) if R.get("orcamento_personalizado", False) else None))
+        if len(cenarios):
+            editados = st.data_editor(
+                [{"Cenário": nome, "Consumo (kWh/mês)": e.consumo, "Tarifa (R$/kWh)": e.tarifa,
+                  "Taxa mínima (kWh)": e.minimo_kwh, "Orçamento (R$)": e.orcamento, "Remover": False}
+                 for nome, e in cenarios.para_lista()],
+                key=f"cenarios_editor_{cenarios.revisao}", hide_index=True, use_container_width=True,
+                disabled=["Cenário"],
+                column_config={
+                    "Consumo (kWh/mês)": st.column_config.NumberColumn(min_value=1, step=10),
+                    "Tarifa (R$/kWh)": st.column_config.NumberColumn(min_value=0.01, step=0.01, format="%.2f"),
+                    "Taxa mínima (kWh)": st.column_config.SelectboxColumn(options=[30, 50, 100]),
+                    "Orçamento (R$)": st.column_config.NumberColumn(
+                        min_value=1000, step=100, format="%.2f", help="Vazio = orçamento médio do SolarSim."),
+                },
+            )
+            for linha in editados:
+                nome = linha["Cenário"]
+                if linha["Remover"]:
+                    cenarios.remover(nome)
+                    continue
+                atual, orcamento = cenarios.entradas(nome), linha["Orçamento (R$)"]
+                mudancas = {
+                    "consumo": float(linha["Consumo (kWh/mês)"] or atual.consumo),
+                    "tarifa": float(linha["Tarifa (R$/kWh)"] or atual.tarifa),
+                    "minimo_kwh": int(linha["Taxa mínima (kWh)"] or atual.minimo_kwh),
+                    "orcamento": None if orcamento is None or orcamento != orcamento else float(orcamento),
+                }
+                if any(getattr(atual, campo) != valor for campo, valor in mudancas.items()):
+                    cenarios.atualizar(nome, **mudancas)
+            if len(cenarios):
+                st.dataframe(cenarios.tabela(), hide_index=True, use_container_width=True)
+                st.vega_lite_chart(CACHE_SIMULACAO.obter_ou_calcular(
+                    ("cenarios_grafico", tuple(cenarios.para_lista())),
+                    lambda: montar_comparativo_cenarios(cenarios.resultados())
+                ), use_container_width=True)
+                st.caption("Etapas recalculadas até agora: " + ", ".join(
+                    f"{etapa} ×{n}" for etapa, n in cenarios.recalculos.items()))
 
-    domain_ = ["Consumo (kWh)", "Geração Solar (kWh)"]
-    range_ = ["#FF4B4B", "#0068C9"] 
+    st.subheader("📈 Comparativo Mensal: Consumo x Geração") 
 
-    df = pd.DataFrame({
-        "Mês": meses,
-        "Consumo (kWh)": [R["consumo"]]*12,
-        "Geração Solar (kWh)": geracao_mensal
-    }).melt("Mês", var_name="Categoria", value_name="Energia (kWh)")
-    
-    grafico = alt.Chart(df).mark_line(point=True).encode(
-        x=alt.X("Mês", sort=meses),
-        y=alt.Y("Energia (kWh)", title="Energia Mensal (kWh)"),
-        color=alt.Color("Categoria", scale=alt.Scale(domain=domain_, range=range_)),
-        tooltip=["Mês","Categoria","Energia (kWh)"]
-    ).properties(height=350, title="📊 Comparativo Mensal: Consumo x Geração Solar").interactive()
+    rerun.etapa("monte_carlo")
+    # --- INCERTEZA (MONTE CARLO) ---
+    faixa_geracao = None
+    with st.expander("🎲 Incerteza da Simulação (Monte Carlo)"):
+        st.markdown("HSP, desempenho dos painéis, custo do Wp e tarifa são estimativas. Sorteamos milhares de cenários para mostrar a faixa provável dos resultados.")
+        mostrar_incerteza = st.checkbox("Calcular faixa de incerteza (P10 a P90)", key="mc_ativo")
+        ci1, ci2, ci3 = st.columns(3)
+        inc_hsp = ci1.slider("Incerteza do HSP (%)", 0, 20, 7, key="mc_hsp")
+        inc_custo = ci2.slider("Incerteza do custo do Wp (%)", 0, 30, 10, key="mc_custo", disabled=R.get("orcamento_personalizado", False))
+        inc_tarifa = ci3.slider("Incerteza da tarifa (%)", 0, 20, 5, key="mc_tarifa")
+
+        if mostrar_incerteza:
+            custo_fixo = R["custo_final"] if R.get("orcamento_personalizado", False) else None
+            mc = CACHE_SIMULACAO.obter_ou_calcular(
+                ("monte_carlo", dados["potencia_kwp"], normalizar(float(R["consumo"])), R["cidade"],
+                 normalizar(R["tarifa"]), normalizar(custo_fixo), inc_hsp, inc_custo, inc_tarifa),
+                lambda: simular_monte_carlo(
+                    dados["potencia_kwp"], R["consumo"],
+                    distribuicoes_padrao(R["hsp"], R["custo_wp"], R["tarifa"],
+                                         inc_hsp / 100, inc_custo / 100, inc_tarifa / 100),
+                    custo_fixo=custo_fixo
+                )
+            )
+            faixa_geracao = (tuple(mc.faixa_mensal(10, R["fatores_mensais"]).round(2)),
+                             tuple(mc.faixa_mensal(90, R["fatores_mensais"]).round(2)))
+
+            for coluna, (percentil, rotulo) in zip(st.columns(3), ((10, "P10 (otimista)"), (50, "P50 (mediana)"), (90, "P90 (conservador)"))):
+                # Payback menor é melhor, economia maior é melhor: P10 do payback casa com P90 da economia
+                coluna.metric(f"Payback {rotulo}", formatar_meses(mc.percentis["payback_anos"][percentil] * 12))
+                coluna.metric(f"Economia Mensal {rotulo}", formatar_reais(mc.percentis["economia_mensal"][100 - percentil]))
+            st.caption(f"{AMOSTRAS_PADRAO:,} cenários sorteados. A faixa azul no gráfico abaixo vai do P10 ao P90 da geração.".replace(",", "."))
+
+    rerun.etapa("grafico")
+    # Simulação hora a hora (12 meses) com banco de créditos e taxa mínima; carga do medidor ou dos aparelhos
+    carga_medidor = carga_aparelhos = None
+    if R.get("medicao"):
+        perfil_r = CACHE_SIMULACAO.obter(("medicao", R["medicao"])) or perfil_em_cache(R["medicao"])
+        carga_medidor = perfil_r.carga_h if perfil_r is not None else None
+    elif R.get("aparelhos"):
+        carga_aparelhos = perfil_casa_nova(*R["aparelhos"])
+    carga_horaria = carga_medidor if carga_medidor is not None else carga_aparelhos
+    geracao_telhado_h = None
+    if telhado_informado:
+        geracao_telhado_h = CACHE_SIMULACAO.obter_ou_calcular(
+            ("telhado_horario", R["cidade"], faces),
+            lambda: perfil_horario_telhado(faces, municipio_res.latitude, municipio_res.hsp_mensal)
+        )
+        faixa_geracao = None  # a faixa do Monte Carlo é do modelo simplificado, não do telhado informado
+    simulacao, especificacao_grafico = CACHE_SIMULACAO.obter_ou_calcular(
+        ("comparativo", normalizar(dados["geracao_mensal"]), normalizar(float(R["consumo"])),
+         R["minimo_kwh"], normalizar(R["tarifa"]), R["cidade"], faixa_geracao,
+         R.get("medicao") if carga_medidor is not None else None,
+         tuple(R["aparelhos"]) if carga_aparelhos is not None else None,
+         faces if geracao_telhado_h is not None else None),
+        lambda: montar_comparativo(dados["geracao_mensal"], R["consumo"], R["minimo_kwh"], R["tarifa"],
+                                   faixa_geracao, R["fatores_mensais"], carga_horaria, geracao_telhado_h)
+    )
 
-    st.altair_chart(grafico, use_container_width=True)
+    with span("st.vega_lite_chart"):
+        st.vega_lite_chart(especificacao_grafico, use_container_width=True)
+    if geracao_telhado_h is not None:
+        st.caption("Geração calculada pelo modelo físico com as águas do telhado informadas em "
+                   "\"Orientação do Telhado\" (sem a faixa de incerteza, que usa o modelo simplificado).")
 
     st.info("💡 Dica: A sua geração de energia pode ser maior que o seu consumo! Isso gera créditos de energia que podem ser usados em até 60 meses.")
 
+    c_sim1, c_sim2 = st.columns(2)
+    with c_sim1:
+        st.metric(
+            "Fatura Média Mensal (simulação hora a hora)",
+            formatar_reais(float(simulacao.fatura.mean())),
+            help="Simula 12 meses hora a hora: a energia gerada à noite não existe, então parte do consumo vem da rede e é abatida pelos créditos. A taxa mínima é cobrada todo mês."
+        )
+    with c_sim2:
+        st.metric("Saldo de Créditos após 12 meses", f"{simulacao.saldo_creditos[-1]:.0f} kWh")
+
+    rerun.etapa("premissas_e_conteudo")
     with st.expander("📘 Premissas e limitações da simulação"):
-        st.markdown(f"""
-        - HSP (Horas de Sol Pleno): média de {R['hsp']}h/dia para {R['cidade']}, baseada em dados do CRESESB/SWERA.    
-        - Taxa de Desempenho (PR): {int(TAXA_DESEMPENHO*100)}%.    
-        - Custo médio do Wp instalado na região: {formatar_reais(CUSTO_WP_CAPITAIS[R['cidade']])}/Wp.    
-        - Economia Mensal: calculada sobre a tarifa cheia informada (não considera taxa mínima da distribuidora).    
-        - Variação sazonal: padrão médio de irradiação no Brasil.    
-        - Emissão de CO₂ evitada: fator médio do SIN.
-        - Cabos e Proteções: O dimensionamento de cabos (bitola) e disjuntores NÃO está incluído. Isso deve ser feito por um engenheiro eletricista qualificado durante a visita técnica, pois depende da distância e das condições específicas da sua residência.
-        """)
+        premissas = premissas_simulacao(
+            R['hsp'], R['cidade'], R['custo_wp'], R['tarifa'], R['minimo_kwh'],
+            origem_tarifa=(f"tabela da {DISTRIBUIDORA_PADRAO} nos últimos 12 meses, com bandeiras e ICMS/PIS/COFINS"
+                           if R.get("tarifa_tabela") else "valores de TE/TUSD informados"),
+            perfil_consumo=("perfil hora a hora das leituras do medidor" if carga_medidor is not None
+                            else "perfil hora a hora e sazonal do uso típico de cada aparelho informado" if carga_aparelhos is not None
+                            else "distribuído igualmente pelas horas do mês"),
+        )
+        st.markdown("\n".join(f"- {premissa}" for premissa in premissas))
     
     st.subheader("📚 Quer saber mais?")
     with st.expander("Clique aqui para expandir seus conhecimentos sobre Energia Solar"):
@@ -515,4 +743,30 @@ if "res" in st.session_state:
         st.markdown("- [Portal Solar — notícias e fornecedores](https://www.portalsolar.com.br/)")
         
         st.markdown("Sustentabilidade:")
-        st.markdown("- [ABSOLAR — dados e impacto do setor](https://www.absolar.org.br/)")
\ No newline at end of file
+        st.markdown("- [ABSOLAR — dados e impacto do setor](https://www.absolar.org.br/)")
+
+rerun.etapa("sessao_externa")
+if armazem_sessoes is not None:
+    salvar_sessao(st.session_state, armazem_sessoes)
+
+rerun.etapa("metricas_cache")
+# --- MÉTRICAS DO CACHE (coletor textfile, se SOLARSIM_METRICAS_ARQUIVO estiver definido) ---
+exportar_metricas()
+
+# --- PAINEL DE DEPURAÇÃO (spans em JSON lines se SOLARSIM_SPANS_ARQUIVO estiver definido) ---
+registro_rerun = rerun.finalizar()
+if DEBUG_ATIVO:
+    with st.sidebar.expander("⏱ Depuração: tempos deste rerun", expanded=True):
+        st.checkbox("Perfilar os reruns desta sessão (cProfile)", key="debug_perfil")
+        st.caption(f"Sessão {registro_rerun['sessao']} · rerun nº {registro_rerun['rerun']} · total {registro_rerun['total_ms']:.1f} ms")
+        st.dataframe(
+            [{"etapa": "· " * s["nivel"] + s["nome"], "início (ms)": s["inicio_ms"], "duração (ms)": s["duracao_ms"]}
+             for s in registro_rerun["spans"]],
+            hide_index=True
+        )
+        if armazem_sessoes is not None:
+            m = armazem_sessoes.medidas.resumo()
+            st.caption(f"Sessões externas: {m['bytes_por_sessao']:.0f} bytes/sessão · restauração p50 "
+                       f"{m['restauracao_p50_ms']:.2f} ms, p99 {m['restauracao_p99_ms']:.2f} ms · {m['acertos']}/{m['leituras']} leituras")
+        if rerun.relatorio_perfil:
+            st.code(rerun.relatorio_perfil)
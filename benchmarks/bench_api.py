@@ -0,0 +1,124 @@
+"""Gerador de carga local para a API de cotação: vazão e latência p50/p99.
+
+Sobe `python -m solarsim servir` num processo separado para cada janela de
+agrupamento pedida, dispara `--pedidos` POST /cotacao com `--concorrencia`
+conexões simultâneas e mede a latência de cada resposta. Com `--url` mede
+um servidor já em execução (uma réplica, por exemplo).
+
+Uso:
+    python benchmarks/bench_api.py [--pedidos 5000] [--concorrencia 64] [--janelas-ms 0 2 5 10]
+    python benchmarks/bench_api.py --url http://localhost:8600
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from tornado.httpclient import AsyncHTTPClient, HTTPRequest
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+
+def _porta_livre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _corpo(rng):
+    pedido = {"tarifas": [round(rng.uniform(0.4, 0.7), 2), round(rng.uniform(0.3, 0.5), 2)],
+              "conexao": rng.choice(("monofasica", "bifasica", "trifasica"))}
+    if rng.random() < 0.2:
+        pedido["casa_nova"] = {"pessoas": rng.randint(1, 6), "chuveiros": rng.randint(0, 3), "ar_cond": rng.randint(0, 3)}
+    else:
+        pedido["consumo"] = rng.randint(100, 2000)
+    if rng.random() < 0.2:
+        pedido["orcamento"] = rng.randint(8, 60) * 1000
+    return json.dumps(pedido)
+
+
+async def _gerar_carga(url, pedidos, concorrencia, semente=0):
+    rng = random.Random(semente)
+    corpos = [_corpo(rng) for _ in range(pedidos)]
+    cliente = AsyncHTTPClient(max_clients=concorrencia)
+    latencias = []
+    proximo = iter(corpos)
+
+    async def trabalhador():
+        for corpo in proximo:
+            inicio = time.perf_counter()
+            await cliente.fetch(HTTPRequest(f"{url}/cotacao", method="POST", body=corpo, request_timeout=60))
+            latencias.append(time.perf_counter() - inicio)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(trabalhador() for _ in range(concorrencia)))
+    duracao = time.perf_counter() - inicio
+    saude = json.loads((await cliente.fetch(f"{url}/saude")).body)
+    return np.array(latencias), duracao, saude
+
+
+def _aguardar(url, processo, limite_s=30):
+    async def tentar():
+        cliente = AsyncHTTPClient()
+        fim = time.perf_counter() + limite_s
+        while time.perf_counter() < fim:
+            if processo.poll() is not None:
+                raise RuntimeError("O servidor terminou antes de responder.")
+            try:
+                await cliente.fetch(f"{url}/saude", request_timeout=1)
+                return
+            except Exception:
+                await asyncio.sleep(0.1)
+        raise TimeoutError(f"Servidor em {url} não respondeu em {limite_s}s.")
+    asyncio.run(tentar())
+
+
+def medir(url, pedidos, concorrencia):
+    asyncio.run(_gerar_carga(url, min(200, pedidos), concorrencia))  # aquecimento
+    latencias, duracao, saude = asyncio.run(_gerar_carga(url, pedidos, concorrencia, semente=1))
+    p50, p99 = np.percentile(latencias, [50, 99]) * 1000
+    return pedidos / duracao, p50, p99, saude["pedidos_por_lote"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pedidos", type=int, default=5000)
+    parser.add_argument("--concorrencia", type=int, default=64)
+    parser.add_argument("--janelas-ms", type=float, nargs="+", default=[0, 2, 5, 10])
+    parser.add_argument("--url", help="Mede um servidor já em execução em vez de subir um.")
+    args = parser.parse_args(argv)
+
+    print(f"{args.pedidos} pedidos, {args.concorrencia} conexões simultâneas")
+    print(f"{'servidor':<24}{'pedidos/s':>12}{'p50':>10}{'p99':>10}{'pedidos/lote':>14}")
+    if args.url:
+        vazao, p50, p99, por_lote = medir(args.url, args.pedidos, args.concorrencia)
+        print(f"{args.url:<24}{vazao:>12,.0f}{p50:>8.1f}ms{p99:>8.1f}ms{por_lote:>14.1f}")
+        return 0
+
+    for janela in args.janelas_ms:
+        porta = _porta_livre()
+        url = f"http://127.0.0.1:{porta}"
+        processo = subprocess.Popen(
+            [sys.executable, "-m", "solarsim", "servir", "--porta", str(porta), "--endereco", "127.0.0.1",
+             "--janela-ms", str(janela)],
+            cwd=RAIZ, stdout=subprocess.DEVNULL,
+        )
+        try:
+            _aguardar(url, processo)
+            vazao, p50, p99, por_lote = medir(url, args.pedidos, args.concorrencia)
+        finally:
+            processo.terminate()
+            processo.wait()
+        print(f"{f'janela {janela:g} ms':<24}{vazao:>12,.0f}{p50:>8.1f}ms{p99:>8.1f}ms{por_lote:>14.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""Benchmark do tempo de importação (cold start) para chamadas sem interface.
+
+Cada cenário roda em um processo Python novo, várias vezes, e o tempo do
+interpretador vazio é descontado. "legado" é o que um job em lote pagava
+antes do pacote solarsim: streamlit + pandas + altair, importados por app.py.
+
+Uso:
+    python benchmarks/bench_importacao.py [--repeticoes 7]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+CENARIOS = {
+    "python vazio": "pass",
+    "legado (streamlit+pandas+altair)": "import streamlit, pandas, altair",
+    "solarsim (calculadoras escalares)": "from solarsim import calcular_sistema_solar",
+    "solarsim.lote (NumPy)": "from solarsim.lote import calcular_lote",
+    "solarsim.horario (NumPy)": "from solarsim.horario import simular_sistema",
+}
+
+
+def medir(codigo, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, check=True)
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeticoes", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    medianas = {nome: medir(codigo, args.repeticoes) for nome, codigo in CENARIOS.items()}
+    base = medianas.pop("python vazio")
+    legado = medianas["legado (streamlit+pandas+altair)"] - base
+
+    print(f"Interpretador vazio: {base * 1000:.0f} ms (descontado abaixo)")
+    print(f"{'cenário':<38}{'importação':>12}{'% do legado':>14}")
+    for nome, tempo in medianas.items():
+        liquido = max(tempo - base, 0.0)
+        print(f"{nome:<38}{liquido * 1000:>10.0f} ms{liquido / legado:>13.1%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
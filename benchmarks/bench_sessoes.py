@@ -0,0 +1,87 @@
+"""Benchmark do estado de sessão externo: bytes por sessão e latência de restauração.
+
+Gera sessões sintéticas (um resultado de simulação + lista de tarifas),
+compara o tamanho do registro compacto com o pickle do dict que ficava no
+session_state, e mede gravar/restaurar em cada backend: "memoria" (o
+substituto local do Redis), SQLite em arquivo temporário e, com --redis,
+um servidor Redis de verdade.
+
+Uso:
+    python benchmarks/bench_sessoes.py [--sessoes 5000] [--redis redis://localhost:6379/15]
+"""
+
+import argparse
+import pickle
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+
+def _estado(rng):
+    from solarsim.calculos import calcular_sistema_solar, formatar_payback
+
+    consumo = int(rng.integers(100, 2000))
+    tarifa, hsp = rng.uniform(0.6, 1.3), rng.uniform(4.2, 5.8)
+    dados = calcular_sistema_solar(consumo, tarifa, hsp, 3.4)
+    res = {
+        "cidade": "Niterói", "hsp": hsp, "custo_wp": 3.4, "fatores_mensais": tuple(rng.uniform(0.8, 1.2, 12)),
+        "consumo": consumo, "tarifa": tarifa, "custo_final": dados["custo_total_estimado_site"], "dados": dados,
+        "payback": formatar_payback(dados["custo_total_estimado_site"], dados["economia_mensal_reais"]),
+        "minimo_kwh": 50, "saldo_kwh": dados["geracao_mensal"] - consumo, "orcamento_personalizado": False,
+        "medicao": None, "tarifa_tabela": True,
+    }
+    return {"res": res, "tarifas_list": [tarifa]}
+
+
+def medir(armazem, registros):
+    from solarsim.sessao import desserializar
+
+    inicio = time.perf_counter()
+    for sessao, dados in registros.items():
+        armazem.guardar(sessao, dados)
+    gravacao = (time.perf_counter() - inicio) / len(registros)
+    latencias = []
+    for sessao in registros:
+        inicio = time.perf_counter()
+        desserializar(armazem.obter(sessao))
+        latencias.append(time.perf_counter() - inicio)
+    latencias.sort()
+    return gravacao, statistics.median(latencias), latencias[int(0.99 * (len(latencias) - 1))]
+
+
+def main(argv=None):
+    import numpy as np
+
+    from solarsim.sessao import ArmazemMemoria, ArmazemSQLite, criar_armazem, serializar
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessoes", type=int, default=5000)
+    parser.add_argument("--redis", help="URL de um Redis de teste (as chaves são sobrescritas)")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    estados = [_estado(rng) for _ in range(args.sessoes)]
+    registros = {f"{i:032x}": serializar(e) for i, e in enumerate(estados)}
+    tamanho_pickle = statistics.mean(len(pickle.dumps(e)) for e in estados)
+    tamanho_registro = statistics.mean(len(r) for r in registros.values())
+    print(f"{args.sessoes} sessões · pickle do dict: {tamanho_pickle:.0f} bytes · registro compacto: "
+          f"{tamanho_registro:.0f} bytes ({tamanho_registro / tamanho_pickle:.0%})")
+
+    with tempfile.TemporaryDirectory() as pasta:
+        backends = {"memoria": ArmazemMemoria(), "sqlite": ArmazemSQLite(Path(pasta) / "sessoes.db")}
+        if args.redis:
+            backends["redis"] = criar_armazem(args.redis)
+        print(f"{'backend':<10}{'gravar':>12}{'restaurar p50':>16}{'restaurar p99':>16}")
+        for nome, armazem in backends.items():
+            gravacao, p50, p99 = medir(armazem, registros)
+            print(f"{nome:<10}{gravacao * 1e6:>9.1f} µs{p50 * 1e6:>13.1f} µs{p99 * 1e6:>13.1f} µs")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,354 @@
+"""Suíte de benchmarks do SolarSim com baseline em JSON e limite de regressão.
+
+Três grupos de medidas:
+
+* micro: funções de cálculo em vários tamanhos de entrada;
+* rerun: latência de ponta a ponta do app.py, executado sem navegador pelo
+  AppTest do Streamlit (primeira carga, clique em "Simular" e reruns);
+* memoria: memória por sessão (alocações Python retidas por sessão e
+  tamanho serializado do session_state).
+
+Todas as medidas são "menor é melhor". Sem --salvar, os resultados são
+comparados com o baseline e o processo termina com código 1 se alguma
+medida piorar mais que o limite (padrão 50%, ou SOLARSIM_BENCH_LIMITE).
+Medidas que ainda não estão no baseline aparecem como "novo" e são
+listadas no fim; com --estrito elas também fazem o processo falhar.
+O baseline só vale para a máquina onde foi gravado: grave um por ambiente
+(ex.: no runner de CI) antes de usar a comparação como gate.
+
+Uso:
+    python benchmarks/suite.py --salvar                 # grava benchmarks/baseline.json
+    python benchmarks/suite.py                          # compara com o baseline
+    python benchmarks/suite.py --estrito                # e falha se alguma medida não tiver baseline
+    python benchmarks/suite.py --grupos micro --limite 0.5 --saida atual.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import pickle
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+BASELINE_PADRAO = Path(__file__).resolve().parent / "baseline.json"
+LIMITE_PADRAO = float(os.environ.get("SOLARSIM_BENCH_LIMITE", 0.5))
+GRUPOS = ("micro", "rerun", "memoria")
+
+sys.path.insert(0, str(RAIZ))
+
+
+def cronometrar(funcao, repeticoes=7, minimo_s=0.1):
+    """Melhor tempo de uma chamada (o menos afetado por ruído da máquina).
+
+    Chamadas muito rápidas são repetidas em laço até somar `minimo_s`.
+    """
+    inicio = time.perf_counter()
+    funcao()
+    duracao = time.perf_counter() - inicio
+    laco = max(1, int(minimo_s / max(duracao, 1e-9)))
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        for _ in range(laco):
+            funcao()
+        tempos.append((time.perf_counter() - inicio) / laco)
+    return min(tempos)
+
+
+# --- MICRO ---
+
+def _catalogo_sintetico(rng, n_paineis, n_inversores):
+    """Catálogo grande com faixas realistas de potência, tensão e preço."""
+    from solarsim.equipamentos import Catalogo
+
+    paineis = []
+    for k in range(n_paineis):
+        wp = int(rng.integers(380, 700))
+        vmp = rng.uniform(30, 46)
+        paineis.append({"modelo": f"P{k}", "fabricante": "Sintético", "potencia_wp": wp, "voc": vmp * 1.2, "vmp": vmp,
+                        "isc": wp / vmp * 1.05, "imp": wp / vmp, "coef_voc": rng.uniform(-0.30, -0.24),
+                        "coef_pmax": rng.uniform(-0.37, -0.29),
+                        "area_m2": wp / 220, "preco": wp * rng.uniform(0.9, 1.3)})
+    inversores = []
+    for k in range(n_inversores):
+        ca = float(rng.choice([1.5, 2, 3, 3.6, 4, 5, 6, 8, 10, 12, 15, 20, 25]))
+        tensao_max = float(rng.choice([500, 550, 600, 1000, 1100]))
+        inversores.append({"modelo": f"I{k}", "fabricante": "Sintético", "potencia_ca_kw": ca,
+                           "potencia_cc_max_kw": ca * rng.uniform(1.2, 1.6), "tensao_max_cc": tensao_max,
+                           "mppt_min": rng.uniform(40, 200), "mppt_max": tensao_max * 0.9,
+                           "tensao_partida": rng.uniform(50, 150), "n_mppt": int(rng.integers(1, 5)),
+                           "strings_por_mppt": int(rng.integers(1, 3)),
+                           "corrente_max_mppt": float(rng.choice([12.5, 13, 16, 20, 32])),
+                           "preco": ca * rng.uniform(500, 900) + 800})
+    return Catalogo(paineis, inversores)
+
+
+def casos_micro():
+    """Casos do grupo micro: nome -> função sem argumentos."""
+    import numpy as np
+
+    from solarsim.aparelhos import carregar_biblioteca, perfil_casa_nova, quantidades_casa_nova
+    from solarsim.api import calcular_cotacoes, interpretar_pedido
+    from solarsim.cache import CACHE_SIMULACAO
+    from solarsim.calculos import calcular_sistema_por_orcamento, calcular_sistema_solar
+    from solarsim.carteira import Carteira, agregar_carteira
+    from solarsim.cenarios import ColecaoCenarios, EntradasCenario
+    from solarsim.constantes import CIDADE_PADRAO
+    from solarsim.equipamentos import configurar_sistema
+    from solarsim.fluxo_caixa import calcular_fluxo_caixa
+    from solarsim.horario import simular_lote
+    from solarsim.lote import calcular_lote
+    from solarsim.monte_carlo import distribuicoes_padrao, simular_monte_carlo
+    from solarsim.municipios import abrir_base
+    from solarsim.otimizador import otimizar_lote, otimizar_sistema
+    from solarsim.propostas import calcular_propostas, renderizar_proposta
+    from solarsim.rendimento import fatores_transposicao, simular_faces
+    from solarsim.sessao import ArmazemMemoria, desserializar, serializar
+    from solarsim.tarifas import carregar_tabela
+
+    rng = np.random.default_rng(0)
+    tabela_tarifas = carregar_tabela()
+    consumo = lambda n: rng.uniform(100, 2000, n)
+    tarifa = lambda n: rng.uniform(0.6, 1.3, n)
+
+    casos = {
+        "calcular_sistema_solar": lambda: calcular_sistema_solar(350, 1.05, 5.0, 3.4),
+        "calcular_sistema_por_orcamento": lambda: calcular_sistema_por_orcamento(20000, 3.4, 350, 1.05, 5.0),
+        "otimizar_sistema": lambda: otimizar_sistema(350, 1.05, 5.0, 3.4),
+    }
+    for n in (1_000, 100_000, 1_000_000):
+        c, t = consumo(n), tarifa(n)
+        casos[f"calcular_lote[{n}]"] = lambda c=c, t=t: calcular_lote(c, t, 5.0, 3.4)
+    for n in (1, 100, 1_000):
+        g, c = rng.uniform(100, 2000, n), consumo(n)
+        casos[f"calcular_fluxo_caixa[{n}]"] = lambda g=g, c=c: calcular_fluxo_caixa(g * 3.4 * 5, g, c, 1.0)
+    for n in (1, 100):
+        c = consumo(n)
+        casos[f"simular_lote[{n}]"] = lambda c=c: simular_lote(c / 30, c, 50, 1.0)
+    for n in (10_000, 100_000):
+        casos[f"simular_monte_carlo[{n}]"] = lambda n=n: simular_monte_carlo(
+            2.75, 350, distribuicoes_padrao(5.0, 3.4, 1.05), n=n)
+    for n in (10, 200):
+        c = consumo(n)
+        casos[f"otimizar_lote[{n}]"] = lambda c=c: otimizar_lote(c, 1.0, 5.0, 3.4)
+    fatores = fatores_transposicao(-22.5, (5.57, 6.09, 5.24, 5.05, 4.54, 4.43, 4.39, 5.05, 4.78, 4.9, 4.57, 5.19))
+    casos["fatores_transposicao[sem cache]"] = lambda: fatores_transposicao.__wrapped__(-22.5, fatores.ghi.sum(axis=1))
+    for n in (4, 10_000):
+        casos[f"simular_faces[{n}]"] = lambda n=n: simular_faces(fatores, rng.uniform(2, 10, n), rng.uniform(0, 40, n),
+                                                                  rng.uniform(0, 360, n))
+    catalogo = _catalogo_sintetico(rng, 2_000, 2_000)
+    for kwp in (0.5, 1.5, 3, 20):  # abaixo de ~2 kWp quase nenhum inversor fica na janela CC/CA
+        casos[f"configurar_sistema[{kwp} kWp, 4000 modelos]"] = lambda kwp=kwp: configurar_sistema(kwp * 1000, catalogo)
+    meses = tabela_tarifas.ultimos_meses(12)
+    for n in (1, 10_000):
+        c = consumo(n)[:, None]
+        casos[f"fatura_tarifas[{n}x12]"] = lambda c=c: tabela_tarifas.fatura(c, meses, minimo_kwh=50)
+    estado = {"tarifas_list": [1.05], "res": {
+        "cidade": "Niterói", "hsp": 5.0, "custo_wp": 3.4, "fatores_mensais": (1.0,) * 12, "consumo": 350,
+        "tarifa": 1.05, "custo_final": 9350.0, "dados": calcular_sistema_solar(350, 1.05, 5.0, 3.4), "payback": "",
+        "minimo_kwh": 50, "saldo_kwh": 0.0}}
+    armazem = ArmazemMemoria()
+    armazem.guardar("bench", serializar(estado))
+    casos["sessao_serializar"] = lambda: serializar(estado)
+    casos["sessao_restaurar[memoria]"] = lambda: desserializar(armazem.obter("bench"))
+    codigo = abrir_base().buscar(CIDADE_PADRAO).codigo_ibge
+    for n in (100_000,):
+        carteira = Carteira({"codigo_ibge": np.full(n, codigo), "conexao": rng.integers(0, 3, n),
+                             "potencia_kwp": rng.uniform(1, 10, n), "consumo_kwh": consumo(n), "tarifa": tarifa(n)})
+        casos[f"agregar_carteira[{n}]"] = lambda carteira=carteira: agregar_carteira(carteira)
+    clientes = [{"id": i, "consumo": float(c), "tarifa": 1.05} for i, c in enumerate(consumo(64).round(-1))]
+    contexto = calcular_propostas(clientes[:1])[0]
+    casos["calcular_propostas[64]"] = lambda: calcular_propostas(clientes)
+    casos["renderizar_proposta"] = lambda: renderizar_proposta(contexto)
+    colecao = ColecaoCenarios()
+    for i in range(50):
+        colecao.salvar(f"Cenário {i}", EntradasCenario(200.0 + 20 * i, 1.05, CIDADE_PADRAO, 50))
+    colecao.resultados()
+    editar = iter(range(10**9))
+    casos["cenarios[50, editar 1]"] = lambda: (colecao.atualizar("Cenário 7", tarifa=1 + next(editar) % 2 / 10),
+                                               colecao.resultados())
+    casos["cenarios[50, do zero]"] = lambda: (CACHE_SIMULACAO.limpar(),
+                                              ColecaoCenarios.de_lista(colecao.para_lista()).resultados())
+    casos["cenarios[50, restaurar]"] = lambda: ColecaoCenarios.de_lista(colecao.para_lista()).resultados()
+    biblioteca = carregar_biblioteca()
+    casos["perfil_casa_nova[sem cache]"] = lambda: perfil_casa_nova.__wrapped__(3, 1, 1, 0, 1)
+    for n in (1_000, 10_000):
+        quantidades = quantidades_casa_nova(*(rng.integers(0, 4, n) for _ in range(5)))
+        casos[f"compor_casas[{n}, float32]"] = lambda q=quantidades: biblioteca.compor(q, np.float32)
+        casos[f"consumo_mensal_casas[{n}]"] = lambda q=quantidades: biblioteca.consumo_mensal(q)
+    entrada = interpretar_pedido({"consumo": 350, "tarifa": 1.05})
+    for n in (1, 64):
+        casos[f"calcular_cotacoes[{n}]"] = lambda n=n: calcular_cotacoes([entrada] * n)
+    return {f"micro/{nome}": funcao for nome, funcao in casos.items()}
+
+
+def medir_micro():
+    return {nome: cronometrar(funcao) for nome, funcao in casos_micro().items()}
+
+
+# --- RERUN (AppTest) ---
+
+def _nova_sessao():
+    from streamlit.testing.v1 import AppTest
+
+    return AppTest.from_file(str(RAIZ / "app.py"), default_timeout=120)
+
+
+def _simular(at):
+    botao = next(b for b in at.button if "Simular" in b.label)
+    botao.click().run()
+    if at.exception:
+        raise RuntimeError(f"app.py falhou: {at.exception[0].message}")
+    return at
+
+
+def medir_rerun(reruns=20, sessoes=3):
+    from solarsim.cache import CACHE_SIMULACAO
+
+    os.chdir(RAIZ)
+    # Primeira carga e clique em "Simular" com o cache de resultados vazio (melhor de `sessoes`)
+    primeira, simular = [], []
+    for _ in range(sessoes):
+        CACHE_SIMULACAO.limpar()
+        at = _nova_sessao()
+        inicio = time.perf_counter()
+        at.run()
+        primeira.append(time.perf_counter() - inicio)
+        inicio = time.perf_counter()
+        _simular(at)
+        simular.append(time.perf_counter() - inicio)
+    resultados = {"rerun/primeira_execucao_s": min(primeira), "rerun/simular_s": min(simular)}
+
+    tempos = []
+    for _ in range(reruns):
+        inicio = time.perf_counter()
+        at.run()
+        tempos.append(time.perf_counter() - inicio)
+    tempos.sort()
+    resultados["rerun/rerun_mediana_s"] = statistics.median(tempos)
+    resultados["rerun/rerun_p95_s"] = tempos[min(len(tempos) - 1, int(0.95 * len(tempos)))]
+
+    # Rerun que liga a faixa de incerteza (Monte Carlo), com o cache vazio para
+    # medir as simulações e não só a leitura do cache
+    CACHE_SIMULACAO.limpar()
+    caixa = at.checkbox(key="mc_ativo").check()
+    inicio = time.perf_counter()
+    caixa.run()
+    resultados["rerun/rerun_monte_carlo_s"] = time.perf_counter() - inicio
+    return resultados
+
+
+# --- MEMÓRIA ---
+
+def medir_memoria(sessoes=5):
+    os.chdir(RAIZ)
+    _simular(_nova_sessao().run())  # aquece imports e caches do processo
+
+    gc.collect()
+    tracemalloc.start()
+    antes = tracemalloc.get_traced_memory()[0]
+    abertas = [_simular(_nova_sessao().run()) for _ in range(sessoes)]
+    gc.collect()
+    depois = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    estado = abertas[0].session_state._state.filtered_state
+    return {
+        "memoria/bytes_por_sessao": (depois - antes) / sessoes,
+        "memoria/session_state_pickle_bytes": len(pickle.dumps(estado)),
+    }
+
+
+# --- BASELINE ---
+
+def comparar(atual, baseline, limite):
+    """Linhas (nome, baseline, atual, variação, regrediu), uma por medida atual.
+
+    Medidas sem baseline voltam com baseline e variação None: não regridem,
+    mas `main` as lista à parte (e falha com --estrito).
+    """
+    linhas = []
+    for nome, valor in atual.items():
+        referencia = baseline.get(nome)
+        if not referencia:
+            linhas.append((nome, None, valor, None, False))
+            continue
+        variacao = valor / referencia - 1
+        linhas.append((nome, referencia, valor, variacao, variacao > limite))
+    return linhas
+
+
+def _formatar(nome, valor):
+    if valor is None:
+        return "—"
+    if "bytes" in nome:
+        return f"{valor / 1024:,.1f} KiB"
+    return f"{valor * 1000:,.3f} ms"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--grupos", nargs="+", choices=GRUPOS, default=list(GRUPOS))
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PADRAO)
+    parser.add_argument("--salvar", action="store_true", help="Grava os resultados como novo baseline.")
+    parser.add_argument("--limite", type=float, default=LIMITE_PADRAO,
+                        help="Piora relativa tolerada antes de falhar (0.5 = 50%%).")
+    parser.add_argument("--saida", type=Path, help="Grava também os resultados desta execução em JSON.")
+    parser.add_argument("--estrito", action="store_true",
+                        help="Falha também quando alguma medida não tem baseline.")
+    args = parser.parse_args(argv)
+
+    medidores = {"micro": medir_micro, "rerun": medir_rerun, "memoria": medir_memoria}
+    atual = {}
+    for grupo in args.grupos:
+        inicio = time.perf_counter()
+        atual.update(medidores[grupo]())
+        print(f"[{grupo}] {time.perf_counter() - inicio:.1f}s", file=sys.stderr)
+
+    documento = {
+        "ambiente": {"python": platform.python_version(), "plataforma": platform.platform(),
+                     "cpus": os.cpu_count()},
+        "medidas": atual,
+    }
+    if args.saida:
+        args.saida.write_text(json.dumps(documento, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    if args.salvar:
+        if args.baseline.exists():
+            anterior = json.loads(args.baseline.read_text(encoding="utf-8"))["medidas"]
+            documento["medidas"] = {**anterior, **atual}
+        args.baseline.write_text(json.dumps(documento, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(f"Baseline gravado em {args.baseline}")
+        return 0
+
+    baseline = {}
+    if args.baseline.exists():
+        gravado = json.loads(args.baseline.read_text(encoding="utf-8"))
+        baseline = gravado["medidas"]
+        if gravado.get("ambiente") != documento["ambiente"]:
+            print(f"Aviso: baseline gravado em outro ambiente ({gravado.get('ambiente')}).", file=sys.stderr)
+    linhas = comparar(atual, baseline, args.limite)
+    print(f"{'medida':<46}{'baseline':>16}{'atual':>16}{'variação':>10}")
+    for nome, referencia, valor, variacao, regrediu in linhas:
+        texto_variacao = f"{variacao:+.1%}" if variacao is not None else "novo"
+        print(f"{nome:<46}{_formatar(nome, referencia):>16}{_formatar(nome, valor):>16}{texto_variacao:>10}"
+              + ("  REGRESSÃO" if regrediu else ""))
+
+    sem_baseline = [linha[0] for linha in linhas if linha[1] is None]
+    if sem_baseline:
+        print(f"\n{len(sem_baseline)} medida(s) sem baseline (grave com --salvar): {', '.join(sem_baseline)}",
+              file=sys.stderr)
+    regressoes = [linha[0] for linha in linhas if linha[4]]
+    if regressoes:
+        print(f"\n{len(regressoes)} medida(s) pioraram mais de {args.limite:.0%}.", file=sys.stderr)
+        return 1
+    return 1 if sem_baseline and args.estrito else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""Núcleo de cálculo do SolarSim, utilizável sem a interface Streamlit.
+
+As calculadoras escalares são puro Python e carregam na hora. Os módulos
+que dependem de NumPy, pandas ou altair (lote, horario, graficos, ...) só
+são importados no primeiro acesso, por exemplo `solarsim.lote`.
+"""
+
+import importlib
+
+from solarsim.calculos import (
+    calcular_sistema_por_orcamento,
+    calcular_sistema_solar,
+    estimar_consumo_casa_nova,
+    formatar_meses,
+    formatar_payback,
+    formatar_reais,
+)
+
+_SUBMODULOS = ("api", "aparelhos", "carteira", "cache", "cenarios", "cli", "constantes", "equipamentos", "fluxo_caixa", "graficos", "horario", "instrumentacao", "lote", "medicao", "monte_carlo",
+               "municipios", "otimizador", "propostas", "rendimento", "sessao", "tarifas")
+
+# Nome público -> submódulo que o define (carregado sob demanda)
+_ATRIBUTOS_PREGUICOSOS = {
+    "calcular_lote": "lote",
+    "calcular_lote_df": "lote",
+    "simular_sistema": "horario",
+    "calcular_fluxo_caixa": "fluxo_caixa",
+    "simular_monte_carlo": "monte_carlo",
+    "CACHE_SIMULACAO": "cache",
+    "abrir_base": "municipios",
+    "otimizar_sistema": "otimizador",
+    "otimizar_lote": "otimizador",
+    "carregar_medicao": "medicao",
+    "carregar_tabela": "tarifas",
+    "simular_telhado": "rendimento",
+    "configurar_sistema": "equipamentos",
+    "abrir_armazem": "sessao",
+    "ColecaoCenarios": "cenarios",
+    "agregar_carteira": "carteira",
+    "gerar_propostas": "propostas",
+    "carregar_biblioteca": "aparelhos",
+}
+
+__all__ = [
+    "calcular_sistema_solar",
+    "calcular_sistema_por_orcamento",
+    "estimar_consumo_casa_nova",
+    "formatar_payback",
+    "formatar_reais",
+    "formatar_meses",
+    *_ATRIBUTOS_PREGUICOSOS,
+]
+
+
+def __getattr__(nome):
+    if nome in _SUBMODULOS:
+        return importlib.import_module(f"solarsim.{nome}")
+    if nome in _ATRIBUTOS_PREGUICOSOS:
+        modulo = importlib.import_module(f"solarsim.{_ATRIBUTOS_PREGUICOSOS[nome]}")
+        return getattr(modulo, nome)
+    raise AttributeError(f"module 'solarsim' has no attribute {nome!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_SUBMODULOS) | set(_ATRIBUTOS_PREGUICOSOS))
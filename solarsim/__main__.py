@@ -0,0 +1,5 @@
+import sys
+
+from solarsim.cli import main
+
+sys.exit(main())
@@ -0,0 +1,150 @@
+"""Perfis horários de carga por aparelho, compostos em perfis de casas.
+
+`solarsim/dados/aparelhos.csv` traz, para cada aparelho (ou uso por
+morador), o consumo médio mensal por unidade, a forma do dia (24 pesos
+horários), o peso dos dias de fim de semana e a sazonalidade (12 fatores
+mensais). Na primeira chamada do processo cada aparelho vira um perfil-base
+de 8760 horas por unidade, guardado numa matriz (aparelhos x 8760). A carga
+de uma casa é a soma das quantidades vezes os perfis-base, ou seja, um
+único produto matricial, e vale igual para uma casa ou para milhares:
+
+    biblioteca = carregar_biblioteca()
+    q = quantidades_casa_nova(pessoas, chuveiros, ar_cond, freezer, home_office)  # (..., aparelhos)
+    carga_h = biblioteca.compor(q)         # (..., 8760) kWh em cada hora
+    mensal = biblioteca.consumo_mensal(q)  # (..., 12), sem materializar as horas
+
+Os fatores sazonais são normalizados para média 1, então a média mensal do
+perfil é exatamente o `estimar_consumo_casa_nova` do site: só muda como o
+consumo se distribui pelos meses e pelas horas.
+"""
+
+import csv
+import functools
+import os
+from pathlib import Path
+
+import numpy as np
+
+from solarsim.horario import DIAS_MES, HORAS_ANO
+from solarsim.municipios import PASTA_DADOS
+
+DIAS_ANO = HORAS_ANO // 24
+PRIMEIRO_DIA_SEMANA = 3  # ano típico começando numa quinta-feira (0 = segunda), como 2026
+MESES = ("jan", "fev", "mar", "abr", "mai", "jun", "jul", "ago", "set", "out", "nov", "dez")
+COLUNAS_HORAS = tuple(f"h{h:02d}" for h in range(24))
+
+# Argumentos de estimar_consumo_casa_nova -> aparelho da biblioteca
+APARELHOS_CASA_NOVA = ("pessoa", "chuveiro", "ar_condicionado", "freezer", "home_office")
+
+_INICIO_MES_DIA = np.concatenate(([0], np.cumsum(DIAS_MES)[:-1]))
+_MES_DO_DIA = np.repeat(np.arange(12), DIAS_MES)
+_FIM_DE_SEMANA = (np.arange(DIAS_ANO) + PRIMEIRO_DIA_SEMANA) % 7 >= 5
+
+
+def _perfis_base(kwh_mes, forma_diaria, peso_fim_de_semana, sazonalidade):
+    """Perfis de 8760 horas por unidade de aparelho, shape (aparelhos, 8760).
+
+    Cada mês recebe `kwh_mes * fator sazonal`, repartido entre os dias pelo
+    peso de dia útil (1) ou de fim de semana e, dentro do dia, pela forma
+    diária.
+    """
+    forma = forma_diaria / forma_diaria.sum(axis=1, keepdims=True)
+    energia_mes = kwh_mes[:, None] * sazonalidade / sazonalidade.mean(axis=1, keepdims=True)
+    peso_dia = np.where(_FIM_DE_SEMANA, peso_fim_de_semana[:, None], 1.0)
+    peso_mes = np.add.reduceat(peso_dia, _INICIO_MES_DIA, axis=1)
+    energia_dia = (energia_mes / peso_mes)[:, _MES_DO_DIA] * peso_dia
+    return (energia_dia[:, :, None] * forma[:, None, :]).reshape(len(kwh_mes), HORAS_ANO), energia_mes
+
+
+class BibliotecaAparelhos:
+    """Perfis-base (por unidade) de todos os aparelhos, prontos para compor casas."""
+
+    def __init__(self, linhas):
+        self.aparelhos = tuple(linha["aparelho"] for linha in linhas)
+        self.descricoes = tuple(linha["descricao"] for linha in linhas)
+        self.kwh_mes = np.array([float(linha["kwh_mes"]) for linha in linhas])
+        forma = np.array([[float(linha[c]) for c in COLUNAS_HORAS] for linha in linhas])
+        fim_de_semana = np.array([float(linha["fator_fim_de_semana"]) for linha in linhas])
+        sazonalidade = np.array([[float(linha[m]) for m in MESES] for linha in linhas])
+        if (forma < 0).any() or (forma.sum(axis=1) <= 0).any():
+            raise ValueError("Cada aparelho precisa de pesos horários não negativos e não todos nulos.")
+        if (fim_de_semana < 0).any() or (sazonalidade <= 0).any():
+            raise ValueError("Pesos de fim de semana devem ser >= 0 e fatores sazonais > 0.")
+        self._indices = {nome: i for i, nome in enumerate(self.aparelhos)}
+        self.perfis_h, self.mensal = _perfis_base(self.kwh_mes, forma, fim_de_semana, sazonalidade)
+        self.perfis_h.flags.writeable = False
+        self.mensal.flags.writeable = False
+
+    def __len__(self):
+        return len(self.aparelhos)
+
+    def indice(self, aparelho):
+        try:
+            return self._indices[aparelho]
+        except KeyError:
+            raise KeyError(f"Aparelho '{aparelho}' não está na biblioteca ({', '.join(self.aparelhos)}).") from None
+
+    def quantidades(self, **por_aparelho):
+        """Vetor de quantidades (ordem da biblioteca) a partir de aparelho=quantidade; arrays viram lote."""
+        valores = {self.indice(nome): np.asarray(q, dtype=float) for nome, q in por_aparelho.items()}
+        forma = np.broadcast_shapes(*(v.shape for v in valores.values())) if valores else ()
+        q = np.zeros(forma + (len(self),))
+        for i, v in valores.items():
+            q[..., i] = v
+        return q
+
+    def _validar(self, quantidades):
+        quantidades = np.asarray(quantidades, dtype=float)
+        if quantidades.shape[-1:] != (len(self),):
+            raise ValueError(f"O eixo final das quantidades deve ter {len(self)} aparelhos ({', '.join(self.aparelhos)}).")
+        return quantidades
+
+    def compor(self, quantidades, dtype=np.float64):
+        """Carga horária (kWh) de uma ou mais casas, shape (..., 8760).
+
+        Cada casa ocupa 8760 * 8 bytes (70 kB) em float64; para dezenas de
+        milhares de casas, componha em blocos ou use `dtype=np.float32`.
+        """
+        quantidades = self._validar(quantidades)
+        return quantidades.astype(dtype, copy=False) @ self.perfis_h.astype(dtype, copy=False)
+
+    def consumo_mensal(self, quantidades):
+        """Consumo (kWh) de cada mês, shape (..., 12), sem passar pelas horas."""
+        return self._validar(quantidades) @ self.mensal
+
+
+@functools.lru_cache(maxsize=None)
+def carregar_biblioteca(pasta=None):
+    """Biblioteca compartilhada do processo (SOLARSIM_APARELHOS aponta outra pasta com o aparelhos.csv)."""
+    pasta = Path(pasta or os.environ.get("SOLARSIM_APARELHOS") or PASTA_DADOS)
+    with open(pasta / "aparelhos.csv", newline="", encoding="utf-8") as f:
+        return BibliotecaAparelhos(list(csv.DictReader(f)))
+
+
+def quantidades_casa_nova(pessoas, chuveiros, ar_cond, freezer, home_office, biblioteca=None):
+    """Quantidades na ordem da biblioteca, com os mesmos argumentos de `estimar_consumo_casa_nova`.
+
+    Escalares descrevem uma casa; arrays (de mesmo shape) descrevem um lote.
+    """
+    biblioteca = biblioteca or carregar_biblioteca()
+    return biblioteca.quantidades(**dict(zip(APARELHOS_CASA_NOVA, (pessoas, chuveiros, ar_cond, freezer, home_office))))
+
+
+@functools.lru_cache(maxsize=256)
+def perfil_casa_nova(pessoas, chuveiros, ar_cond, freezer, home_office):
+    """Carga horária (8760, somente leitura) de uma casa do modo "Estou construindo".
+
+    Em cache por combinação de quantidades: trocar um número no formulário e
+    voltar não recompõe nada.
+    """
+    biblioteca = carregar_biblioteca()
+    carga_h = biblioteca.compor(quantidades_casa_nova(pessoas, chuveiros, ar_cond, freezer, home_office, biblioteca))
+    carga_h.flags.writeable = False
+    return carga_h
+
+
+def fracao_diurna(carga_h, inicio=6, fim=18):
+    """Fração da carga entre `inicio` e `fim` horas, quando os painéis geram; shape (...)."""
+    por_hora = np.asarray(carga_h, dtype=float).reshape(*np.shape(carga_h)[:-1], -1, 24).sum(axis=-2)
+    total = por_hora.sum(axis=-1)
+    return np.divide(por_hora[..., inicio:fim].sum(axis=-1), total, out=np.zeros_like(total), where=total > 0)
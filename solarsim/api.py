@@ -0,0 +1,265 @@
+"""API HTTP (JSON) de cotação, assíncrona, com agrupamento de requisições.
+
+As requisições que chegam dentro de uma janela curta (`janela_ms`) são
+juntadas e calculadas numa única chamada vetorizada (`calcular_lote` +
+`calcular_fluxo_caixa`), feita numa thread à parte para não travar o loop
+de eventos. Cada cliente recebe só a sua linha.
+
+Uso:
+    python -m solarsim servir --porta 8600 --janela-ms 5
+
+    POST /cotacao  {"consumo": 350, "tarifas": [0.62, 0.41], "conexao": "bifasica",
+                    "cidade": "Rio das Ostras (RJ)"}
+    POST /cotacao  {"consumo": 350, "distribuidora": "Enel RJ"}
+    POST /cotacao  [{...}, {...}]        (lista: uma resposta por item)
+    GET  /saude
+"""
+
+import asyncio
+import json
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import tornado.ioloop
+import tornado.web
+
+from solarsim.calculos import estimar_consumo_casa_nova
+from solarsim.constantes import CIDADE_PADRAO, TAXA_MINIMA_CONEXAO
+from solarsim.fluxo_caixa import calcular_fluxo_caixa
+from solarsim.lote import calcular_lote
+from solarsim.municipios import abrir_base, normalizar_nome
+from solarsim.tarifas import carregar_tabela
+
+JANELA_MS_PADRAO = 5
+LOTE_MAXIMO_PADRAO = 512
+PORTA_PADRAO = 8600
+
+CAMPOS_CASA_NOVA = ("pessoas", "chuveiros", "ar_cond", "freezer", "home_office")
+
+
+class PedidoInvalido(ValueError):
+    """Corpo da requisição fora do formato esperado (resposta 400)."""
+
+
+# --- VALIDAÇÃO ---
+
+def _numero(pedido, campo, minimo=0.0, padrao=None):
+    valor = pedido.get(campo, padrao)
+    if valor is None:
+        raise PedidoInvalido(f"Campo obrigatório ausente: {campo!r}")
+    return _validar_numero(valor, campo, minimo)
+
+
+def _validar_numero(valor, campo, minimo=0.0):
+    if isinstance(valor, bool) or not isinstance(valor, (int, float)) or not math.isfinite(valor) or valor < minimo:
+        raise PedidoInvalido(f"Campo {campo!r} deve ser um número >= {minimo}")
+    return float(valor)
+
+
+def interpretar_pedido(pedido, base=None):
+    """Valida um pedido JSON e devolve as entradas numéricas do cálculo.
+
+    Consumo: `consumo` (kWh/mês) ou `casa_nova` ({pessoas, chuveiros,
+    ar_cond, freezer, home_office}). Tarifa: `tarifa`, a lista `tarifas`
+    (TE, TUSD, ...), somada como no site, ou `distribuidora` (tarifa média
+    dos últimos 12 meses da tabela, com bandeiras e tributos). Local: `cidade` ou
+    `latitude`/`longitude`. `conexao` define a taxa mínima e `orcamento`
+    ativa o modo por orçamento.
+    """
+    if not isinstance(pedido, dict):
+        raise PedidoInvalido("Cada pedido deve ser um objeto JSON.")
+    base = base or abrir_base()
+
+    if "casa_nova" in pedido:
+        casa = pedido["casa_nova"]
+        if not isinstance(casa, dict):
+            raise PedidoInvalido("'casa_nova' deve ser um objeto.")
+        consumo = estimar_consumo_casa_nova(*(_numero(casa, c, padrao=0) for c in CAMPOS_CASA_NOVA))
+    else:
+        consumo = _numero(pedido, "consumo", minimo=1)
+
+    if "tarifas" in pedido:
+        tarifas = pedido["tarifas"]
+        if not isinstance(tarifas, list) or not tarifas:
+            raise PedidoInvalido("'tarifas' deve ser uma lista de números.")
+        tarifa = sum(_validar_numero(t, "tarifas") for t in tarifas)
+    elif "tarifa" not in pedido and "distribuidora" in pedido:
+        try:
+            tarifa = float(carregar_tabela().tarifa_media(consumo, str(pedido["distribuidora"])))
+        except KeyError as erro:
+            raise PedidoInvalido(erro.args[0]) from None
+    else:
+        tarifa = _numero(pedido, "tarifa")
+
+    conexao = normalizar_nome(str(pedido.get("conexao", "bifasica")))
+    if conexao not in TAXA_MINIMA_CONEXAO:
+        raise PedidoInvalido(f"'conexao' deve ser uma de: {', '.join(TAXA_MINIMA_CONEXAO)}")
+
+    try:
+        if "latitude" in pedido or "longitude" in pedido:
+            municipio = base.mais_proximo(_numero(pedido, "latitude", -90), _numero(pedido, "longitude", -180))
+        else:
+            municipio = base.buscar(str(pedido.get("cidade", CIDADE_PADRAO)))
+    except KeyError as erro:
+        raise PedidoInvalido(erro.args[0]) from None
+
+    orcamento = _numero(pedido, "orcamento", minimo=1) if pedido.get("orcamento") is not None else math.nan
+    return {
+        "consumo": consumo,
+        "tarifa": tarifa,
+        "hsp": municipio.hsp,
+        "custo_wp": municipio.custo_wp,
+        "orcamento": orcamento,
+        "minimo_kwh": TAXA_MINIMA_CONEXAO[conexao],
+        "fatores_mensais": municipio.fatores_mensais,
+        "cidade": municipio.rotulo,
+    }
+
+
+# --- CÁLCULO EM LOTE ---
+
+def _json(valor):
+    valor = float(valor)
+    return valor if math.isfinite(valor) else None
+
+
+def calcular_cotacoes(entradas):
+    """Calcula uma lista de entradas (de `interpretar_pedido`) numa só passada vetorizada."""
+    coluna = lambda nome: np.array([e[nome] for e in entradas], dtype=float)
+    consumo, tarifa, minimo_kwh = coluna("consumo"), coluna("tarifa"), coluna("minimo_kwh")
+    sistema = calcular_lote(consumo, tarifa, coluna("hsp"), coluna("custo_wp"), coluna("orcamento"))
+    fluxo = calcular_fluxo_caixa(
+        sistema["custo_total_estimado_site"], sistema["geracao_mensal"], consumo, tarifa, minimo_kwh,
+        fatores_mensais=np.array([e["fatores_mensais"] for e in entradas], dtype=float),
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        payback_anos = np.where(sistema["economia_mensal_reais"] > 0,
+                                sistema["custo_total_estimado_site"] / (sistema["economia_mensal_reais"] * 12), np.nan)
+
+    respostas = []
+    for i, entrada in enumerate(entradas):
+        resposta = {"cidade": entrada["cidade"], "consumo": entrada["consumo"], "tarifa": entrada["tarifa"],
+                    "minimo_kwh": entrada["minimo_kwh"]}
+        resposta.update({nome: _json(valores[i]) for nome, valores in sistema.items()})
+        resposta["numero_paineis"] = int(sistema["numero_paineis"][i])
+        resposta.update(
+            payback_anos=_json(payback_anos[i]),
+            vpl=_json(fluxo.vpl[i]),
+            tir_anual=_json(fluxo.tir_anual[i]),
+            payback_descontado_meses=_json(fluxo.payback_descontado_meses[i]),
+        )
+        respostas.append(resposta)
+    return respostas
+
+
+class AgrupadorLotes:
+    """Junta pedidos que chegam dentro de `janela_ms` e os calcula numa só chamada.
+
+    O lote é despachado quando a janela fecha ou quando atinge `lote_maximo`.
+    O cálculo roda numa única thread de trabalho; enquanto ela calcula, o
+    loop continua aceitando conexões e o próximo lote vai se formando.
+    """
+
+    def __init__(self, calcular=calcular_cotacoes, janela_ms=JANELA_MS_PADRAO, lote_maximo=LOTE_MAXIMO_PADRAO):
+        self.calcular = calcular
+        self.janela = janela_ms / 1000
+        self.lote_maximo = lote_maximo
+        self._pendentes = []
+        self._temporizador = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="solarsim-lote")
+        self._em_execucao = set()
+        self.lotes = 0
+        self.pedidos = 0
+
+    async def calcular_um(self, entrada):
+        futuro = asyncio.get_running_loop().create_future()
+        self._pendentes.append((entrada, futuro))
+        if len(self._pendentes) >= self.lote_maximo:
+            self._despachar()
+        elif self._temporizador is None:
+            self._temporizador = asyncio.get_running_loop().call_later(self.janela, self._despachar)
+        return await futuro
+
+    def _despachar(self):
+        if self._temporizador is not None:
+            self._temporizador.cancel()
+            self._temporizador = None
+        lote, self._pendentes = self._pendentes, []
+        if lote:
+            tarefa = asyncio.ensure_future(self._executar(lote))
+            self._em_execucao.add(tarefa)
+            tarefa.add_done_callback(self._em_execucao.discard)
+
+    async def _executar(self, lote):
+        self.lotes += 1
+        self.pedidos += len(lote)
+        try:
+            respostas = await asyncio.get_running_loop().run_in_executor(
+                self._executor, self.calcular, [entrada for entrada, _ in lote])
+        except Exception as erro:
+            for _, futuro in lote:
+                if not futuro.done():
+                    futuro.set_exception(erro)
+            return
+        for (_, futuro), resposta in zip(lote, respostas):
+            if not futuro.done():
+                futuro.set_result(resposta)
+
+    def estatisticas(self):
+        return {"lotes": self.lotes, "pedidos": self.pedidos,
+                "pedidos_por_lote": self.pedidos / self.lotes if self.lotes else 0.0}
+
+
+# --- HANDLERS ---
+
+class _BaseHandler(tornado.web.RequestHandler):
+    def initialize(self, agrupador):
+        self.agrupador = agrupador
+
+    def responder(self, corpo, status=200):
+        self.set_status(status)
+        self.set_header("Content-Type", "application/json; charset=utf-8")
+        self.finish(json.dumps(corpo, ensure_ascii=False))
+
+
+class CotacaoHandler(_BaseHandler):
+    async def post(self):
+        try:
+            corpo = json.loads(self.request.body or b"null")
+            lista = isinstance(corpo, list)
+            entradas = [interpretar_pedido(p) for p in (corpo if lista else [corpo])]
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return self.responder({"erro": "Corpo não é um JSON válido."}, 400)
+        except PedidoInvalido as erro:
+            return self.responder({"erro": str(erro)}, 400)
+
+        respostas = await asyncio.gather(*(self.agrupador.calcular_um(e) for e in entradas))
+        self.responder(list(respostas) if lista else respostas[0])
+
+
+class SaudeHandler(_BaseHandler):
+    def get(self):
+        self.responder({"status": "ok", **self.agrupador.estatisticas()})
+
+
+def criar_app(janela_ms=JANELA_MS_PADRAO, lote_maximo=LOTE_MAXIMO_PADRAO):
+    """Aplicação tornado com as rotas /cotacao e /saude."""
+    abrir_base()  # abre a base de municípios antes do primeiro pedido
+    agrupador = AgrupadorLotes(janela_ms=janela_ms, lote_maximo=lote_maximo)
+    rotas = {"agrupador": agrupador}
+    return tornado.web.Application([
+        (r"/cotacao", CotacaoHandler, rotas),
+        (r"/saude", SaudeHandler, rotas),
+    ])
+
+
+def servir(porta=PORTA_PADRAO, endereco="", janela_ms=JANELA_MS_PADRAO, lote_maximo=LOTE_MAXIMO_PADRAO):
+    """Sobe o servidor e bloqueia até ser interrompido."""
+    app = criar_app(janela_ms, lote_maximo)
+    app.listen(porta, address=endereco)
+    print(f"SolarSim API em http://{endereco or 'localhost'}:{porta} (janela {janela_ms} ms)", flush=True)
+    try:
+        tornado.ioloop.IOLoop.current().start()
+    except KeyboardInterrupt:
+        pass
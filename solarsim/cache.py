@@ -0,0 +1,199 @@
+"""Cache compartilhado entre sessões (LRU + TTL com limite de memória).
+
+Um único `CACHE_SIMULACAO` vive no processo do Streamlit e é usado por todas
+as sessões: as chaves são as entradas normalizadas da simulação, então
+visitantes que usam os valores padrão reaproveitam o mesmo resultado.
+
+Como o mesmo objeto é entregue a todas as sessões, os valores são guardados
+somente leitura (`congelar`): dicts viram `DicionarioCongelado`, listas viram
+tuplas e arrays NumPy deixam de ser graváveis. Quem precisar alterar um
+resultado trabalha numa cópia (`dict(valor)`, `array.copy()`).
+"""
+
+import dataclasses
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+
+def _tamanho_pickle(valor):
+    try:
+        return len(pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 4096
+
+
+class DicionarioCongelado(dict):
+    """dict somente leitura (continua sendo um dict para JSON, pickle e o Streamlit)."""
+
+    __slots__ = ()
+
+    def _somente_leitura(self, *args, **kwargs):
+        raise TypeError("Resultado do cache compartilhado é somente leitura; altere uma cópia (dict(valor)).")
+
+    __setitem__ = __delitem__ = __ior__ = _somente_leitura
+    clear = pop = popitem = setdefault = update = _somente_leitura
+
+    def __reduce__(self):
+        return (DicionarioCongelado, (dict(self),))
+
+
+def congelar(valor):
+    """Versão somente leitura de um resultado, para ser compartilhada entre sessões.
+
+    Percorre dicts, listas, tuplas e os campos de dataclasses; arrays NumPy são
+    marcados como não graváveis no próprio objeto (que passa a ser do cache).
+    """
+    if isinstance(valor, DicionarioCongelado):
+        return valor
+    if isinstance(valor, dict):
+        return DicionarioCongelado({chave: congelar(v) for chave, v in valor.items()})
+    if type(valor) in (list, tuple):
+        return tuple(congelar(v) for v in valor)
+    if getattr(valor, "ndim", 0) and hasattr(valor, "setflags"):
+        valor.setflags(write=False)
+        return valor
+    if dataclasses.is_dataclass(valor) and not isinstance(valor, type):
+        for campo in dataclasses.fields(valor):
+            object.__setattr__(valor, campo.name, congelar(getattr(valor, campo.name)))
+    return valor
+
+
+def normalizar(valor, casas=4):
+    """Normaliza um valor para uso em chave (floats arredondados, listas viram tuplas)."""
+    if isinstance(valor, float):
+        return round(valor, casas) + 0.0  # + 0.0 evita -0.0 != 0.0 na chave
+    if isinstance(valor, (list, tuple)):
+        return tuple(normalizar(v, casas) for v in valor)
+    if hasattr(valor, "item") and getattr(valor, "ndim", None) == 0:
+        return normalizar(valor.item(), casas)
+    return valor
+
+
+class CacheCompartilhado:
+    """Cache LRU com TTL e limite em bytes, seguro para várias threads."""
+
+    def __init__(self, max_bytes, ttl_segundos=None, tamanho=_tamanho_pickle, nome="solarsim"):
+        self.max_bytes = max_bytes
+        self.ttl_segundos = ttl_segundos
+        self.nome = nome
+        self._tamanho = tamanho
+        self._itens = OrderedDict()  # chave -> (valor, bytes, expira_em)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._itens)
+
+    def obter(self, chave, padrao=None):
+        agora = time.monotonic()
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is not None and item[2] is not None and item[2] <= agora:
+                self._remover(chave)
+                self.expirations += 1
+                item = None
+            if item is None:
+                self.misses += 1
+                return padrao
+            self._itens.move_to_end(chave)
+            self.hits += 1
+            return item[0]
+
+    def guardar(self, chave, valor):
+        """Guarda `valor` congelado (ver `congelar`) e o devolve."""
+        valor = congelar(valor)
+        tamanho = self._tamanho(valor)
+        if tamanho > self.max_bytes:
+            return valor
+        expira_em = time.monotonic() + self.ttl_segundos if self.ttl_segundos else None
+        with self._lock:
+            if chave in self._itens:
+                self._remover(chave)
+            self._itens[chave] = (valor, tamanho, expira_em)
+            self._bytes += tamanho
+            while self._bytes > self.max_bytes:
+                self._remover(next(iter(self._itens)))
+                self.evictions += 1
+        return valor
+
+    def obter_ou_calcular(self, chave, calcular):
+        """Devolve o valor em cache ou calcula (fora do lock), guarda e devolve (congelado)."""
+        valor = self.obter(chave, _AUSENTE)
+        if valor is _AUSENTE:
+            valor = self.guardar(chave, calcular())
+        return valor
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self._bytes = 0
+
+    def _remover(self, chave):
+        _, tamanho, _ = self._itens.pop(chave)
+        self._bytes -= tamanho
+
+    # --- MÉTRICAS ---
+
+    def estatisticas(self):
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "entradas": len(self._itens),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "taxa_acerto": self.hits / consultas if consultas else 0.0,
+            }
+
+    def formato_prometheus(self):
+        """Métricas no formato texto do Prometheus."""
+        e = self.estatisticas()
+        p = f"{self.nome}_cache"
+        linhas = []
+        for metrica, tipo, valor in (
+            ("hits_total", "counter", e["hits"]),
+            ("misses_total", "counter", e["misses"]),
+            ("evictions_total", "counter", e["evictions"]),
+            ("expirations_total", "counter", e["expirations"]),
+            ("entries", "gauge", e["entradas"]),
+            ("bytes", "gauge", e["bytes"]),
+            ("max_bytes", "gauge", e["max_bytes"]),
+        ):
+            linhas.append(f"# TYPE {p}_{metrica} {tipo}")
+            linhas.append(f"{p}_{metrica} {valor}")
+        return "\n".join(linhas) + "\n"
+
+
+_AUSENTE = object()
+
+CACHE_SIMULACAO = CacheCompartilhado(
+    max_bytes=int(float(os.environ.get("SOLARSIM_CACHE_MB", "64")) * 1024 * 1024),
+    ttl_segundos=float(os.environ.get("SOLARSIM_CACHE_TTL", "3600")) or None,
+)
+
+# --- EXPORTAÇÃO PARA O COLETOR TEXTFILE (node_exporter) ---
+_ultima_exportacao = 0.0
+
+
+def exportar_metricas(cache=CACHE_SIMULACAO, intervalo_segundos=15.0):
+    """Grava as métricas em SOLARSIM_METRICAS_ARQUIVO (se definido), no máximo a cada intervalo."""
+    global _ultima_exportacao
+    caminho = os.environ.get("SOLARSIM_METRICAS_ARQUIVO")
+    agora = time.monotonic()
+    if not caminho or agora - _ultima_exportacao < intervalo_segundos:
+        return
+    _ultima_exportacao = agora
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, "w", encoding="utf-8") as arquivo:
+        arquivo.write(cache.formato_prometheus())
+    os.replace(temporario, caminho)
@@ -0,0 +1,149 @@
+"""Funções de cálculo do SolarSim (puro Python, sem dependências de interface)."""
+
+import locale
+import math
+
+from solarsim.constantes import (
+    AREA_PAINEL_M2,
+    FATOR_EMISSAO_CO2_KWH,
+    POTENCIA_PAINEL_WP,
+    TAXA_DESEMPENHO,
+)
+
+
+def formatar_reais(valor: float) -> str:
+    """Formata um float para o padrão R$ X.XXX,XX com fallback."""
+    try:
+        return locale.currency(valor, grouping=True)
+    except:
+        return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+# --- FUNÇÕES DE CÁLCULO (COM ESTRATIFICAÇÃO E INVERSOR) ---
+
+def calcular_sistema_solar(consumo_kwh, tarifa, hsp, custo_wp_regional):
+    """Calculadora por Consumo (kWh -> R$)"""
+    consumo_diario_kwh = consumo_kwh / 30
+    potencia_necessaria_kwp = consumo_diario_kwh / (hsp * TAXA_DESEMPENHO)
+    potencia_necessaria_wp = potencia_necessaria_kwp * 1000
+
+    numero_paineis = max(1, round(potencia_necessaria_wp / POTENCIA_PAINEL_WP))
+    potencia_final_sistema_wp = numero_paineis * POTENCIA_PAINEL_WP
+    potencia_kwp_final = potencia_final_sistema_wp / 1000
+    area_total_m2 = numero_paineis * AREA_PAINEL_M2
+    inversor_kw_rec = potencia_kwp_final / 1.25
+
+    geracao_diaria_kwh = potencia_kwp_final * hsp * TAXA_DESEMPENHO
+    geracao_mensal_kwh = geracao_diaria_kwh * 30
+    custo_total_estimado = potencia_final_sistema_wp * custo_wp_regional
+    economia_mensal_reais = min(geracao_mensal_kwh, consumo_kwh) * tarifa
+    geracao_anual_kwh = geracao_mensal_kwh * 12
+    co2_evitado_anual_kg = geracao_anual_kwh * FATOR_EMISSAO_CO2_KWH
+
+    custos_detalhados = {
+        "Painéis Fotovoltaicos": custo_total_estimado * 0.40,
+        "Inversor(es)": custo_total_estimado * 0.20,
+        "Estruturas, Cabos e Proteções": custo_total_estimado * 0.15,
+        "Mão de Obra e Projeto": custo_total_estimado * 0.25
+    }
+
+    return {
+        "potencia_kwp": round(potencia_kwp_final, 2),
+        "inversor_kw_recomendado": round(inversor_kw_rec, 2),
+        "numero_paineis": numero_paineis,
+        "area_m2": round(area_total_m2, 2),
+        "custo_total_estimado_site": custo_total_estimado,
+        "economia_mensal_reais": economia_mensal_reais,
+        "co2_evitado_kg": round(co2_evitado_anual_kg, 2),
+        "geracao_mensal": round(geracao_mensal_kwh, 2),
+        "custos_detalhados": custos_detalhados
+    }
+
+def calcular_sistema_por_orcamento(orcamento, custo_wp_regional, consumo_kwh, tarifa, hsp):
+    """Calculadora por Orçamento (R$ -> kWh)"""
+    
+    potencia_final_sistema_wp = orcamento / custo_wp_regional
+    potencia_kwp_final = potencia_final_sistema_wp / 1000
+    inversor_kw_rec = potencia_kwp_final / 1.25
+    numero_paineis = max(1, round(potencia_final_sistema_wp / POTENCIA_PAINEL_WP))
+    area_total_m2 = numero_paineis * AREA_PAINEL_M2
+
+    geracao_diaria_kwh = potencia_kwp_final * hsp * TAXA_DESEMPENHO
+    geracao_mensal_kwh = geracao_diaria_kwh * 30
+    economia_mensal_reais = min(geracao_mensal_kwh, consumo_kwh) * tarifa
+    geracao_anual_kwh = geracao_mensal_kwh * 12
+    co2_evitado_anual_kg = geracao_anual_kwh * FATOR_EMISSAO_CO2_KWH
+
+    custos_detalhados = {
+        "Painéis Fotovoltaicos": orcamento * 0.40,
+        "Inversor(es)": orcamento * 0.20,
+        "Estruturas, Cabos e Proteções": orcamento * 0.15,
+        "Mão de Obra e Projeto": orcamento * 0.25
+    }
+
+    return {
+        "potencia_kwp": round(potencia_kwp_final, 2),
+        "inversor_kw_recomendado": round(inversor_kw_rec, 2),
+        "numero_paineis": numero_paineis,
+        "area_m2": round(area_total_m2, 2),
+        "custo_total_estimado_site": orcamento,
+        "economia_mensal_reais": economia_mensal_reais,
+        "co2_evitado_kg": round(co2_evitado_anual_kg, 2),
+        "geracao_mensal": round(geracao_mensal_kwh, 2),
+        "custos_detalhados": custos_detalhados
+    }
+
+def estimar_consumo_casa_nova(pessoas, chuveiros, ar_cond, freezer, home_office):
+    """Estima o consumo para uma casa nova (simulação).
+
+    Os coeficientes são o `kwh_mes` de cada aparelho em dados/aparelhos.csv;
+    tests/test_aparelhos.py confere que os dois continuam iguais.
+    """
+    consumo_base_pessoas = pessoas * 60
+    consumo_chuveiros = chuveiros * 70
+    consumo_ar = ar_cond * 100
+    consumo_freezer = freezer * 40
+    consumo_home_office = home_office * 60
+    
+    return consumo_base_pessoas + consumo_chuveiros + consumo_ar + consumo_freezer + consumo_home_office
+
+def formatar_payback(custo, economia_mensal):
+    """Calcula e formata o payback em anos e meses."""
+    if economia_mensal > 0:
+        payback_anos = custo / (economia_mensal * 12)
+    else:
+        return "Não aplicável"
+    anos = int(payback_anos)
+    meses = round((payback_anos - anos) * 12)
+    if meses == 12:
+        anos += 1
+        meses = 0
+    return f"~ {anos} anos e {meses} meses" if anos else f"~ {meses} meses"
+
+def formatar_meses(meses):
+    """Formata um prazo em meses no mesmo padrão do payback (NaN ou infinito = "Não aplicável")."""
+    if meses is None or not math.isfinite(meses):
+        return "Não aplicável"
+    anos, meses = divmod(int(round(meses)), 12)
+    return f"~ {anos} anos e {meses} meses" if anos else f"~ {meses} meses"
+
+def premissas_simulacao(hsp, cidade, custo_wp, tarifa, minimo_kwh,
+                        origem_tarifa="valores de TE/TUSD informados",
+                        perfil_consumo="distribuído igualmente pelas horas do mês"):
+    """Premissas e limitações da simulação, as mesmas no app e nas propostas (uma frase por item)."""
+    from solarsim.fluxo_caixa import ANO_TROCA_INVERSOR, DEGRADACAO_ANUAL, REAJUSTE_TARIFA_ANUAL  # numpy só aqui
+
+    return [
+        f"HSP (Horas de Sol Pleno): média de {hsp}h/dia para {cidade}, baseada em dados do CRESESB/SWERA.",
+        f"Taxa de Desempenho (PR): {int(TAXA_DESEMPENHO * 100)}%.",
+        f"Custo médio do Wp instalado na região: {formatar_reais(custo_wp)}/Wp.",
+        "Economia Mensal: calculada sobre a tarifa cheia informada (não considera taxa mínima da distribuidora).",
+        f"Tarifa: {origem_tarifa} ({formatar_reais(tarifa)}/kWh).",
+        "Variação sazonal: médias mensais de irradiação do município.",
+        f"Consumo: {perfil_consumo}.",
+        f"Compensação: simulada hora a hora por 12 meses (créditos válidos por 60 meses, taxa mínima de {minimo_kwh} kWh todo mês).",
+        f"Análise financeira: tarifa reajustada {REAJUSTE_TARIFA_ANUAL:.0%} ao ano, perda de {DEGRADACAO_ANUAL:.1%} ao ano na geração, "
+        f"troca do inversor no ano {ANO_TROCA_INVERSOR} e Fio B escalonado (Lei 14.300).",
+        "Emissão de CO₂ evitada: fator médio do SIN.",
+        "Cabos e Proteções: o dimensionamento de cabos (bitola) e disjuntores NÃO está incluído; deve ser feito por um "
+        "engenheiro eletricista qualificado durante a visita técnica, pois depende da distância e das condições específicas da residência.",
+    ]
@@ -0,0 +1,351 @@
+"""Carteira de sistemas instalados: geração, créditos e CO₂ agregados por município, conexão e mês.
+
+Para prever a geração e o passivo de créditos da base instalada (milhões de
+sistemas), a carteira é guardada como colunas de largura fixa, uma por campo
+(struct-of-arrays), num arquivo Arrow IPC sem compressão, como a base de
+municípios. Aberta por memory-map, cada record batch vira arrays NumPy sem
+cópia, as páginas são compartilhadas entre processos e só o bloco em uso
+ocupa memória:
+
+    carteira = importar_carteira(pd.read_csv("instalados.csv"))
+    carteira.salvar("instalados.arrow")
+    resultado = agregar_carteira(abrir_carteira("instalados.arrow"), processos=4)
+    resultado.total("saldo_creditos_kwh")[:, :, -1]     # passivo em kWh no fim do ano
+
+Cada bloco calcula 12 meses de todos os seus sistemas de uma vez: geração
+pela HSP mensal do município (sazonalidade regional), compensação mês a mês
+com banco de créditos e taxa mínima da conexão (`compensar_mensal`), CO₂
+evitado pelo FATOR_EMISSAO_CO2_KWH. Os totais por (município, conexão, mês)
+saem de um `np.bincount` por métrica e são somados ao total assim que cada
+bloco termina; a memória fica limitada ao tamanho do bloco (mais a grade de
+municípios do total) e os blocos se distribuem entre processos.
+
+Sistemas sem potência, consumo, tarifa ou créditos numéricos (ou com
+município ou conexão desconhecidos) ficam de fora: `importar_carteira` os
+descarta e conta em `Carteira.descartadas`, e a agregação ignora os que
+chegarem por outro caminho.
+"""
+
+import functools
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from solarsim.constantes import FATOR_EMISSAO_CO2_KWH, TAXA_DESEMPENHO
+from solarsim.horario import DIAS_MES, compensar_mensal
+from solarsim.municipios import abrir_base, normalizar_nome
+
+CONEXOES = ("Monofásica", "Bifásica", "Trifásica")
+MINIMO_KWH_CONEXAO = np.array([30.0, 50.0, 100.0])
+LINHAS_POR_BLOCO = 65_536
+BLOCOS_POR_PROCESSO = 2  # blocos submetidos e ainda não consumidos, por processo
+
+# Coluna -> (dtype no arquivo, valor padrão quando ausente; None = obrigatória)
+COLUNAS = {
+    "codigo_ibge": (np.int32, None),
+    "conexao": (np.int8, 1),
+    "potencia_kwp": (np.float32, None),
+    "consumo_kwh": (np.float32, None),
+    "tarifa": (np.float32, 0.0),
+    "creditos_kwh": (np.float32, 0.0),  # saldo do banco de créditos no início do período
+}
+
+METRICAS = (
+    "sistemas",
+    "potencia_kwp",
+    "geracao_kwh",
+    "consumo_kwh",
+    "compensado_kwh",
+    "faturado_kwh",
+    "creditos_expirados_kwh",
+    "saldo_creditos_kwh",
+    "passivo_creditos_reais",
+    "co2_evitado_kg",
+)
+
+
+class Carteira:
+    """Colunas da carteira (arrays NumPy do mesmo tamanho), percorridas em blocos."""
+
+    def __init__(self, colunas, linhas_por_bloco=LINHAS_POR_BLOCO, descartadas=0):
+        tamanho = len(colunas["codigo_ibge"])
+        self.colunas = {}
+        for nome, (tipo, padrao) in COLUNAS.items():
+            if nome in colunas:
+                self.colunas[nome] = np.asarray(colunas[nome], dtype=tipo)
+            elif padrao is None:
+                raise ValueError(f"Coluna obrigatória ausente na carteira: {nome}")
+            else:
+                self.colunas[nome] = np.full(tamanho, padrao, dtype=tipo)
+            if len(self.colunas[nome]) != tamanho:
+                raise ValueError(f"Coluna {nome} com {len(self.colunas[nome])} linhas (esperado {tamanho})")
+        if tamanho and not np.isin(self.colunas["conexao"], (0, 1, 2)).all():
+            raise ValueError("conexao deve ser 0 (monofásica), 1 (bifásica) ou 2 (trifásica)")
+        self.linhas_por_bloco = linhas_por_bloco
+        self.descartadas = descartadas  # linhas da origem que `importar_carteira` deixou de fora
+
+    def __len__(self):
+        return len(self.colunas["codigo_ibge"])
+
+    @property
+    def n_blocos(self):
+        return -(-len(self) // self.linhas_por_bloco)
+
+    def bloco(self, i):
+        fatia = slice(i * self.linhas_por_bloco, (i + 1) * self.linhas_por_bloco)
+        return {nome: valores[fatia] for nome, valores in self.colunas.items()}
+
+    def salvar(self, caminho):
+        """Grava em Arrow IPC, pronto para `abrir_carteira`."""
+        return salvar_carteiras([self], caminho)
+
+
+def salvar_carteiras(carteiras, caminho):
+    """Grava uma sequência de carteiras (ex.: lidas de um CSV em blocos) num só arquivo Arrow IPC.
+
+    Sem compressão e com um record batch por bloco, para abrir por memory-map.
+    """
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+
+    schema = pa.schema([(nome, pa.from_numpy_dtype(tipo)) for nome, (tipo, _) in COLUNAS.items()])
+    caminho = Path(caminho)
+    temporario = caminho.with_suffix(f".{os.getpid()}.tmp")
+    with pa.OSFile(str(temporario), "wb") as arquivo, ipc.new_file(arquivo, schema) as escritor:
+        for carteira in carteiras:
+            for i in range(carteira.n_blocos):
+                bloco = carteira.bloco(i)
+                escritor.write_batch(pa.record_batch([pa.array(bloco[nome]) for nome in COLUNAS], schema=schema))
+    os.replace(temporario, caminho)
+    return caminho
+
+
+class CarteiraMapeada:
+    """Carteira num arquivo Arrow IPC aberto por memory-map; cada bloco é um record batch, sem cópia."""
+
+    def __init__(self, caminho):
+        import pyarrow as pa
+        import pyarrow.ipc as ipc
+
+        self.caminho = str(caminho)
+        self._leitor = ipc.open_file(pa.memory_map(self.caminho, "r"))
+        faltando = {nome for nome, (_, padrao) in COLUNAS.items() if padrao is None} - set(self._leitor.schema.names)
+        if faltando:
+            raise ValueError(f"Colunas ausentes em {self.caminho}: {sorted(faltando)}")
+        self._tamanho = sum(self._leitor.get_batch(i).num_rows for i in range(self.n_blocos))
+
+    def __len__(self):
+        return self._tamanho
+
+    @property
+    def n_blocos(self):
+        return self._leitor.num_record_batches
+
+    def bloco(self, i):
+        lote = self._leitor.get_batch(i)
+        colunas = {nome: lote.column(nome).to_numpy(zero_copy_only=True) for nome in lote.schema.names}
+        return Carteira(colunas, linhas_por_bloco=max(lote.num_rows, 1)).colunas
+
+
+@functools.lru_cache(maxsize=8)
+def abrir_carteira(caminho):
+    """Carteira mapeada compartilhada do processo (também usada pelos workers)."""
+    return CarteiraMapeada(caminho)
+
+
+def _validas(colunas):
+    """Máscara dos sistemas com potência, consumo, tarifa e créditos finitos."""
+    validas = np.ones(len(colunas["codigo_ibge"]), dtype=bool)
+    for nome in ("potencia_kwp", "consumo_kwh", "tarifa", "creditos_kwh"):
+        if nome in colunas:
+            validas &= np.isfinite(colunas[nome])
+    return validas
+
+
+def importar_carteira(df, base=None, linhas_por_bloco=LINHAS_POR_BLOCO):
+    """Carteira a partir de um DataFrame (ou dict de colunas).
+
+    O município vem de `codigo_ibge` ou de `cidade` ("Rio das Ostras (RJ)");
+    `conexao` aceita 0/1/2 ou o nome ("monofásica", "Bifásica", ...);
+    `consumo` é aceito como sinônimo de `consumo_kwh`. Linhas com número
+    ausente ou que não é número, cidade não encontrada ou conexão vazia são
+    descartadas e contadas em `descartadas`; um nome de conexão desconhecido
+    é erro do arquivo inteiro (ValueError).
+    """
+    import pandas as pd
+
+    colunas = {nome: np.asarray(df[nome]) for nome in df.keys()}
+    if "consumo_kwh" not in colunas and "consumo" in colunas:
+        colunas["consumo_kwh"] = colunas.pop("consumo")
+    for nome in ("codigo_ibge", "potencia_kwp", "consumo_kwh", "tarifa", "creditos_kwh"):
+        if nome in colunas:
+            colunas[nome] = pd.to_numeric(pd.Series(colunas[nome]), errors="coerce").to_numpy(float)
+    if "codigo_ibge" not in colunas:
+        if "cidade" not in colunas:
+            raise ValueError("A carteira precisa da coluna codigo_ibge ou cidade")
+        base = base or abrir_base()
+        cidades = colunas.pop("cidade")
+        informadas = np.array([c is not None and c == c and str(c).strip() != "" for c in cidades], dtype=bool)
+        codigos = np.full(len(cidades), np.nan)
+        if informadas.any():
+            unicas, inverso = np.unique(cidades[informadas].astype(str), return_inverse=True)
+            encontrados = np.full(len(unicas), np.nan)
+            for k, cidade in enumerate(unicas):
+                try:
+                    encontrados[k] = base.buscar(cidade).codigo_ibge
+                except KeyError:
+                    pass
+            codigos[informadas] = encontrados[inverso]
+        colunas["codigo_ibge"] = codigos
+    if "conexao" in colunas:
+        conexao = colunas["conexao"]
+        if conexao.dtype.kind in "OUS":
+            nomes = {normalizar_nome(nome): i for i, nome in enumerate(CONEXOES)}
+            vazias = np.array([c is None or c != c or str(c).strip() == "" for c in conexao], dtype=bool)
+            codigos = np.full(len(conexao), np.nan)
+            if not vazias.all():
+                rotulos, inverso = np.unique(conexao[~vazias].astype(str), return_inverse=True)
+                try:
+                    codigos[~vazias] = np.array([nomes[normalizar_nome(r)] for r in rotulos], dtype=float)[inverso]
+                except KeyError as erro:
+                    raise ValueError(f"Conexão desconhecida: {erro.args[0]!r} (use {', '.join(CONEXOES)})") from None
+            colunas["conexao"] = codigos
+        else:
+            colunas["conexao"] = conexao.astype(float)
+    validas = _validas(colunas) & np.isfinite(colunas["codigo_ibge"])
+    if "conexao" in colunas:
+        validas &= np.isfinite(colunas["conexao"])
+    return Carteira({nome: valores[validas] for nome, valores in colunas.items() if nome in COLUNAS},
+                    linhas_por_bloco, descartadas=int((~validas).sum()))
+
+
+# --- AGREGAÇÃO ---
+
+@dataclass
+class ResultadoCarteira:
+    """Métricas somadas com forma (municípios, conexões, 12 meses); `codigos_ibge` indexa o 1º eixo."""
+    codigos_ibge: np.ndarray
+    metricas: dict = field(default_factory=dict)
+
+    def total(self, metrica, eixos=()):
+        """Soma a métrica nos eixos pedidos: 0 = municípios, 1 = conexões, 2 = meses."""
+        return self.metricas[metrica].sum(axis=eixos) if eixos else self.metricas[metrica]
+
+    @property
+    def sistemas(self):
+        return int(self.metricas["sistemas"][:, :, 0].sum())
+
+    def para_colunas(self, base=None):
+        """Tabela longa (uma linha por município × conexão × mês com sistemas), como dict de colunas."""
+        base = base or abrir_base()
+        municipio, conexao, mes = np.nonzero(self.metricas["sistemas"] > 0)
+        rotulos = {int(c): base.buscar_codigo(c).rotulo for c in np.unique(self.codigos_ibge[municipio])}
+        colunas = {
+            "codigo_ibge": self.codigos_ibge[municipio],
+            "municipio": [rotulos[int(c)] for c in self.codigos_ibge[municipio]],
+            "conexao": np.array(CONEXOES)[conexao],
+            "mes": mes + 1,
+        }
+        for nome in METRICAS:
+            colunas[nome] = self.metricas[nome][municipio, conexao, mes]
+        return colunas
+
+
+def _agregar_colunas(c):
+    """Agregados de um bloco: (códigos IBGE do bloco, {métrica: (municípios, 3, 12)})."""
+    base = abrir_base()
+    validas = _validas(c)
+    if not validas.all():
+        c = {nome: valores[validas] for nome, valores in c.items()}
+    codigos, local = np.unique(c["codigo_ibge"], return_inverse=True)
+    grupo = local.astype(np.int64) * len(CONEXOES) + c["conexao"]
+    n_grupos = len(codigos) * len(CONEXOES)
+
+    potencia = c["potencia_kwp"].astype(float)
+    geracao = potencia[:, None] * base.hsp_mensal_por_codigo(codigos)[local] * (DIAS_MES * TAXA_DESEMPENHO)
+    consumo = c["consumo_kwh"].astype(float)
+    usados, expirados, saldo, faturado = compensar_mensal(
+        geracao, consumo[:, None], MINIMO_KWH_CONEXAO[c["conexao"]], creditos_iniciais=c["creditos_kwh"])
+
+    por_mes = (grupo[:, None] * 12 + np.arange(12)).ravel()
+    somar = lambda valores: np.bincount(por_mes, weights=np.broadcast_to(valores, geracao.shape).ravel(),
+                                        minlength=n_grupos * 12).reshape(len(codigos), len(CONEXOES), 12)
+    metricas = {
+        "sistemas": somar(1.0),
+        "potencia_kwp": somar(potencia[:, None]),
+        "geracao_kwh": somar(geracao),
+        "consumo_kwh": somar(consumo[:, None]),
+        "compensado_kwh": somar(usados),
+        "faturado_kwh": somar(faturado),
+        "creditos_expirados_kwh": somar(expirados),
+        "saldo_creditos_kwh": somar(saldo),
+        "passivo_creditos_reais": somar(saldo * c["tarifa"].astype(float)[:, None]),
+    }
+    metricas["co2_evitado_kg"] = metricas["geracao_kwh"] * FATOR_EMISSAO_CO2_KWH
+    return codigos, metricas
+
+
+def _agregar_bloco_arquivo(tarefa):
+    caminho, i = tarefa
+    return _agregar_colunas(abrir_carteira(caminho).bloco(i))
+
+
+def _em_paralelo(executor, funcao, tarefas, em_andamento):
+    """Resultados de `funcao` para cada tarefa, na ordem, com no máximo `em_andamento` tarefas submetidas.
+
+    Ao contrário de `executor.map`, não consome o iterável inteiro de uma vez:
+    a próxima tarefa só é criada (e copiada para o worker) quando uma vaga abre.
+    """
+    pendentes = deque()
+    for tarefa in tarefas:
+        pendentes.append(executor.submit(funcao, tarefa))
+        if len(pendentes) >= em_andamento:
+            yield pendentes.popleft().result()
+    while pendentes:
+        yield pendentes.popleft().result()
+
+
+def _acumular(total, parte):
+    """Soma os agregados de um bloco ao total (que só cresce com municípios novos)."""
+    codigos, metricas = total
+    codigos_bloco, parciais = parte
+    todos = np.union1d(codigos, codigos_bloco)
+    if len(todos) > len(codigos):
+        posicao = np.searchsorted(todos, codigos)
+        ampliadas = {nome: np.zeros((len(todos), len(CONEXOES), 12)) for nome in METRICAS}
+        for nome in METRICAS:
+            ampliadas[nome][posicao] = metricas[nome]
+        codigos, metricas = todos, ampliadas
+    destino = np.searchsorted(codigos, codigos_bloco)
+    for nome in METRICAS:
+        metricas[nome][destino] += parciais[nome]
+    return codigos, metricas
+
+
+def agregar_carteira(carteira, processos=None):
+    """Totais da carteira por município, conexão e mês, bloco a bloco.
+
+    Com `processos` > 1 os blocos são distribuídos num ProcessPoolExecutor,
+    com no máximo BLOCOS_POR_PROCESSO blocos por processo em andamento; numa
+    carteira mapeada cada worker abre o mesmo arquivo e lê só o seu bloco,
+    então nada grande é copiado entre processos. Cada bloco é somado ao total
+    assim que fica pronto.
+    """
+    total = (np.zeros(0, dtype=np.int32), {nome: np.zeros((0, len(CONEXOES), 12)) for nome in METRICAS})
+    mapeada = isinstance(carteira, CarteiraMapeada)
+    if processos and processos > 1 and carteira.n_blocos > 1:
+        if mapeada:
+            funcao, tarefas = _agregar_bloco_arquivo, ((carteira.caminho, i) for i in range(carteira.n_blocos))
+        else:
+            funcao, tarefas = _agregar_colunas, (carteira.bloco(i) for i in range(carteira.n_blocos))
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            for parte in _em_paralelo(executor, funcao, tarefas, BLOCOS_POR_PROCESSO * processos):
+                total = _acumular(total, parte)
+    else:
+        for i in range(carteira.n_blocos):
+            total = _acumular(total, _agregar_colunas(carteira.bloco(i)))
+    return ResultadoCarteira(*total)
@@ -0,0 +1,255 @@
+"""Cenários salvos: várias simulações nomeadas lado a lado, com recálculo incremental.
+
+Cada cenário guarda só as entradas (consumo, tarifa, cidade, taxa mínima e,
+se houver, o orçamento do instalador). Os valores derivados formam um
+pequeno grafo de etapas:
+
+    municipio  <- cidade                         (HSP, custo do Wp, sazonalidade)
+    sistema    <- consumo, tarifa, orcamento, municipio
+    fluxo      <- consumo, tarifa, minimo_kwh, municipio, sistema   (VPL, TIR, payback descontado)
+
+Cada etapa de cada cenário lembra a chave com que foi calculada (as entradas
+de que depende e a versão das etapas anteriores). Ao editar uma entrada, só
+as etapas daquele cenário cuja chave mudou são refeitas: trocar a taxa
+mínima refaz só o fluxo de caixa; trocar a cidade refaz tudo daquele
+cenário; os demais cenários não são tocados. Os fluxos de caixa pendentes de
+todos os cenários saem numa única chamada vetorizada de
+`calcular_fluxo_caixa`. Dimensionamento e fluxo de caixa também ficam no
+cache do processo, pelas entradas: uma coleção recriada a partir das
+mesmas entradas (`de_lista`) não recalcula nada de caro.
+
+    colecao = ColecaoCenarios()
+    colecao.salvar("Conta de luz", EntradasCenario(350, 1.05, "Rio das Ostras (RJ)", 50))
+    colecao.salvar("Orçamento do instalador", EntradasCenario(350, 1.05, "Rio das Ostras (RJ)", 50, orcamento=18000))
+    colecao.atualizar("Conta de luz", minimo_kwh=100)
+    colecao.tabela()
+"""
+
+from collections import Counter
+from dataclasses import dataclass, fields, replace
+
+import numpy as np
+
+from solarsim.cache import CACHE_SIMULACAO, normalizar
+from solarsim.calculos import (
+    calcular_sistema_por_orcamento, calcular_sistema_solar, formatar_meses, formatar_payback, formatar_reais,
+)
+from solarsim.fluxo_caixa import calcular_fluxo_caixa
+from solarsim.municipios import abrir_base
+
+
+@dataclass(frozen=True)
+class EntradasCenario:
+    """O que o usuário informou; `orcamento` None = orçamento médio do SolarSim."""
+    consumo: float
+    tarifa: float
+    cidade: str
+    minimo_kwh: int = 50
+    orcamento: float = None
+
+
+CAMPOS_ENTRADA = tuple(campo.name for campo in fields(EntradasCenario))
+
+# (etapa, dependências): entradas de EntradasCenario ou etapas anteriores
+ETAPAS = (
+    ("municipio", ("cidade",)),
+    ("sistema", ("consumo", "tarifa", "orcamento", "municipio")),
+    ("fluxo", ("consumo", "tarifa", "minimo_kwh", "municipio", "sistema")),
+)
+
+
+@dataclass
+class ResultadoCenario:
+    """Entradas e valores derivados de um cenário."""
+    entradas: EntradasCenario
+    hsp: float
+    custo_wp: float
+    dados: dict
+    custo_final: float
+    vpl: float
+    tir_anual: float
+    payback_descontado_meses: float
+    fluxo_acumulado_anual: np.ndarray  # R$ acumulados no fim de cada ano (índice 0 = investimento)
+
+    @property
+    def payback(self):
+        return formatar_payback(self.custo_final, self.dados["economia_mensal_reais"])
+
+
+class _Nos:
+    """Valores, chaves e versões das etapas de um cenário."""
+
+    __slots__ = ("valores", "chaves", "versoes")
+
+    def __init__(self):
+        self.valores, self.chaves, self.versoes = {}, {}, {}
+
+
+class ColecaoCenarios:
+    """Cenários nomeados (na ordem em que foram salvos) e seus valores derivados."""
+
+    def __init__(self):
+        self._entradas = {}
+        self._nos = {}
+        self.recalculos = Counter()  # etapa -> quantas vezes foi refeita (todos os cenários)
+        self.revisao = 0  # muda quando cenários são salvos ou removidos (não nas edições de entradas)
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def __contains__(self, nome):
+        return nome in self._entradas
+
+    def nomes(self):
+        return list(self._entradas)
+
+    def entradas(self, nome):
+        return self._entradas[nome]
+
+    def nome_livre(self, prefixo="Cenário"):
+        """Primeiro "<prefixo> N" (N a partir do número de cenários + 1) que ainda não está salvo."""
+        n = len(self) + 1
+        while f"{prefixo} {n}" in self._entradas:
+            n += 1
+        return f"{prefixo} {n}"
+
+    def salvar(self, nome, entradas):
+        """Inclui o cenário ou substitui as entradas de um cenário com o mesmo nome."""
+        self._entradas[nome] = entradas
+        self._nos.setdefault(nome, _Nos())
+        self.revisao += 1
+
+    def atualizar(self, nome, **mudancas):
+        """Altera algumas entradas de um cenário; só as etapas afetadas serão refeitas."""
+        self._entradas[nome] = replace(self._entradas[nome], **mudancas)
+
+    def remover(self, nome):
+        del self._entradas[nome]
+        del self._nos[nome]
+        self.revisao += 1
+
+    def _chave(self, nome, dependencias):
+        entradas, nos = self._entradas[nome], self._nos[nome]
+        return tuple(getattr(entradas, d) if d in CAMPOS_ENTRADA else nos.versoes.get(d) for d in dependencias)
+
+    def _pendentes(self, etapa, dependencias):
+        pendentes = {}
+        for nome in self._entradas:
+            chave = self._chave(nome, dependencias)
+            if self._nos[nome].chaves.get(etapa) != chave:
+                pendentes[nome] = chave
+        return pendentes
+
+    def _guardar(self, nome, etapa, chave, valor):
+        nos = self._nos[nome]
+        nos.valores[etapa], nos.chaves[etapa] = valor, chave
+        nos.versoes[etapa] = nos.versoes.get(etapa, 0) + 1
+        self.recalculos[etapa] += 1
+
+    def _calcular_municipio(self, nome):
+        municipio = abrir_base().buscar(self._entradas[nome].cidade)
+        return municipio.hsp, municipio.custo_wp, tuple(municipio.fatores_mensais)
+
+    def _calcular_sistema(self, nome):
+        e = self._entradas[nome]
+        hsp, custo_wp, _ = self._nos[nome].valores["municipio"]
+        # Mesmas chaves do app: um cenário igual ao resultado exibido já está em cache
+        if e.orcamento is not None:
+            dados = CACHE_SIMULACAO.obter_ou_calcular(
+                ("orcamento", normalizar(float(e.orcamento)), normalizar(float(e.consumo)), normalizar(e.tarifa),
+                 e.cidade),
+                lambda: calcular_sistema_por_orcamento(e.orcamento, custo_wp, e.consumo, e.tarifa, hsp))
+            return dados, float(e.orcamento)
+        dados = CACHE_SIMULACAO.obter_ou_calcular(
+            ("consumo", normalizar(float(e.consumo)), normalizar(e.tarifa), e.cidade),
+            lambda: calcular_sistema_solar(e.consumo, e.tarifa, hsp, custo_wp))
+        return dados, dados["custo_total_estimado_site"]
+
+    def _chave_fluxo(self, nome):
+        e, nos = self._entradas[nome], self._nos[nome]
+        dados, custo = nos.valores["sistema"]
+        return ("fluxo_cenario", normalizar(float(custo)), normalizar(float(dados["geracao_mensal"])),
+                normalizar(float(e.consumo)), normalizar(e.tarifa), e.minimo_kwh, nos.valores["municipio"][2])
+
+    def _calcular_fluxos(self, nomes):
+        """Fluxo de caixa de vários cenários: o que não está no cache do processo sai numa só chamada vetorizada.
+
+        O cache é o que torna barato reconstruir a coleção a cada rerun (ex.:
+        ao restaurar a sessão de um armazém externo): as entradas são as mesmas,
+        então nenhum fluxo é refeito.
+        """
+        chaves = {nome: self._chave_fluxo(nome) for nome in nomes}
+        valores = {nome: CACHE_SIMULACAO.obter(chave) for nome, chave in chaves.items()}
+        faltando = [nome for nome, valor in valores.items() if valor is None]
+        if faltando:
+            entradas = [self._entradas[n] for n in faltando]
+            sistemas = [self._nos[n].valores["sistema"] for n in faltando]
+            fluxo = calcular_fluxo_caixa(
+                [custo for _, custo in sistemas], [dados["geracao_mensal"] for dados, _ in sistemas],
+                [e.consumo for e in entradas], [e.tarifa for e in entradas], [e.minimo_kwh for e in entradas],
+                fatores_mensais=np.array([self._nos[n].valores["municipio"][2] for n in faltando]),
+            )
+            acumulado = np.cumsum(fluxo.fluxos, axis=-1)[:, ::12]
+            for i, nome in enumerate(faltando):
+                valores[nome] = CACHE_SIMULACAO.guardar(chaves[nome], (
+                    float(fluxo.vpl[i]), float(fluxo.tir_anual[i]), float(fluxo.payback_descontado_meses[i]),
+                    acumulado[i].copy()))
+        return [valores[nome] for nome in nomes]
+
+    def resultados(self):
+        """Resultado de cada cenário, refazendo só as etapas cujas dependências mudaram."""
+        for etapa, dependencias in ETAPAS:
+            pendentes = self._pendentes(etapa, dependencias)
+            if not pendentes:
+                continue
+            if etapa == "fluxo":
+                valores = self._calcular_fluxos(list(pendentes))
+            else:
+                calcular = self._calcular_municipio if etapa == "municipio" else self._calcular_sistema
+                valores = [calcular(nome) for nome in pendentes]
+            for (nome, chave), valor in zip(pendentes.items(), valores):
+                self._guardar(nome, etapa, chave, valor)
+
+        resultados = {}
+        for nome, entradas in self._entradas.items():
+            valores = self._nos[nome].valores
+            hsp, custo_wp, _ = valores["municipio"]
+            dados, custo_final = valores["sistema"]
+            vpl, tir, payback_descontado, acumulado = valores["fluxo"]
+            resultados[nome] = ResultadoCenario(entradas, hsp, custo_wp, dados, custo_final, vpl, tir,
+                                                payback_descontado, acumulado)
+        return resultados
+
+    def tabela(self):
+        """Linhas da tabela comparativa (uma por cenário), já formatadas para exibição."""
+        linhas = []
+        for nome, r in self.resultados().items():
+            linhas.append({
+                "Cenário": nome,
+                "Cidade": r.entradas.cidade,
+                "Consumo (kWh/mês)": r.entradas.consumo,
+                "Tarifa (R$/kWh)": r.entradas.tarifa,
+                "Orçamento": "Personalizado" if r.entradas.orcamento is not None else "Médio SolarSim",
+                "Potência (kWp)": r.dados["potencia_kwp"],
+                "Painéis": r.dados["numero_paineis"],
+                "Investimento": formatar_reais(r.custo_final),
+                "Economia mensal": formatar_reais(r.dados["economia_mensal_reais"]),
+                "Payback": r.payback,
+                "VPL": formatar_reais(r.vpl),
+                "TIR": f"{r.tir_anual:.1%} ao ano".replace(".", ",") if r.tir_anual == r.tir_anual else "Não aplicável",
+                "Payback descontado": formatar_meses(r.payback_descontado_meses),
+            })
+        return linhas
+
+    # --- PERSISTÊNCIA (só as entradas; os derivados são recalculados) ---
+
+    def para_lista(self):
+        return [(nome, entradas) for nome, entradas in self._entradas.items()]
+
+    @classmethod
+    def de_lista(cls, itens, revisao=0):
+        colecao = cls()
+        for nome, entradas in itens:
+            colecao.salvar(nome, entradas)
+        colecao.revisao = revisao
+        return colecao
@@ -0,0 +1,577 @@
+"""Interface de linha de comando do SolarSim (sem Streamlit).
+
+Uso:
+    python -m solarsim lote leads.csv resultados.csv
+    python -m solarsim lote leads.csv resultados.parquet --chunksize 200000
+    python -m solarsim otimizar leads.csv tamanhos.csv --criterio payback --processos 4
+    python -m solarsim servir --porta 8600 --janela-ms 5
+    python -m solarsim medicao medidor_15min.csv --saida-horaria perfil.csv
+    python -m solarsim tarifa --consumo 300 450 --de 2024-01 --ate 2024-12 --minimo-kwh 50
+    python -m solarsim rendimento telhados.csv geracao.csv
+    python -m solarsim equipamentos --kwp 4.4
+    python -m solarsim carteira instalados.csv agregados.csv --arrow instalados.arrow --processos 4
+    python -m solarsim carteira instalados.arrow agregados.parquet
+    python -m solarsim propostas clientes.csv propostas/ --processos 4
+    python -m solarsim municipios construir municipios.csv municipios.arrow
+    python -m solarsim municipios buscar "Rio das Ostras (RJ)"
+    python -m solarsim municipios buscar --lat -22.5 --lon -41.9
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+from solarsim.constantes import CIDADE_PADRAO
+
+
+def _escritor(caminho):
+    """Escritor incremental (pyarrow) para .csv ou .parquet; retorna (escrever, fechar).
+
+    O schema do arquivo é o do primeiro bloco; os blocos seguintes são
+    convertidos para ele. Numa coluna que era numérica no primeiro bloco, texto
+    que não é número vira vazio (a linha já sai marcada na coluna `erro`).
+    """
+    import pandas as pd
+    import pyarrow as pa
+
+    if caminho.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        abrir = lambda schema: pq.ParquetWriter(caminho, schema)
+    else:
+        import pyarrow.csv as pcsv
+        abrir = lambda schema: pcsv.CSVWriter(caminho, schema)
+
+    estado = {"writer": None, "schema": None}
+
+    def escrever(df):
+        schema = estado["schema"]
+        if schema is not None:
+            numericas = [campo.name for campo in schema
+                         if pa.types.is_integer(campo.type) or pa.types.is_floating(campo.type)]
+            texto = [c for c in numericas if df[c].dtype == object]
+            if texto:
+                df = df.assign(**{c: pd.to_numeric(df[c], errors="coerce") for c in texto})
+        tabela = pa.Table.from_pandas(df, preserve_index=False)
+        if estado["writer"] is None:
+            estado["schema"] = tabela.schema
+            estado["writer"] = abrir(tabela.schema)
+        elif not tabela.schema.equals(schema):
+            try:
+                tabela = tabela.cast(schema)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError, ValueError) as erro:
+                raise SystemExit(f"Bloco com colunas incompatíveis com o primeiro bloco gravado: {erro}") from None
+        estado["writer"].write_table(tabela)
+
+    def fechar():
+        if estado["writer"] is not None:
+            estado["writer"].close()
+
+    return escrever, fechar
+
+
+def _colunas_repetidas(bloco):
+    """Colunas de entrada para --manter-colunas, com inteiros como float.
+
+    O tipo de cada coluna é deduzido bloco a bloco: uma coluna inteira com um
+    vazio num bloco posterior viraria float e não caberia no schema gravado.
+    """
+    inteiras = bloco.select_dtypes(include="integer").columns
+    return bloco.astype({coluna: float for coluna in inteiras}) if len(inteiras) else bloco
+
+
+def _completar_hsp(bloco, base):
+    """Acrescenta hsp (e custo_wp) por linha a partir das colunas cidade ou latitude/longitude.
+
+    Devolve (entrada, localizacao): `localizacao` mapeia a coluna de origem
+    ("cidade", ou "latitude" e "longitude") para a máscara das linhas
+    encontradas, vazia quando o bloco já traz o hsp.
+    """
+    import numpy as np
+    import pandas as pd
+
+    if "hsp" in bloco.columns or ("cidade" not in bloco.columns and "latitude" not in bloco.columns):
+        return bloco, {}
+    if "cidade" in bloco.columns:
+        hsp_linha, custo_linha = base.hsp_e_custo(cidades=bloco["cidade"].to_numpy())
+        localizacao = {"cidade": np.isfinite(hsp_linha)}
+    else:
+        latitude = pd.to_numeric(bloco["latitude"], errors="coerce").to_numpy(float)
+        longitude = pd.to_numeric(bloco.get("longitude", pd.Series(np.nan, index=bloco.index)),
+                                  errors="coerce").to_numpy(float)
+        hsp_linha, custo_linha = base.hsp_e_custo(latitudes=latitude, longitudes=longitude)
+        with np.errstate(invalid="ignore"):
+            localizacao = {"latitude": np.abs(latitude) <= 90, "longitude": np.abs(longitude) <= 180}
+    entrada = bloco.assign(hsp=hsp_linha)
+    if "custo_wp" not in bloco.columns:
+        entrada["custo_wp"] = custo_linha
+    return entrada, localizacao
+
+
+def comando_lote(args):
+    """Lê o CSV de leads em blocos, calcula e grava os resultados em streaming."""
+    import pandas as pd
+
+    from solarsim.lote import calcular_lote_df
+    from solarsim.municipios import abrir_base
+
+    base = abrir_base()
+    municipio = base.buscar(args.cidade)
+    hsp = args.hsp if args.hsp is not None else municipio.hsp
+    custo_wp = args.custo_wp if args.custo_wp is not None else municipio.custo_wp
+
+    escrever, fechar = _escritor(args.saida)
+
+    inicio = time.perf_counter()
+    total = invalidas = 0
+    try:
+        for bloco in pd.read_csv(args.entrada, chunksize=args.chunksize, sep=args.sep):
+            entrada, localizacao = _completar_hsp(bloco, base)
+            resultado = calcular_lote_df(entrada, hsp=hsp, custo_wp=custo_wp, localizacao=localizacao)
+            if args.manter_colunas:
+                resultado = pd.concat([_colunas_repetidas(bloco), resultado], axis=1)
+            escrever(resultado)
+            total += len(bloco)
+            invalidas += int((resultado["erro"] != "").sum())
+    finally:
+        fechar()
+
+    duracao = time.perf_counter() - inicio
+    print(f"{total} linhas em {duracao:.2f}s ({total / max(duracao, 1e-9):,.0f} linhas/s)", file=sys.stderr)
+    if invalidas:
+        print(f"{invalidas} linhas com entrada inválida (veja a coluna 'erro')", file=sys.stderr)
+    return 0
+
+
+def comando_otimizar(args):
+    """Tamanho ótimo (VPL ou payback) para cada lead do CSV, em blocos."""
+    import numpy as np
+    import pandas as pd
+
+    from solarsim.lote import _motivos_erro
+    from solarsim.municipios import abrir_base
+    from solarsim.otimizador import otimizar_lote
+
+    base = abrir_base()
+    municipio = base.buscar(args.cidade)
+    escrever, fechar = _escritor(args.saida)
+
+    inicio = time.perf_counter()
+    total = sem_candidato = invalidas = 0
+    try:
+        for bloco in pd.read_csv(args.entrada, chunksize=args.chunksize, sep=args.sep):
+            entrada, localizacao = _completar_hsp(bloco, base)
+
+            def coluna(nome, padrao=None):
+                if nome in entrada.columns:
+                    return pd.to_numeric(entrada[nome], errors="coerce").to_numpy(float)
+                if padrao is None:
+                    raise SystemExit(f"Coluna obrigatória ausente: {nome!r}")
+                return np.full(len(entrada), padrao, dtype=float)
+
+            entradas = {nome: coluna(nome, padrao) for nome, padrao in
+                        (("consumo", None), ("tarifa", None), ("hsp", municipio.hsp),
+                         ("custo_wp", municipio.custo_wp), ("minimo_kwh", args.minimo_kwh))}
+            resultado = otimizar_lote(
+                entradas["consumo"], entradas["tarifa"], entradas["hsp"], entradas["custo_wp"],
+                minimo_kwh=entradas["minimo_kwh"], criterio=args.criterio,
+                orcamento_maximo=coluna("orcamento", np.nan), n_candidatos=args.candidatos,
+                processos=args.processos,
+            )
+            resultado = pd.DataFrame(resultado)
+            resultado["erro"] = _motivos_erro(entradas, localizacao=localizacao)
+            invalida = resultado["erro"] != ""
+            invalidas += int(invalida.sum())
+            sem_candidato += int(((resultado["numero_paineis_otimo"] == 0) & ~invalida).sum())
+            if args.manter_colunas:
+                resultado = pd.concat([_colunas_repetidas(bloco).reset_index(drop=True), resultado], axis=1)
+            escrever(resultado)
+            total += len(bloco)
+    finally:
+        fechar()
+
+    duracao = time.perf_counter() - inicio
+    print(f"{total} leads em {duracao:.2f}s ({total / max(duracao, 1e-9):,.0f} leads/s)", file=sys.stderr)
+    if sem_candidato:
+        print(f"{sem_candidato} leads sem tamanho viável no orçamento (numero_paineis_otimo = 0)", file=sys.stderr)
+    if invalidas:
+        print(f"{invalidas} linhas com entrada inválida (veja a coluna 'erro')", file=sys.stderr)
+    return 0
+
+
+def comando_servir(args):
+    from solarsim.api import servir
+
+    servir(args.porta, args.endereco, args.janela_ms, args.lote_maximo)
+    return 0
+
+
+def comando_medicao(args):
+    """Agrega uma exportação de medidor (15 min) em perfis horário e mensal."""
+    import numpy as np
+
+    from solarsim.constantes import MESES
+    from solarsim.medicao import PASTA_CACHE, carregar_medicao
+
+    opcoes = {chave: valor for chave, valor in (
+        ("sep", args.sep), ("decimal", args.decimal), ("coluna_data", args.coluna_data),
+        ("coluna_hora", args.coluna_hora), ("coluna_kwh", args.coluna_kwh),
+    ) if valor is not None}
+    inicio = time.perf_counter()
+    perfil = carregar_medicao(args.arquivo, pasta_cache=None if args.sem_cache else PASTA_CACHE,
+                              unidade=args.unidade, intervalo_min=args.intervalo_min, **opcoes)
+    print(f"{perfil.leituras} leituras de {perfil.inicio} a {perfil.fim} em {time.perf_counter() - inicio:.2f}s "
+          f"(hash {perfil.hash[:12]})", file=sys.stderr)
+    if perfil.descartadas:
+        print(f"{perfil.descartadas} linhas descartadas (sem data ou sem consumo numérico)", file=sys.stderr)
+
+    print(f"Consumo médio mensal (ano típico): {perfil.consumo_medio_mensal:.1f} kWh")
+    print("Ano típico: " + ", ".join(f"{m} {v:.0f}" for m, v in zip(MESES, perfil.mensal)))
+    print(f"{'mês':<10}{'kWh':>12}{'leituras':>10}")
+    for ano, mes, kwh, leituras in perfil.meses.tolist():
+        print(f"{ano}-{mes:02d}   {kwh:>12.1f}{leituras:>10}")
+
+    if args.saida_horaria:
+        hora = np.arange(len(perfil.carga_h))
+        np.savetxt(args.saida_horaria, np.column_stack([hora, hora % 24, perfil.carga_h]), delimiter=",",
+                   header="hora_do_ano,hora,kwh", comments="", fmt=("%d", "%d", "%.6f"))
+    return 0
+
+
+def comando_tarifa(args):
+    """Conta mês a mês pela tabela da distribuidora (bandeiras e tributos incluídos)."""
+    import numpy as np
+
+    from solarsim.tarifas import carregar_tabela, meses_entre
+
+    tabela = carregar_tabela()
+    padrao = tabela.ultimos_meses()
+    meses = meses_entre(args.de or padrao[0], args.ate or padrao[-1])
+    conta = tabela.fatura(np.array(args.consumo, dtype=float)[:, None], meses, args.distribuidora,
+                          args.minimo_kwh, bandeira_futura=args.bandeira_futura)
+    print(f"{'mês':<9}" + "".join(f"{f'{c:g} kWh':>14}" for c in args.consumo))
+    for j, mes in enumerate(meses):
+        print(f"{str(mes):<9}" + "".join(f"{valor:>14.2f}" for valor in conta.total[:, j]))
+    tarifa = conta.total.sum(axis=1) / conta.kwh_faturado.sum(axis=1)
+    print(f"{'R$/kWh':<9}" + "".join(f"{valor:>14.4f}" for valor in tarifa))
+    return 0
+
+
+def comando_rendimento(args):
+    """Geração pelo modelo físico para cada linha (kwp, inclinacao, azimute), em blocos."""
+    import numpy as np
+    import pandas as pd
+
+    from solarsim.constantes import MESES
+    from solarsim.lote import _motivos_erro
+    from solarsim.municipios import abrir_base
+    from solarsim.rendimento import fatores_transposicao, simular_faces
+
+    base = abrir_base()
+    escrever, fechar = _escritor(args.saida)
+
+    inicio = time.perf_counter()
+    total = invalidas = 0
+    try:
+        for bloco in pd.read_csv(args.entrada, chunksize=args.chunksize, sep=args.sep):
+            if "cidade" in bloco.columns:
+                chaves = bloco["cidade"].astype(str).to_numpy()
+                consultar = base.buscar
+            elif "latitude" in bloco.columns:
+                chaves = np.array(list(zip(bloco["latitude"].astype(float), bloco["longitude"].astype(float))),
+                                  dtype=[("lat", float), ("lon", float)])
+                consultar = lambda ponto: base.mais_proximo(float(ponto[0]), float(ponto[1]))
+            else:
+                chaves = np.full(len(bloco), args.cidade, dtype=object)
+                consultar = base.buscar
+            unicas, inverso = np.unique(chaves, return_inverse=True)
+            entradas = {nome: pd.to_numeric(bloco[nome], errors="coerce").to_numpy(float)
+                        for nome in ("kwp", "inclinacao", "azimute")}
+            erro = _motivos_erro(entradas, positivas=("kwp",))
+            invalida = erro != ""
+
+            geracao = np.empty((len(bloco), 12))
+            desempenho = np.empty(len(bloco))
+            for k, chave in enumerate(unicas):
+                municipio = consultar(chave)
+                linhas = np.flatnonzero(inverso == k)
+                resultado = simular_faces(
+                    fatores_transposicao(municipio.latitude, municipio.hsp_mensal),
+                    entradas["kwp"][linhas], entradas["inclinacao"][linhas], entradas["azimute"][linhas],
+                )
+                geracao[linhas] = resultado.geracao_mensal
+                with np.errstate(invalid="ignore"):
+                    desempenho[linhas] = resultado.taxa_desempenho
+            geracao[invalida] = np.nan
+            desempenho[invalida] = np.nan
+
+            saida = pd.DataFrame(geracao.round(2), columns=[f"geracao_{m.lower()}" for m in MESES])
+            saida.insert(0, "taxa_desempenho", desempenho.round(4))
+            saida.insert(0, "geracao_anual_kwh", geracao.sum(axis=1).round(2))
+            saida["erro"] = erro
+            invalidas += int(invalida.sum())
+            if args.manter_colunas:
+                saida = pd.concat([_colunas_repetidas(bloco).reset_index(drop=True), saida], axis=1)
+            escrever(saida)
+            total += len(bloco)
+    finally:
+        fechar()
+
+    duracao = time.perf_counter() - inicio
+    print(f"{total} sistemas em {duracao:.2f}s ({total / max(duracao, 1e-9):,.0f} sistemas/s)", file=sys.stderr)
+    if invalidas:
+        print(f"{invalidas} linhas com entrada inválida (veja a coluna 'erro')", file=sys.stderr)
+    return 0
+
+
+def comando_equipamentos(args):
+    """Lista de materiais mais barata do catálogo para a potência pedida."""
+    from solarsim.equipamentos import carregar_catalogo, configurar_sistema
+
+    catalogo = carregar_catalogo()
+    inicio = time.perf_counter()
+    materiais = configurar_sistema(args.kwp * 1000, catalogo)
+    duracao = time.perf_counter() - inicio
+    print(f"{len(catalogo)} modelos no catálogo, busca em {duracao * 1000:.1f} ms", file=sys.stderr)
+    if materiais is None:
+        print(f"Nenhuma combinação do catálogo atende {args.kwp} kWp.", file=sys.stderr)
+        return 1
+    print(f"Painéis:    {materiais.numero_paineis}× {materiais.painel} ({materiais.potencia_kwp:.2f} kWp, "
+          f"{materiais.area_m2:.1f} m²)")
+    print(f"Inversores: {materiais.quantidade_inversores}× {materiais.inversor} "
+          f"(CC/CA {materiais.relacao_cc_ca:.0%})")
+    print(f"Strings:    {materiais.descricao_strings()} painéis, até {materiais.tensao_string_max_v:.0f} V")
+    for item, valor in materiais.custos.items():
+        print(f"{item:<12}{valor:>12,.2f}")
+    print(f"{'total':<12}{materiais.custo_equipamentos:>12,.2f}")
+    return 0
+
+
+def comando_carteira(args):
+    """Geração, créditos e CO₂ da carteira instalada, agregados por município, conexão e mês."""
+    import tempfile
+
+    import pandas as pd
+
+    from solarsim.carteira import abrir_carteira, agregar_carteira, importar_carteira, salvar_carteiras
+
+    inicio = time.perf_counter()
+    if args.entrada.endswith(".arrow"):
+        arquivo = args.entrada
+    else:
+        arquivo = args.arrow or str(Path(tempfile.gettempdir()) / f"solarsim-carteira-{os.getpid()}.arrow")
+        descartadas = 0
+
+        def carteiras():
+            nonlocal descartadas
+            for bloco in pd.read_csv(args.entrada, chunksize=args.chunksize, sep=args.sep):
+                carteira = importar_carteira(bloco)
+                descartadas += carteira.descartadas
+                yield carteira
+
+        salvar_carteiras(carteiras(), arquivo)
+        print(f"{arquivo} gravado em {time.perf_counter() - inicio:.2f}s", file=sys.stderr)
+        if descartadas:
+            print(f"{descartadas} linhas descartadas (potência, consumo, tarifa ou créditos que não são número, "
+                  "cidade não encontrada ou conexão vazia)", file=sys.stderr)
+    try:
+        carteira = abrir_carteira(arquivo)
+        inicio_agregacao = time.perf_counter()
+        resultado = agregar_carteira(carteira, processos=args.processos)
+        duracao = time.perf_counter() - inicio_agregacao
+    finally:
+        if arquivo != args.entrada and not args.arrow:
+            abrir_carteira.cache_clear()
+            os.remove(arquivo)
+
+    escrever, fechar = _escritor(args.saida)
+    try:
+        escrever(pd.DataFrame(resultado.para_colunas()))
+    finally:
+        fechar()
+    print(f"{resultado.sistemas} sistemas em {duracao:.2f}s ({resultado.sistemas / max(duracao, 1e-9):,.0f} sistemas/s); "
+          f"geração {resultado.total('geracao_kwh', (0, 1, 2)) / 1e6:,.1f} GWh/ano, "
+          f"créditos em carteira no fim do ano {resultado.total('saldo_creditos_kwh', (0, 1))[-1] / 1e6:,.1f} GWh "
+          f"(R$ {resultado.total('passivo_creditos_reais', (0, 1))[-1]:,.0f})", file=sys.stderr)
+    return 0
+
+
+def comando_propostas(args):
+    """Uma proposta (HTML ou PDF) por cliente do CSV; retoma execuções interrompidas."""
+    import csv
+
+    import pandas as pd
+
+    from solarsim.propostas import gerar_propostas
+
+    def clientes():
+        for bloco in pd.read_csv(args.entrada, chunksize=args.chunksize, sep=args.sep, dtype={"id": str}):
+            bloco = bloco.astype(object).where(bloco.notna(), None)
+            yield from bloco.to_dict("records")
+
+    ultimo = [0.0]
+
+    def progresso(relatorio):
+        if relatorio.segundos - ultimo[0] >= args.intervalo:
+            ultimo[0] = relatorio.segundos
+            print(f"{relatorio.gerados} propostas em {relatorio.segundos:.1f}s ({relatorio.por_segundo:,.0f}/s), "
+                  f"{relatorio.pulados} já existentes, {len(relatorio.erros)} erros", file=sys.stderr)
+
+    relatorio = gerar_propostas(clientes(), args.saida, processos=args.processos, formato=args.formato,
+                                retomar=not args.refazer, clientes_por_tarefa=args.lote, progresso=progresso)
+    print(f"{relatorio.gerados} propostas em {relatorio.segundos:.2f}s ({relatorio.por_segundo:,.0f}/s); "
+          f"{relatorio.pulados} já existentes; gráficos reaproveitados do cache: {relatorio.taxa_cache_graficos:.0%}",
+          file=sys.stderr)
+    if relatorio.erros:
+        caminho = Path(args.saida) / "_erros.csv"
+        with open(caminho, "w", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerows([("id", "erro"), *relatorio.erros])
+        print(f"{len(relatorio.erros)} clientes com erro, listados em {caminho}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def comando_municipios_construir(args):
+    from solarsim.municipios import construir_base
+
+    inicio = time.perf_counter()
+    destino = construir_base(args.origem, args.destino)
+    print(f"{destino} gerado em {time.perf_counter() - inicio:.2f}s", file=sys.stderr)
+    return 0
+
+
+def comando_municipios_buscar(args):
+    from solarsim.municipios import abrir_base
+
+    base = abrir_base(args.base)
+    if args.nome:
+        municipio = base.buscar(args.nome)
+    elif args.lat is not None and args.lon is not None:
+        municipio = base.mais_proximo(args.lat, args.lon)
+    else:
+        print("Informe um nome ou --lat e --lon.", file=sys.stderr)
+        return 2
+    print(f"{municipio.rotulo} (IBGE {municipio.codigo_ibge}): HSP {municipio.hsp} h/dia, "
+          f"custo {municipio.custo_wp} R$/Wp")
+    print("Fatores mensais: " + ", ".join(f"{f:.3f}" for f in municipio.fatores_mensais))
+    return 0
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(prog="solarsim", description="SolarSim — simulador solar sem interface.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_lote = sub.add_parser("lote", help="Calcula um arquivo de leads (CSV) em lote.")
+    p_lote.add_argument("entrada", help="CSV com as colunas consumo, tarifa e, opcionalmente, hsp, custo_wp e orcamento.")
+    p_lote.add_argument("saida", help="Arquivo de resultados (.csv ou .parquet).")
+    p_lote.add_argument("--chunksize", type=int, default=100_000, help="Linhas lidas por bloco.")
+    p_lote.add_argument("--sep", default=",", help="Separador do CSV de entrada.")
+    p_lote.add_argument("--cidade", default=CIDADE_PADRAO,
+                        help="Cidade usada quando não há colunas hsp/custo_wp, cidade ou latitude/longitude.")
+    p_lote.add_argument("--hsp", type=float, help="HSP padrão (sobrepõe --cidade).")
+    p_lote.add_argument("--custo-wp", type=float, help="Custo do Wp padrão (sobrepõe --cidade).")
+    p_lote.add_argument("--manter-colunas", action="store_true", help="Repete as colunas de entrada na saída.")
+    p_lote.set_defaults(func=comando_lote)
+
+    p_otim = sub.add_parser("otimizar", help="Tamanho de sistema que maximiza o VPL (ou minimiza o payback) por lead.")
+    p_otim.add_argument("entrada", help="CSV com consumo, tarifa e, opcionalmente, hsp, custo_wp, minimo_kwh, "
+                                        "orcamento (teto), cidade ou latitude/longitude.")
+    p_otim.add_argument("saida", help="Arquivo de resultados (.csv ou .parquet).")
+    p_otim.add_argument("--criterio", choices=("vpl", "payback"), default="vpl")
+    p_otim.add_argument("--candidatos", type=int, default=48, help="Tamanhos avaliados por lead.")
+    p_otim.add_argument("--minimo-kwh", type=float, default=50, help="Taxa mínima (kWh) quando não há coluna minimo_kwh.")
+    p_otim.add_argument("--processos", type=int, help="Processos paralelos (padrão: 1).")
+    p_otim.add_argument("--chunksize", type=int, default=20_000, help="Leads lidos por bloco.")
+    p_otim.add_argument("--sep", default=",", help="Separador do CSV de entrada.")
+    p_otim.add_argument("--cidade", default=CIDADE_PADRAO, help="Cidade usada quando não há colunas hsp/custo_wp.")
+    p_otim.add_argument("--manter-colunas", action="store_true", help="Repete as colunas de entrada na saída.")
+    p_otim.set_defaults(func=comando_otimizar)
+
+    p_servir = sub.add_parser("servir", help="API HTTP (JSON) de cotação, com agrupamento de requisições.")
+    p_servir.add_argument("--porta", type=int, default=8600)
+    p_servir.add_argument("--endereco", default="", help="Endereço de escuta (padrão: todas as interfaces).")
+    p_servir.add_argument("--janela-ms", type=float, default=5, help="Janela de agrupamento das requisições.")
+    p_servir.add_argument("--lote-maximo", type=int, default=512, help="Pedidos por lote antes de fechar a janela.")
+    p_servir.set_defaults(func=comando_servir)
+
+    p_med = sub.add_parser("medicao", help="Agrega a exportação do medidor (15 min) em perfis horário e mensal.")
+    p_med.add_argument("arquivo", help="CSV com data/hora e consumo por intervalo.")
+    p_med.add_argument("--saida-horaria", help="Grava o ano típico hora a hora (8760 linhas) em CSV.")
+    p_med.add_argument("--sep", help="Separador (padrão: detectado).")
+    p_med.add_argument("--decimal", help="Separador decimal (padrão: detectado).")
+    p_med.add_argument("--coluna-data")
+    p_med.add_argument("--coluna-hora", help="Coluna de hora, quando separada da data.")
+    p_med.add_argument("--coluna-kwh")
+    p_med.add_argument("--unidade", choices=("kwh", "kw"), default="kwh",
+                       help="kwh: energia do intervalo; kw: potência média do intervalo.")
+    p_med.add_argument("--intervalo-min", type=float, default=15)
+    p_med.add_argument("--sem-cache", action="store_true", help="Não usa nem grava o cache por conteúdo.")
+    p_med.set_defaults(func=comando_medicao)
+
+    p_tar = sub.add_parser("tarifa", help="Conta mensal pela tabela de tarifas da distribuidora.")
+    p_tar.add_argument("--consumo", type=float, nargs="+", required=True, help="Um ou mais consumos (kWh/mês).")
+    p_tar.add_argument("--distribuidora", default="Enel RJ")
+    p_tar.add_argument("--de", help="Primeiro mês (AAAA-MM); padrão: 12 últimos meses da tabela.")
+    p_tar.add_argument("--ate", help="Último mês (AAAA-MM).")
+    p_tar.add_argument("--minimo-kwh", type=float, default=0, help="Custo de disponibilidade (kWh).")
+    p_tar.add_argument("--bandeira-futura", default="verde",
+                       choices=("verde", "amarela", "vermelha_1", "vermelha_2", "historica"),
+                       help="Bandeira dos meses além da tabela.")
+    p_tar.set_defaults(func=comando_tarifa)
+
+    p_rend = sub.add_parser("rendimento", help="Geração pelo modelo físico (inclinação, azimute, temperatura).")
+    p_rend.add_argument("entrada", help="CSV com kwp, inclinacao, azimute e, opcionalmente, cidade ou latitude/longitude.")
+    p_rend.add_argument("saida", help="Arquivo de saída (.csv ou .parquet).")
+    p_rend.add_argument("--chunksize", type=int, default=100_000, help="Linhas lidas por bloco.")
+    p_rend.add_argument("--sep", default=",", help="Separador do CSV de entrada.")
+    p_rend.add_argument("--cidade", default=CIDADE_PADRAO, help="Cidade usada quando não há colunas de local.")
+    p_rend.add_argument("--manter-colunas", action="store_true", help="Repete as colunas de entrada na saída.")
+    p_rend.set_defaults(func=comando_rendimento)
+
+    p_equip = sub.add_parser("equipamentos", help="Painéis, inversores e strings mais baratos do catálogo.")
+    p_equip.add_argument("--kwp", type=float, required=True, help="Potência CC mínima do sistema.")
+    p_equip.set_defaults(func=comando_equipamentos)
+
+    p_cart = sub.add_parser("carteira", help="Geração, créditos e CO₂ da base instalada por município, conexão e mês.")
+    p_cart.add_argument("entrada", help="Carteira em .arrow (de uma execução anterior com --arrow) ou CSV com "
+                                        "codigo_ibge ou cidade, potencia_kwp, consumo_kwh e, opcionalmente, "
+                                        "conexao, tarifa e creditos_kwh.")
+    p_cart.add_argument("saida", help="Agregados (.csv ou .parquet).")
+    p_cart.add_argument("--arrow", help="Guarda a carteira importada do CSV neste .arrow (memory-map) para reúso.")
+    p_cart.add_argument("--processos", type=int, help="Processos paralelos (padrão: 1).")
+    p_cart.add_argument("--chunksize", type=int, default=65_536, help="Linhas lidas do CSV por bloco.")
+    p_cart.add_argument("--sep", default=",", help="Separador do CSV de entrada.")
+    p_cart.set_defaults(func=comando_carteira)
+
+    p_prop = sub.add_parser("propostas", help="Propostas comerciais (HTML ou PDF), uma por cliente, em paralelo.")
+    p_prop.add_argument("entrada", help="CSV com id, consumo, tarifa e, opcionalmente, nome, cidade, minimo_kwh e orcamento.")
+    p_prop.add_argument("saida", help="Pasta das propostas (<id>.html ou <id>.pdf).")
+    p_prop.add_argument("--formato", choices=("html", "pdf"), default="html", help="PDF requer o pacote weasyprint.")
+    p_prop.add_argument("--processos", type=int, help="Processos paralelos (padrão: 1).")
+    p_prop.add_argument("--lote", type=int, default=64, help="Clientes por tarefa enviada a um processo.")
+    p_prop.add_argument("--refazer", action="store_true", help="Regera também as propostas que já existem na pasta.")
+    p_prop.add_argument("--intervalo", type=float, default=5, help="Segundos entre as mensagens de andamento.")
+    p_prop.add_argument("--chunksize", type=int, default=10_000, help="Linhas lidas do CSV por bloco.")
+    p_prop.add_argument("--sep", default=",", help="Separador do CSV de entrada.")
+    p_prop.set_defaults(func=comando_propostas)
+
+    p_mun = sub.add_parser("municipios", help="Base de irradiação e custo por município.")
+    sub_mun = p_mun.add_subparsers(dest="acao", required=True)
+    p_construir = sub_mun.add_parser("construir", help="Gera o .arrow indexado a partir do CSV.")
+    p_construir.add_argument("origem")
+    p_construir.add_argument("destino")
+    p_construir.set_defaults(func=comando_municipios_construir)
+    p_buscar = sub_mun.add_parser("buscar", help="Consulta por nome ou pela coordenada mais próxima.")
+    p_buscar.add_argument("nome", nargs="?")
+    p_buscar.add_argument("--lat", type=float)
+    p_buscar.add_argument("--lon", type=float)
+    p_buscar.add_argument("--base", help="Arquivo .arrow (padrão: base do pacote).")
+    p_buscar.set_defaults(func=comando_municipios_buscar)
+
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    return args.func(args)
@@ -0,0 +1,15 @@
+# --- CONSTANTES DE SIMULAÇÃO GLOBAIS ---
+TAXA_DESEMPENHO = 0.80
+POTENCIA_PAINEL_WP = 550
+AREA_PAINEL_M2 = 2.3
+FATOR_EMISSAO_CO2_KWH = 0.075
+
+# --- VARIAÇÃO SAZONAL (Jan..Dez, padrão médio nacional; cada município tem a sua na base) ---
+MESES = ["Jan","Fev","Mar","Abr","Mai","Jun","Jul","Ago","Set","Out","Nov","Dez"]
+FATOR_SAZONAL_MENSAL = [1.118, 1.223, 1.052, 1.014, 0.912, 0.890, 0.881, 1.014, 0.960, 0.984, 0.918, 1.042]
+
+# --- LOCALIZAÇÃO PADRÃO (base completa em solarsim/dados/municipios.csv) ---
+CIDADE_PADRAO = "Rio das Ostras (RJ)"
+
+# --- TAXA MÍNIMA (CUSTO DE DISPONIBILIDADE, kWh/mês) POR TIPO DE CONEXÃO ---
+TAXA_MINIMA_CONEXAO = {"monofasica": 30, "bifasica": 50, "trifasica": 100}
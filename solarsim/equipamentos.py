@@ -0,0 +1,252 @@
+"""Catálogo de painéis e inversores e escolha da configuração mais barata.
+
+O catálogo (`solarsim/dados/paineis.csv` e `inversores.csv`) é carregado
+uma vez por processo em arrays NumPy. Os inversores ficam ordenados pela
+potência CC máxima, e o menor preço de cada trecho de potência CC (entre
+RELACAO_CC_CA_MIN × CA e a CC máxima de cada inversor) é pré-calculado: "o
+inversor mais barato que aguenta X kWp sem ficar superdimensionado" é uma
+busca binária. As janelas de tensão (MPPT, tensão máxima e de partida) e de
+corrente de todos os inversores também ficam em arrays, então os limites de
+string de um painel contra o catálogo inteiro são uma única expressão
+vetorizada.
+
+`configurar_sistema` é um branch-and-bound: os pares (painel, quantidade)
+são visitados do menor para o maior limite inferior de custo e a busca para
+assim que esse limite passa do melhor orçamento já encontrado. Cada
+candidato só é expandido para os inversores que cabem na janela de
+potência, e as strings são verificadas de forma fechada (strings de
+comprimento L e L + 1, cada MPPT com um só comprimento).
+"""
+
+import csv
+import functools
+import math
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from solarsim.municipios import PASTA_DADOS
+
+# Temperaturas de projeto: menor temperatura da célula (Voc máxima) e maior (Vmp mínima)
+TEMPERATURA_CELULA_MIN_C = 5.0
+TEMPERATURA_CELULA_MAX_C = 70.0
+RELACAO_CC_CA_MIN = 0.75
+
+CUSTO_ESTRUTURA_POR_PAINEL = 120.0
+CUSTO_POR_STRING = 180.0  # cabos, conectores MC4 e proteção CC por string
+
+FOLGA_PAINEIS = 3
+QUANTIDADE_MAXIMA_INVERSORES = 8
+
+COLUNAS_PAINEIS = ("potencia_wp", "voc", "vmp", "isc", "imp", "coef_voc", "coef_pmax", "area_m2", "preco")
+COLUNAS_INVERSORES = ("potencia_ca_kw", "potencia_cc_max_kw", "tensao_max_cc", "mppt_min", "mppt_max",
+                      "tensao_partida", "n_mppt", "strings_por_mppt", "corrente_max_mppt", "preco")
+
+
+@dataclass
+class ListaMateriais:
+    """Configuração escolhida: equipamentos, strings e custos dos componentes (R$)."""
+    painel: str
+    potencia_painel_wp: float
+    area_painel_m2: float
+    numero_paineis: int
+    inversor: str
+    quantidade_inversores: int
+    potencia_ca_kw: float
+    strings: list  # [(número de strings, painéis por string)]
+    tensao_string_max_v: float
+    custos: dict = field(default_factory=dict)
+
+    @property
+    def potencia_kwp(self):
+        return self.numero_paineis * self.potencia_painel_wp / 1000
+
+    @property
+    def area_m2(self):
+        return self.numero_paineis * self.area_painel_m2
+
+    @property
+    def relacao_cc_ca(self):
+        return self.potencia_kwp / (self.quantidade_inversores * self.potencia_ca_kw)
+
+    @property
+    def custo_equipamentos(self):
+        return sum(self.custos.values())
+
+    def custos_detalhados(self, custo_total):
+        """Repartição exibida no site: componentes do catálogo e o restante como mão de obra e projeto."""
+        return {
+            "Painéis Fotovoltaicos": self.custos["paineis"],
+            "Inversor(es)": self.custos["inversores"],
+            "Estruturas, Cabos e Proteções": self.custos["estruturas"] + self.custos["strings"],
+            "Mão de Obra e Projeto": max(custo_total - self.custo_equipamentos, 0.0),
+        }
+
+    def descricao_strings(self):
+        return " + ".join(f"{n} string{'s' if n > 1 else ''} de {comprimento}" for n, comprimento in self.strings)
+
+
+def _tensao(valor_stc, coef_pct, temperatura):
+    return valor_stc * (1 + coef_pct / 100 * (temperatura - 25))
+
+
+class Catalogo:
+    """Painéis e inversores em arrays, com índice por potência CC do inversor."""
+
+    def __init__(self, paineis, inversores):
+        """`paineis` e `inversores`: listas de dicts (linhas dos CSVs)."""
+        if not paineis or not inversores:
+            raise ValueError("O catálogo precisa de ao menos um painel e um inversor.")
+        self.paineis_modelo = [f"{p['fabricante']} {p['modelo']}" for p in paineis]
+        self.paineis = {c: np.array([float(p[c]) for p in paineis]) for c in COLUNAS_PAINEIS}
+
+        ordem = sorted(range(len(inversores)), key=lambda i: float(inversores[i]["potencia_cc_max_kw"]))
+        inversores = [inversores[i] for i in ordem]
+        self.inversores_modelo = [f"{i['fabricante']} {i['modelo']}" for i in inversores]
+        self.inversores = {c: np.array([float(i[c]) for i in inversores]) for c in COLUNAS_INVERSORES}
+        # Cada inversor aceita de RELACAO_CC_CA_MIN × CA até a CC máxima (com uma folga numérica, para
+        # que o limite nunca passe do custo real). Entre dois extremos consecutivos o conjunto de
+        # inversores que aceitam a potência não muda: guarda o menor preço de cada trecho.
+        minimo = RELACAO_CC_CA_MIN * self.inversores["potencia_ca_kw"] * (1 - 1e-9)
+        maximo = self.inversores["potencia_cc_max_kw"] * (1 + 1e-9)
+        self._extremos_janela = np.unique(np.concatenate([minimo, maximo]))
+        self._preco_min_janela = np.full(len(self._extremos_janela), np.inf)
+        inicio = np.searchsorted(self._extremos_janela, minimo)
+        fim = np.searchsorted(self._extremos_janela, maximo)
+        for i in np.argsort(-self.inversores["preco"], kind="stable"):  # o mais barato escreve por último
+            self._preco_min_janela[inicio[i]:fim[i]] = self.inversores["preco"][i]
+
+    def __len__(self):
+        return len(self.paineis_modelo) + len(self.inversores_modelo)
+
+    def inicio_faixa_cc(self, potencia_cc_kw):
+        """Primeiro índice de inversor com potência CC máxima >= `potencia_cc_kw` (aceita arrays)."""
+        return np.searchsorted(self.inversores["potencia_cc_max_kw"], potencia_cc_kw, "left")
+
+    def preco_minimo_inversor(self, potencia_cc_kw):
+        """Menor preço de um inversor que aguenta `potencia_cc_kw` sem sair da relação CC/CA mínima (inf se nenhum).
+
+        Aceita arrays: é uma busca binária nos extremos das janelas de potência.
+        """
+        trecho = np.searchsorted(self._extremos_janela, potencia_cc_kw, "right") - 1
+        return np.where(trecho >= 0, self._preco_min_janela[np.maximum(trecho, 0)], np.inf)
+
+    def limites_string(self, painel, inicio=0):
+        """(mínimo, máximo) de painéis por string e strings por MPPT, para os inversores a partir de `inicio`."""
+        p = {c: v[painel] for c, v in self.paineis.items()}
+        inv = {c: v[inicio:] for c, v in self.inversores.items()}
+        voc_frio = _tensao(p["voc"], p["coef_voc"], TEMPERATURA_CELULA_MIN_C)
+        # A Imp quase não varia com a temperatura: a Vmp acompanha o coeficiente da Pmax, não o da Voc
+        vmp_frio = _tensao(p["vmp"], p["coef_pmax"], TEMPERATURA_CELULA_MIN_C)
+        vmp_quente = _tensao(p["vmp"], p["coef_pmax"], TEMPERATURA_CELULA_MAX_C)
+        comprimento_max = np.floor(np.minimum(inv["tensao_max_cc"] / voc_frio, inv["mppt_max"] / vmp_frio))
+        comprimento_min = np.ceil(np.maximum(inv["mppt_min"], inv["tensao_partida"]) / vmp_quente)
+        strings_por_mppt = np.minimum(inv["strings_por_mppt"], np.floor(inv["corrente_max_mppt"] / p["imp"]))
+        return comprimento_min, comprimento_max, strings_por_mppt
+
+
+def _strings_minimas(n_paineis, comprimento_min, comprimento_max, strings_por_mppt, entradas):
+    """Menor número de strings que distribui `n_paineis` respeitando os limites (0 = impossível).
+
+    Com T strings, os comprimentos são L = n // T (T - r strings) e L + 1
+    (r strings); cada MPPT recebe strings de um único comprimento.
+    """
+    maximo = int(np.max(strings_por_mppt * entradas, initial=0))
+    if maximo < 1:
+        return np.zeros(len(comprimento_min), dtype=np.int64)
+    t = np.arange(1, min(maximo, n_paineis) + 1)[None, :]
+    comprimento, resto = n_paineis // t, n_paineis % t
+    s = np.maximum(strings_por_mppt, 1)[:, None]
+    mppts = np.ceil(resto / s) + np.ceil((t - resto) / s)
+    valido = ((t <= (strings_por_mppt * entradas)[:, None])
+              & (comprimento >= comprimento_min[:, None])
+              & (comprimento + (resto > 0) <= comprimento_max[:, None])
+              & (mppts <= entradas[:, None]))
+    return np.where(valido.any(axis=1), valido.argmax(axis=1) + 1, 0)
+
+
+def configurar_sistema(potencia_alvo_wp, catalogo=None, folga_paineis=FOLGA_PAINEIS,
+                       quantidade_maxima=QUANTIDADE_MAXIMA_INVERSORES, potencia_maxima_wp=None):
+    """Lista de materiais mais barata com potência CC >= `potencia_alvo_wp`, ou None se nada couber.
+
+    Sem `potencia_maxima_wp`, a busca pode somar até `folga_paineis` painéis
+    para fechar as strings (um sistema pequeno pode sair bem maior que o
+    alvo); com ele, candidatos acima dessa potência são descartados.
+    """
+    catalogo = catalogo or carregar_catalogo()
+    paineis, inversores = catalogo.paineis, catalogo.inversores
+    custo_por_painel = paineis["preco"] + CUSTO_ESTRUTURA_POR_PAINEL
+
+    # Candidatos (painel, quantidade) com o limite inferior de custo: painéis + inversor mais barato que aguenta
+    # a potência dentro da janela CC/CA (sem a janela, sistemas pequenos expandiriam quase todo candidato)
+    base = np.maximum(np.ceil(potencia_alvo_wp / paineis["potencia_wp"] - 1e-9), 1)
+    quantidade = base[:, None] + np.arange(folga_paineis + 1)[None, :]
+    potencia_cc = quantidade * paineis["potencia_wp"][:, None] / 1000
+    q = np.arange(1, quantidade_maxima + 1)[:, None, None]
+    limite_inferior = (quantidade * custo_por_painel[:, None]
+                       + np.min(q * catalogo.preco_minimo_inversor(potencia_cc[None] / q), axis=0)
+                       + CUSTO_POR_STRING)
+    if potencia_maxima_wp is not None:
+        limite_inferior = np.where(potencia_cc * 1000 <= potencia_maxima_wp + 1e-6, limite_inferior, np.inf)
+    ordem = np.argsort(limite_inferior, axis=None, kind="stable")
+
+    melhor, melhor_custo = None, math.inf
+    for posicao in ordem:
+        if limite_inferior.flat[posicao] >= melhor_custo:
+            break  # os demais candidatos só podem custar mais
+        painel, extra = divmod(int(posicao), folga_paineis + 1)
+        n = int(quantidade[painel, extra])
+        custo_paineis = n * custo_por_painel[painel]
+        for qtd in range(1, quantidade_maxima + 1):
+            if custo_paineis + qtd * catalogo.preco_minimo_inversor(potencia_cc[painel, extra] / qtd) \
+                    + CUSTO_POR_STRING >= melhor_custo:
+                continue
+            inicio = int(catalogo.inicio_faixa_cc(potencia_cc[painel, extra] / qtd))
+            cabe = potencia_cc[painel, extra] >= RELACAO_CC_CA_MIN * qtd * inversores["potencia_ca_kw"][inicio:]
+            comprimento_min, comprimento_max, strings_por_mppt = catalogo.limites_string(painel, inicio)
+            strings = _strings_minimas(n, comprimento_min, comprimento_max, strings_por_mppt,
+                                       qtd * inversores["n_mppt"][inicio:])
+            custo = np.where(cabe & (strings > 0),
+                             custo_paineis + qtd * inversores["preco"][inicio:] + strings * CUSTO_POR_STRING, np.inf)
+            k = int(np.argmin(custo))
+            if custo[k] < melhor_custo:
+                melhor_custo = float(custo[k])
+                melhor = (painel, n, inicio + k, qtd, int(strings[k]))
+
+    if melhor is None:
+        return None
+    painel, n, inversor, qtd, total_strings = melhor
+    comprimento, resto = divmod(n, total_strings)
+    strings = [(total_strings - resto, comprimento)] + ([(resto, comprimento + 1)] if resto else [])
+    voc_frio = _tensao(paineis["voc"][painel], paineis["coef_voc"][painel], TEMPERATURA_CELULA_MIN_C)
+    return ListaMateriais(
+        painel=catalogo.paineis_modelo[painel],
+        potencia_painel_wp=float(paineis["potencia_wp"][painel]),
+        area_painel_m2=float(paineis["area_m2"][painel]),
+        numero_paineis=n,
+        inversor=catalogo.inversores_modelo[inversor],
+        quantidade_inversores=qtd,
+        potencia_ca_kw=float(inversores["potencia_ca_kw"][inversor]),
+        strings=strings,
+        tensao_string_max_v=round(float(max(c for _, c in strings) * voc_frio), 1),
+        custos={
+            "paineis": float(n * paineis["preco"][painel]),
+            "inversores": float(qtd * inversores["preco"][inversor]),
+            "estruturas": n * CUSTO_ESTRUTURA_POR_PAINEL,
+            "strings": total_strings * CUSTO_POR_STRING,
+        },
+    )
+
+
+def _ler_csv(caminho):
+    with open(caminho, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+@functools.lru_cache(maxsize=None)
+def carregar_catalogo(pasta=None):
+    """Catálogo compartilhado do processo (SOLARSIM_CATALOGO aponta outra pasta com os dois CSVs)."""
+    pasta = Path(pasta or os.environ.get("SOLARSIM_CATALOGO") or PASTA_DADOS)
+    return Catalogo(_ler_csv(pasta / "paineis.csv"), _ler_csv(pasta / "inversores.csv"))
@@ -0,0 +1,193 @@
+"""Fluxo de caixa mensal (25 anos) vetorizado: VPL, TIR e paybacks.
+
+Cada cenário é uma linha; todas as entradas aceitam escalares ou arrays
+que se combinam por broadcasting. A TIR de todos os cenários é resolvida
+de uma vez (Newton com salvaguarda por bisseção), sem laço por linha.
+
+O modelo considera reajuste anual da tarifa, degradação dos painéis, troca
+do inversor e a transição do Fio B da Lei 14.300: a parcela Fio B da TUSD
+passa a ser cobrada sobre a energia compensada de forma escalonada.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from solarsim.constantes import FATOR_SAZONAL_MENSAL
+from solarsim.horario import DIAS_MES, compensar_mensal
+
+# Percentual do Fio B cobrado sobre a energia compensada (Lei 14.300, art. 27).
+# A partir de 2029 vale a regra a ser definida pela ANEEL; assumimos 100%.
+FIO_B_ESCALONAMENTO = {2023: 0.15, 2024: 0.30, 2025: 0.45, 2026: 0.60, 2027: 0.75, 2028: 0.90}
+FIO_B_APOS_TRANSICAO = 1.0
+# Sistemas com direito adquirido (pedido até 07/01/2023) ficam isentos até 2045
+FIO_B_FIM_ISENCAO = 2046
+
+ANOS_PADRAO = 25
+REAJUSTE_TARIFA_ANUAL = 0.06
+DEGRADACAO_ANUAL = 0.005
+TAXA_DESCONTO_ANUAL = 0.10
+FRACAO_FIO_B_TARIFA = 0.28
+ANO_TROCA_INVERSOR = 12
+FRACAO_CUSTO_INVERSOR = 0.20
+
+# Intervalo de busca da TIR mensal (≈ -99,98% a +795% ao ano)
+TIR_MENSAL_MIN = -0.5
+TIR_MENSAL_MAX = 0.2
+
+
+@dataclass
+class ResultadoFluxoCaixa:
+    """Fluxos (cenários × meses+1, mês 0 = investimento) e indicadores por cenário."""
+    fluxos: np.ndarray
+    economia: np.ndarray
+    vpl: np.ndarray
+    tir_anual: np.ndarray
+    payback_simples_meses: np.ndarray
+    payback_descontado_meses: np.ndarray
+
+
+def percentual_fio_b(anos_calendario, direito_adquirido=False):
+    """Fração do Fio B cobrada em cada ano civil (array)."""
+    anos_calendario = np.asarray(anos_calendario)
+    percentual = np.full(anos_calendario.shape, FIO_B_APOS_TRANSICAO)
+    for ano, valor in FIO_B_ESCALONAMENTO.items():
+        percentual[anos_calendario == ano] = valor
+    percentual[anos_calendario < min(FIO_B_ESCALONAMENTO)] = 0.0
+    direito_adquirido = np.asarray(direito_adquirido, dtype=bool)[..., None]
+    return np.where(direito_adquirido & (anos_calendario < FIO_B_FIM_ISENCAO), 0.0, percentual)
+
+
+def _payback(fluxos_acumulados):
+    """Primeiro mês em que o acumulado fica >= 0 (NaN se nunca)."""
+    positivo = fluxos_acumulados >= 0
+    mes = np.argmax(positivo, axis=-1).astype(float)
+    mes[~positivo.any(axis=-1)] = np.nan
+    return mes
+
+
+def _vpl_mensal(fluxos, taxa_mensal, meses):
+    return np.sum(fluxos * np.exp(-meses * np.log1p(taxa_mensal)[..., None]), axis=-1)
+
+
+def tir_lote(fluxos, iteracoes=100, tolerancia=1e-10):
+    """TIR mensal de cada linha de `fluxos` (eixo final = meses), resolvida em lote.
+
+    Usa Newton-Raphson para todas as linhas ao mesmo tempo e recai na
+    bisseção quando o passo sai do intervalo que contém a raiz. Linhas sem
+    troca de sinal no VPL recebem NaN.
+    """
+    fluxos = np.atleast_2d(np.asarray(fluxos, dtype=float))
+    meses = np.arange(fluxos.shape[-1], dtype=float)
+    baixo = np.full(fluxos.shape[:-1], TIR_MENSAL_MIN)
+    alto = np.full(fluxos.shape[:-1], TIR_MENSAL_MAX)
+    f_baixo = _vpl_mensal(fluxos, baixo, meses)
+    valido = np.sign(f_baixo) != np.sign(_vpl_mensal(fluxos, alto, meses))
+
+    # Chute inicial de anuidade: retorno médio mensal sobre o investimento
+    investido = -np.minimum(fluxos, 0).sum(axis=-1)
+    retorno = np.maximum(fluxos, 0).sum(axis=-1) / max(fluxos.shape[-1] - 1, 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        taxa = np.clip(retorno / investido - 1 / max(fluxos.shape[-1] - 1, 1), -0.1, 0.5)
+    taxa = np.where(np.isfinite(taxa), taxa, 0.01)
+
+    # Só as linhas ainda não convergidas seguem iterando
+    ativas = np.flatnonzero(valido)
+    for _ in range(iteracoes):
+        if not len(ativas):
+            break
+        fl, t = fluxos[ativas], taxa[ativas]
+        desconto = np.exp(-meses * np.log1p(t)[:, None])
+        f = np.sum(fl * desconto, axis=-1)
+        derivada = np.sum(-meses * fl * desconto, axis=-1) / (1 + t)
+
+        # Mantém o intervalo [baixo, alto] com troca de sinal
+        mesmo_sinal = np.sign(f) == np.sign(f_baixo[ativas])
+        baixo[ativas] = np.where(mesmo_sinal, t, baixo[ativas])
+        f_baixo[ativas] = np.where(mesmo_sinal, f, f_baixo[ativas])
+        alto[ativas] = np.where(mesmo_sinal, alto[ativas], t)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            nova = t - f / derivada
+        fora = ~np.isfinite(nova) | (nova < baixo[ativas]) | (nova > alto[ativas])
+        nova = np.where(fora, (baixo[ativas] + alto[ativas]) / 2, nova)
+        taxa[ativas] = nova
+        ativas = ativas[np.abs(nova - t) >= tolerancia]
+
+    return np.where(valido, taxa, np.nan)
+
+
+def calcular_fluxo_caixa(
+    custo_inicial,
+    geracao_mensal_kwh,
+    consumo_mensal_kwh,
+    tarifa,
+    minimo_kwh=50,
+    anos=ANOS_PADRAO,
+    ano_inicio=2026,
+    reajuste_tarifa_anual=REAJUSTE_TARIFA_ANUAL,
+    degradacao_anual=DEGRADACAO_ANUAL,
+    taxa_desconto_anual=TAXA_DESCONTO_ANUAL,
+    fracao_fio_b=FRACAO_FIO_B_TARIFA,
+    fracao_autoconsumo=0.0,
+    direito_adquirido=False,
+    ano_troca_inversor=ANO_TROCA_INVERSOR,
+    fracao_custo_inversor=FRACAO_CUSTO_INVERSOR,
+    fatores_mensais=FATOR_SAZONAL_MENSAL,
+    calcular_tir=True,
+):
+    """Fluxo de caixa mensal de muitos cenários de uma vez.
+
+    `geracao_mensal_kwh` é a geração média mensal do 1º ano (como em
+    `calcular_sistema_solar`), distribuída pelos `fatores_mensais` (None =
+    geração constante; um array cenários × 12 dá a sazonalidade de cada
+    cenário). A fração `fracao_autoconsumo` da geração é consumida na hora e
+    não paga Fio B; o restante é injetado e compensado pelo banco de
+    créditos (60 meses, taxa mínima todo mês). Com
+    `calcular_tir=False` a TIR (a parte mais cara) não é calculada.
+    """
+    (custo_inicial, geracao_mensal_kwh, consumo_mensal_kwh, tarifa, minimo_kwh,
+     reajuste_tarifa_anual, degradacao_anual, taxa_desconto_anual, fracao_fio_b,
+     fracao_autoconsumo, direito_adquirido, fracao_custo_inversor) = np.broadcast_arrays(*(
+        np.atleast_1d(np.asarray(v, dtype=float)) for v in (
+            custo_inicial, geracao_mensal_kwh, consumo_mensal_kwh, tarifa, minimo_kwh,
+            reajuste_tarifa_anual, degradacao_anual, taxa_desconto_anual, fracao_fio_b,
+            fracao_autoconsumo, direito_adquirido, fracao_custo_inversor)
+    ))
+    n_meses = anos * 12
+    mes = np.arange(n_meses)
+    ano = mes // 12
+
+    if fatores_mensais is None:
+        fator_mes = np.ones(n_meses)
+    else:
+        fator_mes = np.tile(np.asarray(fatores_mensais, dtype=float) * DIAS_MES / 30, anos)
+    geracao = geracao_mensal_kwh[:, None] * fator_mes * (1 - degradacao_anual[:, None]) ** ano
+    consumo = np.broadcast_to(consumo_mensal_kwh[:, None], geracao.shape)
+    autoconsumo = np.minimum(geracao * fracao_autoconsumo[:, None], consumo)
+    usados, _, _, faturado = compensar_mensal(geracao - autoconsumo, consumo - autoconsumo, minimo_kwh)
+
+    tarifa_mes = tarifa[:, None] * (1 + reajuste_tarifa_anual[:, None]) ** ano
+    fio_b = usados * tarifa_mes * fracao_fio_b[:, None] * percentual_fio_b(ano_inicio + ano, direito_adquirido)
+    fatura_sem_solar = np.maximum(consumo, minimo_kwh[:, None]) * tarifa_mes
+    economia = fatura_sem_solar - (faturado * tarifa_mes + fio_b)
+
+    fluxos = np.empty((len(custo_inicial), n_meses + 1))
+    fluxos[:, 0] = -custo_inicial
+    fluxos[:, 1:] = economia
+    if 0 < ano_troca_inversor < anos:
+        fluxos[:, 12 * ano_troca_inversor] -= custo_inicial * fracao_custo_inversor
+
+    taxa_mensal = (1 + taxa_desconto_anual) ** (1 / 12) - 1
+    meses_fluxo = np.arange(n_meses + 1)
+    descontados = fluxos * np.exp(-meses_fluxo * np.log1p(taxa_mensal)[:, None])
+
+    tir_mensal = tir_lote(fluxos) if calcular_tir else np.full(len(fluxos), np.nan)
+    return ResultadoFluxoCaixa(
+        fluxos=fluxos,
+        economia=economia,
+        vpl=descontados.sum(axis=-1),
+        tir_anual=(1 + tir_mensal) ** 12 - 1,
+        payback_simples_meses=_payback(np.cumsum(fluxos, axis=-1)),
+        payback_descontado_meses=_payback(np.cumsum(descontados, axis=-1)),
+    )
@@ -0,0 +1,84 @@
+"""Gráficos do SolarSim. pandas e altair são importados só quando um gráfico é montado."""
+
+from solarsim.constantes import FATOR_SAZONAL_MENSAL, MESES
+from solarsim.horario import simular_sistema
+from solarsim.instrumentacao import span
+
+
+def montar_comparativo(geracao_mensal, consumo, minimo_kwh, tarifa, faixa=None,
+                       fatores_mensais=FATOR_SAZONAL_MENSAL, carga_h=None, geracao_h=None):
+    """Simulação hora a hora (12 meses) + especificação Vega-Lite do gráfico comparativo.
+
+    `faixa` opcional: par (P10, P90) da geração de cada mês, desenhado como banda.
+    `fatores_mensais`: sazonalidade regional do município.
+    `carga_h` opcional: carga real hora a hora (8760), ex.: do medidor; sem
+    ela o consumo é uma linha plana.
+    `geracao_h` opcional: geração hora a hora (8760) do telhado informado
+    (`perfil_horario_telhado`); sem ela, `geracao_mensal` com a sazonalidade.
+    """
+    with span("grafico.importar_altair_pandas"):
+        import altair as alt
+        import pandas as pd
+
+    with span("grafico.simulacao_horaria"):
+        simulacao = simular_sistema(geracao_mensal / 30, consumo, minimo_kwh, tarifa,
+                                    carga_h=carga_h, fatores_mensais=fatores_mensais, geracao_h=geracao_h)
+
+    domain_ = ["Consumo (kWh)", "Geração Solar (kWh)"]
+    range_ = ["#FF4B4B", "#0068C9"] 
+
+    with span("grafico.dataframe_melt"):
+        df = pd.DataFrame({
+            "Mês": MESES,
+            "Consumo (kWh)": simulacao.consumo.tolist(),
+            "Geração Solar (kWh)": simulacao.geracao.tolist()
+        }).melt("Mês", var_name="Categoria", value_name="Energia (kWh)")
+    
+    grafico = alt.Chart(df).mark_line(point=True).encode(
+        x=alt.X("Mês", sort=MESES),
+        y=alt.Y("Energia (kWh)", title="Energia Mensal (kWh)"),
+        color=alt.Color("Categoria", scale=alt.Scale(domain=domain_, range=range_)),
+        tooltip=["Mês","Categoria","Energia (kWh)"]
+    )
+
+    if faixa is not None:
+        df_faixa = pd.DataFrame({"Mês": MESES, "Geração P10 (kWh)": list(faixa[0]), "Geração P90 (kWh)": list(faixa[1])})
+        banda = alt.Chart(df_faixa).mark_area(opacity=0.2, color=range_[1]).encode(
+            x=alt.X("Mês", sort=MESES),
+            y="Geração P10 (kWh)",
+            y2="Geração P90 (kWh)",
+            tooltip=["Mês", "Geração P10 (kWh)", "Geração P90 (kWh)"]
+        )
+        grafico = alt.layer(banda, grafico)
+
+    grafico = grafico.properties(height=350, title="📊 Comparativo Mensal: Consumo x Geração Solar").interactive()
+
+    with span("grafico.altair_to_dict"):
+        especificacao = grafico.to_dict()
+    return simulacao, especificacao
+
+
+def montar_comparativo_cenarios(resultados):
+    """Especificação Vega-Lite do fluxo de caixa acumulado (R$) ano a ano de cada cenário salvo.
+
+    `resultados`: dict nome -> ResultadoCenario (de `ColecaoCenarios.resultados()`).
+    """
+    with span("grafico.importar_altair_pandas"):
+        import altair as alt
+        import pandas as pd
+
+    df = pd.DataFrame([
+        {"Cenário": nome, "Ano": ano, "Fluxo de caixa acumulado (R$)": float(valor)}
+        for nome, r in resultados.items() for ano, valor in enumerate(r.fluxo_acumulado_anual)
+    ])
+    linhas = alt.Chart(df).mark_line(point=True).encode(
+        x=alt.X("Ano:Q", title="Ano"),
+        y=alt.Y("Fluxo de caixa acumulado (R$):Q"),
+        color="Cenário:N",
+        tooltip=["Cenário", "Ano", alt.Tooltip("Fluxo de caixa acumulado (R$):Q", format=",.0f")]
+    )
+    zero = alt.Chart(pd.DataFrame({"y": [0]})).mark_rule(color="gray", strokeDash=[4, 4]).encode(y="y:Q")
+    grafico = alt.layer(zero, linhas).properties(height=350, title="📈 Cenários: fluxo de caixa acumulado")
+
+    with span("grafico.altair_to_dict"):
+        return grafico.interactive().to_dict()
@@ -0,0 +1,203 @@
+"""Simulação horária (8760 passos/ano) de geração x carga com banco de créditos.
+
+Tudo é vetorizado sobre cenários: as entradas podem ter um eixo inicial de
+cenários e o eixo final é sempre o de horas. A compensação segue as regras
+exibidas no site: créditos valem 60 meses e a taxa mínima (`minimo_kwh`) é
+cobrada todo mês.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from solarsim.constantes import FATOR_SAZONAL_MENSAL
+
+DIAS_MES = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+HORAS_ANO = 24 * int(DIAS_MES.sum())
+VALIDADE_CREDITOS_MESES = 60
+
+# Início (em horas) de cada mês do ano
+_INICIO_MES_H = np.concatenate(([0], np.cumsum(DIAS_MES * 24)[:-1]))
+
+
+def _forma_diaria():
+    """Curva de geração normalizada (soma 1) entre 6h e 18h."""
+    horas = np.arange(24) + 0.5
+    forma = np.clip(np.sin(np.pi * (horas - 6) / 12), 0, None)
+    return forma / forma.sum()
+
+
+FORMA_DIARIA = _forma_diaria()
+
+
+@dataclass
+class ResultadoCompensacao:
+    """Séries mensais (eixo final = meses) da simulação de compensação."""
+    geracao: np.ndarray
+    consumo: np.ndarray
+    autoconsumo: np.ndarray
+    injetada: np.ndarray
+    importada: np.ndarray
+    creditos_usados: np.ndarray
+    creditos_expirados: np.ndarray
+    saldo_creditos: np.ndarray
+    kwh_faturado: np.ndarray
+    fatura: np.ndarray
+    fatura_sem_solar: np.ndarray
+
+    @property
+    def economia(self):
+        return self.fatura_sem_solar - self.fatura
+
+
+def perfil_geracao_horario(geracao_diaria_kwh, anos=1, fatores_mensais=FATOR_SAZONAL_MENSAL):
+    """Geração horária (kWh) a partir da geração diária média e dos fatores sazonais.
+
+    `geracao_diaria_kwh` pode ser escalar ou um array de cenários; o resultado
+    tem shape (..., 8760 * anos).
+    """
+    geracao_diaria_kwh = np.asarray(geracao_diaria_kwh, dtype=float)
+    fatores = np.asarray(fatores_mensais, dtype=float)
+    ano = np.repeat(fatores, DIAS_MES * 24) * np.tile(FORMA_DIARIA, HORAS_ANO // 24)
+    return geracao_diaria_kwh[..., None] * np.tile(ano, anos)
+
+
+def perfil_carga_plano(consumo_mensal_kwh, anos=1):
+    """Carga horária constante, com o mesmo total em todos os meses."""
+    consumo_mensal_kwh = np.asarray(consumo_mensal_kwh, dtype=float)
+    por_hora = np.repeat(1.0 / (DIAS_MES * 24), DIAS_MES * 24)
+    return consumo_mensal_kwh[..., None] * np.tile(por_hora, anos)
+
+
+def somar_por_mes(serie_horaria):
+    """Agrega uma série horária (eixo final múltiplo de 8760) em totais mensais."""
+    serie_horaria = np.asarray(serie_horaria, dtype=float)
+    anos = serie_horaria.shape[-1] // HORAS_ANO
+    inicios = (_INICIO_MES_H[None, :] + HORAS_ANO * np.arange(anos)[:, None]).ravel()
+    return np.add.reduceat(serie_horaria, inicios, axis=-1)
+
+
+def compensar_mensal(injetada, importada, minimo_kwh, validade_meses=VALIDADE_CREDITOS_MESES,
+                     creditos_iniciais=None):
+    """Liquida mês a mês a energia injetada/importada contra o banco de créditos.
+
+    A energia injetada no mês compensa primeiro o consumo do próprio mês e
+    depois o banco é consumido do crédito mais antigo para o mais novo. A
+    compensação nunca reduz o faturamento abaixo de `minimo_kwh`; o que
+    sobra vira crédito, que expira após `validade_meses`.
+
+    Retorna (creditos_usados, creditos_expirados, saldo_creditos, kwh_faturado),
+    todos com o shape de `injetada` (eixo final = meses).
+    """
+    injetada, importada = np.broadcast_arrays(np.asarray(injetada, float), np.asarray(importada, float))
+    cenarios = injetada.shape[:-1]
+    n_meses = injetada.shape[-1]
+    minimo = np.broadcast_to(np.asarray(minimo_kwh, float), cenarios)
+
+    # Como o banco é FIFO, basta acompanhar o total depositado (acumulado por
+    # mês) e o total que já saiu (usado ou expirado): no fim do mês t, tudo o
+    # que foi depositado até t - validade e ainda não saiu expira.
+    depositado = np.zeros(cenarios + (n_meses + 1,))
+    if creditos_iniciais is not None:
+        depositado[..., 0] = creditos_iniciais
+    saiu = np.zeros(cenarios)
+
+    usados = np.empty(injetada.shape)
+    expirados = np.empty(injetada.shape)
+    saldo = np.empty(injetada.shape)
+    faturado = np.empty(injetada.shape)
+
+    for m in range(n_meses):
+        compensavel = np.maximum(importada[..., m] - minimo, 0.0)
+        do_mes = np.minimum(injetada[..., m], compensavel)
+        do_banco = np.minimum(compensavel - do_mes, depositado[..., m] - saiu)
+        saiu += do_banco
+
+        if m + 1 >= validade_meses:
+            vencido = np.maximum(depositado[..., m + 1 - validade_meses] - saiu, 0.0)
+            saiu += vencido
+            expirados[..., m] = vencido
+        else:
+            expirados[..., m] = 0.0
+        depositado[..., m + 1] = depositado[..., m] + injetada[..., m] - do_mes
+
+        usados[..., m] = do_mes + do_banco
+        faturado[..., m] = np.maximum(importada[..., m] - do_banco - do_mes, minimo)
+        saldo[..., m] = depositado[..., m + 1] - saiu
+
+    return usados, expirados, saldo, faturado
+
+
+def simular_compensacao(geracao_h, carga_h, minimo_kwh, tarifa,
+                        validade_meses=VALIDADE_CREDITOS_MESES, creditos_iniciais=None):
+    """Simula hora a hora o balanço geração x carga e, mês a mês, o banco de créditos
+    (ver `compensar_mensal`)."""
+    geracao_h, carga_h = np.broadcast_arrays(np.asarray(geracao_h, float), np.asarray(carga_h, float))
+    if geracao_h.shape[-1] % HORAS_ANO:
+        raise ValueError(f"O eixo de horas deve ser múltiplo de {HORAS_ANO}.")
+
+    autoconsumo_h = np.minimum(geracao_h, carga_h)
+    geracao = somar_por_mes(geracao_h)
+    consumo = somar_por_mes(carga_h)
+    autoconsumo = somar_por_mes(autoconsumo_h)
+    injetada = geracao - autoconsumo
+    importada = consumo - autoconsumo
+
+    minimo = np.broadcast_to(np.asarray(minimo_kwh, float), geracao.shape[:-1])
+    tarifa = np.asarray(tarifa, float)[..., None]
+    usados, expirados, saldo, faturado = compensar_mensal(
+        injetada, importada, minimo, validade_meses, creditos_iniciais
+    )
+
+    return ResultadoCompensacao(
+        geracao=geracao,
+        consumo=consumo,
+        autoconsumo=autoconsumo,
+        injetada=injetada,
+        importada=importada,
+        creditos_usados=usados,
+        creditos_expirados=expirados,
+        saldo_creditos=saldo,
+        kwh_faturado=faturado,
+        fatura=faturado * tarifa,
+        fatura_sem_solar=np.maximum(consumo, minimo[..., None]) * tarifa,
+    )
+
+
+def simular_sistema(geracao_diaria_kwh, consumo_mensal_kwh, minimo_kwh, tarifa, anos=1, carga_h=None,
+                    fatores_mensais=FATOR_SAZONAL_MENSAL, geracao_h=None):
+    """Atalho: perfil de geração (sazonal ou informado) + carga (plana ou informada) + compensação.
+
+    `geracao_h` opcional (8760), ex.: `rendimento.perfil_horario_telhado`,
+    substitui o perfil montado a partir de `geracao_diaria_kwh`.
+    """
+    if geracao_h is None:
+        geracao_h = perfil_geracao_horario(geracao_diaria_kwh, anos, fatores_mensais)
+    else:
+        geracao_h = np.asarray(geracao_h, dtype=float)
+        if geracao_h.shape[-1] == HORAS_ANO and anos > 1:
+            geracao_h = np.tile(geracao_h, anos)
+    if carga_h is None:
+        carga_h = perfil_carga_plano(consumo_mensal_kwh, anos)
+    else:
+        carga_h = np.asarray(carga_h, dtype=float)
+        if carga_h.shape[-1] == HORAS_ANO and anos > 1:
+            carga_h = np.tile(carga_h, anos)
+    return simular_compensacao(geracao_h, carga_h, minimo_kwh, tarifa)
+
+
+def simular_lote(geracao_diaria_kwh, consumo_mensal_kwh, minimo_kwh, tarifa, anos=1, bloco=500):
+    """Processa muitos cenários em blocos para limitar a memória (8760 × anos × bloco)."""
+    geracao_diaria_kwh, consumo_mensal_kwh, minimo_kwh, tarifa = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(v, dtype=float)) for v in
+          (geracao_diaria_kwh, consumo_mensal_kwh, minimo_kwh, tarifa))
+    )
+    partes = []
+    for i in range(0, len(geracao_diaria_kwh), bloco):
+        fatia = slice(i, i + bloco)
+        partes.append(simular_sistema(geracao_diaria_kwh[fatia], consumo_mensal_kwh[fatia],
+                                      minimo_kwh[fatia], tarifa[fatia], anos))
+    return ResultadoCompensacao(**{
+        campo: np.concatenate([getattr(p, campo) for p in partes])
+        for campo in ResultadoCompensacao.__dataclass_fields__
+    })
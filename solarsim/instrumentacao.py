@@ -0,0 +1,124 @@
+"""Tempos de cada etapa de um rerun (spans), com exportação em JSON lines.
+
+O app.py abre um `Rerun` no início do script e marca as etapas em sequência
+com `rerun.etapa("nome")`; funções do pacote podem abrir spans aninhados com
+`with span("nome")`, que não custam nada quando não há rerun em andamento
+(jobs em lote, API). O rerun atual fica numa ContextVar, então cada sessão
+(cada thread do Streamlit) enxerga só os seus spans.
+
+Cada rerun finalizado vira uma linha JSON em SOLARSIM_SPANS_ARQUIVO (se
+definido), com o id da sessão e o número do rerun dentro dela. Com
+`perfil=True` o rerun inteiro também roda sob cProfile.
+"""
+
+import contextlib
+import contextvars
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import uuid
+
+ARQUIVO_SPANS = os.environ.get("SOLARSIM_SPANS_ARQUIVO")
+LINHAS_PERFIL = 25
+
+_RERUN_ATUAL = contextvars.ContextVar("solarsim_rerun", default=None)
+_lock_arquivo = threading.Lock()
+
+
+class Rerun:
+    """Spans de uma execução do script, relativos ao início do rerun."""
+
+    def __init__(self, sessao, numero, perfil=False):
+        self.sessao = sessao
+        self.numero = numero
+        self.spans = []  # (nome, início_s, duração_s, nível)
+        self.relatorio_perfil = None
+        self._inicio = time.perf_counter()
+        self._inicio_epoch = time.time()
+        self._etapa = None
+        self._nivel = 0
+        self._perfil = None
+        if perfil:
+            self._perfil = cProfile.Profile()
+            try:
+                self._perfil.enable()
+            except ValueError:  # outro profiler ativo neste processo
+                self._perfil = None
+                self.relatorio_perfil = "cProfile indisponível: outro profiler está ativo."
+        self._token = _RERUN_ATUAL.set(self)
+
+    def _agora(self):
+        return time.perf_counter() - self._inicio
+
+    def _fechar_etapa(self):
+        if self._etapa is not None:
+            nome, inicio = self._etapa
+            self.spans.append((nome, inicio, self._agora() - inicio, 0))
+            self._etapa = None
+
+    def etapa(self, nome):
+        """Encerra a etapa de nível 0 em andamento e começa `nome`."""
+        self._fechar_etapa()
+        self._etapa = (nome, self._agora())
+
+    @contextlib.contextmanager
+    def span(self, nome):
+        self._nivel += 1
+        inicio = self._agora()
+        try:
+            yield
+        finally:
+            self.spans.append((nome, inicio, self._agora() - inicio, self._nivel))
+            self._nivel -= 1
+
+    def finalizar(self, arquivo=ARQUIVO_SPANS):
+        """Fecha a última etapa, o cProfile e grava o registro (dict) no arquivo JSON lines."""
+        self._fechar_etapa()
+        total = self._agora()
+        if self._perfil is not None:
+            self._perfil.disable()
+            saida = io.StringIO()
+            pstats.Stats(self._perfil, stream=saida).sort_stats("cumulative").print_stats(LINHAS_PERFIL)
+            self.relatorio_perfil = saida.getvalue()
+            self._perfil = None
+        try:
+            _RERUN_ATUAL.reset(self._token)
+        except ValueError:  # finalizado em outro contexto
+            _RERUN_ATUAL.set(None)
+
+        registro = {
+            "sessao": self.sessao,
+            "rerun": self.numero,
+            "inicio": round(self._inicio_epoch, 3),
+            "total_ms": round(total * 1000, 3),
+            "perfil": self.relatorio_perfil is not None,
+            "spans": [{"nome": nome, "inicio_ms": round(inicio * 1000, 3), "duracao_ms": round(duracao * 1000, 3),
+                       "nivel": nivel} for nome, inicio, duracao, nivel in sorted(self.spans, key=lambda s: s[1])],
+        }
+        if arquivo:
+            linha = json.dumps(registro, ensure_ascii=False) + "\n"
+            with _lock_arquivo, open(arquivo, "a", encoding="utf-8") as f:
+                f.write(linha)
+        return registro
+
+
+def iniciar_rerun(estado, perfil=False):
+    """Abre o `Rerun` desta execução; `estado` é o session_state (guarda id e contagem de reruns)."""
+    anterior = _RERUN_ATUAL.get()
+    if anterior is not None and anterior._perfil is not None:
+        anterior._perfil.disable()  # rerun anterior interrompido pelo Streamlit antes de finalizar
+    if "_instr_sessao" not in estado:
+        estado["_instr_sessao"] = uuid.uuid4().hex[:12]
+        estado["_instr_reruns"] = 0
+    estado["_instr_reruns"] += 1
+    return Rerun(estado["_instr_sessao"], estado["_instr_reruns"], perfil=perfil)
+
+
+def span(nome):
+    """Span aninhado no rerun em andamento (sem efeito fora do Streamlit)."""
+    rerun = _RERUN_ATUAL.get()
+    return rerun.span(nome) if rerun is not None else contextlib.nullcontext()
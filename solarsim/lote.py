@@ -0,0 +1,172 @@
+"""Cálculo em lote (vetorizado) das calculadoras do SolarSim.
+
+Reproduz exatamente `calcular_sistema_solar` e `calcular_sistema_por_orcamento`
+para arrays NumPy ou DataFrames, devolvendo os resultados em colunas. Linhas
+que as funções escalares rejeitariam (consumo, tarifa, HSP ou custo do Wp
+ausente, HSP ou custo do Wp <= 0) não interrompem o lote: saem com 0 painéis e
+NaN nos demais campos, e `calcular_lote_df` explica o motivo na coluna `erro`.
+"""
+
+import numpy as np
+
+from solarsim.constantes import (
+    AREA_PAINEL_M2,
+    FATOR_EMISSAO_CO2_KWH,
+    POTENCIA_PAINEL_WP,
+    TAXA_DESEMPENHO,
+)
+
+# Coluna de saída -> (rótulo exibido no site, fração do custo total)
+REPARTICAO_CUSTOS = {
+    "custo_paineis": ("Painéis Fotovoltaicos", 0.40),
+    "custo_inversor": ("Inversor(es)", 0.20),
+    "custo_estruturas": ("Estruturas, Cabos e Proteções", 0.15),
+    "custo_mao_de_obra": ("Mão de Obra e Projeto", 0.25),
+}
+
+COLUNAS_ENTRADA = ("consumo", "tarifa", "hsp", "custo_wp", "orcamento")
+
+COLUNAS_SAIDA = (
+    "potencia_kwp",
+    "inversor_kw_recomendado",
+    "numero_paineis",
+    "area_m2",
+    "custo_total_estimado_site",
+    "economia_mensal_reais",
+    "co2_evitado_kg",
+    "geracao_mensal",
+    *REPARTICAO_CUSTOS,
+)
+
+
+def _arredondar(valores, casas):
+    """Equivalente vetorizado de round(x, casas) do Python (mesmo resultado bit a bit)."""
+    valores = np.asarray(valores, dtype=float)
+    escala = 10.0 ** casas
+    escalados = valores * escala
+    resultado = np.round(escalados) / escala
+    # rint(x*10^n)/10^n só diverge de round() quando x*10^n fica a um fio de .5
+    fracao = np.abs(escalados - np.trunc(escalados))
+    duvidosos = np.isfinite(valores) & (np.abs(fracao - 0.5) < 1e-6)
+    if duvidosos.any():
+        resultado[duvidosos] = [round(v, casas) for v in valores[duvidosos].tolist()]
+    return resultado
+
+
+def calcular_lote(consumo, tarifa, hsp, custo_wp, orcamento=None):
+    """Calcula o sistema para vários clientes de uma vez.
+
+    Linhas com `orcamento` finito e positivo usam a calculadora por orçamento;
+    as demais usam a calculadora por consumo. Retorna um dict de arrays.
+    """
+    consumo, tarifa, hsp, custo_wp = np.broadcast_arrays(
+        *(np.asarray(v, dtype=float) for v in (consumo, tarifa, hsp, custo_wp))
+    )
+    if orcamento is None:
+        orcamento = np.full(consumo.shape, np.nan)
+    else:
+        orcamento = np.broadcast_to(np.asarray(orcamento, dtype=float), consumo.shape)
+    usa_orcamento = np.isfinite(orcamento) & (orcamento > 0)
+    validas = linhas_validas(consumo, tarifa, hsp, custo_wp)
+    if not validas.all():
+        # Valores neutros nas linhas inválidas (mascaradas no fim) para não propagar inf/NaN nos cálculos
+        consumo, tarifa, hsp, custo_wp = (np.where(validas, v, 1.0) for v in (consumo, tarifa, hsp, custo_wp))
+
+    # Calculadora por Consumo (kWh -> R$)
+    consumo_diario_kwh = consumo / 30
+    potencia_necessaria_kwp = consumo_diario_kwh / (hsp * TAXA_DESEMPENHO)
+    potencia_necessaria_wp = potencia_necessaria_kwp * 1000
+    paineis_consumo = np.maximum(1, np.rint(potencia_necessaria_wp / POTENCIA_PAINEL_WP))
+    potencia_wp_consumo = paineis_consumo * POTENCIA_PAINEL_WP
+
+    # Calculadora por Orçamento (R$ -> kWh)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        potencia_wp_orcamento = orcamento / custo_wp
+    paineis_orcamento = np.maximum(1, np.rint(potencia_wp_orcamento / POTENCIA_PAINEL_WP))
+
+    potencia_final_sistema_wp = np.where(usa_orcamento, potencia_wp_orcamento, potencia_wp_consumo)
+    numero_paineis = np.where(validas, np.where(usa_orcamento, paineis_orcamento, paineis_consumo), 0).astype(np.int64)
+    potencia_kwp_final = potencia_final_sistema_wp / 1000
+    area_total_m2 = numero_paineis * AREA_PAINEL_M2
+    inversor_kw_rec = potencia_kwp_final / 1.25
+
+    geracao_diaria_kwh = potencia_kwp_final * hsp * TAXA_DESEMPENHO
+    geracao_mensal_kwh = geracao_diaria_kwh * 30
+    custo_total = np.where(usa_orcamento, orcamento, potencia_wp_consumo * custo_wp)
+    economia_mensal_reais = np.minimum(geracao_mensal_kwh, consumo) * tarifa
+    geracao_anual_kwh = geracao_mensal_kwh * 12
+    co2_evitado_anual_kg = geracao_anual_kwh * FATOR_EMISSAO_CO2_KWH
+
+    resultado = {
+        "potencia_kwp": _arredondar(potencia_kwp_final, 2),
+        "inversor_kw_recomendado": _arredondar(inversor_kw_rec, 2),
+        "numero_paineis": numero_paineis,
+        "area_m2": _arredondar(area_total_m2, 2),
+        "custo_total_estimado_site": custo_total,
+        "economia_mensal_reais": economia_mensal_reais,
+        "co2_evitado_kg": _arredondar(co2_evitado_anual_kg, 2),
+        "geracao_mensal": _arredondar(geracao_mensal_kwh, 2),
+    }
+    for coluna, (_, fracao) in REPARTICAO_CUSTOS.items():
+        resultado[coluna] = custo_total * fracao
+    if not validas.all():
+        for coluna, valores in resultado.items():
+            if coluna != "numero_paineis":
+                resultado[coluna] = np.where(validas, valores, np.nan)
+    return resultado
+
+
+def linhas_validas(consumo, tarifa, hsp, custo_wp):
+    """Máscara das linhas que as funções escalares aceitam (números finitos, HSP e custo do Wp > 0)."""
+    with np.errstate(invalid="ignore"):
+        return (np.isfinite(consumo) & np.isfinite(tarifa) & np.isfinite(hsp) & (hsp > 0)
+                & np.isfinite(custo_wp) & (custo_wp > 0))
+
+
+def _motivos_erro(colunas, positivas=("hsp", "custo_wp"), localizacao=None):
+    """Texto da coluna `erro`: nomes das entradas inválidas de cada linha ("" se a linha é válida).
+
+    Toda coluna precisa ser finita; as de `positivas`, também maiores que zero.
+    `localizacao` ({"cidade": máscara das linhas encontradas}) diz de onde
+    vieram hsp e custo_wp: numa linha não localizada o motivo é a cidade (ou
+    latitude/longitude), e não o HSP que faltou por causa dela.
+    """
+    if localizacao:
+        localizada = np.logical_and.reduce([np.asarray(m, bool) for m in localizacao.values()])
+        colunas = {**{nome: np.where(m, 1.0, np.nan) for nome, m in localizacao.items()},
+                   **{nome: np.where(localizada, v, 1.0) if nome in ("hsp", "custo_wp") else v
+                      for nome, v in colunas.items()}}
+    motivos = np.full(len(next(iter(colunas.values()))), "", dtype=object)
+    for nome, valores in colunas.items():
+        with np.errstate(invalid="ignore"):
+            invalida = ~np.isfinite(valores) | ((valores <= 0) if nome in positivas else False)
+        motivos[invalida] = motivos[invalida] + np.where(motivos[invalida] == "", "", ", ") + nome
+    return np.where(motivos == "", "", "entrada inválida: " + motivos.astype(str))
+
+
+def calcular_lote_df(df, hsp=None, custo_wp=None, localizacao=None):
+    """Versão para DataFrame: usa as colunas de COLUNAS_ENTRADA e devolve um DataFrame.
+
+    `hsp` e `custo_wp` servem de valor padrão quando a coluna não existe. Texto
+    que não é número vira NaN e a linha sai marcada na coluna `erro`;
+    `localizacao` é repassado a `_motivos_erro`.
+    """
+    import pandas as pd
+
+    def coluna(nome, padrao=None):
+        if nome in df.columns:
+            return pd.to_numeric(df[nome], errors="coerce").to_numpy(dtype=float)
+        if padrao is None:
+            raise KeyError(f"Coluna obrigatória ausente: {nome!r}")
+        return np.full(len(df), padrao, dtype=float)
+
+    entradas = {nome: coluna(nome, padrao) for nome, padrao in
+                (("consumo", None), ("tarifa", None), ("hsp", hsp), ("custo_wp", custo_wp))}
+    resultado = calcular_lote(**entradas, orcamento=coluna("orcamento", np.nan))
+    resultado["erro"] = _motivos_erro(entradas, localizacao=localizacao)
+    return pd.DataFrame(resultado, index=df.index)
+
+
+def custos_detalhados(linha):
+    """Monta o dict `custos_detalhados` (como nas funções escalares) a partir de uma linha do lote."""
+    return {rotulo: linha[coluna] for coluna, (rotulo, _) in REPARTICAO_CUSTOS.items()}
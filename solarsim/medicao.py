@@ -0,0 +1,331 @@
+"""Leitura em blocos de exportações de medidor (intervalos de 15 min) em perfis de carga.
+
+Os arquivos de clientes comerciais cobrem anos de leituras e chegam a
+centenas de MB. O CSV é lido em blocos de tamanho fixo e cada bloco é
+somado em acumuladores de tamanho fixo, então a memória não cresce com o
+arquivo:
+
+* hora do ano típico (8760 posições; 29/02 é somado a 28/02), que vira o
+  perfil horário usado na simulação (`simular_sistema(..., carga_h=...)`);
+* mês do calendário (ano × mês), para conferir cobertura e consumo real.
+
+Separador, vírgula decimal (com ponto de milhar, "1.234,5") e codificação
+(UTF-8 ou Latin-1, comum nas exportações das distribuidoras) são detectados
+pelo início do arquivo. Linhas sem data ou sem número válido são descartadas
+e contadas em `PerfilMedicao.descartadas`.
+
+O resultado fica num cache em disco endereçado pelo hash do conteúdo do
+arquivo (e das opções de leitura): reenviar o mesmo arquivo não relê o CSV.
+"""
+
+import codecs
+import hashlib
+import os
+import re
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from solarsim.horario import DIAS_MES, HORAS_ANO, somar_por_mes
+
+LINHAS_POR_BLOCO = 250_000
+INTERVALO_MIN_PADRAO = 15
+PASTA_CACHE = Path(os.environ.get("SOLARSIM_MEDICOES_CACHE",
+                                  Path(tempfile.gettempdir()) / "solarsim-medicoes"))
+
+_PADRAO_DATA = re.compile(r"data|date|timestamp|datetime|inicio|in[ií]cio|per[ií]odo", re.IGNORECASE)
+_PADRAO_HORA = re.compile(r"^(hora|time|horario|hor[áa]rio)$", re.IGNORECASE)
+_PADRAO_ENERGIA = re.compile(r"kwh|consumo|energia|ativa|valor|leitura|kw\b|demanda", re.IGNORECASE)
+
+
+@dataclass
+class PerfilMedicao:
+    """Perfis agregados de uma exportação de medidor.
+
+    `carga_h`: ano típico hora a hora (kWh, 8760 posições). `meses`: array
+    estruturado (ano, mes, kwh, leituras) com os meses do calendário cobertos.
+    """
+    carga_h: np.ndarray
+    meses: np.ndarray
+    leituras: int
+    inicio: str
+    fim: str
+    hash: str
+    descartadas: int = 0  # linhas sem data ou sem consumo numérico
+
+    @property
+    def mensal(self):
+        """Consumo de cada mês (Jan..Dez) do ano típico."""
+        return somar_por_mes(self.carga_h)
+
+    @property
+    def consumo_medio_mensal(self):
+        return float(self.carga_h.sum() / 12)
+
+    @property
+    def horario_medio(self):
+        """Curva diária média (24 posições) de cada mês: array 12 × 24."""
+        dias = np.repeat(np.arange(12), DIAS_MES)
+        por_dia = self.carga_h.reshape(-1, 24)
+        return np.stack([por_dia[dias == m].mean(axis=0) for m in range(12)])
+
+
+# --- LEITURA EM BLOCOS ---
+
+def _detectar_colunas(colunas, coluna_data, coluna_hora, coluna_kwh):
+    if coluna_data is None:
+        coluna_data = next((c for c in colunas if _PADRAO_DATA.search(c)), colunas[0])
+    if coluna_hora is None:
+        coluna_hora = next((c for c in colunas if c != coluna_data and _PADRAO_HORA.match(c.strip())), None)
+    if coluna_kwh is None:
+        restantes = [c for c in colunas if c not in (coluna_data, coluna_hora)]
+        if not restantes:
+            raise ValueError(f"Nenhuma coluna de consumo encontrada em {list(colunas)}")
+        coluna_kwh = next((c for c in restantes if _PADRAO_ENERGIA.search(c)), restantes[0])
+    return coluna_data, coluna_hora, coluna_kwh
+
+
+def _inicio_arquivo(origem, tamanho=4096):
+    if hasattr(origem, "read"):
+        inicio = origem.read(tamanho)
+        origem.seek(0)
+        return inicio
+    with open(origem, "rb") as f:
+        return f.read(tamanho)
+
+
+def detectar_codificacao(origem):
+    """"utf-8" se o início do arquivo é UTF-8 válido; senão "latin-1" (aceita qualquer byte)."""
+    inicio = _inicio_arquivo(origem, 1 << 16)
+    if isinstance(inicio, str):
+        return "utf-8"
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(inicio, final=False)  # o bloco pode cortar um caractere
+    except UnicodeDecodeError:
+        return "latin-1"
+    return "utf-8"
+
+
+def detectar_formato(origem):
+    """(sep, decimal) pelas primeiras linhas: ';' com vírgula decimal (padrão brasileiro) ou ','."""
+    inicio = _inicio_arquivo(origem)
+    if isinstance(inicio, bytes):
+        inicio = inicio.decode("utf-8", errors="replace")
+    linhas = inicio.splitlines()[:2]
+    cabecalho = linhas[0] if linhas else ""
+    sep = ";" if cabecalho.count(";") > cabecalho.count(",") else ("\t" if "\t" in cabecalho else ",")
+    decimal = "," if sep != "," and len(linhas) > 1 and re.search(r"\d,\d", linhas[1]) else "."
+    return sep, decimal
+
+
+def _hora_do_ano(datas):
+    """Índice 0..8759 no ano típico; 29/02 é somado a 28/02."""
+    dia = datas.dt.dayofyear.to_numpy() - 1
+    bissexto = datas.dt.is_leap_year.to_numpy()
+    dia = np.where(bissexto & (dia >= 59), dia - 1, dia)
+    return dia * 24 + datas.dt.hour.to_numpy()
+
+
+def agregar_csv(origem, sep=None, decimal=None, coluna_data=None, coluna_hora=None, coluna_kwh=None,
+                unidade="kwh", intervalo_min=INTERVALO_MIN_PADRAO, dayfirst=None, formato_data=None,
+                linhas_por_bloco=LINHAS_POR_BLOCO, encoding=None):
+    """Lê o CSV do medidor em blocos e devolve os acumuladores.
+
+    `unidade` "kwh": cada linha é a energia do intervalo; "kw": potência
+    média do intervalo (convertida com `intervalo_min`). Sem `sep`/`decimal`,
+    o formato é detectado pelo início do arquivo; com vírgula decimal, o ponto
+    é separador de milhar. Sem `encoding`, UTF-8 ou Latin-1 (se o arquivo não
+    for UTF-8 válido). Sem `dayfirst`, datas ISO (2024-01-31) são lidas como
+    ano-mês-dia e as demais como dia/mês/ano, o padrão das distribuidoras.
+    Retorna (soma_h, leituras_h, meses: dict (ano, mês) -> [kwh, leituras],
+    inicio, fim, descartadas).
+    """
+    if unidade not in ("kwh", "kw"):
+        raise ValueError(f"Unidade desconhecida: {unidade!r} (use kwh ou kw)")
+    opcoes = dict(sep=sep, decimal=decimal, coluna_data=coluna_data, coluna_hora=coluna_hora, coluna_kwh=coluna_kwh,
+                  unidade=unidade, intervalo_min=intervalo_min, dayfirst=dayfirst, formato_data=formato_data,
+                  linhas_por_bloco=linhas_por_bloco)
+    detectada = encoding is None
+    encoding = encoding or detectar_codificacao(origem)
+    try:
+        return _agregar_csv(origem, encoding=encoding, **opcoes)
+    except UnicodeDecodeError:
+        if not detectada or encoding == "latin-1":
+            raise
+        # Byte fora de UTF-8 depois do trecho usado na detecção: relê tudo como Latin-1
+        if hasattr(origem, "seek"):
+            origem.seek(0)
+        return _agregar_csv(origem, encoding="latin-1", **opcoes)
+
+
+def _agregar_csv(origem, sep, decimal, coluna_data, coluna_hora, coluna_kwh, unidade, intervalo_min, dayfirst,
+                 formato_data, linhas_por_bloco, encoding):
+    import pandas as pd
+
+    if sep is None or decimal is None:
+        sep_detectado, decimal_detectado = detectar_formato(origem)
+        sep, decimal = sep or sep_detectado, decimal or decimal_detectado
+    milhar = "." if decimal == "," else None
+    cabecalho = pd.read_csv(origem, sep=sep, nrows=0, encoding=encoding).columns.tolist()
+    if hasattr(origem, "seek"):
+        origem.seek(0)
+    coluna_data, coluna_hora, coluna_kwh = _detectar_colunas(cabecalho, coluna_data, coluna_hora, coluna_kwh)
+    fator = intervalo_min / 60 if unidade == "kw" else 1.0
+
+    soma_h = np.zeros(HORAS_ANO)
+    leituras_h = np.zeros(HORAS_ANO, dtype=np.int64)
+    meses = {}
+    inicio = fim = None
+    descartadas = 0
+    colunas = [c for c in (coluna_data, coluna_hora, coluna_kwh) if c is not None]
+    tipos = {c: str for c in (coluna_data, coluna_hora) if c is not None}
+    for bloco in pd.read_csv(origem, sep=sep, decimal=decimal, thousands=milhar, usecols=colunas, dtype=tipos,
+                             chunksize=linhas_por_bloco, encoding=encoding):
+        texto = bloco[coluna_data] if coluna_hora is None else bloco[coluna_data] + " " + bloco[coluna_hora]
+        if dayfirst is None and formato_data is None:
+            primeira = texto.dropna()
+            dayfirst = not (len(primeira) and re.match(r"\s*\d{4}-", primeira.iloc[0]))
+        datas = pd.to_datetime(texto, format=formato_data, dayfirst=bool(dayfirst), errors="coerce")
+        valores = bloco[coluna_kwh]
+        if valores.dtype == object:  # linhas com texto: converte o que for número
+            valores = valores.astype(str)
+            if milhar:
+                valores = valores.str.replace(milhar, "", regex=False)
+            valores = pd.to_numeric(valores.str.replace(decimal, ".", regex=False), errors="coerce")
+        valores = valores.to_numpy(float) * fator
+        validas = datas.notna().to_numpy() & np.isfinite(valores)
+        descartadas += int((~validas).sum())
+        if not validas.any():
+            continue
+        datas, valores = datas[validas], valores[validas]
+
+        posicao = _hora_do_ano(datas)
+        soma_h += np.bincount(posicao, valores, minlength=HORAS_ANO)
+        leituras_h += np.bincount(posicao, minlength=HORAS_ANO)
+
+        mes_absoluto = datas.dt.year.to_numpy() * 12 + datas.dt.month.to_numpy() - 1
+        unicos, inverso = np.unique(mes_absoluto, return_inverse=True)
+        kwh_mes = np.bincount(inverso, valores)
+        leituras_mes = np.bincount(inverso)
+        for chave, kwh, n in zip(unicos.tolist(), kwh_mes.tolist(), leituras_mes.tolist()):
+            acumulado = meses.setdefault(divmod(chave, 12), [0.0, 0])
+            acumulado[0] += kwh
+            acumulado[1] += n
+
+        menor, maior = datas.min(), datas.max()
+        inicio = menor if inicio is None or menor < inicio else inicio
+        fim = maior if fim is None or maior > fim else fim
+
+    if inicio is None:
+        raise ValueError("Nenhuma leitura válida (data e consumo) encontrada no arquivo.")
+    return soma_h, leituras_h, meses, inicio, fim, descartadas
+
+
+def montar_perfil(soma_h, leituras_h, meses, inicio, fim, descartadas=0, intervalo_min=INTERVALO_MIN_PADRAO,
+                  hash_arquivo=""):
+    """Ano típico hora a hora a partir dos acumuladores.
+
+    Cada hora recebe a média das leituras × leituras por hora; horas sem
+    nenhuma leitura recebem a média da mesma hora do dia no mesmo mês (ou,
+    faltando também, no ano todo).
+    """
+    por_hora = 60 / intervalo_min
+    with np.errstate(invalid="ignore", divide="ignore"):
+        carga_h = soma_h / leituras_h * por_hora
+    faltando = leituras_h == 0
+    if faltando.any():
+        mes_h = np.repeat(np.arange(12), DIAS_MES * 24)
+        hora_dia = np.tile(np.arange(24), HORAS_ANO // 24)
+        soma_mh = np.zeros((12, 24))
+        leit_mh = np.zeros((12, 24))
+        np.add.at(soma_mh, (mes_h, hora_dia), soma_h)
+        np.add.at(leit_mh, (mes_h, hora_dia), leituras_h)
+        soma_hd, leit_hd = soma_mh.sum(axis=0), leit_mh.sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            media_mh = soma_mh / leit_mh * por_hora
+            media_hd = np.nan_to_num(soma_hd / leit_hd * por_hora)
+        media_mh = np.where(leit_mh > 0, media_mh, media_hd)
+        carga_h[faltando] = media_mh[mes_h[faltando], hora_dia[faltando]]
+
+    tabela_meses = np.array(
+        [(ano, mes + 1, kwh, n) for (ano, mes), (kwh, n) in sorted(meses.items())],
+        dtype=[("ano", "i4"), ("mes", "i4"), ("kwh", "f8"), ("leituras", "i8")],
+    )
+    return PerfilMedicao(carga_h, tabela_meses, int(leituras_h.sum()), str(inicio), str(fim), hash_arquivo,
+                         int(descartadas))
+
+
+# --- CACHE POR CONTEÚDO ---
+
+def hash_conteudo(origem, opcoes=(), tamanho_bloco=1 << 20):
+    """SHA-256 do arquivo (caminho ou arquivo binário) e das opções de leitura."""
+    h = hashlib.sha256(repr(opcoes).encode())
+    if hasattr(origem, "read"):
+        origem.seek(0)
+        while bloco := origem.read(tamanho_bloco):
+            h.update(bloco)
+        origem.seek(0)
+    else:
+        with open(origem, "rb") as f:
+            while bloco := f.read(tamanho_bloco):
+                h.update(bloco)
+    return h.hexdigest()
+
+
+def _salvar_cache(perfil, pasta):
+    pasta.mkdir(parents=True, exist_ok=True)
+    destino = pasta / f"{perfil.hash}.npz"
+    temporario = pasta / f"{perfil.hash}.{os.getpid()}.tmp.npz"
+    np.savez(temporario, carga_h=perfil.carga_h, meses=perfil.meses,
+             info=np.array([perfil.leituras, perfil.inicio, perfil.fim, perfil.descartadas], dtype=str))
+    os.replace(temporario, destino)
+
+
+def _ler_cache(hash_arquivo, pasta):
+    caminho = pasta / f"{hash_arquivo}.npz"
+    if not caminho.exists():
+        return None
+    with np.load(caminho) as dados:
+        info = dados["info"].tolist()
+        if len(info) != 4:
+            return None  # cache de antes do ponto de milhar e da contagem de descartadas: lê de novo
+        leituras, inicio, fim, descartadas = info
+        return PerfilMedicao(dados["carga_h"], dados["meses"], int(leituras), inicio, fim, hash_arquivo,
+                             int(descartadas))
+
+
+def carregar_medicao(origem, pasta_cache=PASTA_CACHE, **opcoes):
+    """Perfil de carga de um CSV de medidor (caminho ou arquivo binário, ex.: upload).
+
+    O mesmo conteúdo com as mesmas opções é lido do cache em disco.
+    `opcoes` seguem para `agregar_csv` (sep, decimal, colunas, unidade, ...).
+    """
+    hash_arquivo = hash_conteudo(origem, sorted(opcoes.items()))
+    pasta = Path(pasta_cache) if pasta_cache else None
+    if pasta is not None:
+        try:
+            perfil = _ler_cache(hash_arquivo, pasta)
+        except (OSError, ValueError, KeyError):
+            perfil = None  # arquivo de cache corrompido: lê de novo
+        if perfil is not None:
+            return perfil
+
+    perfil = montar_perfil(*agregar_csv(origem, **opcoes),
+                           intervalo_min=opcoes.get("intervalo_min", INTERVALO_MIN_PADRAO),
+                           hash_arquivo=hash_arquivo)
+    if pasta is not None:
+        try:
+            _salvar_cache(perfil, pasta)
+        except OSError:
+            pass  # sem permissão de escrita: segue sem cache em disco
+    return perfil
+
+
+def perfil_em_cache(hash_arquivo, pasta_cache=PASTA_CACHE):
+    """Perfil já processado, pelo hash (None se não estiver no cache)."""
+    try:
+        return _ler_cache(hash_arquivo, Path(pasta_cache))
+    except (OSError, ValueError, KeyError):
+        return None
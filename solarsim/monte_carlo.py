@@ -0,0 +1,116 @@
+"""Análise de incerteza por Monte Carlo (HSP, taxa de desempenho, custo do Wp e tarifa).
+
+O sistema cotado (potência) é fixo; o que varia é quanto ele gera, quanto
+custa e quanto vale a energia. As amostras são sorteadas em blocos com
+sementes derivadas de uma `SeedSequence`, então o resultado é o mesmo para
+uma dada semente, independentemente do número de processos usados.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from solarsim.constantes import FATOR_SAZONAL_MENSAL, TAXA_DESEMPENHO
+from solarsim.horario import DIAS_MES
+
+PERCENTIS = (10, 50, 90)
+AMOSTRAS_PADRAO = 100_000
+AMOSTRAS_POR_BLOCO = 250_000
+
+
+@dataclass(frozen=True)
+class Distribuicao:
+    """Distribuição de uma entrada.
+
+    tipo "fixo": a; "normal": média a, desvio b; "uniforme": a..b;
+    "triangular": mínimo a, moda b, máximo c.
+    """
+    tipo: str
+    a: float
+    b: float = 0.0
+    c: float = 0.0
+
+    def amostrar(self, rng, n):
+        if self.tipo == "fixo":
+            return np.full(n, float(self.a))
+        if self.tipo == "normal":
+            return rng.normal(self.a, self.b, n)
+        if self.tipo == "uniforme":
+            return rng.uniform(self.a, self.b, n)
+        if self.tipo == "triangular":
+            return rng.triangular(self.a, self.b, self.c, n)
+        raise ValueError(f"Distribuição desconhecida: {self.tipo!r}")
+
+    @classmethod
+    def normal_relativa(cls, valor, incerteza):
+        """Normal centrada em `valor` com desvio de `incerteza` (fração, ex.: 0.05)."""
+        return cls("normal", valor, abs(valor) * incerteza) if incerteza else cls("fixo", valor)
+
+
+@dataclass
+class ResultadoMonteCarlo:
+    """Amostras por sorteio e percentis (P10/P50/P90) das principais saídas."""
+    payback_anos: np.ndarray
+    economia_mensal: np.ndarray
+    geracao_mensal: np.ndarray
+    percentis: dict = field(default_factory=dict)
+
+    def faixa_mensal(self, percentil, fatores_mensais=FATOR_SAZONAL_MENSAL):
+        """Geração de cada mês (Jan..Dez) no percentil pedido, com a mesma sazonalidade da simulação horária."""
+        fatores = np.asarray(fatores_mensais) * DIAS_MES / 30
+        return self.percentis["geracao_mensal"][percentil] * fatores
+
+
+def distribuicoes_padrao(hsp, custo_wp, tarifa, incerteza_hsp=0.07, incerteza_custo=0.10, incerteza_tarifa=0.05):
+    """Distribuições usadas no site: normais em torno das estimativas pontuais e PR triangular."""
+    return {
+        "hsp": Distribuicao.normal_relativa(hsp, incerteza_hsp),
+        "taxa_desempenho": Distribuicao("triangular", 0.72, TAXA_DESEMPENHO, 0.85),
+        "custo_wp": Distribuicao.normal_relativa(custo_wp, incerteza_custo),
+        "tarifa": Distribuicao.normal_relativa(tarifa, incerteza_tarifa),
+    }
+
+
+def _simular_bloco(args):
+    semente, n, potencia_kwp, consumo_kwh, custo_fixo, distribuicoes = args
+    rng = np.random.default_rng(semente)
+    hsp = np.maximum(distribuicoes["hsp"].amostrar(rng, n), 0.0)
+    taxa_desempenho = np.clip(distribuicoes["taxa_desempenho"].amostrar(rng, n), 0.0, 1.0)
+    custo_wp = np.maximum(distribuicoes["custo_wp"].amostrar(rng, n), 0.0)
+    tarifa = np.maximum(distribuicoes["tarifa"].amostrar(rng, n), 0.0)
+
+    geracao_mensal = potencia_kwp * hsp * taxa_desempenho * 30
+    economia_mensal = np.minimum(geracao_mensal, consumo_kwh) * tarifa
+    custo = np.full(n, custo_fixo) if custo_fixo is not None else potencia_kwp * 1000 * custo_wp
+    with np.errstate(divide="ignore"):
+        payback_anos = np.where(economia_mensal > 0, custo / (economia_mensal * 12), np.inf)
+    return payback_anos, economia_mensal, geracao_mensal
+
+
+def simular_monte_carlo(potencia_kwp, consumo_kwh, distribuicoes, n=AMOSTRAS_PADRAO, semente=0,
+                        custo_fixo=None, processos=None, amostras_por_bloco=AMOSTRAS_POR_BLOCO):
+    """Sorteia `n` cenários para um sistema de `potencia_kwp` e devolve amostras e percentis.
+
+    `custo_fixo` (ex.: orçamento informado) substitui o custo por Wp sorteado.
+    Com `processos` > 1 os blocos são distribuídos num ProcessPoolExecutor.
+    """
+    tamanhos = [min(amostras_por_bloco, n - i) for i in range(0, n, amostras_por_bloco)]
+    sementes = np.random.SeedSequence(semente).spawn(len(tamanhos))
+    tarefas = [(s, t, potencia_kwp, consumo_kwh, custo_fixo, distribuicoes) for s, t in zip(sementes, tamanhos)]
+
+    if processos and processos > 1 and len(tarefas) > 1:
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            blocos = list(executor.map(_simular_bloco, tarefas))
+    else:
+        blocos = [_simular_bloco(t) for t in tarefas]
+
+    payback_anos, economia_mensal, geracao_mensal = (np.concatenate(partes) for partes in zip(*blocos))
+    resultado = ResultadoMonteCarlo(payback_anos, economia_mensal, geracao_mensal)
+    for nome in ("payback_anos", "economia_mensal", "geracao_mensal"):
+        # Payback sem economia é infinito; interpolar entre dois infinitos daria NaN
+        with np.errstate(invalid="ignore"):
+            valores = np.percentile(getattr(resultado, nome), PERCENTIS)
+        valores[np.isnan(valores)] = np.inf
+        resultado.percentis[nome] = dict(zip(PERCENTIS, valores.tolist()))
+    return resultado
@@ -0,0 +1,309 @@
+"""Base de irradiação e custo por município (Arrow IPC com memory-map).
+
+O arquivo `.arrow` é gravado sem compressão e ordenado pela célula de uma
+grade de lat/lon, o que permite:
+
+* abrir a base por memory-map: as colunas numéricas viram arrays NumPy sem
+  cópia e as páginas são compartilhadas pelo sistema operacional entre
+  todos os processos (Streamlit, jobs em lote, workers);
+* achar o município mais próximo de um ponto olhando só as células vizinhas
+  (busca binária na coluna `celula`);
+* buscar por nome por busca binária numa permutação ordenada por nome, sem
+  materializar a coluna de nomes.
+"""
+
+import functools
+import math
+import os
+import tempfile
+import unicodedata
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+PASTA_DADOS = Path(__file__).resolve().parent / "dados"
+CSV_PADRAO = PASTA_DADOS / "municipios.csv"
+ARROW_PADRAO = PASTA_DADOS / "municipios.arrow"
+
+COLUNAS_HSP_MENSAL = [f"hsp_{m}" for m in
+                      ("jan", "fev", "mar", "abr", "mai", "jun", "jul", "ago", "set", "out", "nov", "dez")]
+
+TAMANHO_CELULA_GRAUS = 0.5
+_CELULAS_POR_LINHA = int(360 / TAMANHO_CELULA_GRAUS)
+_RAIO_TERRA_KM = 6371.0
+_KM_POR_GRAU = 111.32
+
+
+@dataclass(frozen=True)
+class Municipio:
+    codigo_ibge: int
+    nome: str
+    uf: str
+    latitude: float
+    longitude: float
+    hsp: float
+    hsp_mensal: tuple
+    custo_wp: float
+
+    @property
+    def rotulo(self):
+        """Nome no formato usado no site, ex.: "Rio das Ostras (RJ)"."""
+        return f"{self.nome} ({self.uf})"
+
+    @property
+    def fatores_mensais(self):
+        """Fatores sazonais regionais (HSP do mês / HSP média anual)."""
+        return tuple(h / self.hsp for h in self.hsp_mensal)
+
+
+def normalizar_nome(texto):
+    """Minúsculas e sem acentos, para comparação de nomes."""
+    sem_acento = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+    return " ".join(sem_acento.lower().split())
+
+
+def _celula(latitude, longitude):
+    linha = np.floor((np.asarray(latitude) + 90) / TAMANHO_CELULA_GRAUS).astype(np.int64)
+    coluna = np.floor((np.asarray(longitude) + 180) / TAMANHO_CELULA_GRAUS).astype(np.int64)
+    return linha * _CELULAS_POR_LINHA + coluna
+
+
+def _distancia_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * _RAIO_TERRA_KM * np.arcsin(np.sqrt(a))
+
+
+# --- CONSTRUÇÃO DA BASE ---
+
+def construir_base(origem=CSV_PADRAO, destino=ARROW_PADRAO):
+    """Converte o CSV de municípios no arquivo Arrow indexado usado em tempo de execução."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pcsv
+    import pyarrow.ipc as ipc
+
+    tabela = pcsv.read_csv(origem)
+    faltando = {"codigo_ibge", "nome", "uf", "latitude", "longitude", "hsp", "custo_wp",
+                *COLUNAS_HSP_MENSAL} - set(tabela.column_names)
+    if faltando:
+        raise ValueError(f"Colunas ausentes em {origem}: {sorted(faltando)}")
+
+    # Custo do Wp ausente: mediana da base
+    custo = tabela["custo_wp"].cast(pa.float64())
+    mediana = pc.approximate_median(custo).as_py() if pc.count(custo).as_py() else 0.0
+    tabela = tabela.set_column(tabela.schema.get_field_index("custo_wp"), "custo_wp",
+                               pc.fill_null(custo, mediana))
+
+    celula = _celula(tabela["latitude"].to_numpy(), tabela["longitude"].to_numpy())
+    tabela = tabela.append_column("celula", pa.array(celula, pa.int64()))
+    tabela = tabela.take(np.argsort(celula, kind="stable"))
+
+    chaves = [normalizar_nome(f"{n} ({u})") for n, u in zip(tabela["nome"].to_pylist(), tabela["uf"].to_pylist())]
+    tabela = tabela.append_column("chave_nome", pa.array(chaves, pa.string()))
+    ordem = np.array(sorted(range(len(chaves)), key=chaves.__getitem__), dtype=np.int32)
+    tabela = tabela.append_column("ordem_nome", pa.array(ordem, pa.int32()))
+
+    for coluna in ("latitude", "longitude", "hsp", "custo_wp", *COLUNAS_HSP_MENSAL):
+        tabela = tabela.set_column(tabela.schema.get_field_index(coluna), coluna,
+                                   tabela[coluna].cast(pa.float64()))
+    tabela = tabela.combine_chunks()
+
+    destino = Path(destino)
+    temporario = destino.with_suffix(f".{os.getpid()}.tmp")
+    with pa.OSFile(str(temporario), "wb") as arquivo, ipc.new_file(arquivo, tabela.schema) as escritor:
+        escritor.write_table(tabela)
+    os.replace(temporario, destino)
+    return destino
+
+
+# --- CONSULTA ---
+
+class BaseMunicipios:
+    """Base aberta por memory-map, com busca por nome e por proximidade."""
+
+    def __init__(self, caminho):
+        import pyarrow as pa
+        import pyarrow.ipc as ipc
+
+        self.caminho = Path(caminho)
+        self._mmap = pa.memory_map(str(self.caminho), "r")
+        self._tabela = ipc.open_file(self._mmap).read_all()
+        coluna = lambda nome: self._tabela[nome].chunk(0).to_numpy(zero_copy_only=True)
+        self._celula = coluna("celula")
+        self._latitude = coluna("latitude")
+        self._longitude = coluna("longitude")
+        self._ordem_nome = coluna("ordem_nome")
+        self._chave_nome = self._tabela["chave_nome"].chunk(0)
+
+    def __len__(self):
+        return self._tabela.num_rows
+
+    def _linha(self, i):
+        t = self._tabela
+        return Municipio(
+            codigo_ibge=int(t["codigo_ibge"][i].as_py()),
+            nome=t["nome"][i].as_py(),
+            uf=t["uf"][i].as_py(),
+            latitude=float(self._latitude[i]),
+            longitude=float(self._longitude[i]),
+            hsp=t["hsp"][i].as_py(),
+            hsp_mensal=tuple(t[c][i].as_py() for c in COLUNAS_HSP_MENSAL),
+            custo_wp=t["custo_wp"][i].as_py(),
+        )
+
+    def _primeira_chave_maior_igual(self, chave):
+        baixo, alto = 0, len(self)
+        while baixo < alto:
+            meio = (baixo + alto) // 2
+            if self._chave_nome[int(self._ordem_nome[meio])].as_py() < chave:
+                baixo = meio + 1
+            else:
+                alto = meio
+        return baixo
+
+    def buscar(self, nome):
+        """Município por nome: "Rio das Ostras (RJ)" ou só "rio das ostras" (primeiro encontrado)."""
+        chave = normalizar_nome(nome)
+        for procurada, exata in ((chave, True), (f"{chave} (", False)):
+            pos = self._primeira_chave_maior_igual(procurada)
+            if pos < len(self):
+                encontrada = self._chave_nome[int(self._ordem_nome[pos])].as_py()
+                if (encontrada == procurada) if exata else encontrada.startswith(procurada):
+                    return self._linha(int(self._ordem_nome[pos]))
+        raise KeyError(f"Município não encontrado: {nome!r}")
+
+    def mais_proximo(self, latitude, longitude):
+        """Município cuja sede está mais perto do ponto, visitando anéis de células ao redor."""
+        if not len(self):
+            raise KeyError("Base de municípios vazia.")
+        celula = int(_celula(latitude, longitude))
+        linha0, coluna0 = divmod(celula, _CELULAS_POR_LINHA)
+        melhor, melhor_km = None, math.inf
+        anel = 0
+        while True:
+            deslocamento = np.arange(-anel, anel + 1)
+            dl, dc = np.meshgrid(deslocamento, deslocamento, indexing="ij")
+            borda = np.maximum(np.abs(dl), np.abs(dc)) == anel
+            celulas = np.unique((linha0 + dl[borda]) * _CELULAS_POR_LINHA
+                                + (coluna0 + dc[borda]) % _CELULAS_POR_LINHA)
+            inicio = np.searchsorted(self._celula, celulas, "left")
+            fim = np.searchsorted(self._celula, celulas, "right")
+            if (fim > inicio).any():
+                indices = np.concatenate([np.arange(a, b) for a, b in zip(inicio, fim)])
+                distancias = _distancia_km(latitude, longitude, self._latitude[indices], self._longitude[indices])
+                k = int(np.argmin(distancias))
+                if distancias[k] < melhor_km:
+                    melhor, melhor_km = int(indices[k]), float(distancias[k])
+
+            # Qualquer ponto fora dos anéis já vistos está a pelo menos `anel` células de distância
+            lat_limite = min(abs(latitude) + (anel + 1) * TAMANHO_CELULA_GRAUS, 89.0)
+            alcance_km = anel * TAMANHO_CELULA_GRAUS * _KM_POR_GRAU * math.cos(math.radians(lat_limite))
+            if melhor is not None and melhor_km <= alcance_km:
+                break
+            if anel * TAMANHO_CELULA_GRAUS > 180:
+                break
+            anel += 1
+        return self._linha(melhor)
+
+    def hsp_e_custo(self, cidades=None, latitudes=None, longitudes=None):
+        """Arrays (hsp, custo_wp) para muitas linhas, por nome ou por coordenadas.
+
+        Cada nome/coordenada distinto é consultado uma única vez. Linhas sem
+        nome, com coordenada ausente ou fora do globo, ou com município não
+        encontrado saem com NaN, sem interromper as demais.
+        """
+        if cidades is not None:
+            nomes = np.asarray(cidades, dtype=object)
+            validas = np.array([c is not None and c == c and str(c).strip() != "" for c in nomes], dtype=bool)
+            chaves = nomes[validas].astype(str)
+            consultar = self.buscar
+        else:
+            latitudes, longitudes = np.broadcast_arrays(np.asarray(latitudes, float), np.asarray(longitudes, float))
+            with np.errstate(invalid="ignore"):
+                validas = (np.abs(latitudes) <= 90) & (np.abs(longitudes) <= 180)
+            chaves = np.array(list(zip(latitudes[validas], longitudes[validas])), dtype=[("lat", float), ("lon", float)])
+            consultar = lambda ponto: self.mais_proximo(float(ponto[0]), float(ponto[1]))
+        hsp = np.full(len(validas), np.nan)
+        custo_wp = np.full(len(validas), np.nan)
+        if validas.any():
+            unicas, inverso = np.unique(chaves, return_inverse=True)
+            valores = np.full((len(unicas), 2), np.nan)
+            for k, chave in enumerate(unicas):
+                try:
+                    municipio = consultar(chave)
+                except KeyError:
+                    continue
+                valores[k] = municipio.hsp, municipio.custo_wp
+            hsp[validas], custo_wp[validas] = valores[inverso].T
+        return hsp, custo_wp
+
+    def _linhas_por_codigo(self, codigos):
+        if not hasattr(self, "_codigo_ordenado"):
+            codigo = self._tabela["codigo_ibge"].chunk(0).to_numpy().astype(np.int64)
+            self._ordem_codigo = np.argsort(codigo, kind="stable")
+            self._codigo_ordenado = codigo[self._ordem_codigo]
+        codigos = np.asarray(codigos, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self._codigo_ordenado, codigos), len(self) - 1)
+        ausentes = self._codigo_ordenado[pos] != codigos
+        if ausentes.any():
+            raise KeyError(f"Códigos IBGE fora da base de municípios: {np.unique(codigos[ausentes])[:10].tolist()}")
+        return self._ordem_codigo[pos]
+
+    def buscar_codigo(self, codigo_ibge):
+        """Município pelo código IBGE."""
+        return self._linha(int(self._linhas_por_codigo([codigo_ibge])[0]))
+
+    def hsp_mensal_por_codigo(self, codigos):
+        """HSP mensal (len(codigos), 12) pelo código IBGE; KeyError se algum código não estiver na base."""
+        if not hasattr(self, "_hsp_mensal"):
+            self._hsp_mensal = np.column_stack([self._tabela[c].chunk(0).to_numpy() for c in COLUNAS_HSP_MENSAL])
+        return self._hsp_mensal[self._linhas_por_codigo(codigos)]
+
+    def rotulos(self):
+        """Todos os nomes "Município (UF)" em ordem alfabética (para a caixa de seleção).
+
+        Montados uma vez por base (ou seja, uma vez por processo com `abrir_base`)
+        e devolvidos como tupla compartilhada.
+        """
+        if not hasattr(self, "_rotulos"):
+            nomes = self._tabela["nome"].take(self._ordem_nome).to_pylist()
+            ufs = self._tabela["uf"].take(self._ordem_nome).to_pylist()
+            self._rotulos = tuple(f"{n} ({u})" for n, u in zip(nomes, ufs))
+        return self._rotulos
+
+    def posicao_rotulo(self, rotulo):
+        """Posição de `rotulo` em `rotulos()` (busca binária), ou None se não estiver na base."""
+        chave = normalizar_nome(rotulo)
+        pos = self._primeira_chave_maior_igual(chave)
+        if pos < len(self) and self._chave_nome[int(self._ordem_nome[pos])].as_py() == chave:
+            return pos
+        return None
+
+
+def _garantir_arrow(origem, destino):
+    destino = Path(destino)
+    if destino.exists() and destino.stat().st_mtime >= Path(origem).stat().st_mtime:
+        return destino
+    try:
+        return construir_base(origem, destino)
+    except OSError:
+        # Pasta do pacote somente leitura: gera no diretório temporário
+        alternativo = Path(tempfile.gettempdir()) / f"solarsim-{destino.name}"
+        if alternativo.exists() and alternativo.stat().st_mtime >= Path(origem).stat().st_mtime:
+            return alternativo
+        return construir_base(origem, alternativo)
+
+
+@functools.lru_cache(maxsize=None)
+def abrir_base(caminho=None):
+    """Base compartilhada do processo.
+
+    Usa SOLARSIM_MUNICIPIOS (um .arrow já construído) ou gera o .arrow a
+    partir do CSV do pacote quando ele não existe ou está desatualizado.
+    """
+    caminho = caminho or os.environ.get("SOLARSIM_MUNICIPIOS")
+    if caminho is None:
+        caminho = _garantir_arrow(CSV_PADRAO, ARROW_PADRAO)
+    return BaseMunicipios(caminho)
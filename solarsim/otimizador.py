@@ -0,0 +1,215 @@
+"""Dimensionamento ótimo: número de painéis que maximiza o VPL ou minimiza o payback.
+
+`calcular_sistema_solar` divide o consumo por HSP × PR e arredonda o número
+de painéis. Isso ignora que a energia abaixo da taxa mínima (`minimo_kwh`)
+é paga de qualquer jeito e que créditos excedentes vencem em 60 meses. Aqui
+cada lead recebe uma grade de candidatos (número de painéis e, se pedido,
+níveis de orçamento) e todos são avaliados numa única chamada de
+`calcular_fluxo_caixa`, com a tarifa, a taxa mínima do tipo de conexão e a
+transição do Fio B. No modo em lote os leads são processados em blocos,
+opcionalmente distribuídos num ProcessPoolExecutor.
+
+Quando nenhum candidato cabe em `orcamento_maximo` não há escolha: o
+resultado individual fica sem candidato (`resumo()` devolve None) e, no lote,
+a linha sai com 0 painéis e NaN nos demais campos. O mesmo vale, no lote,
+para leads que `lote.linhas_validas` rejeita (consumo, tarifa, HSP ou custo do
+Wp ausente, HSP ou custo do Wp <= 0) e para taxa mínima ausente.
+"""
+
+import math
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from solarsim.constantes import FATOR_SAZONAL_MENSAL, POTENCIA_PAINEL_WP, TAXA_DESEMPENHO
+from solarsim.fluxo_caixa import calcular_fluxo_caixa
+from solarsim.lote import linhas_validas
+
+CRITERIOS = ("vpl", "payback")
+CANDIDATOS_PADRAO = 48
+# A grade vai de 1 painel até FOLGA × o número de painéis pelo consumo
+FOLGA_DIMENSIONAMENTO = 2.0
+LEADS_POR_BLOCO = 200
+SEM_CANDIDATO = -1  # índice do escolhido quando nenhum candidato é viável
+
+COLUNAS_SAIDA = ["numero_paineis_otimo", "potencia_kwp_otima", "custo_otimo", "geracao_mensal_otima",
+                 "vpl_otimo", "payback_descontado_meses_otimo"]
+
+
+@dataclass
+class ResultadoOtimizacao:
+    """Todos os candidatos avaliados para um lead e o índice do escolhido."""
+    numero_paineis: np.ndarray
+    potencia_kwp: np.ndarray
+    custo: np.ndarray
+    geracao_mensal: np.ndarray
+    vpl: np.ndarray
+    payback_descontado_meses: np.ndarray
+    viavel: np.ndarray
+    melhor: int  # SEM_CANDIDATO se nenhum candidato cabe no orçamento
+    criterio: str
+
+    @property
+    def encontrado(self):
+        return self.melhor != SEM_CANDIDATO
+
+    def resumo(self):
+        """Dados do candidato escolhido, no formato de `calcular_sistema_solar` quando aplicável.
+
+        None quando nenhum tamanho cabe no orçamento máximo.
+        """
+        if not self.encontrado:
+            return None
+        i = self.melhor
+        return {
+            "numero_paineis": int(self.numero_paineis[i]),
+            "potencia_kwp": round(float(self.potencia_kwp[i]), 2),
+            "custo_total_estimado_site": float(self.custo[i]),
+            "geracao_mensal": round(float(self.geracao_mensal[i]), 2),
+            "vpl": float(self.vpl[i]),
+            "payback_descontado_meses": float(self.payback_descontado_meses[i]),
+        }
+
+
+def paineis_pelo_consumo(consumo_kwh, hsp):
+    """Número de painéis (fracionário) que zera o consumo, como em `calcular_sistema_solar`."""
+    return np.asarray(consumo_kwh, float) / 30 / (np.asarray(hsp, float) * TAXA_DESEMPENHO) * 1000 / POTENCIA_PAINEL_WP
+
+
+def grade_paineis(consumo_kwh, hsp, n_candidatos=CANDIDATOS_PADRAO, folga=FOLGA_DIMENSIONAMENTO):
+    """Grade leads × candidatos de números de painéis.
+
+    Com até `n_candidatos` valores possíveis a grade cobre todos os inteiros
+    de 1 ao máximo; acima disso, `n_candidatos` pontos igualmente espaçados.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pelo_consumo = np.atleast_1d(paineis_pelo_consumo(consumo_kwh, hsp))
+    # Consumo ou HSP inválido (NaN, HSP <= 0) não tem tamanho de referência: grade só com 1 painel
+    maximo = np.maximum(np.ceil(np.where(np.isfinite(pelo_consumo), pelo_consumo, 1) * folga), 1)
+    return np.rint(1 + (maximo[:, None] - 1) * np.linspace(0, 1, n_candidatos))
+
+
+def _escolher(vpl, payback, viavel, criterio):
+    """Índice do melhor candidato por linha (eixo final = candidatos); SEM_CANDIDATO se nenhum é viável."""
+    if criterio not in CRITERIOS:
+        raise ValueError(f"Critério desconhecido: {criterio!r} (use {', '.join(CRITERIOS)})")
+    vpl = np.where(viavel, vpl, -np.inf)
+    if criterio == "vpl":
+        melhor = np.argmax(vpl, axis=-1)
+    else:
+        # Menor payback; empates (mesmo mês) decididos pelo VPL. Sem payback: maior VPL.
+        prazo = np.where(viavel & np.isfinite(payback), payback, np.inf)
+        empatados = prazo == prazo.min(axis=-1, keepdims=True)
+        melhor = np.argmax(np.where(empatados, vpl, -np.inf), axis=-1)
+    return np.where(viavel.any(axis=-1), melhor, SEM_CANDIDATO)
+
+
+def _avaliar(paineis, potencia_kwp, custo, consumo_kwh, tarifa, hsp, minimo_kwh, fatores_mensais, premissas):
+    """Avalia a grade (leads × candidatos) numa chamada de `calcular_fluxo_caixa`."""
+    n_leads, n_candidatos = custo.shape
+    geracao = potencia_kwp * hsp[:, None] * TAXA_DESEMPENHO * 30
+    repetir = lambda v: np.repeat(np.broadcast_to(v, (n_leads,)), n_candidatos)
+    fatores = fatores_mensais
+    if fatores is not None and np.ndim(fatores) == 2:
+        fatores = np.repeat(np.asarray(fatores, float), n_candidatos, axis=0)
+    fluxo = calcular_fluxo_caixa(
+        custo.ravel(), geracao.ravel(), repetir(consumo_kwh), repetir(tarifa), repetir(minimo_kwh),
+        fatores_mensais=fatores, calcular_tir=False, **premissas
+    )
+    return (geracao, fluxo.vpl.reshape(n_leads, n_candidatos),
+            fluxo.payback_descontado_meses.reshape(n_leads, n_candidatos))
+
+
+def otimizar_sistema(consumo_kwh, tarifa, hsp, custo_wp, minimo_kwh=50, criterio="vpl", orcamentos=None,
+                     orcamento_maximo=None, n_candidatos=CANDIDATOS_PADRAO, fatores_mensais=FATOR_SAZONAL_MENSAL,
+                     **premissas):
+    """Melhor tamanho de sistema para um lead.
+
+    `orcamentos` acrescenta candidatos de valor fixo (potência = orçamento /
+    custo do Wp, como em `calcular_sistema_por_orcamento`); `orcamento_maximo`
+    descarta candidatos mais caros. As `premissas` (taxa de desconto,
+    reajuste, direito adquirido, ...) seguem para `calcular_fluxo_caixa`.
+    """
+    paineis = np.unique(grade_paineis(consumo_kwh, hsp, n_candidatos)[0])
+    potencia_kwp = paineis * POTENCIA_PAINEL_WP / 1000
+    custo = potencia_kwp * 1000 * custo_wp
+    if orcamentos is not None:
+        orcamentos = np.asarray(orcamentos, float)
+        potencia_orcamento = orcamentos / custo_wp / 1000
+        paineis = np.concatenate([paineis, np.maximum(1, np.rint(potencia_orcamento * 1000 / POTENCIA_PAINEL_WP))])
+        potencia_kwp = np.concatenate([potencia_kwp, potencia_orcamento])
+        custo = np.concatenate([custo, orcamentos])
+
+    geracao, vpl, payback = _avaliar(
+        paineis[None], potencia_kwp[None], custo[None], consumo_kwh, np.atleast_1d(float(tarifa)),
+        np.atleast_1d(float(hsp)), minimo_kwh, fatores_mensais, premissas
+    )
+    viavel = custo <= orcamento_maximo if orcamento_maximo is not None else np.ones(len(custo), bool)
+    melhor = int(_escolher(vpl[0], payback[0], viavel, criterio))
+    return ResultadoOtimizacao(paineis.astype(int), potencia_kwp, custo, geracao[0], vpl[0], payback[0],
+                               viavel, melhor, criterio)
+
+
+# --- LOTE ---
+
+def _otimizar_bloco(args):
+    consumo, tarifa, hsp, custo_wp, minimo_kwh, orcamento_maximo, criterio, n_candidatos, fatores, premissas = args
+    validas = linhas_validas(consumo, tarifa, hsp, custo_wp) & np.isfinite(minimo_kwh)
+    if not validas.all():
+        # Valores neutros nas linhas inválidas (descartadas no fim), como em `lote.calcular_lote`
+        consumo, tarifa, hsp, custo_wp = (np.where(validas, v, 1.0) for v in (consumo, tarifa, hsp, custo_wp))
+        minimo_kwh = np.where(validas, minimo_kwh, 0.0)
+    paineis = grade_paineis(consumo, hsp, n_candidatos)
+    potencia_kwp = paineis * POTENCIA_PAINEL_WP / 1000
+    custo = potencia_kwp * 1000 * custo_wp[:, None]
+    geracao, vpl, payback = _avaliar(paineis, potencia_kwp, custo, consumo, tarifa, hsp, minimo_kwh, fatores, premissas)
+    viavel = ~(custo > orcamento_maximo[:, None])  # NaN = sem limite
+    melhor = _escolher(vpl, payback, viavel, criterio)
+    encontrado = validas & (melhor != SEM_CANDIDATO)
+    linhas, melhor = np.arange(len(consumo)), np.maximum(melhor, 0)
+    escolhido = lambda v: np.where(encontrado, v[linhas, melhor], np.nan)
+    return dict(zip(COLUNAS_SAIDA, (
+        np.where(encontrado, paineis[linhas, melhor], 0).astype(int),
+        escolhido(potencia_kwp).round(2),
+        escolhido(custo),
+        escolhido(geracao).round(2),
+        escolhido(vpl),
+        escolhido(payback),
+    )))
+
+
+def otimizar_lote(consumo, tarifa, hsp, custo_wp, minimo_kwh=50, criterio="vpl", orcamento_maximo=None,
+                  n_candidatos=CANDIDATOS_PADRAO, fatores_mensais=FATOR_SAZONAL_MENSAL,
+                  leads_por_bloco=LEADS_POR_BLOCO, processos=None, **premissas):
+    """Otimiza uma lista de leads; retorna um dicionário de arrays (uma posição por lead).
+
+    Cada bloco de `leads_por_bloco` leads vira uma única grade vetorizada.
+    Com `processos` > 1 os blocos são distribuídos num ProcessPoolExecutor.
+    `fatores_mensais` pode ser um vetor de 12 ou um array leads × 12.
+    Leads inválidos e leads sem candidato no orçamento saem com 0 painéis e
+    NaN nos demais campos.
+    """
+    if criterio not in CRITERIOS:
+        raise ValueError(f"Critério desconhecido: {criterio!r} (use {', '.join(CRITERIOS)})")
+    consumo = np.atleast_1d(np.asarray(consumo, float))
+    n = len(consumo)
+    colunas = [np.broadcast_to(np.asarray(v, float), (n,)) for v in
+               (consumo, tarifa, hsp, custo_wp, minimo_kwh, np.nan if orcamento_maximo is None else orcamento_maximo)]
+    por_lead = fatores_mensais is not None and np.ndim(fatores_mensais) == 2
+
+    tarefas = []
+    for inicio in range(0, n, leads_por_bloco):
+        fatia = slice(inicio, inicio + leads_por_bloco)
+        fatores = np.asarray(fatores_mensais, float)[fatia] if por_lead else fatores_mensais
+        tarefas.append((*(c[fatia] for c in colunas), criterio, n_candidatos, fatores, premissas))
+
+    if processos and processos > 1 and len(tarefas) > 1:
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            blocos = list(executor.map(_otimizar_bloco, tarefas, chunksize=max(1, math.ceil(len(tarefas) / (4 * processos)))))
+    else:
+        blocos = [_otimizar_bloco(t) for t in tarefas]
+
+    if not blocos:
+        return {nome: np.empty(0) for nome in COLUNAS_SAIDA}
+    return {nome: np.concatenate([b[nome] for b in blocos]) for nome in COLUNAS_SAIDA}
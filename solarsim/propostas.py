@@ -0,0 +1,338 @@
+"""Propostas comerciais (HTML ou PDF) em lote, com as mesmas métricas da seção de resultados do app.
+
+    relatorio = gerar_propostas(clientes, "propostas/", processos=4)
+    relatorio.gerados, relatorio.por_segundo
+
+Cada cliente é um dict (ou linha de CSV) com `id`, `consumo`, `tarifa` e,
+opcionalmente, `nome`, `cidade`, `minimo_kwh` e `orcamento`; consumo abaixo
+de 1 kWh, tarifa não positiva ou taxa mínima negativa viram erro do cliente,
+sem proposta. Os modelos Jinja2 de `solarsim/modelos` são compilados uma vez
+por processo; o gráfico comparativo é um SVG embutido, guardado num cache
+LRU pela sua entrada (geração, consumo, taxa mínima, tarifa e sazonalidade),
+então clientes com o mesmo perfil reaproveitam o desenho e a simulação hora
+a hora.
+
+Os clientes vão em lotes para um ProcessPoolExecutor; dentro de cada lote o
+fluxo de caixa (VPL, TIR, payback descontado) de todos sai numa única
+chamada vetorizada. Cada documento é gravado num arquivo temporário e
+renomeado ao final, então um arquivo `<id>.html` existente está completo:
+com `retomar=True` uma execução interrompida recomeça só pelos que faltam.
+PDF requer o pacote opcional `weasyprint`.
+"""
+
+import datetime
+import functools
+import hashlib
+import math
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from solarsim.calculos import (
+    calcular_sistema_por_orcamento, calcular_sistema_solar, formatar_meses, formatar_payback, formatar_reais,
+    premissas_simulacao,
+)
+from solarsim.constantes import CIDADE_PADRAO, MESES
+from solarsim.equipamentos import configurar_sistema
+from solarsim.fluxo_caixa import ANOS_PADRAO, calcular_fluxo_caixa
+from solarsim.horario import simular_sistema
+from solarsim.municipios import abrir_base
+
+PASTA_MODELOS = Path(__file__).resolve().parent / "modelos"
+FORMATOS = ("html", "pdf")
+CLIENTES_POR_TAREFA = 64
+MINIMO_KWH_PADRAO = 50
+
+
+# --- MODELOS E ATIVOS ---
+
+@functools.lru_cache(maxsize=None)
+def carregar_modelo(nome, pasta=None):
+    """Modelo Jinja2 compilado, compartilhado pelo processo (SOLARSIM_MODELOS aponta outra pasta)."""
+    import jinja2
+
+    ambiente = jinja2.Environment(
+        loader=jinja2.FileSystemLoader(str(pasta or os.environ.get("SOLARSIM_MODELOS") or PASTA_MODELOS)),
+        autoescape=jinja2.select_autoescape(("html", "svg")),
+        trim_blocks=True, lstrip_blocks=True,
+    )
+    ambiente.filters["reais"] = formatar_reais
+    ambiente.filters["meses"] = formatar_meses
+    return ambiente.get_template(nome)
+
+
+def _svg_comparativo(consumo, geracao, largura=640, altura=260):
+    margem_esquerda, topo, base = 48, 44, altura - 24
+    maximo = max(max(consumo), max(geracao), 1.0)
+    passo = 10 ** math.floor(math.log10(maximo))
+    passo *= 1 if maximo / passo > 5 else 0.5 if maximo / passo > 2 else 0.25
+    teto = math.ceil(maximo / passo) * passo
+    x = lambda i: margem_esquerda + 12 + i * (largura - margem_esquerda - 34) / 11
+    y = lambda v: base - (base - topo) * v / teto
+    series = []
+    for i, (nome, cor, valores) in enumerate((("Consumo (kWh)", "#FF4B4B", consumo),
+                                              ("Geração Solar (kWh)", "#0068C9", geracao))):
+        xy = [(round(x(m), 1), round(y(v), 1)) for m, v in enumerate(valores)]
+        series.append({"nome": nome, "cor": cor, "xy": xy, "pontos": " ".join(f"{a},{b}" for a, b in xy),
+                       "legenda_x": margem_esquerda + 160 * i})
+    return carregar_modelo("grafico_comparativo.svg").render(
+        largura=largura, altura=altura, margem_esquerda=margem_esquerda, series=series,
+        meses=[{"x": round(x(m), 1), "rotulo": rotulo} for m, rotulo in enumerate(MESES)],
+        ticks=[{"y": round(y(v), 1), "rotulo": f"{v:g}"} for v in np.arange(0, teto + passo / 2, passo)],
+    )
+
+
+@functools.lru_cache(maxsize=4096)
+def comparativo(geracao_mensal, consumo, minimo_kwh, tarifa, fatores_mensais):
+    """(SVG do gráfico, fatura média, saldo de créditos após 12 meses) da simulação hora a hora."""
+    simulacao = simular_sistema(geracao_mensal / 30, consumo, minimo_kwh, tarifa, fatores_mensais=fatores_mensais)
+    svg = _svg_comparativo(simulacao.consumo.tolist(), simulacao.geracao.tolist())
+    return svg, float(simulacao.fatura.mean()), float(simulacao.saldo_creditos[-1])
+
+
+@functools.lru_cache(maxsize=1024)
+def _materiais(potencia_kwp):
+    """Lista de materiais com exatamente a potência simulada (a mesma regra do app)."""
+    return configurar_sistema(potencia_kwp * 1000, potencia_maxima_wp=potencia_kwp * 1000)
+
+
+# --- CÁLCULO E RENDERIZAÇÃO ---
+
+def _numero(valor, padrao=None):
+    if valor is None or (isinstance(valor, float) and math.isnan(valor)) or valor == "":
+        return padrao
+    return float(valor)
+
+
+def nome_arquivo(cliente_id):
+    """Nome de arquivo seguro para o id do cliente.
+
+    Ids já seguros viram o próprio nome; os demais ganham um hash curto do id
+    original, para que "a/b" e "a_b" não gravem no mesmo arquivo.
+    """
+    bruto = str(cliente_id)
+    nome = re.sub(r"[^0-9A-Za-z_.-]", "_", bruto).strip(".")
+    if nome and nome == bruto:
+        return nome
+    return f"{nome or '_'}-{hashlib.sha1(bruto.encode('utf-8')).hexdigest()[:8]}"
+
+
+def _sistema(cliente, base):
+    consumo = _numero(cliente.get("consumo"))
+    tarifa = _numero(cliente.get("tarifa"))
+    if consumo is None or tarifa is None:
+        raise ValueError("consumo e tarifa são obrigatórios")
+    # Mesmo piso do pedido na API (consumo >= 1 kWh); tarifa zero não gera economia a propor
+    if not (math.isfinite(consumo) and consumo >= 1):
+        raise ValueError(f"consumo deve ser um número >= 1 kWh (recebido {consumo:g})")
+    if not (math.isfinite(tarifa) and tarifa > 0):
+        raise ValueError(f"tarifa deve ser um número > 0 (recebido {tarifa:g})")
+    minimo_kwh = _numero(cliente.get("minimo_kwh"), MINIMO_KWH_PADRAO)
+    if not (math.isfinite(minimo_kwh) and minimo_kwh >= 0):
+        raise ValueError(f"minimo_kwh deve ser um número >= 0 (recebido {minimo_kwh:g})")
+    cidade = cliente.get("cidade") or CIDADE_PADRAO
+    municipio = base.buscar(cidade)
+    orcamento = _numero(cliente.get("orcamento"))
+    if orcamento is not None and orcamento > 0:
+        dados = calcular_sistema_por_orcamento(orcamento, municipio.custo_wp, consumo, tarifa, municipio.hsp)
+        custo_final = orcamento
+    else:
+        dados = calcular_sistema_solar(consumo, tarifa, municipio.hsp, municipio.custo_wp)
+        custo_final = dados["custo_total_estimado_site"]
+    return {"consumo": consumo, "tarifa": tarifa, "municipio": municipio, "dados": dados, "custo_final": custo_final,
+            "minimo_kwh": int(minimo_kwh)}
+
+
+def calcular_propostas(clientes, base=None):
+    """Contexto dos modelos para cada cliente (ou a exceção do cliente que falhou), na mesma ordem."""
+    base = base or abrir_base()
+    sistemas = []
+    for cliente in clientes:
+        try:
+            sistemas.append(_sistema(cliente, base))
+        except (KeyError, ValueError, TypeError) as erro:
+            sistemas.append(erro)
+    validos = [s for s in sistemas if not isinstance(s, Exception)]
+    if validos:
+        fluxo = calcular_fluxo_caixa(
+            [s["custo_final"] for s in validos], [s["dados"]["geracao_mensal"] for s in validos],
+            [s["consumo"] for s in validos], [s["tarifa"] for s in validos], [s["minimo_kwh"] for s in validos],
+            fatores_mensais=np.array([s["municipio"].fatores_mensais for s in validos]),
+        )
+    data = datetime.date.today().strftime("%d/%m/%Y")
+
+    contextos, i = [], 0
+    for cliente, s in zip(clientes, sistemas):
+        if isinstance(s, Exception):
+            contextos.append(s)
+            continue
+        dados, municipio = s["dados"], s["municipio"]
+        materiais = _materiais(dados["potencia_kwp"])
+        saldo_kwh = dados["geracao_mensal"] - s["consumo"]
+        if saldo_kwh < 0:
+            nova_fatura = max(-saldo_kwh, s["minimo_kwh"]) * s["tarifa"]
+            rotulos = ("Nova Fatura Mensal Estimada", "Consumo restante da Rede")
+        else:
+            nova_fatura = s["minimo_kwh"] * s["tarifa"]
+            rotulos = ("Nova Fatura (Taxa Mínima)", "Créditos Gerados")
+        svg, fatura_media, saldo_creditos = comparativo(
+            dados["geracao_mensal"], s["consumo"], s["minimo_kwh"], s["tarifa"], municipio.fatores_mensais)
+        tir = float(fluxo.tir_anual[i])
+        contextos.append({
+            "cliente": {"id": cliente.get("id"), "nome": cliente.get("nome") or ""},
+            "cidade": municipio.rotulo,
+            "data": data,
+            "dados": dados,
+            "custo_final": s["custo_final"],
+            "custos": materiais.custos_detalhados(s["custo_final"]) if materiais else dados["custos_detalhados"],
+            "materiais": materiais,
+            "area_m2": round(materiais.area_m2, 1) if materiais else dados["area_m2"],
+            "inversor_kw": (f"{materiais.quantidade_inversores * materiais.potencia_ca_kw:g} kW" if materiais
+                            else f"~ {dados['inversor_kw_recomendado']} kW"),
+            "nova_fatura": nova_fatura,
+            "rotulo_fatura": rotulos[0],
+            "rotulo_saldo": rotulos[1],
+            "saldo_exibido": abs(saldo_kwh),
+            "payback": formatar_payback(s["custo_final"], dados["economia_mensal_reais"]),
+            "anos": ANOS_PADRAO,
+            "vpl": float(fluxo.vpl[i]),
+            "tir": f"{tir:.1%} ao ano".replace(".", ",") if tir == tir else "Não aplicável",
+            "payback_descontado": float(fluxo.payback_descontado_meses[i]),
+            "grafico": svg,
+            "fatura_media": fatura_media,
+            "saldo_creditos": saldo_creditos,
+            "premissas": premissas_simulacao(municipio.hsp, municipio.rotulo, municipio.custo_wp, s["tarifa"],
+                                             s["minimo_kwh"], origem_tarifa="valores informados"),
+        })
+        i += 1
+    return contextos
+
+
+def renderizar_proposta(contexto):
+    """HTML da proposta a partir do contexto de `calcular_propostas`."""
+    return carregar_modelo("proposta.html").render(**contexto)
+
+
+def _para_pdf(html):
+    try:
+        import weasyprint
+    except ImportError:
+        raise ImportError("Propostas em PDF requerem o pacote 'weasyprint' (pip install weasyprint).") from None
+    return weasyprint.HTML(string=html).write_pdf()
+
+
+def _gravar(caminho, conteudo):
+    temporario = caminho.with_name(f".{caminho.name}.{os.getpid()}.tmp")
+    temporario.write_bytes(conteudo.encode("utf-8") if isinstance(conteudo, str) else conteudo)
+    os.replace(temporario, caminho)
+
+
+def _gerar_lote(tarefa):
+    """Worker: calcula, renderiza e grava um lote; devolve (gerados, erros, acertos e consultas do cache)."""
+    clientes, pasta, formato = tarefa
+    antes = comparativo.cache_info()
+    gerados, erros = 0, []
+    for cliente, contexto in zip(clientes, calcular_propostas(clientes)):
+        try:
+            if isinstance(contexto, Exception):
+                raise contexto
+            html = renderizar_proposta(contexto)
+            _gravar(Path(pasta) / f"{nome_arquivo(cliente['id'])}.{formato}", html if formato == "html" else _para_pdf(html))
+            gerados += 1
+        except Exception as erro:  # um cliente com problema não derruba o lote
+            erros.append((cliente.get("id"), f"{type(erro).__name__}: {erro}"))
+    depois = comparativo.cache_info()
+    return gerados, erros, depois.hits - antes.hits, (depois.hits + depois.misses) - (antes.hits + antes.misses)
+
+
+# --- GERAÇÃO EM LOTE ---
+
+@dataclass
+class RelatorioPropostas:
+    """Andamento/resultado de `gerar_propostas`."""
+    gerados: int = 0
+    pulados: int = 0
+    erros: list = field(default_factory=list)
+    segundos: float = 0.0
+    graficos_em_cache: int = 0
+    graficos_consultados: int = 0
+
+    @property
+    def por_segundo(self):
+        return self.gerados / self.segundos if self.segundos else 0.0
+
+    @property
+    def taxa_cache_graficos(self):
+        return self.graficos_em_cache / self.graficos_consultados if self.graficos_consultados else 0.0
+
+
+def _lotes(clientes, pasta, formato, retomar, tamanho, relatorio):
+    lote = []
+    for cliente in clientes:
+        if cliente.get("id") is None:
+            relatorio.erros.append((None, "cliente sem id"))
+            continue
+        if retomar and (pasta / f"{nome_arquivo(cliente['id'])}.{formato}").exists():
+            relatorio.pulados += 1
+            continue
+        lote.append(cliente)
+        if len(lote) == tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def gerar_propostas(clientes, pasta, processos=None, formato="html", retomar=True,
+                    clientes_por_tarefa=CLIENTES_POR_TAREFA, progresso=None):
+    """Gera uma proposta por cliente em `pasta` e devolve um RelatorioPropostas.
+
+    `clientes` pode ser um iterável grande (ex.: CSV lido em blocos): no
+    máximo 2 lotes por processo ficam em andamento. `progresso(relatorio)` é
+    chamado a cada lote concluído.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato desconhecido: {formato!r} (use {', '.join(FORMATOS)})")
+    if formato == "pdf":
+        _para_pdf("")  # falha já, e não em cada cliente, se o weasyprint não estiver instalado
+    pasta = Path(pasta)
+    pasta.mkdir(parents=True, exist_ok=True)
+    if retomar:
+        for temporario in pasta.glob(f".*.{formato}.*.tmp"):  # restos de uma execução interrompida
+            temporario.unlink(missing_ok=True)
+    relatorio = RelatorioPropostas()
+    inicio = time.perf_counter()
+    lotes = ((lote, str(pasta), formato)
+             for lote in _lotes(clientes, pasta, formato, retomar, clientes_por_tarefa, relatorio))
+
+    def registrar(resultado):
+        gerados, erros, em_cache, consultados = resultado
+        relatorio.gerados += gerados
+        relatorio.erros.extend(erros)
+        relatorio.graficos_em_cache += em_cache
+        relatorio.graficos_consultados += consultados
+        relatorio.segundos = time.perf_counter() - inicio
+        if progresso:
+            progresso(relatorio)
+
+    if processos and processos > 1:
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            em_andamento = set()
+            for tarefa in lotes:
+                em_andamento.add(executor.submit(_gerar_lote, tarefa))
+                if len(em_andamento) >= 2 * processos:
+                    prontos, em_andamento = wait(em_andamento, return_when=FIRST_COMPLETED)
+                    for futuro in prontos:
+                        registrar(futuro.result())
+            for futuro in em_andamento:
+                registrar(futuro.result())
+    else:
+        for tarefa in lotes:
+            registrar(_gerar_lote(tarefa))
+    relatorio.segundos = time.perf_counter() - inicio
+    return relatorio
@@ -0,0 +1,255 @@
+"""Modelo físico de geração: transposição para o plano dos painéis e temperatura.
+
+Substitui o `potência × HSP × TAXA_DESEMPENHO` quando a orientação do
+telhado importa. Para cada mês, um dia representativo hora a hora:
+
+1. a HSP mensal do município (irradiação global horizontal) é separada em
+   direta e difusa (correlação de Erbs) e distribuída pelas horas do dia
+   (Collares-Pereira & Rabl para a global, Liu & Jordan para a difusa);
+2. a irradiância é transposta para o plano de cada face (modelo isotrópico:
+   direta pelo ângulo de incidência, difusa do céu e refletida pelo solo);
+3. a temperatura da célula (modelo NOCT) reduz a potência pelo coeficiente
+   de temperatura do módulo; as demais perdas entram como uma fração fixa.
+
+A irradiância no plano é pré-calculada numa grade de inclinações ×
+azimutes e guardada em cache por município (`fatores_transposicao`); cada
+face é então só uma interpolação bilinear na grade, e um telhado com muitas
+faces (ou um estudo com milhares de sistemas) é avaliado de uma vez.
+
+Azimute em graus a partir do norte, no sentido horário (0 = norte,
+90 = leste, 180 = sul, 270 = oeste): no hemisfério sul, 0 é a face ideal.
+"""
+
+import functools
+from dataclasses import dataclass
+
+import numpy as np
+
+from solarsim.horario import DIAS_MES
+
+INCLINACOES_GRADE = np.arange(0, 91, 5)
+AZIMUTES_GRADE = np.arange(0, 360, 10)
+# Dia do ano representativo de cada mês (Klein, 1977)
+DIAS_REPRESENTATIVOS = np.array([17, 47, 75, 105, 135, 162, 198, 228, 258, 288, 318, 344])
+
+CONSTANTE_SOLAR_W_M2 = 1367.0
+ALBEDO_PADRAO = 0.20
+COS_ZENITE_MIN = 0.0872  # sol a menos de 5° do horizonte: direta não é amplificada
+
+TEMPERATURA_AMBIENTE_PADRAO = 25.0
+AMPLITUDE_TERMICA_DIARIA = 8.0
+HORA_TEMPERATURA_MAXIMA = 15
+NOCT = 45.0
+COEF_TEMPERATURA_POTENCIA = -0.0037  # por °C acima de 25 °C (módulo monocristalino típico)
+PERDAS_SISTEMA = 0.14  # sujeira, descasamento, cabos e eficiência do inversor
+
+FACES_POR_BLOCO = 20_000
+
+
+@dataclass(frozen=True)
+class Face:
+    """Uma água do telhado: inclinação e azimute em graus, potência instalada em kWp."""
+    inclinacao: float
+    azimute: float
+    kwp: float
+    nome: str = ""
+
+
+@dataclass
+class ResultadoRendimento:
+    """Valores mensais por face (eixo final = 12 meses)."""
+    geracao_mensal: np.ndarray
+    irradiacao_plano: np.ndarray
+    perda_temperatura: np.ndarray
+    kwp: np.ndarray
+
+    @property
+    def geracao_anual(self):
+        return self.geracao_mensal.sum(axis=-1)
+
+    @property
+    def taxa_desempenho(self):
+        """Geração / (kWp × irradiação no plano) no ano: comparável à TAXA_DESEMPENHO fixa."""
+        irradiacao_anual = (self.irradiacao_plano * DIAS_MES).sum(axis=-1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.geracao_anual / (self.kwp * irradiacao_anual)
+
+    @property
+    def taxa_desempenho_conjunto(self):
+        """Taxa de desempenho de todas as faces juntas (o telhado inteiro)."""
+        return float(self.geracao_anual.sum() / (self.kwp * (self.irradiacao_plano * DIAS_MES).sum(axis=-1)).sum())
+
+
+# --- GEOMETRIA SOLAR E IRRADIÂNCIA HORIZONTAL ---
+
+def _posicao_sol(latitude):
+    """Componentes (leste, norte, zênite) do vetor do sol, (12, 24), e o ângulo do pôr do sol por mês."""
+    phi = np.radians(latitude)
+    delta = np.radians(23.45) * np.sin(2 * np.pi * (284 + DIAS_REPRESENTATIVOS) / 365)[:, None]
+    omega = np.radians(15.0 * (np.arange(24) + 0.5 - 12))[None, :]
+    leste = -np.cos(delta) * np.sin(omega)
+    norte = np.cos(phi) * np.sin(delta) - np.sin(phi) * np.cos(delta) * np.cos(omega)
+    zenite = np.sin(phi) * np.sin(delta) + np.cos(phi) * np.cos(delta) * np.cos(omega)
+    omega_por = np.arccos(np.clip(-np.tan(phi) * np.tan(delta[:, 0]), -1, 1))
+    return leste, norte, zenite, omega, omega_por, delta[:, 0]
+
+
+def _fracao_difusa(kt, omega_por):
+    """Fração difusa diária (Erbs et al., 1982), por mês."""
+    inverno = 1 - 0.2727 * kt + 2.4495 * kt ** 2 - 11.9514 * kt ** 3 + 9.3879 * kt ** 4
+    verao = 1 + 0.2832 * kt - 2.5557 * kt ** 2 + 0.8448 * kt ** 3
+    return np.where(omega_por <= np.radians(81.4),
+                    np.where(kt < 0.715, inverno, 0.143),
+                    np.where(kt < 0.722, verao, 0.175))
+
+
+def irradiancia_horizontal(latitude, hsp_mensal):
+    """Global e difusa horizontais (kWh/m² em cada hora do dia representativo), (12, 24) cada."""
+    leste, norte, zenite, omega, omega_por, delta = _posicao_sol(latitude)
+    phi = np.radians(latitude)
+    hsp = np.asarray(hsp_mensal, dtype=float)
+
+    excentricidade = 1 + 0.033 * np.cos(2 * np.pi * DIAS_REPRESENTATIVOS / 365)
+    h0 = (24 / np.pi) * CONSTANTE_SOLAR_W_M2 / 1000 * excentricidade * (
+        np.cos(phi) * np.cos(delta) * np.sin(omega_por) + omega_por * np.sin(phi) * np.sin(delta))
+    kt = np.clip(hsp / h0, 0, 1)
+    difusa_diaria = hsp * _fracao_difusa(kt, omega_por)
+
+    por = omega_por[:, None]
+    a = 0.409 + 0.5016 * np.sin(por - np.pi / 3)
+    b = 0.6609 - 0.4767 * np.sin(por - np.pi / 3)
+    forma_difusa = np.clip(np.cos(omega) - np.cos(por), 0, None)
+    forma_global = (a + b * np.cos(omega)) * forma_difusa
+    # Amostrar no meio de cada hora não fecha a soma exata: normaliza para a HSP do mês
+    global_h = hsp[:, None] * forma_global / forma_global.sum(axis=1, keepdims=True)
+    difusa_h = difusa_diaria[:, None] * forma_difusa / forma_difusa.sum(axis=1, keepdims=True)
+    return global_h, np.minimum(difusa_h, global_h), (leste, norte, zenite)
+
+
+# --- TRANSPOSIÇÃO (GRADE EM CACHE) ---
+
+class FatoresTransposicao:
+    """Irradiância no plano pré-calculada numa grade de orientações, para um local.
+
+    `poa` tem shape (inclinações, azimutes, 12, 24), em kWh/m² por hora do
+    dia representativo de cada mês; `ghi` é a horizontal, (12, 24).
+    """
+
+    def __init__(self, latitude, hsp_mensal, albedo=ALBEDO_PADRAO,
+                 inclinacoes=INCLINACOES_GRADE, azimutes=AZIMUTES_GRADE):
+        self.latitude = latitude
+        self.inclinacoes = np.asarray(inclinacoes, dtype=float)
+        self.azimutes = np.asarray(azimutes, dtype=float)
+        self.ghi, difusa, (leste, norte, zenite) = irradiancia_horizontal(latitude, hsp_mensal)
+        direta = self.ghi - difusa
+
+        beta = np.radians(self.inclinacoes)[:, None, None, None]
+        alfa = np.radians(self.azimutes)[None, :, None, None]
+        cos_incidencia = np.sin(beta) * (np.sin(alfa) * leste + np.cos(alfa) * norte) + np.cos(beta) * zenite
+        fator_direta = np.where(zenite > 0, np.clip(cos_incidencia, 0, None) / np.maximum(zenite, COS_ZENITE_MIN), 0.0)
+        self.poa = (direta * fator_direta
+                    + difusa * (1 + np.cos(beta)) / 2
+                    + self.ghi * albedo * (1 - np.cos(beta)) / 2)
+        self.poa.setflags(write=False)
+        self.ghi.setflags(write=False)
+
+    def irradiancia_plano(self, inclinacao, azimute):
+        """Interpolação bilinear na grade: (faces, 12, 24) para arrays de inclinação/azimute.
+
+        Faces com inclinação ou azimute não finitos (NaN, inf) saem com NaN.
+        """
+        inclinacao = np.atleast_1d(np.asarray(inclinacao, dtype=float))
+        azimute = np.atleast_1d(np.asarray(azimute, dtype=float))
+        inclinacao, azimute = np.broadcast_arrays(inclinacao, azimute)
+        validas = np.isfinite(inclinacao) & np.isfinite(azimute)
+        if not validas.all():
+            inclinacao, azimute = np.where(validas, inclinacao, 0.0), np.where(validas, azimute, 0.0)
+        passo_i = self.inclinacoes[1] - self.inclinacoes[0]
+        posicao_i = np.clip((inclinacao - self.inclinacoes[0]) / passo_i, 0, len(self.inclinacoes) - 1)
+        i0 = np.minimum(posicao_i.astype(np.int64), len(self.inclinacoes) - 2)
+        peso_i = (posicao_i - i0)[:, None, None]
+
+        passo_a = 360.0 / len(self.azimutes)
+        posicao_a = np.mod(azimute - self.azimutes[0], 360.0) / passo_a
+        j0 = posicao_a.astype(np.int64) % len(self.azimutes)
+        j1 = (j0 + 1) % len(self.azimutes)
+        peso_a = (posicao_a - np.floor(posicao_a))[:, None, None]
+
+        poa = self.poa
+        baixo = poa[i0, j0] * (1 - peso_a) + poa[i0, j1] * peso_a
+        alto = poa[i0 + 1, j0] * (1 - peso_a) + poa[i0 + 1, j1] * peso_a
+        resultado = baixo * (1 - peso_i) + alto * peso_i
+        resultado[~validas] = np.nan
+        return resultado
+
+    def fator(self, inclinacao, azimute):
+        """Irradiação diária no plano / horizontal, por mês: (faces, 12)."""
+        return self.irradiancia_plano(inclinacao, azimute).sum(axis=-1) / self.ghi.sum(axis=-1)
+
+
+@functools.lru_cache(maxsize=128)
+def fatores_transposicao(latitude, hsp_mensal, albedo=ALBEDO_PADRAO):
+    """Grade de transposição compartilhada do processo, uma por local (latitude + HSP mensal)."""
+    return FatoresTransposicao(float(latitude), tuple(hsp_mensal), albedo)
+
+
+# --- GERAÇÃO ---
+
+def _temperatura_ambiente(temperatura_ambiente, amplitude):
+    """Temperatura ambiente (12, 24): média mensal (escalar ou 12 valores) com ciclo diário."""
+    media = np.broadcast_to(np.asarray(temperatura_ambiente, dtype=float), (12,))
+    horas = np.arange(24) + 0.5
+    return media[:, None] + amplitude / 2 * np.cos(2 * np.pi * (horas - HORA_TEMPERATURA_MAXIMA) / 24)[None, :]
+
+
+def _geracao_horaria(fatores, kwp, inclinacao, azimute, temperatura_ambiente, amplitude, perdas):
+    """Geração (faces, 12, 24) em kWh por hora do dia representativo, e a irradiância no plano."""
+    poa = fatores.irradiancia_plano(inclinacao, azimute)
+    temperatura_celula = _temperatura_ambiente(temperatura_ambiente, amplitude) + (NOCT - 20) / 800 * poa * 1000
+    fator_temperatura = 1 + COEF_TEMPERATURA_POTENCIA * (temperatura_celula - 25)
+    return kwp[:, None, None] * poa * fator_temperatura * (1 - perdas), poa
+
+
+def simular_faces(fatores, kwp, inclinacao, azimute, temperatura_ambiente=TEMPERATURA_AMBIENTE_PADRAO,
+                  amplitude_termica=AMPLITUDE_TERMICA_DIARIA, perdas=PERDAS_SISTEMA, bloco=FACES_POR_BLOCO):
+    """Geração mensal de muitas faces (ou sistemas) de um mesmo local, em blocos.
+
+    `kwp`, `inclinacao` e `azimute` se combinam por broadcasting em um
+    array 1-D de faces; o resultado tem uma linha por face.
+    """
+    kwp, inclinacao, azimute = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(v, dtype=float)) for v in (kwp, inclinacao, azimute)))
+    geracao = np.empty(kwp.shape + (12,))
+    irradiacao = np.empty(kwp.shape + (12,))
+    perda = np.empty(kwp.shape + (12,))
+    for i in range(0, len(kwp), bloco):
+        fatia = slice(i, i + bloco)
+        horaria, poa = _geracao_horaria(fatores, kwp[fatia], inclinacao[fatia], azimute[fatia],
+                                        temperatura_ambiente, amplitude_termica, perdas)
+        irradiacao[fatia] = poa.sum(axis=-1)
+        geracao[fatia] = horaria.sum(axis=-1) * DIAS_MES
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sem_temperatura = kwp[fatia, None] * irradiacao[fatia] * (1 - perdas)
+            perda[fatia] = np.where(sem_temperatura > 0, 1 - horaria.sum(axis=-1) / sem_temperatura,
+                                    np.where(np.isnan(sem_temperatura), np.nan, 0.0))
+    return ResultadoRendimento(geracao_mensal=geracao, irradiacao_plano=irradiacao,
+                               perda_temperatura=perda, kwp=kwp)
+
+
+def simular_telhado(faces, latitude, hsp_mensal, **opcoes):
+    """Atalho para uma lista de `Face` de um município: resultado por face (linhas na ordem dada)."""
+    fatores = fatores_transposicao(latitude, tuple(hsp_mensal))
+    return simular_faces(fatores, [f.kwp for f in faces], [f.inclinacao for f in faces],
+                         [f.azimute for f in faces], **opcoes)
+
+
+def perfil_horario_telhado(faces, latitude, hsp_mensal, temperatura_ambiente=TEMPERATURA_AMBIENTE_PADRAO,
+                           amplitude_termica=AMPLITUDE_TERMICA_DIARIA, perdas=PERDAS_SISTEMA):
+    """Geração horária do telhado inteiro (8760 valores), somando as faces; serve de `geracao_h`
+    para `horario.simular_sistema` (e o gráfico comparativo do app)."""
+    fatores = fatores_transposicao(latitude, tuple(hsp_mensal))
+    horaria, _ = _geracao_horaria(
+        fatores, np.array([f.kwp for f in faces], dtype=float), [f.inclinacao for f in faces],
+        [f.azimute for f in faces], temperatura_ambiente, amplitude_termica, perdas)
+    dia_por_mes = horaria.sum(axis=0)  # (12, 24)
+    return np.repeat(dia_por_mes, DIAS_MES, axis=0).ravel()
@@ -0,0 +1,396 @@
+"""Estado da sessão fora do processo, para rodar várias réplicas do Streamlit.
+
+Sem backend configurado nada muda: o resultado (`res`) e a lista de
+tarifas ficam no session_state do processo. Com SOLARSIM_SESSOES definido,
+o app identifica o visitante por `?sessao=<id>` na URL (que sobrevive à troca
+de réplica), restaura o estado no início de cada rerun e, ao final, grava um
+registro binário compacto e tira esses itens da memória do processo:
+
+    SOLARSIM_SESSOES=sqlite:///var/lib/solarsim/sessoes.db   (arquivo compartilhado entre réplicas)
+    SOLARSIM_SESSOES=redis://localhost:6379/0               (requer o pacote redis)
+    SOLARSIM_SESSOES=memoria                                (substituto local do Redis, um processo)
+    SOLARSIM_SESSOES_TTL=86400                              (segundos sem acesso até expirar)
+
+O registro não é um pickle do dict: são ~30 floats numa ordem fixa, alguns
+flags, as poucas strings (cidade, hash da medição) e, no modo "Estou
+construindo", as quantidades de aparelhos, num layout versionado.
+O que é derivável (payback formatado, saldo de kWh, os resultados dos
+cenários salvos, dos quais só as entradas são gravadas) é recalculado ao
+restaurar.
+"""
+
+import functools
+import os
+import sqlite3
+import struct
+import threading
+import time
+import uuid
+from array import array
+
+from solarsim.calculos import formatar_payback
+from solarsim.cenarios import ColecaoCenarios, EntradasCenario
+
+TTL_PADRAO_SEGUNDOS = 24 * 3600
+VERSAO_REGISTRO = 1
+PARAMETRO_URL = "sessao"
+
+# Itens do session_state que vivem no armazém quando ele está ativo
+CHAVES_EXTERNAS = ("res", "tarifas_list", "medicao_hash", "cenarios")
+
+# Rótulos de `custos_detalhados`, na ordem gravada
+ROTULOS_CUSTOS = ("Painéis Fotovoltaicos", "Inversor(es)", "Estruturas, Cabos e Proteções", "Mão de Obra e Projeto")
+CAMPOS_DADOS = ("potencia_kwp", "inversor_kw_recomendado", "numero_paineis", "area_m2", "custo_total_estimado_site",
+                "economia_mensal_reais", "co2_evitado_kg", "geracao_mensal")
+CAMPOS_RESULTADO = ("hsp", "custo_wp", "consumo", "tarifa", "custo_final", "minimo_kwh")
+
+_N_FLOATS = len(CAMPOS_RESULTADO) + 12 + len(CAMPOS_DADOS) + len(ROTULOS_CUSTOS)
+_CABECALHO = struct.Struct("<BBH")  # versão, flags, número de tarifas
+_FLAG_ORCAMENTO, _FLAG_TARIFA_TABELA, _FLAG_CONSUMO_INTEIRO, _FLAG_RESULTADO, _FLAG_CENARIOS = 1, 2, 4, 8, 16
+_FLAG_APARELHOS = 32
+_CENARIOS = struct.Struct("<IH")  # revisão, número de cenários
+_ENTRADAS_CENARIO = struct.Struct("<4d")  # consumo, tarifa, taxa mínima, orçamento (NaN = médio SolarSim)
+_APARELHOS = struct.Struct("<5H")  # quantidades do modo "Estou construindo" (perfil por aparelho)
+
+
+class RegistroResultado:
+    """O dict `res` do app em um array de floats de layout fixo."""
+
+    __slots__ = ("valores", "cidade", "medicao", "orcamento_personalizado", "tarifa_tabela", "consumo_inteiro",
+                 "aparelhos")
+
+    def __init__(self, valores, cidade, medicao=None, orcamento_personalizado=False, tarifa_tabela=False,
+                 consumo_inteiro=False, aparelhos=None):
+        self.valores = valores
+        self.cidade = cidade
+        self.medicao = medicao
+        self.orcamento_personalizado = orcamento_personalizado
+        self.tarifa_tabela = tarifa_tabela
+        self.consumo_inteiro = consumo_inteiro
+        self.aparelhos = aparelhos
+
+    @classmethod
+    def de_resultado(cls, res):
+        dados = res["dados"]
+        valores = array("d", [res[c] for c in CAMPOS_RESULTADO])
+        valores.extend(res["fatores_mensais"])
+        valores.extend(dados[c] for c in CAMPOS_DADOS)
+        valores.extend(dados["custos_detalhados"].get(rotulo, 0.0) for rotulo in ROTULOS_CUSTOS)
+        return cls(valores, res["cidade"], res.get("medicao"), bool(res.get("orcamento_personalizado")),
+                   bool(res.get("tarifa_tabela")), isinstance(res["consumo"], int), res.get("aparelhos"))
+
+    def para_resultado(self):
+        v = self.valores.tolist()
+        base = dict(zip(CAMPOS_RESULTADO, v))
+        fatores = tuple(v[len(CAMPOS_RESULTADO):len(CAMPOS_RESULTADO) + 12])
+        inicio = len(CAMPOS_RESULTADO) + 12
+        dados = dict(zip(CAMPOS_DADOS, v[inicio:inicio + len(CAMPOS_DADOS)]))
+        dados["numero_paineis"] = int(dados["numero_paineis"])
+        dados["custos_detalhados"] = dict(zip(ROTULOS_CUSTOS, v[inicio + len(CAMPOS_DADOS):]))
+        consumo = int(base["consumo"]) if self.consumo_inteiro else base["consumo"]
+        return {
+            "cidade": self.cidade,
+            "hsp": base["hsp"],
+            "custo_wp": base["custo_wp"],
+            "fatores_mensais": fatores,
+            "consumo": consumo,
+            "tarifa": base["tarifa"],
+            "custo_final": base["custo_final"],
+            "dados": dados,
+            "payback": formatar_payback(base["custo_final"], dados["economia_mensal_reais"]),
+            "minimo_kwh": int(base["minimo_kwh"]),
+            "saldo_kwh": dados["geracao_mensal"] - consumo,
+            "orcamento_personalizado": self.orcamento_personalizado,
+            "medicao": self.medicao,
+            "tarifa_tabela": self.tarifa_tabela,
+            "aparelhos": self.aparelhos,
+        }
+
+
+def _texto(valor):
+    dados = (valor or "").encode("utf-8")
+    return struct.pack("<H", len(dados)) + dados
+
+
+def _ler_texto(buffer, posicao):
+    (tamanho,) = struct.unpack_from("<H", buffer, posicao)
+    posicao += 2
+    return bytes(buffer[posicao:posicao + tamanho]).decode("utf-8") or None, posicao + tamanho
+
+
+def serializar(estado):
+    """Bytes dos itens de CHAVES_EXTERNAS de um session_state (ou dict)."""
+    tarifas = array("d", estado.get("tarifas_list", ()))
+    res = estado.get("res")
+    registro = RegistroResultado.de_resultado(res) if res is not None else None
+    flags = 0
+    if registro is not None:
+        flags |= _FLAG_RESULTADO
+        flags |= _FLAG_ORCAMENTO * registro.orcamento_personalizado
+        flags |= _FLAG_TARIFA_TABELA * registro.tarifa_tabela
+        flags |= _FLAG_CONSUMO_INTEIRO * registro.consumo_inteiro
+        flags |= _FLAG_APARELHOS * (registro.aparelhos is not None)
+    partes = [_CABECALHO.pack(VERSAO_REGISTRO, flags, len(tarifas)), tarifas.tobytes(),
+              _texto(estado.get("medicao_hash"))]
+    if registro is not None:
+        partes += [registro.valores.tobytes(), _texto(registro.cidade), _texto(registro.medicao)]
+        if registro.aparelhos is not None:
+            partes.append(_APARELHOS.pack(*registro.aparelhos))
+    cenarios = estado.get("cenarios")
+    if cenarios:
+        flags |= _FLAG_CENARIOS
+        partes.append(_CENARIOS.pack(cenarios.revisao, len(cenarios)))
+        for nome, e in cenarios.para_lista():
+            orcamento = float("nan") if e.orcamento is None else e.orcamento
+            partes += [_texto(nome), _texto(e.cidade),
+                       _ENTRADAS_CENARIO.pack(e.consumo, e.tarifa, e.minimo_kwh, orcamento)]
+    partes[0] = _CABECALHO.pack(VERSAO_REGISTRO, flags, len(tarifas))
+    return b"".join(partes)
+
+
+def desserializar(dados):
+    """Dict com os itens de CHAVES_EXTERNAS presentes no registro."""
+    buffer = memoryview(dados)
+    versao, flags, n_tarifas = _CABECALHO.unpack_from(buffer, 0)
+    if versao != VERSAO_REGISTRO:
+        raise ValueError(f"Versão de registro de sessão desconhecida: {versao}")
+    posicao = _CABECALHO.size
+    tarifas = array("d")
+    tarifas.frombytes(buffer[posicao:posicao + 8 * n_tarifas])
+    posicao += 8 * n_tarifas
+    estado = {"tarifas_list": tarifas.tolist()}
+    medicao_hash, posicao = _ler_texto(buffer, posicao)
+    if medicao_hash:
+        estado["medicao_hash"] = medicao_hash
+    if flags & _FLAG_RESULTADO:
+        valores = array("d")
+        valores.frombytes(buffer[posicao:posicao + 8 * _N_FLOATS])
+        posicao += 8 * _N_FLOATS
+        cidade, posicao = _ler_texto(buffer, posicao)
+        medicao, posicao = _ler_texto(buffer, posicao)
+        aparelhos = None
+        if flags & _FLAG_APARELHOS:
+            aparelhos = _APARELHOS.unpack_from(buffer, posicao)
+            posicao += _APARELHOS.size
+        estado["res"] = RegistroResultado(
+            valores, cidade, medicao, bool(flags & _FLAG_ORCAMENTO), bool(flags & _FLAG_TARIFA_TABELA),
+            bool(flags & _FLAG_CONSUMO_INTEIRO), aparelhos).para_resultado()
+    if flags & _FLAG_CENARIOS:
+        revisao, n_cenarios = _CENARIOS.unpack_from(buffer, posicao)
+        posicao += _CENARIOS.size
+        itens = []
+        for _ in range(n_cenarios):
+            nome, posicao = _ler_texto(buffer, posicao)
+            cidade, posicao = _ler_texto(buffer, posicao)
+            consumo, tarifa, minimo_kwh, orcamento = _ENTRADAS_CENARIO.unpack_from(buffer, posicao)
+            posicao += _ENTRADAS_CENARIO.size
+            itens.append((nome, EntradasCenario(consumo, tarifa, cidade, int(minimo_kwh),
+                                                None if orcamento != orcamento else orcamento)))
+        # Só as entradas viajam; a coleção é recriada a cada restauração, mas dimensionamento e fluxo de
+        # caixa de entradas já vistas por este processo vêm do CACHE_SIMULACAO
+        estado["cenarios"] = ColecaoCenarios.de_lista(itens, revisao)
+    return estado
+
+
+# --- ARMAZÉNS ---
+
+class _Medidas:
+    """Contadores de uso do armazém: bytes gravados e latência de leitura."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.leituras = self.acertos = self.gravacoes = self.bytes_gravados = 0
+        self.ultimo_tamanho = 0
+        self._latencias = []
+
+    def leitura(self, segundos, acertou):
+        with self._lock:
+            self.leituras += 1
+            self.acertos += acertou
+            self._latencias.append(segundos)
+            if len(self._latencias) > 4096:
+                del self._latencias[:2048]
+
+    def gravacao(self, tamanho):
+        with self._lock:
+            self.gravacoes += 1
+            self.bytes_gravados += tamanho
+            self.ultimo_tamanho = tamanho
+
+    def resumo(self):
+        with self._lock:
+            latencias = sorted(self._latencias)
+        percentil = lambda p: latencias[min(len(latencias) - 1, int(p * len(latencias)))] * 1000 if latencias else 0.0
+        return {
+            "leituras": self.leituras,
+            "acertos": self.acertos,
+            "gravacoes": self.gravacoes,
+            "bytes_por_sessao": self.bytes_gravados / self.gravacoes if self.gravacoes else 0.0,
+            "restauracao_p50_ms": percentil(0.5),
+            "restauracao_p99_ms": percentil(0.99),
+        }
+
+
+class ArmazemMemoria:
+    """Substituto local do Redis (GET/SETEX com TTL) para um único processo."""
+
+    def __init__(self, ttl_segundos=TTL_PADRAO_SEGUNDOS):
+        self.ttl_segundos = ttl_segundos
+        self._itens = {}
+        self._lock = threading.Lock()
+        self.medidas = _Medidas()
+
+    def obter(self, sessao):
+        inicio = time.perf_counter()
+        agora = time.monotonic()
+        with self._lock:
+            item = self._itens.get(sessao)
+            if item is not None and item[1] <= agora:
+                del self._itens[sessao]
+                item = None
+        self.medidas.leitura(time.perf_counter() - inicio, item is not None)
+        return item[0] if item is not None else None
+
+    def guardar(self, sessao, dados):
+        with self._lock:
+            self._itens[sessao] = (bytes(dados), time.monotonic() + self.ttl_segundos)
+        self.medidas.gravacao(len(dados))
+
+    def remover_expirados(self):
+        agora = time.monotonic()
+        with self._lock:
+            vencidas = [chave for chave, (_, expira) in self._itens.items() if expira <= agora]
+            for chave in vencidas:
+                del self._itens[chave]
+        return len(vencidas)
+
+    def __len__(self):
+        return len(self._itens)
+
+
+class ArmazemSQLite:
+    """Sessões num arquivo SQLite (WAL), que várias réplicas na mesma máquina ou volume podem compartilhar."""
+
+    LIMPEZA_A_CADA = 500  # gravações entre duas remoções de sessões expiradas
+
+    def __init__(self, caminho, ttl_segundos=TTL_PADRAO_SEGUNDOS):
+        self.caminho = str(caminho)
+        self.ttl_segundos = ttl_segundos
+        self.medidas = _Medidas()
+        self._local = threading.local()
+        self._gravacoes_desde_limpeza = 0
+        with self._conexao() as conexao:
+            conexao.execute("CREATE TABLE IF NOT EXISTS sessoes (id TEXT PRIMARY KEY, dados BLOB NOT NULL, "
+                            "expira REAL NOT NULL) WITHOUT ROWID")
+            conexao.execute("CREATE INDEX IF NOT EXISTS sessoes_expira ON sessoes (expira)")
+
+    def _conexao(self):
+        conexao = getattr(self._local, "conexao", None)
+        if conexao is None:
+            conexao = sqlite3.connect(self.caminho, timeout=5, isolation_level=None)
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute("PRAGMA synchronous=NORMAL")
+            self._local.conexao = conexao
+        return conexao
+
+    def obter(self, sessao):
+        inicio = time.perf_counter()
+        linha = self._conexao().execute(
+            "SELECT dados FROM sessoes WHERE id = ? AND expira > ?", (sessao, time.time())).fetchone()
+        self.medidas.leitura(time.perf_counter() - inicio, linha is not None)
+        return linha[0] if linha is not None else None
+
+    def guardar(self, sessao, dados):
+        self._conexao().execute("INSERT OR REPLACE INTO sessoes (id, dados, expira) VALUES (?, ?, ?)",
+                                (sessao, bytes(dados), time.time() + self.ttl_segundos))
+        self.medidas.gravacao(len(dados))
+        self._gravacoes_desde_limpeza += 1
+        if self._gravacoes_desde_limpeza >= self.LIMPEZA_A_CADA:
+            self._gravacoes_desde_limpeza = 0
+            self.remover_expirados()
+
+    def remover_expirados(self):
+        return self._conexao().execute("DELETE FROM sessoes WHERE expira <= ?", (time.time(),)).rowcount
+
+    def __len__(self):
+        return self._conexao().execute("SELECT COUNT(*) FROM sessoes").fetchone()[0]
+
+
+class ArmazemRedis:
+    """Sessões num Redis (ou compatível: Valkey, KeyDB, ...) com SETEX; a expiração é do servidor."""
+
+    def __init__(self, url, ttl_segundos=TTL_PADRAO_SEGUNDOS, prefixo="solarsim:sessao:"):
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("SOLARSIM_SESSOES=redis://... requer o pacote 'redis' (pip install redis).") from None
+        self.cliente = redis.Redis.from_url(url)
+        self.ttl_segundos = ttl_segundos
+        self.prefixo = prefixo
+        self.medidas = _Medidas()
+
+    def obter(self, sessao):
+        inicio = time.perf_counter()
+        dados = self.cliente.get(self.prefixo + sessao)
+        self.medidas.leitura(time.perf_counter() - inicio, dados is not None)
+        return dados
+
+    def guardar(self, sessao, dados):
+        self.cliente.setex(self.prefixo + sessao, int(self.ttl_segundos), bytes(dados))
+        self.medidas.gravacao(len(dados))
+
+    def remover_expirados(self):
+        return 0
+
+
+def criar_armazem(url, ttl_segundos=TTL_PADRAO_SEGUNDOS):
+    """Armazém a partir de uma URL: sqlite:///caminho, redis://..., memoria."""
+    if url == "memoria":
+        return ArmazemMemoria(ttl_segundos)
+    if url.startswith("sqlite:///"):
+        return ArmazemSQLite(url[len("sqlite:///"):], ttl_segundos)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return ArmazemRedis(url, ttl_segundos)
+    raise ValueError(f"Backend de sessão desconhecido: {url!r} (use sqlite:///..., redis://... ou memoria)")
+
+
+@functools.lru_cache(maxsize=None)
+def abrir_armazem():
+    """Armazém do processo configurado por SOLARSIM_SESSOES, ou None (estado só em memória)."""
+    url = os.environ.get("SOLARSIM_SESSOES")
+    if not url:
+        return None
+    return criar_armazem(url, float(os.environ.get("SOLARSIM_SESSOES_TTL", TTL_PADRAO_SEGUNDOS)))
+
+
+# --- INTEGRAÇÃO COM O SESSION_STATE ---
+
+def restaurar_sessao(estado, parametros, armazem):
+    """Identifica a sessão pela URL e traz de volta os itens externos que não estão na memória."""
+    sessao = estado.get("_sessao_id") or parametros.get(PARAMETRO_URL)
+    if not sessao:
+        sessao = uuid.uuid4().hex
+    if parametros.get(PARAMETRO_URL) != sessao:
+        parametros[PARAMETRO_URL] = sessao
+    estado["_sessao_id"] = sessao
+    if any(chave in estado for chave in CHAVES_EXTERNAS):
+        return False  # rerun anterior interrompido antes de gravar: a memória está mais atual
+    dados = armazem.obter(sessao)
+    if dados is None:
+        return False
+    for chave, valor in desserializar(dados).items():
+        estado[chave] = valor
+    return True
+
+
+def salvar_sessao(estado, armazem):
+    """Grava os itens externos e os tira da memória do processo; devolve o tamanho do registro."""
+    sessao = estado.get("_sessao_id")
+    if not sessao:
+        return 0
+    dados = serializar(estado)
+    armazem.guardar(sessao, dados)
+    for chave in CHAVES_EXTERNAS:
+        if chave in estado:
+            del estado[chave]
+    return len(dados)
@@ -0,0 +1,218 @@
+"""Tarifas de energia por distribuidora e data: TE/TUSD, bandeiras e tributos.
+
+As tabelas datadas de `solarsim/dados` (uma linha por vigência) são
+compiladas uma vez por processo em arrays densos, um valor por mês do
+calendário coberto. Com isso a conta de qualquer combinação de meses ×
+cenários é só indexação e aritmética NumPy, numa única chamada:
+
+    tabela = carregar_tabela()
+    conta = tabela.fatura([[300], [450]], meses_entre("2024-01", "2024-12"), "Enel RJ", minimo_kwh=50)
+    conta.total          # (2 cenários, 12 meses) em R$
+
+A conta segue a regra da ANEEL para residencial B1: energia faturada
+(consumo ou custo de disponibilidade, o maior) × (TE + TUSD + adicional da
+bandeira), com ICMS, PIS e COFINS "por dentro":
+
+    total = base / (1 - (pis + cofins + icms))
+
+O ICMS do RJ é por faixa de consumo e a alíquota da faixa vale para a conta
+inteira. Meses depois do fim das tabelas repetem a última tarifa vigente; a
+bandeira desses meses é `bandeira_futura` ("verde" ou "historica", a média
+dos adicionais nos últimos 12 meses conhecidos).
+"""
+
+import csv
+import functools
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from solarsim.municipios import PASTA_DADOS, normalizar_nome
+
+BANDEIRAS = ("verde", "amarela", "vermelha_1", "vermelha_2")
+BANDEIRA_HISTORICA = -1
+DISTRIBUIDORA_PADRAO = "Enel RJ"
+MESES_HISTORICO_BANDEIRA = 12
+
+
+@dataclass
+class Fatura:
+    """Componentes da conta em R$ (mesma forma: cenários × meses)."""
+    kwh_faturado: np.ndarray
+    energia: np.ndarray
+    bandeira: np.ndarray
+    tributos: np.ndarray
+    total: np.ndarray
+
+    @property
+    def tarifa_efetiva(self):
+        """R$/kWh pago de fato (com bandeira e tributos)."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(self.kwh_faturado > 0, self.total / self.kwh_faturado, np.nan)
+
+
+def mes_numero(meses):
+    """Meses ("2024-03", datetime64, date) como inteiros (meses desde 1970-01)."""
+    return np.asarray(meses, dtype="datetime64[M]").astype(np.int64)
+
+
+def meses_entre(inicio, fim):
+    """Meses de `inicio` a `fim`, inclusive, como datetime64[M]."""
+    return np.arange(np.datetime64(inicio, "M"), np.datetime64(fim, "M") + 1)
+
+
+def _ler_csv(caminho):
+    with open(caminho, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def _vigente(vigencias, meses):
+    """Índice da vigência em vigor em cada mês (a primeira vale também para meses anteriores)."""
+    return np.clip(np.searchsorted(vigencias, meses, "right") - 1, 0, None)
+
+
+class TabelaTarifas:
+    """Tabelas datadas compiladas em arrays (distribuidora × mês do calendário)."""
+
+    def __init__(self, pasta=PASTA_DADOS):
+        pasta = Path(pasta)
+        tarifas = _ler_csv(pasta / "tarifas.csv")
+        icms = _ler_csv(pasta / "icms.csv")
+        valores = _ler_csv(pasta / "bandeiras_valores.csv")
+        acionadas = _ler_csv(pasta / "bandeiras_acionadas.csv")
+        if not tarifas:
+            raise ValueError(f"Nenhuma tarifa em {pasta / 'tarifas.csv'}")
+
+        self.distribuidoras = tuple(dict.fromkeys(linha["distribuidora"] for linha in tarifas))
+        self._indice = {normalizar_nome(nome): i for i, nome in enumerate(self.distribuidoras)}
+        self.uf = tuple(next(l["uf"] for l in tarifas if l["distribuidora"] == d) for d in self.distribuidoras)
+
+        meses_bandeira = mes_numero([l["mes"] for l in acionadas])
+        datas = [mes_numero([l["vigencia"] for l in tabela]) for tabela in (tarifas, icms, valores) if tabela]
+        self.mes_inicial = int(min(np.min(d) for d in [*datas, meses_bandeira]))
+        self.mes_final = int(max(np.max(d) for d in [*datas, meses_bandeira]))
+        calendario = np.arange(self.mes_inicial, self.mes_final + 1)
+        n_dist, n_meses = len(self.distribuidoras), len(calendario)
+
+        # TE, TUSD, PIS e COFINS: (distribuidora, mês)
+        self.te, self.tusd, self.pis, self.cofins = (np.zeros((n_dist, n_meses)) for _ in range(4))
+        for d, nome in enumerate(self.distribuidoras):
+            linhas = sorted((l for l in tarifas if l["distribuidora"] == nome), key=lambda l: l["vigencia"])
+            vigente = _vigente(mes_numero([l["vigencia"] for l in linhas]), calendario)
+            for coluna in ("te", "tusd", "pis", "cofins"):
+                getattr(self, coluna)[d] = np.array([float(l[coluna]) for l in linhas])[vigente]
+
+        # ICMS por faixa: limites inferiores e alíquotas (distribuidora, mês, faixa), faixas vazias com +inf
+        faixas = {}
+        for linha in icms:
+            faixas.setdefault(linha["uf"], {}).setdefault(linha["vigencia"], []).append(
+                (float(linha["acima_de_kwh"]), float(linha["aliquota"])))
+        n_faixas = max((len(f) for por_data in faixas.values() for f in por_data.values()), default=1)
+        self.icms_limites = np.full((n_dist, n_meses, n_faixas), np.inf)
+        self.icms_aliquotas = np.zeros((n_dist, n_meses, n_faixas))
+        self.icms_limites[:, :, 0] = 0.0
+        for d, uf in enumerate(self.uf):
+            if uf not in faixas:
+                continue
+            vigencias = sorted(faixas[uf])
+            vigente = _vigente(mes_numero(vigencias), calendario)
+            for v, vigencia in enumerate(vigencias):
+                ordenadas = sorted(faixas[uf][vigencia])
+                em_vigor = vigente == v
+                self.icms_limites[d, em_vigor, :len(ordenadas)] = [limite for limite, _ in ordenadas]
+                self.icms_aliquotas[d, em_vigor, :len(ordenadas)] = [aliquota for _, aliquota in ordenadas]
+
+        # Bandeiras: adicional em R$/kWh (mês, bandeira) e bandeira acionada em cada mês (-1 = sem registro)
+        self.adicional = np.zeros((n_meses, len(BANDEIRAS)))
+        if valores:
+            valores = sorted(valores, key=lambda l: l["vigencia"])
+            vigente = _vigente(mes_numero([l["vigencia"] for l in valores]), calendario)
+            tabela = np.array([[0.0] + [float(l[b]) for b in BANDEIRAS[1:]] for l in valores])
+            self.adicional = tabela[vigente]
+        self.bandeira_mes = np.full(n_meses, BANDEIRA_HISTORICA, dtype=np.int8)
+        self.bandeira_mes[meses_bandeira - self.mes_inicial] = [BANDEIRAS.index(l["bandeira"]) for l in acionadas]
+
+        # Frequência de cada bandeira nos últimos 12 meses registrados (para "historica")
+        registrados = np.flatnonzero(self.bandeira_mes >= 0)[-MESES_HISTORICO_BANDEIRA:]
+        contagem = np.bincount(self.bandeira_mes[registrados], minlength=len(BANDEIRAS))
+        self.frequencia_bandeiras = contagem / max(contagem.sum(), 1)
+
+    def indice_distribuidora(self, distribuidora):
+        try:
+            return self._indice[normalizar_nome(distribuidora)]
+        except KeyError:
+            raise KeyError(f"Distribuidora sem tabela de tarifas: {distribuidora!r} "
+                           f"(disponíveis: {', '.join(self.distribuidoras)})") from None
+
+    def _posicao(self, meses):
+        return np.clip(mes_numero(meses) - self.mes_inicial, 0, self.mes_final - self.mes_inicial)
+
+    def _adicional_bandeira(self, meses, posicao, bandeira, bandeira_futura):
+        """Adicional da bandeira em R$/kWh, com forma (..., meses)."""
+        if bandeira is None:
+            codigo = self.bandeira_mes[posicao].astype(np.int64)
+            futura = BANDEIRA_HISTORICA if bandeira_futura == "historica" else BANDEIRAS.index(bandeira_futura)
+            codigo = np.where(mes_numero(meses) > self.mes_final, futura, codigo)
+            codigo = np.where(codigo < 0, futura, codigo)
+        elif isinstance(bandeira, str):
+            codigo = np.full(len(posicao), BANDEIRAS.index(bandeira))
+        else:
+            codigo = np.broadcast_to(np.asarray(bandeira, dtype=np.int64),
+                                     np.broadcast_shapes(np.shape(bandeira), posicao.shape))
+        adicional = self.adicional[posicao]  # (meses, bandeiras)
+        escolhido = adicional[np.arange(len(posicao)), np.maximum(codigo, 0)]
+        return np.where(codigo == BANDEIRA_HISTORICA, adicional @ self.frequencia_bandeiras, escolhido)
+
+    def fatura(self, consumo, meses, distribuidora=DISTRIBUIDORA_PADRAO, minimo_kwh=0,
+               bandeira=None, bandeira_futura="verde"):
+        """Conta de cada cenário em cada mês, numa só passada vetorizada.
+
+        `consumo` (kWh) e `minimo_kwh` se combinam por broadcasting com os
+        meses (último eixo), ex.: (cenários, 1) ou (cenários, meses).
+        `bandeira` força a bandeira: um nome de BANDEIRAS ou um array de
+        códigos (índices de BANDEIRAS, -1 = média histórica) com a forma do
+        resultado, útil para sortear cenários de bandeira.
+        """
+        d = self.indice_distribuidora(distribuidora)
+        meses = np.atleast_1d(np.asarray(meses, dtype="datetime64[M]"))
+        posicao = self._posicao(meses)
+        consumo = np.asarray(consumo, dtype=float)
+        kwh = np.maximum(consumo, np.asarray(minimo_kwh, dtype=float))
+
+        adicional = self._adicional_bandeira(meses, posicao, bandeira, bandeira_futura)
+        energia = kwh * (self.te[d, posicao] + self.tusd[d, posicao])
+        valor_bandeira = kwh * adicional
+
+        limites, aliquotas = self.icms_limites[d, posicao], self.icms_aliquotas[d, posicao]  # (meses, faixas)
+        faixa = np.maximum((consumo[..., None] > limites).sum(axis=-1) - 1, 0)
+        icms = np.take_along_axis(np.broadcast_to(aliquotas, faixa.shape + aliquotas.shape[-1:]),
+                                  faixa[..., None], axis=-1)[..., 0]
+        base = energia + valor_bandeira
+        total = base / (1 - (self.pis[d, posicao] + self.cofins[d, posicao] + icms))
+        return Fatura(
+            kwh_faturado=np.broadcast_to(kwh, total.shape),
+            energia=np.broadcast_to(energia, total.shape),
+            bandeira=np.broadcast_to(valor_bandeira, total.shape),
+            tributos=total - base,
+            total=total,
+        )
+
+    def ultimos_meses(self, n=12):
+        """Os `n` últimos meses cobertos pelas tabelas (datetime64[M])."""
+        fim = np.datetime64(self.mes_final, "M")
+        return np.arange(fim - (n - 1), fim + 1)
+
+    def tarifa_media(self, consumo, distribuidora=DISTRIBUIDORA_PADRAO, meses=None, minimo_kwh=0):
+        """Tarifa efetiva média (R$/kWh) nos `meses` (padrão: os 12 últimos das tabelas), por cenário."""
+        if meses is None:
+            meses = self.ultimos_meses()
+        conta = self.fatura(np.asarray(consumo, dtype=float)[..., None], meses, distribuidora, minimo_kwh)
+        return conta.total.sum(axis=-1) / conta.kwh_faturado.sum(axis=-1)
+
+
+@functools.lru_cache(maxsize=None)
+def carregar_tabela(pasta=None):
+    """Tabela compilada compartilhada do processo (SOLARSIM_TARIFAS aponta outra pasta de CSVs)."""
+    return TabelaTarifas(pasta or os.environ.get("SOLARSIM_TARIFAS") or PASTA_DADOS)
@@ -0,0 +1,58 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from solarsim.aparelhos import (APARELHOS_CASA_NOVA, MESES, BibliotecaAparelhos, carregar_biblioteca, fracao_diurna,
+                                perfil_casa_nova, quantidades_casa_nova)
+from solarsim.calculos import estimar_consumo_casa_nova
+from solarsim.horario import HORAS_ANO
+
+
+@pytest.fixture(scope="module")
+def biblioteca():
+    return carregar_biblioteca()
+
+
+def test_csv_concorda_com_estimar_consumo_casa_nova(biblioteca):
+    # kwh_mes de cada aparelho é o coeficiente de estimar_consumo_casa_nova: mudar um exige mudar o outro
+    for i, aparelho in enumerate(APARELHOS_CASA_NOVA):
+        unitario = [0] * len(APARELHOS_CASA_NOVA)
+        unitario[i] = 1
+        assert biblioteca.kwh_mes[biblioteca.indice(aparelho)] == estimar_consumo_casa_nova(*unitario), aparelho
+
+
+def test_media_mensal_igual_ao_consumo_do_site(biblioteca):
+    casas = np.array(list(itertools.product(range(1, 5), range(3), range(3), range(2), range(2))))
+    mensal = biblioteca.consumo_mensal(quantidades_casa_nova(*casas.T))
+    esperado = [estimar_consumo_casa_nova(*casa) for casa in casas]
+    np.testing.assert_allclose(mensal.mean(axis=-1), esperado)
+    assert (mensal.std(axis=-1) > 0).all()  # sazonalidade muda os meses, não a média
+
+
+def test_compor_soma_o_mensal_e_lote_igual_a_uma_casa(biblioteca):
+    q = quantidades_casa_nova(np.array([3, 5]), np.array([1, 2]), np.array([0, 2]), 1, np.array([0, 1]))
+    carga_h = biblioteca.compor(q)
+    assert carga_h.shape == (2, HORAS_ANO) and (carga_h >= 0).all()
+    np.testing.assert_allclose(carga_h.sum(axis=-1), biblioteca.consumo_mensal(q).sum(axis=-1))
+    np.testing.assert_allclose(carga_h[1], perfil_casa_nova(5, 2, 2, 1, 1))
+    np.testing.assert_allclose(biblioteca.compor(q, dtype=np.float32), carga_h, rtol=1e-5)
+    assert not perfil_casa_nova(5, 2, 2, 1, 1).flags.writeable
+
+
+def test_fracao_diurna(biblioteca):
+    uma = perfil_casa_nova(3, 1, 0, 1, 1)
+    assert 0 < fracao_diurna(uma) < 1
+    assert fracao_diurna(np.ones(HORAS_ANO)) == pytest.approx(0.5)
+    assert fracao_diurna(np.zeros((2, HORAS_ANO))).tolist() == [0.0, 0.0]
+
+
+def test_erros(biblioteca):
+    with pytest.raises(KeyError, match="piscina"):
+        biblioteca.quantidades(piscina=1)
+    with pytest.raises(ValueError):
+        biblioteca.compor(np.ones(len(biblioteca) + 1))
+    linha = {"aparelho": "x", "descricao": "", "kwh_mes": "1", "fator_fim_de_semana": "1",
+             **{f"h{h:02d}": "0" for h in range(24)}, **{m: "1" for m in MESES}}
+    with pytest.raises(ValueError, match="pesos horários"):
+        BibliotecaAparelhos([linha])
@@ -0,0 +1,119 @@
+import asyncio
+import json
+import math
+
+import pytest
+from tornado.testing import AsyncHTTPTestCase
+
+from solarsim.api import AgrupadorLotes, PedidoInvalido, calcular_cotacoes, criar_app, interpretar_pedido
+from solarsim.calculos import calcular_sistema_solar, estimar_consumo_casa_nova
+from solarsim.constantes import CIDADE_PADRAO, TAXA_MINIMA_CONEXAO
+from solarsim.fluxo_caixa import calcular_fluxo_caixa
+from solarsim.municipios import abrir_base
+from solarsim.tarifas import carregar_tabela
+
+
+def test_interpretar_pedido_soma_tarifas_e_usa_cidade_padrao():
+    entrada = interpretar_pedido({"consumo": 350, "tarifas": [0.62, 0.41], "conexao": "Trifásica"})
+    municipio = abrir_base().buscar(CIDADE_PADRAO)
+    assert entrada["tarifa"] == pytest.approx(1.03)
+    assert entrada["minimo_kwh"] == TAXA_MINIMA_CONEXAO["trifasica"]
+    assert (entrada["cidade"], entrada["hsp"]) == (municipio.rotulo, municipio.hsp)
+    assert math.isnan(entrada["orcamento"])
+
+
+def test_interpretar_pedido_casa_nova_e_distribuidora():
+    casa = {"pessoas": 3, "chuveiros": 1, "ar_cond": 1}
+    entrada = interpretar_pedido({"casa_nova": casa, "distribuidora": "Enel RJ", "orcamento": 8000})
+    consumo = estimar_consumo_casa_nova(3, 1, 1, 0, 0)
+    assert entrada["consumo"] == consumo
+    assert entrada["tarifa"] == pytest.approx(float(carregar_tabela().tarifa_media(consumo, "Enel RJ")))
+    assert entrada["orcamento"] == 8000
+
+
+@pytest.mark.parametrize("pedido", [
+    [],
+    {"tarifa": 1.0},
+    {"consumo": 0, "tarifa": 1.0},
+    {"consumo": True, "tarifa": 1.0},
+    {"consumo": "350", "tarifa": 1.0},
+    {"consumo": float("nan"), "tarifa": 1.0},
+    {"consumo": 350, "tarifas": []},
+    {"consumo": 350, "tarifas": [0.6, -0.1]},
+    {"consumo": 350, "distribuidora": "Inexistente"},
+    {"consumo": 350, "tarifa": 1.0, "conexao": "quadrifasica"},
+    {"consumo": 350, "tarifa": 1.0, "cidade": "Cidade Que Não Existe"},
+    {"consumo": 350, "tarifa": 1.0, "latitude": -200, "longitude": 0},
+    {"casa_nova": [3], "tarifa": 1.0},
+])
+def test_interpretar_pedido_rejeita_entradas_invalidas(pedido):
+    with pytest.raises(PedidoInvalido):
+        interpretar_pedido(pedido)
+
+
+def test_cotacoes_em_lote_iguais_as_individuais():
+    pedidos = [{"consumo": c, "tarifa": t} for c, t in ((120, 0.9), (350, 1.03), (1800, 1.2))]
+    pedidos.append({"consumo": 500, "tarifa": 1.0, "orcamento": 6000})
+    entradas = [interpretar_pedido(p) for p in pedidos]
+    juntas = calcular_cotacoes(entradas)
+    for entrada, resposta in zip(entradas, juntas):
+        assert calcular_cotacoes([entrada]) == [resposta]
+    e = entradas[1]
+    escalar = calcular_sistema_solar(e["consumo"], e["tarifa"], e["hsp"], e["custo_wp"])
+    assert juntas[1]["numero_paineis"] == escalar["numero_paineis"]
+    assert juntas[1]["custo_total_estimado_site"] == escalar["custo_total_estimado_site"]
+    fluxo = calcular_fluxo_caixa(escalar["custo_total_estimado_site"], escalar["geracao_mensal"], e["consumo"],
+                                 e["tarifa"], e["minimo_kwh"], fatores_mensais=e["fatores_mensais"])
+    assert juntas[1]["vpl"] == pytest.approx(fluxo.vpl.item())
+    assert juntas[3]["custo_total_estimado_site"] <= 6000
+
+
+def test_agrupador_junta_pedidos_da_mesma_janela():
+    lotes = []
+
+    def calcular(entradas):
+        lotes.append(list(entradas))
+        return [e * 10 for e in entradas]
+
+    async def rodar():
+        agrupador = AgrupadorLotes(calcular, janela_ms=20, lote_maximo=4)
+        respostas = await asyncio.gather(*(agrupador.calcular_um(i) for i in range(6)))
+        return respostas, agrupador.estatisticas()
+
+    respostas, estatisticas = asyncio.run(rodar())
+    assert respostas == [i * 10 for i in range(6)]
+    assert lotes == [[0, 1, 2, 3], [4, 5]]
+    assert estatisticas == {"lotes": 2, "pedidos": 6, "pedidos_por_lote": 3.0}
+
+
+def test_agrupador_propaga_erro_a_todos_do_lote():
+    def calcular(entradas):
+        raise RuntimeError("falhou")
+
+    async def rodar():
+        agrupador = AgrupadorLotes(calcular, janela_ms=1)
+        return await asyncio.gather(*(agrupador.calcular_um(i) for i in range(3)), return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(rodar()))
+
+
+class TestServidor(AsyncHTTPTestCase):
+    def get_app(self):
+        return criar_app(janela_ms=1)
+
+    def _post(self, corpo):
+        return self.fetch("/cotacao", method="POST", body=corpo if isinstance(corpo, bytes) else json.dumps(corpo))
+
+    def test_cotacao_unica_e_lista(self):
+        unica = self._post({"consumo": 350, "tarifa": 1.0})
+        assert unica.code == 200
+        resposta = json.loads(unica.body)
+        lista = json.loads(self._post([{"consumo": 350, "tarifa": 1.0}, {"consumo": 900, "tarifa": 1.0}]).body)
+        assert lista[0] == resposta and lista[1]["numero_paineis"] > resposta["numero_paineis"]
+        saude = json.loads(self.fetch("/saude").body)
+        assert saude["status"] == "ok" and saude["pedidos"] == 3
+
+    def test_erros_viram_400(self):
+        assert self._post(b"{nao e json").code == 400
+        resposta = self._post({"consumo": -1, "tarifa": 1.0})
+        assert resposta.code == 400 and "consumo" in json.loads(resposta.body)["erro"]
@@ -0,0 +1,35 @@
+import json
+
+import pytest
+
+from benchmarks import suite
+
+
+def test_comparar_marca_regressoes_e_medidas_sem_baseline():
+    linhas = suite.comparar({"a": 1.2, "b": 2.0, "c": 0.5}, {"a": 1.0, "b": 1.0}, limite=0.5)
+    assert linhas[0] == ("a", 1.0, 1.2, pytest.approx(0.2), False)
+    assert linhas[1] == ("b", 1.0, 2.0, pytest.approx(1.0), True)
+    assert linhas[2] == ("c", None, 0.5, None, False)
+
+
+@pytest.mark.parametrize("argumentos, codigo", [([], 0), (["--estrito"], 1)])
+def test_main_lista_medidas_sem_baseline(tmp_path, monkeypatch, capsys, argumentos, codigo):
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps({"ambiente": {}, "medidas": {"micro/a": 1.0}}), encoding="utf-8")
+    monkeypatch.setattr(suite, "medir_micro", lambda: {"micro/a": 1.1, "micro/nova": 1.0})
+    assert suite.main(["--grupos", "micro", "--baseline", str(baseline), *argumentos]) == codigo
+    assert "1 medida(s) sem baseline" in capsys.readouterr().err
+
+
+def test_main_falha_com_regressao(tmp_path, monkeypatch):
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps({"ambiente": {}, "medidas": {"micro/a": 1.0}}), encoding="utf-8")
+    monkeypatch.setattr(suite, "medir_micro", lambda: {"micro/a": 2.0})
+    assert suite.main(["--grupos", "micro", "--baseline", str(baseline)]) == 1
+    assert suite.main(["--grupos", "micro", "--baseline", str(baseline), "--limite", "1.5"]) == 0
+
+
+def test_baseline_versionado_cobre_todos_os_casos_micro():
+    medidas = json.loads(suite.BASELINE_PADRAO.read_text(encoding="utf-8"))["medidas"]
+    faltando = sorted(set(suite.casos_micro()) - set(medidas))
+    assert not faltando, f"Regrave o baseline (python benchmarks/suite.py --salvar): {faltando}"
@@ -0,0 +1,81 @@
+import json
+import pickle
+
+import numpy as np
+import pytest
+
+from solarsim import cache as modulo_cache
+from solarsim.cache import CacheCompartilhado, DicionarioCongelado, congelar, normalizar
+from solarsim.calculos import calcular_sistema_solar
+from solarsim.fluxo_caixa import calcular_fluxo_caixa
+
+
+def test_obter_ou_calcular_calcula_uma_vez_e_conta_acertos():
+    cache = CacheCompartilhado(max_bytes=10**6)
+    chamadas = []
+    calcular = lambda: chamadas.append(1) or {"valor": 1}
+    primeiro = cache.obter_ou_calcular(("a", 1), calcular)
+    segundo = cache.obter_ou_calcular(("a", 1), calcular)
+    assert primeiro is segundo and len(chamadas) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_limite_de_bytes_remove_o_menos_usado():
+    cache = CacheCompartilhado(max_bytes=300, tamanho=lambda valor: 100)
+    for chave in "abc":
+        cache.guardar(chave, chave)
+    cache.obter("a")  # "b" passa a ser o menos usado
+    cache.guardar("d", "d")
+    assert cache.obter("b") is None and cache.obter("a") == "a"
+    assert cache.evictions == 1
+    assert cache.estatisticas()["bytes"] == 300
+
+
+def test_ttl_expira(monkeypatch):
+    agora = [1000.0]
+    monkeypatch.setattr(modulo_cache.time, "monotonic", lambda: agora[0])
+    cache = CacheCompartilhado(max_bytes=10**6, ttl_segundos=10)
+    cache.guardar("a", 1)
+    agora[0] += 9.9
+    assert cache.obter("a") == 1
+    agora[0] += 0.2
+    assert cache.obter("a") is None and cache.expirations == 1 and len(cache) == 0
+
+
+def test_normalizar_gera_chaves_estaveis():
+    assert normalizar(-0.0) == 0.0 and str(normalizar(-0.0)) == "0.0"
+    assert normalizar([1.00001, (2.123456,)]) == (1.0, (2.1235,))
+    assert normalizar(np.float64(3.14159265)) == 3.1416
+
+
+def test_resultado_compartilhado_e_somente_leitura():
+    cache = CacheCompartilhado(max_bytes=10**6)
+    dados = cache.obter_ou_calcular("sistema", lambda: calcular_sistema_solar(300, 1.0, 5.0, 3.4))
+    assert isinstance(dados, DicionarioCongelado)
+    with pytest.raises(TypeError):
+        dados["potencia_kwp"] = 99
+    with pytest.raises(TypeError):
+        dados["custos_detalhados"]["Inversor(es)"] = 0
+    with pytest.raises(TypeError):
+        dados.update(x=1)
+    # A cópia é um dict comum, editável, e o valor em cache não muda
+    copia = dict(dados)
+    copia["potencia_kwp"] = 99
+    assert cache.obter("sistema")["potencia_kwp"] == 2.75
+
+
+def test_arrays_e_dataclasses_congelados():
+    cache = CacheCompartilhado(max_bytes=10**7)
+    fluxo = cache.obter_ou_calcular("fluxo", lambda: calcular_fluxo_caixa(9000.0, 400.0, 350.0, 1.0))
+    with pytest.raises(ValueError):
+        fluxo.vpl[0] = 0
+    valor = congelar({"lista": [1, [2, 3]], "array": np.arange(3)})
+    assert valor["lista"] == (1, (2, 3))
+    assert not valor["array"].flags.writeable
+
+
+def test_dicionario_congelado_continua_serializavel():
+    valor = congelar({"a": [1, 2], "b": {"c": 1.5}})
+    assert json.loads(json.dumps(valor)) == {"a": [1, 2], "b": {"c": 1.5}}
+    copia = pickle.loads(pickle.dumps(valor))
+    assert copia == valor and isinstance(copia, DicionarioCongelado)
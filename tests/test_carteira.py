@@ -0,0 +1,137 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from solarsim.carteira import (CONEXOES, METRICAS, MINIMO_KWH_CONEXAO, Carteira, _acumular, _em_paralelo,
+                               abrir_carteira, agregar_carteira, importar_carteira)
+from solarsim.cli import main
+from solarsim.constantes import CIDADE_PADRAO, FATOR_EMISSAO_CO2_KWH, TAXA_DESEMPENHO
+from solarsim.horario import DIAS_MES, compensar_mensal
+from solarsim.municipios import abrir_base
+
+
+@pytest.fixture(scope="module")
+def municipio():
+    return abrir_base().buscar(CIDADE_PADRAO)
+
+
+def _carteira(municipio, n=1000, linhas_por_bloco=128, semente=18):
+    rng = np.random.default_rng(semente)
+    return Carteira({"codigo_ibge": np.full(n, municipio.codigo_ibge), "conexao": rng.integers(0, 3, n),
+                     "potencia_kwp": rng.uniform(1, 10, n), "consumo_kwh": rng.uniform(100, 1500, n),
+                     "tarifa": rng.uniform(0.7, 1.2, n), "creditos_kwh": rng.uniform(0, 500, n)}, linhas_por_bloco)
+
+
+def test_um_sistema_igual_a_compensacao_direta(municipio):
+    carteira = Carteira({"codigo_ibge": [municipio.codigo_ibge], "conexao": [2], "potencia_kwp": [4.4],
+                         "consumo_kwh": [300.0], "tarifa": [1.0], "creditos_kwh": [120.0]})
+    r = agregar_carteira(carteira)
+    potencia = np.float32(4.4).astype(float)
+    geracao = potencia * np.asarray(municipio.hsp_mensal) * TAXA_DESEMPENHO * DIAS_MES
+    usados, expirados, saldo, faturado = compensar_mensal(geracao[None], np.array([[300.0]]),
+                                                          MINIMO_KWH_CONEXAO[2], creditos_iniciais=np.array([120.0]))
+    np.testing.assert_allclose(r.metricas["geracao_kwh"][0, 2], geracao, rtol=1e-6)
+    np.testing.assert_allclose(r.metricas["saldo_creditos_kwh"][0, 2], saldo[0], rtol=1e-6)
+    np.testing.assert_allclose(r.metricas["co2_evitado_kg"], r.metricas["geracao_kwh"] * FATOR_EMISSAO_CO2_KWH)
+    assert r.sistemas == 1 and r.metricas["sistemas"][0, :2].sum() == 0
+
+
+def test_blocos_processos_e_arquivo_dao_o_mesmo_total(municipio, tmp_path):
+    carteira = _carteira(municipio)
+    inteira = agregar_carteira(Carteira(carteira.colunas, linhas_por_bloco=10**6))
+    em_blocos = agregar_carteira(carteira)
+    paralela = agregar_carteira(carteira, processos=2)
+    mapeada = agregar_carteira(abrir_carteira(carteira.salvar(tmp_path / "carteira.arrow")), processos=2)
+    assert carteira.n_blocos == 8
+    for r in (em_blocos, paralela, mapeada):
+        np.testing.assert_array_equal(r.codigos_ibge, inteira.codigos_ibge)
+        for nome in METRICAS:
+            np.testing.assert_allclose(r.metricas[nome], inteira.metricas[nome], rtol=1e-9)
+    assert inteira.sistemas == 1000
+
+
+def test_em_paralelo_limita_as_tarefas_submetidas():
+    criadas, maximo = [0], [0]
+    consumidas = [0]
+    trava = threading.Lock()
+
+    def tarefas():
+        for i in range(50):
+            with trava:
+                criadas[0] += 1
+                maximo[0] = max(maximo[0], criadas[0] - consumidas[0])
+            yield i
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        resultados = []
+        for valor in _em_paralelo(executor, lambda x: x * x, tarefas(), em_andamento=4):
+            with trava:
+                consumidas[0] += 1
+            resultados.append(valor)
+    assert resultados == [i * i for i in range(50)]
+    assert maximo[0] <= 4
+
+
+def test_importar_carteira_por_nome(municipio):
+    carteira = importar_carteira({"cidade": [CIDADE_PADRAO] * 3, "conexao": ["monofásica", "Bifásica", "TRIFASICA"],
+                                  "potencia_kwp": [3.0, 4.0, 5.0], "consumo": [200, 300, 400]})
+    np.testing.assert_array_equal(carteira.colunas["conexao"], [0, 1, 2])
+    assert (carteira.colunas["codigo_ibge"] == municipio.codigo_ibge).all()
+    assert carteira.colunas["consumo_kwh"].tolist() == [200, 300, 400]
+    with pytest.raises(ValueError, match="Conexão desconhecida"):
+        importar_carteira({"codigo_ibge": [1], "conexao": ["quadrifásica"], "potencia_kwp": [1], "consumo_kwh": [1]})
+    with pytest.raises(ValueError):
+        Carteira({"codigo_ibge": [1], "potencia_kwp": [1.0]})
+    with pytest.raises(ValueError):
+        Carteira({"codigo_ibge": [1], "conexao": [5], "potencia_kwp": [1.0], "consumo_kwh": [1.0]})
+
+
+def test_carteira_vazia():
+    r = agregar_carteira(Carteira({nome: [] for nome in ("codigo_ibge", "potencia_kwp", "consumo_kwh")}))
+    assert r.sistemas == 0 and r.metricas["geracao_kwh"].shape == (0, len(CONEXOES), 12)
+
+
+def test_importar_descarta_linhas_sem_numero_cidade_ou_conexao(municipio):
+    df = pd.DataFrame({"cidade": [CIDADE_PADRAO, CIDADE_PADRAO, "Atlântida (ZZ)", None, CIDADE_PADRAO, CIDADE_PADRAO],
+                       "conexao": ["bifásica", "bifásica", "bifásica", "bifásica", None, "trifásica"],
+                       "potencia_kwp": [4.0, np.nan, 4.0, 4.0, 4.0, 5.0],
+                       "consumo": [300, 300, 300, 300, 300, "abc"]})
+    carteira = importar_carteira(df)
+    assert len(carteira) == 1 and carteira.descartadas == 5
+    assert carteira.colunas["codigo_ibge"].tolist() == [municipio.codigo_ibge]
+
+
+def test_linha_nao_finita_fica_fora_dos_totais(municipio):
+    colunas = {"codigo_ibge": [municipio.codigo_ibge] * 3, "conexao": [1, 1, 1],
+               "potencia_kwp": [4.0, np.nan, 5.0], "consumo_kwh": [300.0, 300.0, np.nan]}
+    r = agregar_carteira(Carteira(colunas))
+    so_validas = agregar_carteira(Carteira({nome: v[:1] for nome, v in colunas.items()}))
+    assert r.sistemas == 1
+    for nome in METRICAS:
+        np.testing.assert_array_equal(r.metricas[nome], so_validas.metricas[nome])
+
+
+def test_acumular_amplia_o_total_com_municipios_novos():
+    parte = lambda codigos, valor: (np.array(codigos, dtype=np.int32),
+                                    {nome: np.full((len(codigos), len(CONEXOES), 12), valor) for nome in METRICAS})
+    total = parte([], 0.0)
+    for p in (parte([20, 40], 1.0), parte([10, 40], 2.0), parte([30], 5.0)):
+        total = _acumular(total, p)
+    codigos, metricas = total
+    assert codigos.tolist() == [10, 20, 30, 40]
+    assert metricas["geracao_kwh"][:, 0, 0].tolist() == [2.0, 1.0, 5.0, 3.0]
+
+
+def test_cli_carteira_informa_as_linhas_descartadas(tmp_path, capsys):
+    entrada = tmp_path / "instalados.csv"
+    entrada.write_text(f"cidade,conexao,potencia_kwp,consumo\n{CIDADE_PADRAO},bifásica,4,300\n"
+                       f"{CIDADE_PADRAO},bifásica,,300\n{CIDADE_PADRAO},trifásica,5,400\n", encoding="utf-8")
+    saida = tmp_path / "agregados.csv"
+    assert main(["carteira", str(entrada), str(saida)]) == 0
+    avisos = capsys.readouterr().err
+    assert "1 linhas descartadas" in avisos and "2 sistemas" in avisos and "nan" not in avisos
+    resultado = pd.read_csv(saida)
+    assert np.isfinite(resultado["geracao_kwh"]).all() and resultado["sistemas"].max() == 1
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from solarsim.cache import CACHE_SIMULACAO
+from solarsim.calculos import calcular_sistema_por_orcamento, calcular_sistema_solar
+from solarsim.cenarios import ColecaoCenarios, EntradasCenario
+from solarsim.constantes import CIDADE_PADRAO
+from solarsim.fluxo_caixa import calcular_fluxo_caixa
+from solarsim.municipios import abrir_base
+
+
+@pytest.fixture
+def colecao():
+    CACHE_SIMULACAO.limpar()
+    colecao = ColecaoCenarios()
+    colecao.salvar("A", EntradasCenario(350.0, 1.05, CIDADE_PADRAO, 50))
+    colecao.salvar("B", EntradasCenario(600.0, 0.95, CIDADE_PADRAO, 100, orcamento=15000.0))
+    colecao.resultados()
+    return colecao
+
+
+def test_resultados_iguais_ao_calculo_direto(colecao):
+    municipio = abrir_base().buscar(CIDADE_PADRAO)
+    r = colecao.resultados()
+    dados_a = calcular_sistema_solar(350.0, 1.05, municipio.hsp, municipio.custo_wp)
+    dados_b = calcular_sistema_por_orcamento(15000.0, municipio.custo_wp, 600.0, 0.95, municipio.hsp)
+    assert r["A"].dados == dados_a and r["A"].custo_final == dados_a["custo_total_estimado_site"]
+    assert r["B"].dados == dados_b and r["B"].custo_final == 15000.0
+    fluxo = calcular_fluxo_caixa(15000.0, dados_b["geracao_mensal"], 600.0, 0.95, 100,
+                                 fatores_mensais=municipio.fatores_mensais)
+    assert r["B"].vpl == pytest.approx(fluxo.vpl.item())
+    assert r["B"].fluxo_acumulado_anual[0] == pytest.approx(-15000.0)
+    assert [linha["Cenário"] for linha in colecao.tabela()] == ["A", "B"]
+
+
+@pytest.mark.parametrize("mudanca, refeitas", [
+    ({"minimo_kwh": 30}, {"fluxo": 1}),
+    ({"tarifa": 1.2}, {"sistema": 1, "fluxo": 1}),
+    ({"orcamento": 20000.0}, {"sistema": 1, "fluxo": 1}),
+])
+def test_editar_refaz_so_as_etapas_afetadas(colecao, mudanca, refeitas):
+    antes = dict(colecao.recalculos)
+    outro = colecao.resultados()["A"]
+    colecao.atualizar("B", **mudanca)
+    r = colecao.resultados()
+    depois = {etapa: colecao.recalculos[etapa] - antes.get(etapa, 0) for etapa in ("municipio", "sistema", "fluxo")}
+    assert depois == {"municipio": 0, "sistema": 0, "fluxo": 0, **refeitas}
+    assert r["A"] == outro  # o outro cenário não é tocado
+    for campo, valor in mudanca.items():
+        assert getattr(r["B"].entradas, campo) == valor
+
+
+def test_resultado_editado_igual_ao_de_uma_colecao_nova(colecao):
+    colecao.atualizar("A", consumo=800.0, minimo_kwh=100)
+    editado = colecao.resultados()["A"]
+    CACHE_SIMULACAO.limpar()
+    novo = ColecaoCenarios.de_lista(colecao.para_lista()).resultados()["A"]
+    assert (editado.vpl, editado.custo_final, editado.dados) == (novo.vpl, novo.custo_final, novo.dados)
+    np.testing.assert_array_equal(editado.fluxo_acumulado_anual, novo.fluxo_acumulado_anual)
+
+
+def test_salvar_e_remover_mudam_a_revisao(colecao):
+    revisao = colecao.revisao
+    colecao.atualizar("A", tarifa=1.1)
+    assert colecao.revisao == revisao
+    colecao.salvar("C", EntradasCenario(200.0, 1.0, CIDADE_PADRAO))
+    colecao.remover("A")
+    assert colecao.revisao == revisao + 2
+    assert colecao.nomes() == ["B", "C"] and "A" not in colecao
+    assert set(colecao.resultados()) == {"B", "C"}
+
+
+def test_cidade_desconhecida(colecao):
+    colecao.salvar("X", EntradasCenario(300.0, 1.0, "Cidade Inexistente (ZZ)"))
+    with pytest.raises(KeyError):
+        colecao.resultados()
+
+
+def test_nome_livre_nao_repete_um_cenario_salvo():
+    colecao = ColecaoCenarios()
+    entradas = EntradasCenario(300.0, 1.0, CIDADE_PADRAO)
+    assert colecao.nome_livre() == "Cenário 1"
+    colecao.salvar(colecao.nome_livre(), entradas)
+    colecao.salvar(colecao.nome_livre(), entradas)
+    colecao.remover("Cenário 1")
+    assert colecao.nome_livre() == "Cenário 3"  # "Cenário 2" ainda existe
+    colecao.salvar(colecao.nome_livre(), entradas)
+    assert colecao.nomes() == ["Cenário 2", "Cenário 3"]
@@ -0,0 +1,117 @@
+import math
+
+import numpy as np
+import pytest
+
+from solarsim.equipamentos import (CUSTO_ESTRUTURA_POR_PAINEL, CUSTO_POR_STRING, RELACAO_CC_CA_MIN,
+                                   TEMPERATURA_CELULA_MAX_C, TEMPERATURA_CELULA_MIN_C, Catalogo, _strings_minimas,
+                                   carregar_catalogo, configurar_sistema)
+from solarsim.propostas import calcular_propostas
+
+
+def _catalogo(rng, n_paineis=6, n_inversores=8):
+    paineis = []
+    for k in range(n_paineis):
+        wp = int(rng.integers(400, 600))
+        vmp = rng.uniform(31, 42)
+        paineis.append({"modelo": f"P{k}", "fabricante": "T", "potencia_wp": wp, "voc": vmp * 1.2, "vmp": vmp,
+                        "isc": wp / vmp * 1.05, "imp": wp / vmp, "coef_voc": rng.uniform(-0.30, -0.24),
+                        "coef_pmax": rng.uniform(-0.37, -0.29), "area_m2": wp / 220, "preco": wp * rng.uniform(0.9, 1.3)})
+    inversores = []
+    for k in range(n_inversores):
+        ca = float(rng.choice([2, 3, 5, 8]))
+        inversores.append({"modelo": f"I{k}", "fabricante": "T", "potencia_ca_kw": ca,
+                           "potencia_cc_max_kw": ca * rng.uniform(1.2, 1.5), "tensao_max_cc": 550.0,
+                           "mppt_min": rng.uniform(60, 150), "mppt_max": 500.0, "tensao_partida": 100.0,
+                           "n_mppt": int(rng.integers(1, 3)), "strings_por_mppt": 1, "corrente_max_mppt": 16.0,
+                           "preco": ca * rng.uniform(500, 900) + 800})
+    return Catalogo(paineis, inversores)
+
+
+def _busca_exaustiva(alvo_wp, catalogo, folga=3, quantidade_maxima=8):
+    p, inv = catalogo.paineis, catalogo.inversores
+    melhor = math.inf
+    for painel in range(len(catalogo.paineis_modelo)):
+        base = max(math.ceil(alvo_wp / p["potencia_wp"][painel] - 1e-9), 1)
+        for n in range(base, base + folga + 1):
+            kwp = n * p["potencia_wp"][painel] / 1000
+            for qtd in range(1, quantidade_maxima + 1):
+                for i in range(len(catalogo.inversores_modelo)):
+                    if kwp / qtd > inv["potencia_cc_max_kw"][i] or kwp < RELACAO_CC_CA_MIN * qtd * inv["potencia_ca_kw"][i]:
+                        continue
+                    cmin, cmax, spm = (v[i:i + 1] for v in catalogo.limites_string(painel))
+                    strings = int(_strings_minimas(n, cmin, cmax, spm, qtd * inv["n_mppt"][i:i + 1])[0])
+                    if strings:
+                        custo = (n * (p["preco"][painel] + CUSTO_ESTRUTURA_POR_PAINEL) + qtd * inv["preco"][i]
+                                 + strings * CUSTO_POR_STRING)
+                        melhor = min(melhor, custo)
+    return melhor
+
+
+@pytest.mark.parametrize("semente", range(5))
+def test_branch_and_bound_igual_a_busca_exaustiva(semente):
+    rng = np.random.default_rng(semente)
+    catalogo = _catalogo(rng)
+    for alvo in (500, 1000, 1800, 4300, 9000):
+        materiais = configurar_sistema(alvo, catalogo)
+        esperado = _busca_exaustiva(alvo, catalogo)
+        if materiais is None:
+            assert esperado == math.inf
+        else:
+            assert materiais.custo_equipamentos == pytest.approx(esperado)
+            assert materiais.potencia_kwp * 1000 >= alvo
+
+
+def test_preco_minimo_respeita_a_janela_cc_ca():
+    catalogo = _catalogo(np.random.default_rng(7), n_inversores=30)
+    inv = catalogo.inversores
+    minimo, maximo = RELACAO_CC_CA_MIN * inv["potencia_ca_kw"], inv["potencia_cc_max_kw"]
+    potencias = np.concatenate([np.linspace(0, 14, 300), minimo, maximo])
+    esperado = [min((preco for preco, a, b in zip(inv["preco"], minimo, maximo) if a <= kw <= b), default=math.inf)
+                for kw in potencias]
+    np.testing.assert_array_equal(catalogo.preco_minimo_inversor(potencias), esperado)
+    assert catalogo.preco_minimo_inversor(0.5) == math.inf  # 1 painel não sustenta nem o menor inversor
+
+
+def test_vmp_usa_o_coeficiente_da_pmax():
+    painel = {"modelo": "P", "fabricante": "T", "potencia_wp": 500, "voc": 50.0, "vmp": 40.0, "isc": 13.0,
+              "imp": 12.5, "coef_voc": -0.25, "coef_pmax": -0.40, "area_m2": 2.3, "preco": 500}
+    inversor = {"modelo": "I", "fabricante": "T", "potencia_ca_kw": 3, "potencia_cc_max_kw": 4.5,
+                "tensao_max_cc": 600, "mppt_min": 150, "mppt_max": 500, "tensao_partida": 150, "n_mppt": 1,
+                "strings_por_mppt": 1, "corrente_max_mppt": 15, "preco": 2000}
+    minimo, maximo, _ = Catalogo([painel], [inversor]).limites_string(0)
+    vmp_quente = 40.0 * (1 - 0.40 / 100 * (TEMPERATURA_CELULA_MAX_C - 25))  # 32.8 V; com a da Voc seria 35.5 V
+    vmp_frio = 40.0 * (1 - 0.40 / 100 * (TEMPERATURA_CELULA_MIN_C - 25))
+    voc_frio = 50.0 * (1 - 0.25 / 100 * (TEMPERATURA_CELULA_MIN_C - 25))
+    assert minimo[0] == math.ceil(150 / vmp_quente) == 5
+    assert maximo[0] == math.floor(min(600 / voc_frio, 500 / vmp_frio))
+
+
+def test_potencia_maxima_mantem_o_sistema_simulado():
+    for paineis in range(1, 25):
+        alvo = paineis * 550
+        livre = configurar_sistema(alvo)
+        exato = configurar_sistema(alvo, potencia_maxima_wp=alvo)
+        assert livre is not None and livre.potencia_kwp * 1000 >= alvo
+        if exato is not None:
+            assert exato.potencia_kwp * 1000 == pytest.approx(alvo)
+            assert exato.numero_paineis == paineis
+            assert exato.custo_equipamentos >= livre.custo_equipamentos
+    # 1 painel não fecha string em nenhum inversor do catálogo: sem a trava, a lista cresce para 5 painéis
+    assert configurar_sistema(550, potencia_maxima_wp=550) is None
+    assert configurar_sistema(550).numero_paineis > 1
+
+
+def test_proposta_mostra_o_mesmo_sistema_simulado():
+    for contexto in calcular_propostas([{"id": i, "consumo": c, "tarifa": 1.0} for i, c in enumerate((60, 350, 1200))]):
+        materiais = contexto["materiais"]
+        if materiais is not None:
+            assert materiais.numero_paineis == contexto["dados"]["numero_paineis"]
+            assert contexto["area_m2"] == round(materiais.area_m2, 1)
+        else:
+            assert contexto["area_m2"] == contexto["dados"]["area_m2"]
+
+
+def test_catalogo_padrao_tem_coeficientes_plausiveis():
+    p = carregar_catalogo().paineis
+    assert ((p["coef_pmax"] < p["coef_voc"]) & (p["coef_pmax"] > -0.5)).all()
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from solarsim.fluxo_caixa import (
+    FIO_B_ESCALONAMENTO, FIO_B_FIM_ISENCAO, calcular_fluxo_caixa, percentual_fio_b, tir_lote,
+)
+from solarsim.horario import compensar_mensal
+
+SEM_AJUSTES = dict(reajuste_tarifa_anual=0.0, degradacao_anual=0.0, fracao_fio_b=0.0, ano_troca_inversor=0,
+                   fatores_mensais=None)
+
+
+def test_tir_de_fluxos_conhecidos():
+    # -1000 hoje e 1100 daqui a um mês: 10% ao mês; anuidade de 12 x 100 contra 1000: ~2,92% ao mês
+    tir = tir_lote(np.array([[-1000.0, 1100.0, 0.0], [-1000.0, 0.0, 1210.0]]))
+    np.testing.assert_allclose(tir, [0.10, 0.10], atol=1e-9)
+    anuidade = tir_lote(np.concatenate(([-1000.0], np.full(12, 100.0))))[0]
+    vpl = -1000 + sum(100 / (1 + anuidade) ** m for m in range(1, 13))
+    assert abs(vpl) < 1e-6
+    # Sem troca de sinal não existe TIR
+    assert np.isnan(tir_lote(np.array([[-1000.0, 10.0, 10.0]]))[0])
+
+
+def test_vpl_e_payback_conferem_com_a_definicao():
+    r = calcular_fluxo_caixa(9000.0, 400.0, 350.0, 1.0, 50, taxa_desconto_anual=0.10)
+    taxa = 1.10 ** (1 / 12) - 1
+    fluxos = r.fluxos[0]
+    assert r.vpl[0] == pytest.approx(sum(f / (1 + taxa) ** m for m, f in enumerate(fluxos)), rel=1e-12)
+    acumulado = np.cumsum(fluxos)
+    assert r.payback_simples_meses[0] == np.argmax(acumulado >= 0)
+    assert acumulado[int(r.payback_simples_meses[0]) - 1] < 0
+
+
+def test_lote_igual_a_um_cenario_por_vez():
+    rng = np.random.default_rng(4)
+    n = 30
+    entradas = dict(custo_inicial=rng.uniform(5000, 30000, n), geracao_mensal_kwh=rng.uniform(100, 1500, n),
+                    consumo_mensal_kwh=rng.uniform(100, 1500, n), tarifa=rng.uniform(0.6, 1.3, n),
+                    minimo_kwh=rng.choice([30.0, 50.0, 100.0], n), fracao_autoconsumo=rng.uniform(0, 0.5, n))
+    lote = calcular_fluxo_caixa(**entradas)
+    for i in range(0, n, 7):
+        um = calcular_fluxo_caixa(**{nome: valores[i] for nome, valores in entradas.items()})
+        np.testing.assert_allclose(um.fluxos[0], lote.fluxos[i])
+        assert um.tir_anual[0] == pytest.approx(lote.tir_anual[i], rel=1e-9)
+
+
+def test_economia_segue_o_banco_de_creditos_com_validade_e_taxa_minima():
+    # Geração muito acima do consumo: o excedente vira crédito e expira; nunca se paga menos que a taxa mínima
+    r = calcular_fluxo_caixa(10000.0, 1000.0, 300.0, 1.0, 50, anos=10, **SEM_AJUSTES)
+    consumo = np.full(120, 300.0)
+    usados, expirados, _, faturado = compensar_mensal(np.full(120, 1000.0), consumo, 50)
+    np.testing.assert_allclose(r.economia[0], (consumo - faturado) * 1.0)
+    np.testing.assert_allclose(r.economia[0], 250.0)
+    assert expirados[59] == 0 and expirados[60] > 0
+
+
+def test_fio_b_escalonado_e_direito_adquirido():
+    anos = np.arange(2022, 2048)
+    percentual = percentual_fio_b(anos)
+    assert percentual[anos == 2022][0] == 0.0
+    for ano, valor in FIO_B_ESCALONAMENTO.items():
+        assert percentual[anos == ano][0] == valor
+    assert (percentual[anos >= 2029] == 1.0).all()
+    isento = percentual_fio_b(anos, direito_adquirido=True)
+    assert (isento[anos < FIO_B_FIM_ISENCAO] == 0).all() and (isento[anos >= FIO_B_FIM_ISENCAO] == 1.0).all()
+
+
+def test_fio_b_reduz_a_economia_da_energia_compensada():
+    base = dict(SEM_AJUSTES, ano_inicio=2026)
+    sem_fio_b = calcular_fluxo_caixa(10000.0, 300.0, 300.0, 1.0, 50, anos=2, **base)
+    com_fio_b = calcular_fluxo_caixa(10000.0, 300.0, 300.0, 1.0, 50, anos=2, **dict(base, fracao_fio_b=0.28))
+    # 250 kWh compensados por mês; 60% do Fio B em 2026 e 75% em 2027
+    np.testing.assert_allclose(sem_fio_b.economia[0] - com_fio_b.economia[0],
+                               250 * 0.28 * np.repeat([0.60, 0.75], 12))
+
+
+def test_troca_do_inversor_desconta_no_ano_certo():
+    sem = calcular_fluxo_caixa(10000.0, 400.0, 400.0, 1.0, anos=15, ano_troca_inversor=0)
+    com = calcular_fluxo_caixa(10000.0, 400.0, 400.0, 1.0, anos=15, ano_troca_inversor=12, fracao_custo_inversor=0.2)
+    diferenca = sem.fluxos[0] - com.fluxos[0]
+    assert diferenca[144] == pytest.approx(2000.0) and np.count_nonzero(diferenca) == 1
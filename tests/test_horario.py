@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+from solarsim.horario import (
+    DIAS_MES, HORAS_ANO, compensar_mensal, perfil_carga_plano, perfil_geracao_horario, simular_lote, simular_sistema,
+    somar_por_mes,
+)
+
+
+def _compensar_referencia(injetada, importada, minimo, validade, creditos_iniciais=0.0):
+    """Banco de créditos explícito, lote a lote (FIFO), para conferir a versão vetorizada."""
+    lotes = [[-1, creditos_iniciais]] if creditos_iniciais else []
+    saida = []
+    for m, (inj, imp) in enumerate(zip(injetada, importada)):
+        compensavel = max(imp - minimo, 0.0)
+        do_mes = min(inj, compensavel)
+        falta, do_banco = compensavel - do_mes, 0.0
+        for lote in lotes:
+            retirar = min(lote[1], falta)
+            lote[1] -= retirar
+            falta -= retirar
+            do_banco += retirar
+        expirado = sum(q for mes, q in lotes if mes <= m - validade)
+        lotes = [l for l in lotes if l[0] > m - validade and l[1] > 0]
+        lotes.append([m, inj - do_mes])
+        saida.append((do_mes + do_banco, expirado, sum(q for _, q in lotes), max(imp - do_banco - do_mes, minimo)))
+    return [np.array(coluna) for coluna in zip(*saida)]
+
+
+@pytest.mark.parametrize("validade", [1, 3, 12, 60])
+def test_compensacao_igual_ao_banco_fifo_explicito(validade):
+    rng = np.random.default_rng(validade)
+    for _ in range(20):
+        meses = 80
+        injetada = rng.uniform(0, 400, meses) * (rng.random(meses) < 0.7)
+        importada = rng.uniform(0, 500, meses)
+        minimo, iniciais = float(rng.choice([30, 50, 100])), float(rng.uniform(0, 300))
+        vetorizado = compensar_mensal(injetada, importada, minimo, validade, creditos_iniciais=iniciais)
+        for obtido, esperado in zip(vetorizado, _compensar_referencia(injetada, importada, minimo, validade, iniciais)):
+            np.testing.assert_allclose(obtido, esperado, atol=1e-9)
+
+
+def test_credito_expira_exatamente_apos_a_validade():
+    injetada = np.array([100.0, 0, 0, 0, 0])
+    importada = np.full(5, 50.0)  # só a taxa mínima: nada a compensar
+    usados, expirados, saldo, faturado = compensar_mensal(injetada, importada, 50, validade_meses=3)
+    # Depositado no mês 0, vale nos meses 1, 2 e 3 e expira no fim do mês 3
+    assert saldo.tolist() == [100, 100, 100, 0, 0]
+    assert expirados.tolist() == [0, 0, 0, 100, 0]
+    assert usados.tolist() == [0] * 5
+    assert faturado.tolist() == [50] * 5
+
+
+def test_creditos_iniciais_expiram_um_mes_antes_dos_do_mes_zero():
+    _, expirados, saldo, _ = compensar_mensal(np.zeros(4), np.zeros(4), 0, validade_meses=3, creditos_iniciais=80)
+    assert expirados.tolist() == [0, 0, 80, 0]
+    assert saldo.tolist() == [80, 80, 0, 0]
+
+
+def test_credito_mais_antigo_e_usado_primeiro():
+    injetada = np.array([100.0, 100.0, 0, 0])
+    importada = np.array([0.0, 0.0, 150.0, 0.0])
+    _, expirados, saldo, _ = compensar_mensal(injetada, importada, 0, validade_meses=3)
+    # Mês 2 usa 100 do mês 0 e 50 do mês 1; os 50 restantes (do mês 1) expiram no fim do mês 4 (fora da janela)
+    assert saldo.tolist() == [100, 200, 50, 50]
+    assert expirados.tolist() == [0, 0, 0, 0]
+
+
+def test_taxa_minima_e_cobrada_mesmo_com_creditos():
+    _, _, _, faturado = compensar_mensal(np.array([1000.0]), np.array([300.0]), 100)
+    assert faturado.tolist() == [100.0]
+
+
+def test_perfis_preservam_os_totais_mensais():
+    fatores = np.linspace(0.8, 1.2, 12)
+    geracao = perfil_geracao_horario(10.0, anos=2, fatores_mensais=fatores)
+    assert geracao.shape == (2 * HORAS_ANO,)
+    np.testing.assert_allclose(somar_por_mes(geracao), np.tile(10.0 * fatores * DIAS_MES, 2))
+    np.testing.assert_allclose(somar_por_mes(perfil_carga_plano([300.0, 450.0])), [[300.0] * 12, [450.0] * 12])
+    # Nada é gerado à noite
+    assert geracao.reshape(-1, 24)[:, list(range(6)) + list(range(18, 24))].sum() == 0
+
+
+def test_balanco_de_energia_e_fatura():
+    r = simular_sistema(np.array([8.0, 15.0]), np.array([300.0, 300.0]), 50, 1.0)
+    np.testing.assert_allclose(r.autoconsumo + r.injetada, r.geracao)
+    np.testing.assert_allclose(r.autoconsumo + r.importada, r.consumo)
+    assert (r.kwh_faturado >= 50).all()
+    np.testing.assert_allclose(r.fatura, r.kwh_faturado)
+    assert (r.economia >= 0).all()
+
+
+def test_simular_lote_igual_a_uma_chamada_unica():
+    rng = np.random.default_rng(3)
+    geracao, consumo = rng.uniform(5, 20, 23), rng.uniform(100, 600, 23)
+    em_blocos = simular_lote(geracao, consumo, 50, 1.0, bloco=5)
+    direto = simular_sistema(geracao, consumo, 50, 1.0)
+    np.testing.assert_allclose(em_blocos.fatura, direto.fatura)
+    np.testing.assert_allclose(em_blocos.saldo_creditos, direto.saldo_creditos)
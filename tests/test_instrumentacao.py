@@ -0,0 +1,69 @@
+import contextvars
+import json
+import threading
+
+from solarsim.instrumentacao import Rerun, _RERUN_ATUAL, iniciar_rerun, span
+
+
+def test_etapas_e_spans_aninhados_em_ordem(tmp_path):
+    arquivo = tmp_path / "spans.jsonl"
+    rerun = Rerun("s1", 1)
+    rerun.etapa("entrada")
+    with span("externo"):
+        with span("interno"):
+            pass
+    rerun.etapa("saida")
+    registro = rerun.finalizar(arquivo)
+
+    assert [(s["nome"], s["nivel"]) for s in registro["spans"]] == [
+        ("entrada", 0), ("externo", 1), ("interno", 2), ("saida", 0)]
+    inicios = [s["inicio_ms"] for s in registro["spans"]]
+    assert inicios == sorted(inicios)
+    assert all(s["duracao_ms"] <= registro["total_ms"] for s in registro["spans"])
+    assert json.loads(arquivo.read_text(encoding="utf-8")) == registro
+    assert _RERUN_ATUAL.get() is None
+
+
+def test_span_sem_rerun_nao_faz_nada():
+    with span("solto"):
+        pass
+    assert _RERUN_ATUAL.get() is None
+
+
+def test_iniciar_rerun_numera_por_sessao():
+    estado, outro = {}, {}
+    primeiro = iniciar_rerun(estado)
+    primeiro.finalizar(None)
+    segundo = iniciar_rerun(estado)
+    segundo.finalizar(None)
+    terceiro = iniciar_rerun(outro)
+    terceiro.finalizar(None)
+    assert (primeiro.sessao, primeiro.numero) == (segundo.sessao, 1) and segundo.numero == 2
+    assert terceiro.sessao != primeiro.sessao and terceiro.numero == 1
+
+
+def test_reruns_em_threads_nao_misturam_spans():
+    registros = {}
+
+    def rodar(nome):
+        rerun = Rerun(nome, 1)
+        for i in range(50):
+            with span(f"{nome}-{i}"):
+                pass
+        registros[nome] = rerun.finalizar(None)
+
+    threads = [threading.Thread(target=contextvars.copy_context().run, args=(rodar, n)) for n in ("a", "b", "c")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for nome, registro in registros.items():
+        assert {s["nome"].split("-")[0] for s in registro["spans"]} == {nome}
+        assert len(registro["spans"]) == 50
+
+
+def test_perfil_gera_relatorio():
+    rerun = Rerun("s", 1, perfil=True)
+    sum(range(1000))
+    registro = rerun.finalizar(None)
+    assert registro["perfil"] and rerun.relatorio_perfil
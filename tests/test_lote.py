@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from solarsim.calculos import calcular_sistema_por_orcamento, calcular_sistema_solar
+from solarsim.cli import main
+from solarsim.constantes import CIDADE_PADRAO, POTENCIA_PAINEL_WP, TAXA_DESEMPENHO
+from solarsim.lote import REPARTICAO_CUSTOS, calcular_lote, calcular_lote_df, custos_detalhados
+
+
+def _linha(resultado, i):
+    return {nome: valores[i] for nome, valores in resultado.items()}
+
+
+def _comparar(escalar, linha):
+    for nome, valor in escalar.items():
+        if nome == "custos_detalhados":
+            assert custos_detalhados(linha) == valor
+        else:
+            assert linha[nome] == valor, nome
+
+
+def test_lote_igual_ao_escalar_por_consumo():
+    rng = np.random.default_rng(1)
+    n = 2000
+    consumo, tarifa = rng.uniform(30, 3000, n).round(1), rng.uniform(0.5, 1.5, n).round(2)
+    hsp, custo_wp = rng.uniform(3.5, 6.5, n).round(2), rng.uniform(2.5, 4.5, n).round(2)
+    resultado = calcular_lote(consumo, tarifa, hsp, custo_wp)
+    for i in range(n):
+        escalar = calcular_sistema_solar(float(consumo[i]), float(tarifa[i]), float(hsp[i]), float(custo_wp[i]))
+        _comparar(escalar, _linha(resultado, i))
+
+
+def test_lote_igual_ao_escalar_nos_empates_de_arredondamento():
+    # Consumos que caem (quase) exatamente em meio painel: round() do Python arredonda para o par
+    hsp = 5.0
+    meio_painel = POTENCIA_PAINEL_WP / 1000 * hsp * TAXA_DESEMPENHO * 30
+    consumo = (np.arange(1, 200) + 0.5) * meio_painel
+    resultado = calcular_lote(consumo, 1.0, hsp, 3.0)
+    for i, c in enumerate(consumo):
+        _comparar(calcular_sistema_solar(float(c), 1.0, hsp, 3.0), _linha(resultado, i))
+
+
+def test_lote_igual_ao_escalar_por_orcamento():
+    rng = np.random.default_rng(2)
+    n = 1000
+    orcamento = rng.uniform(2000, 80000, n).round(-1)
+    # Inclui orçamentos que dão exatamente meio painel (empate no round)
+    orcamento[:50] = (np.arange(1, 51) + 0.5) * POTENCIA_PAINEL_WP * 3.0
+    consumo, tarifa = rng.uniform(100, 2000, n), rng.uniform(0.5, 1.5, n)
+    resultado = calcular_lote(consumo, tarifa, 5.1, 3.0, orcamento)
+    for i in range(n):
+        escalar = calcular_sistema_por_orcamento(float(orcamento[i]), 3.0, float(consumo[i]), float(tarifa[i]), 5.1)
+        _comparar(escalar, _linha(resultado, i))
+
+
+def test_orcamento_nan_ou_nao_positivo_usa_calculadora_por_consumo():
+    resultado = calcular_lote([300.0] * 3, 1.0, 5.0, 3.4, [np.nan, 0.0, -5.0])
+    escalar = calcular_sistema_solar(300.0, 1.0, 5.0, 3.4)
+    for i in range(3):
+        _comparar(escalar, _linha(resultado, i))
+
+
+@pytest.mark.parametrize("entrada", [
+    dict(consumo=np.nan), dict(tarifa=np.nan), dict(hsp=np.nan), dict(hsp=0.0), dict(custo_wp=np.nan),
+    dict(custo_wp=0.0),
+])
+def test_linha_invalida_sai_mascarada_sem_afetar_as_demais(entrada):
+    valores = dict(consumo=300.0, tarifa=1.0, hsp=5.0, custo_wp=3.4)
+    colunas = {nome: np.array([v, entrada.get(nome, v)]) for nome, v in valores.items()}
+    resultado = calcular_lote(**colunas)
+    assert resultado["numero_paineis"].tolist() == [5, 0]
+    for nome in resultado:
+        if nome != "numero_paineis":
+            assert np.isnan(resultado[nome][1]), nome
+    _comparar(calcular_sistema_solar(**{"consumo_kwh": 300.0, "tarifa": 1.0, "hsp": 5.0, "custo_wp_regional": 3.4}),
+              _linha(resultado, 0))
+
+
+def test_lote_df_explica_as_linhas_invalidas():
+    df = pd.DataFrame({"consumo": [300, "abc", None], "tarifa": [1.0, 1.0, None]})
+    resultado = calcular_lote_df(df, hsp=5.0, custo_wp=3.4)
+    assert resultado["erro"].tolist() == ["", "entrada inválida: consumo", "entrada inválida: consumo, tarifa"]
+    assert resultado["numero_paineis"].tolist() == [5, 0, 0]
+    assert set(REPARTICAO_CUSTOS) <= set(resultado.columns)
+
+
+@pytest.mark.parametrize("extensao", ["parquet", "csv"])
+def test_cli_lote_com_tipos_diferentes_entre_blocos(tmp_path, extensao):
+    entrada = tmp_path / "leads.csv"
+    # `cliente` é inteiro no primeiro bloco e float (vazio, 5.5) depois; `tarifa` ganha um texto
+    entrada.write_text("consumo,tarifa,cliente\n300,1.0,1\n400,1.0,2\n500,1.0,3\n600,x,\n,1.0,5.5\n",
+                       encoding="utf-8")
+    saida = tmp_path / f"resultados.{extensao}"
+    assert main(["lote", str(entrada), str(saida), "--chunksize", "3", "--manter-colunas"]) == 0
+    resultado = pd.read_parquet(saida) if extensao == "parquet" else pd.read_csv(saida, keep_default_na=False)
+    assert len(resultado) == 5
+    assert resultado["numero_paineis"].tolist() == [5, 6, 8, 0, 0]
+    assert [e != "" for e in resultado["erro"]] == [False, False, False, True, True]
+
+
+def test_cli_lote_linha_sem_municipio_no_meio_do_bloco(tmp_path):
+    entrada = tmp_path / "leads.csv"
+    entrada.write_text(f"consumo,tarifa,cidade\n300,1.0,{CIDADE_PADRAO}\n400,1.0,\n500,1.0,Atlântida (ZZ)\n"
+                       f"600,x,\n700,1.0,{CIDADE_PADRAO}\n", encoding="utf-8")
+    saida = tmp_path / "resultados.csv"
+    assert main(["lote", str(entrada), str(saida), "--chunksize", "4"]) == 0
+    resultado = pd.read_csv(saida, keep_default_na=False)
+    assert resultado["erro"].tolist() == ["", "entrada inválida: cidade", "entrada inválida: cidade",
+                                          "entrada inválida: cidade, tarifa", ""]
+    assert resultado["numero_paineis"].tolist()[1:4] == [0, 0, 0]
+    assert resultado["numero_paineis"][4] > resultado["numero_paineis"][0] > 0
+
+    entrada.write_text("consumo,tarifa,latitude,longitude\n300,1.0,-22.5,-41.9\n400,1.0,,-41.9\n"
+                       "500,1.0,-22.5,abc\n600,1.0,-95,-41.9\n", encoding="utf-8")
+    assert main(["lote", str(entrada), str(saida)]) == 0
+    resultado = pd.read_csv(saida, keep_default_na=False)
+    assert resultado["erro"].tolist() == ["", "entrada inválida: latitude", "entrada inválida: longitude",
+                                          "entrada inválida: latitude"]
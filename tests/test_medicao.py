@@ -0,0 +1,115 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from solarsim.cli import main
+from solarsim.horario import HORAS_ANO
+from solarsim.medicao import (agregar_csv, carregar_medicao, detectar_codificacao, detectar_formato, hash_conteudo,
+                              montar_perfil, perfil_em_cache)
+
+
+def _csv_brasileiro(datas, kwh):
+    linhas = ["Data;Hora;Consumo Ativo (kWh)"]
+    linhas += [f"{d:%d/%m/%Y};{d:%H:%M};{str(round(v, 4)).replace('.', ',')}" for d, v in zip(datas, kwh)]
+    return ("\n".join(linhas) + "\n").encode("utf-8")
+
+
+@pytest.fixture
+def ano_2025():
+    datas = pd.date_range("2025-01-01", "2025-12-31 23:45", freq="15min")
+    kwh = 0.25 + 0.05 * (datas.hour.to_numpy() >= 18)
+    return datas, kwh
+
+
+def test_formato_brasileiro_detectado_e_ano_completo(ano_2025):
+    datas, kwh = ano_2025
+    arquivo = io.BytesIO(_csv_brasileiro(datas, kwh))
+    assert detectar_formato(arquivo) == (";", ",")
+    perfil = montar_perfil(*agregar_csv(arquivo, linhas_por_bloco=5_000))
+    esperado = np.where(np.tile(np.arange(24), 365) >= 18, 1.2, 1.0)
+    np.testing.assert_allclose(perfil.carga_h, esperado)
+    assert perfil.leituras == len(datas)
+    assert len(perfil.meses) == 12 and perfil.meses["kwh"].sum() == pytest.approx(kwh.sum())
+    assert perfil.consumo_medio_mensal == pytest.approx(esperado.sum() / 12)
+
+
+def test_blocos_nao_mudam_o_resultado(ano_2025):
+    datas, kwh = ano_2025
+    conteudo = _csv_brasileiro(datas, kwh)
+    inteiro = agregar_csv(io.BytesIO(conteudo))
+    picado = agregar_csv(io.BytesIO(conteudo), linhas_por_bloco=997)
+    np.testing.assert_allclose(inteiro[0], picado[0])
+    np.testing.assert_array_equal(inteiro[1], picado[1])
+    assert inteiro[2].keys() == picado[2].keys()
+
+
+def test_bissexto_iso_kw_e_linhas_invalidas():
+    datas = pd.date_range("2024-02-28", "2024-03-01 23:00", freq="h")
+    texto = "timestamp,demanda_kw\n" + "".join(f"{d:%Y-%m-%d %H:%M},2.0\n" for d in datas) + "lixo,abc\n,3\n"
+    soma_h, leituras_h, meses, inicio, fim, descartadas = agregar_csv(io.BytesIO(texto.encode()), unidade="kw",
+                                                                      intervalo_min=60)
+    dia_28 = slice(58 * 24, 59 * 24)
+    np.testing.assert_array_equal(leituras_h[dia_28], 2)  # 28/02 e 29/02 somados
+    assert soma_h.sum() == pytest.approx(2.0 * len(datas))
+    assert set(meses) == {(2024, 1), (2024, 2)}  # chave (ano, mês 0-11)
+    assert str(inicio).startswith("2024-02-28") and str(fim).startswith("2024-03-01")
+    assert descartadas == 2
+
+
+def test_horas_sem_leitura_recebem_a_media_do_mes():
+    soma_h, leituras_h = np.zeros(HORAS_ANO), np.zeros(HORAS_ANO, dtype=np.int64)
+    soma_h[:24 * 30], leituras_h[:24 * 30] = 1.0, 4  # só janeiro, 1 kWh por hora
+    perfil = montar_perfil(soma_h, leituras_h, {}, "a", "b")
+    np.testing.assert_allclose(perfil.carga_h, 1.0)
+
+
+def test_sem_leituras_validas():
+    with pytest.raises(ValueError):
+        agregar_csv(io.BytesIO(b"data,kwh\nx,y\n"))
+    with pytest.raises(ValueError):
+        agregar_csv(io.BytesIO(b"data,kwh\n2025-01-01,1\n"), unidade="mwh")
+
+
+def test_cache_por_conteudo_e_opcoes(tmp_path, ano_2025):
+    datas, kwh = ano_2025
+    arquivo = tmp_path / "medidor.csv"
+    arquivo.write_bytes(_csv_brasileiro(datas, kwh))
+    cache = tmp_path / "cache"
+    perfil = carregar_medicao(arquivo, pasta_cache=cache)
+    assert perfil.hash == hash_conteudo(arquivo, [])
+    assert hash_conteudo(arquivo, [("unidade", "kw")]) != perfil.hash
+
+    relido = perfil_em_cache(perfil.hash, cache)
+    np.testing.assert_array_equal(relido.carga_h, perfil.carga_h)
+    assert (relido.leituras, relido.inicio, relido.fim) == (perfil.leituras, perfil.inicio, perfil.fim)
+
+    (cache / f"{perfil.hash}.npz").write_bytes(b"corrompido")
+    assert perfil_em_cache(perfil.hash, cache) is None
+    np.testing.assert_array_equal(carregar_medicao(arquivo, pasta_cache=cache).carga_h, perfil.carga_h)
+    assert perfil_em_cache("0" * 64, cache) is None
+
+
+def test_latin1_e_ponto_de_milhar(tmp_path, capsys):
+    texto = ("Início;Consumo (kWh)\n01/01/2025 00:00;1.234,5\n01/01/2025 00:15;0,5\n"
+             "01/01/2025 00:30;sem leitura\n02/01/2025 00:00;2.000\n")
+    arquivo = tmp_path / "medidor.csv"
+    arquivo.write_bytes(texto.encode("latin-1"))
+    assert detectar_codificacao(arquivo) == "latin-1"
+    assert detectar_codificacao(io.BytesIO(texto.encode("utf-8"))) == "utf-8"
+    soma_h, _, meses, _, _, descartadas = agregar_csv(arquivo)
+    assert soma_h.sum() == pytest.approx(3235.0)
+    assert meses[(2025, 0)][0] == pytest.approx(3235.0) and descartadas == 1
+
+    perfil = carregar_medicao(arquivo, pasta_cache=tmp_path / "cache")
+    assert perfil.descartadas == 1 and perfil_em_cache(perfil.hash, tmp_path / "cache").descartadas == 1
+    assert main(["medicao", str(arquivo), "--sem-cache"]) == 0
+    assert "1 linhas descartadas" in capsys.readouterr().err
+
+
+def test_byte_latin1_depois_do_trecho_detectado():
+    linhas = "".join(f"{d:%d/%m/%Y %H:%M};1,0\n" for d in pd.date_range("2025-01-01", periods=20_000, freq="15min"))
+    conteudo = ("data;kwh\n" + linhas + "31/12/2025 23:45;1,0;\n").encode("utf-8") + "# observação\n".encode("latin-1")
+    soma_h, leituras_h, _, _, _, descartadas = agregar_csv(io.BytesIO(conteudo), linhas_por_bloco=5_000)
+    assert leituras_h.sum() == 20_001 and descartadas == 1
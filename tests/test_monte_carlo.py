@@ -0,0 +1,51 @@
+import math
+
+import numpy as np
+
+from solarsim.calculos import formatar_meses
+from solarsim.monte_carlo import Distribuicao, distribuicoes_padrao, simular_monte_carlo
+
+
+def test_mesma_semente_mesmo_resultado_com_qualquer_numero_de_processos():
+    distribuicoes = distribuicoes_padrao(5.0, 3.4, 1.0)
+    serial = simular_monte_carlo(2.75, 300, distribuicoes, n=30_000, semente=7, amostras_por_bloco=8_000)
+    paralelo = simular_monte_carlo(2.75, 300, distribuicoes, n=30_000, semente=7, amostras_por_bloco=8_000,
+                                   processos=2)
+    np.testing.assert_array_equal(serial.payback_anos, paralelo.payback_anos)
+    assert serial.percentis == paralelo.percentis
+    outra = simular_monte_carlo(2.75, 300, distribuicoes, n=30_000, semente=8, amostras_por_bloco=8_000)
+    assert outra.percentis != serial.percentis
+
+
+def test_distribuicoes_fixas_reproduzem_o_calculo_pontual():
+    fixas = {nome: Distribuicao("fixo", valor) for nome, valor in
+             (("hsp", 5.0), ("taxa_desempenho", 0.8), ("custo_wp", 3.4), ("tarifa", 1.0))}
+    r = simular_monte_carlo(2.75, 300, fixas, n=100)
+    assert r.percentis["geracao_mensal"][50] == 2.75 * 5.0 * 0.8 * 30
+    assert r.percentis["economia_mensal"][50] == 300.0
+    assert math.isclose(r.percentis["payback_anos"][10], 2750 * 3.4 / 3600)
+    assert r.percentis["payback_anos"][10] == r.percentis["payback_anos"][90]
+
+
+def test_custo_fixo_substitui_o_custo_sorteado():
+    r = simular_monte_carlo(2.75, 300, distribuicoes_padrao(5.0, 3.4, 1.0), n=1000, custo_fixo=12000.0)
+    np.testing.assert_allclose(r.payback_anos, 12000.0 / (r.economia_mensal * 12))
+
+
+def test_economia_nula_da_payback_infinito_e_texto_nao_aplicavel():
+    distribuicoes = dict(distribuicoes_padrao(5.0, 3.4, 0.0), tarifa=Distribuicao("fixo", 0.0))
+    r = simular_monte_carlo(2.75, 300, distribuicoes, n=1000)
+    assert np.isinf(r.percentis["payback_anos"][90])
+    assert formatar_meses(r.percentis["payback_anos"][90] * 12) == "Não aplicável"
+    assert formatar_meses(float("nan")) == "Não aplicável"
+    assert formatar_meses(-math.inf) == "Não aplicável"
+    assert formatar_meses(None) == "Não aplicável"
+    assert formatar_meses(27.4) == "~ 2 anos e 3 meses"
+    assert formatar_meses(11.6) == "~ 1 anos e 0 meses"
+
+
+def test_faixa_mensal_aplica_a_sazonalidade():
+    r = simular_monte_carlo(2.75, 300, distribuicoes_padrao(5.0, 3.4, 1.0), n=5000)
+    faixa = r.faixa_mensal(50, np.ones(12))
+    np.testing.assert_allclose(faixa.sum(), r.percentis["geracao_mensal"][50] * 365 / 30)
+    assert (r.faixa_mensal(10) <= r.faixa_mensal(90)).all()
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from solarsim.constantes import CIDADE_PADRAO
+from solarsim.municipios import (
+    COLUNAS_HSP_MENSAL, BaseMunicipios, _distancia_km, abrir_base, construir_base, normalizar_nome,
+)
+
+
+@pytest.fixture(scope="module")
+def base(tmp_path_factory):
+    """Base sintética de 300 municípios espalhados pelo Brasil (inclui nomes acentuados e repetidos em UFs diferentes)."""
+    rng = np.random.default_rng(5)
+    pasta = tmp_path_factory.mktemp("municipios")
+    linhas = ["codigo_ibge,nome,uf,latitude,longitude,hsp," + ",".join(COLUNAS_HSP_MENSAL) + ",custo_wp"]
+    for i in range(300):
+        nome = {0: "São João", 1: "São João", 2: "Água Branca"}.get(i, f"Cidade {i:03d}")
+        uf = ("PE", "RJ", "AL")[i] if i < 3 else ("SP", "MG", "BA", "RS", "AM")[i % 5]
+        mensal = rng.uniform(3.5, 6.5, 12)
+        custo = "" if i == 10 else f"{rng.uniform(2.3, 3.2):.2f}"
+        linhas.append(f"{1000000 + i},{nome},{uf},{rng.uniform(-33, 4):.4f},{rng.uniform(-73, -35):.4f},"
+                      f"{mensal.mean():.4f}," + ",".join(f"{h:.4f}" for h in mensal) + f",{custo}")
+    csv = pasta / "municipios.csv"
+    csv.write_text("\n".join(linhas) + "\n", encoding="utf-8")
+    return BaseMunicipios(construir_base(csv, pasta / "municipios.arrow"))
+
+
+def test_busca_por_nome_exata_sem_acento_e_por_prefixo(base):
+    assert base.buscar("São João (RJ)").uf == "RJ"
+    assert base.buscar("sao joao (pe)").uf == "PE"
+    assert base.buscar("  AGUA   branca ").rotulo == "Água Branca (AL)"
+    with pytest.raises(KeyError):
+        base.buscar("Atlântida (XX)")
+
+
+def test_mais_proximo_igual_a_forca_bruta(base):
+    rng = np.random.default_rng(6)
+    latitudes = base._latitude
+    longitudes = base._longitude
+    for lat, lon in zip(rng.uniform(-34, 5, 200), rng.uniform(-75, -34, 200)):
+        esperado = int(np.argmin(_distancia_km(lat, lon, latitudes, longitudes)))
+        assert base.mais_proximo(lat, lon).codigo_ibge == base._linha(esperado).codigo_ibge
+
+
+def test_rotulos_ordenados_montados_uma_vez(base):
+    rotulos = base.rotulos()
+    assert len(rotulos) == 300 and rotulos is base.rotulos()
+    assert [normalizar_nome(r) for r in rotulos] == sorted(normalizar_nome(r) for r in rotulos)
+    for rotulo in ("São João (PE)", "Água Branca (AL)", rotulos[-1]):
+        assert rotulos[base.posicao_rotulo(rotulo)] == rotulo
+    assert base.posicao_rotulo("Inexistente (ZZ)") is None
+
+
+def test_consultas_vetorizadas(base):
+    hsp, custo = base.hsp_e_custo(cidades=["São João (RJ)", "Água Branca (AL)", "São João (RJ)"])
+    assert hsp[0] == hsp[2] == base.buscar("São João (RJ)").hsp
+    municipio = base.buscar("Cidade 010 (SP)")
+    # Custo ausente no CSV vira a mediana da base
+    assert 2.3 <= municipio.custo_wp <= 3.2
+    np.testing.assert_allclose(base.hsp_mensal_por_codigo([municipio.codigo_ibge])[0], municipio.hsp_mensal)
+    assert base.buscar_codigo(municipio.codigo_ibge) == municipio
+    with pytest.raises(KeyError):
+        base.hsp_mensal_por_codigo([1])
+
+
+def test_consultas_vetorizadas_com_linhas_invalidas(base):
+    hsp, custo = base.hsp_e_custo(cidades=["São João (RJ)", None, float("nan"), "  ", "Atlântida (ZZ)", "São João (RJ)"])
+    assert hsp[0] == hsp[5] == base.buscar("São João (RJ)").hsp
+    assert np.isnan(hsp[1:5]).all() and np.isnan(custo[1:5]).all()
+    hsp, custo = base.hsp_e_custo(latitudes=[-10.0, np.nan, -95.0], longitudes=[-50.0, -50.0, -50.0])
+    assert hsp[0] == base.mais_proximo(-10.0, -50.0).hsp
+    assert np.isnan(hsp[1:]).all() and np.isnan(custo[1:]).all()
+    assert [len(v) for v in base.hsp_e_custo(cidades=[None])] == [1, 1]
+
+
+def test_base_do_pacote_tem_a_cidade_padrao():
+    municipio = abrir_base().buscar(CIDADE_PADRAO)
+    assert municipio.rotulo == CIDADE_PADRAO
+    assert sum(municipio.fatores_mensais) == pytest.approx(12, rel=0.01)
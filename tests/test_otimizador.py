@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from solarsim.cli import main
+from solarsim.constantes import CIDADE_PADRAO, POTENCIA_PAINEL_WP, TAXA_DESEMPENHO
+from solarsim.fluxo_caixa import calcular_fluxo_caixa
+from solarsim.otimizador import SEM_CANDIDATO, otimizar_lote, otimizar_sistema
+
+
+def test_escolhe_o_maior_vpl_entre_todos_os_candidatos():
+    r = otimizar_sistema(350, 1.05, 5.0, 3.4, minimo_kwh=50)
+    vpl = calcular_fluxo_caixa(r.custo, r.potencia_kwp * 5.0 * TAXA_DESEMPENHO * 30, 350, 1.05, 50,
+                               calcular_tir=False).vpl
+    np.testing.assert_allclose(r.vpl, vpl)
+    assert r.melhor == int(np.argmax(vpl))
+    assert r.resumo()["numero_paineis"] == r.numero_paineis[r.melhor]
+
+
+def test_criterio_payback_escolhe_o_menor_prazo():
+    r = otimizar_sistema(350, 1.05, 5.0, 3.4, criterio="payback")
+    assert r.payback_descontado_meses[r.melhor] == np.nanmin(r.payback_descontado_meses)
+    with pytest.raises(ValueError):
+        otimizar_sistema(350, 1.05, 5.0, 3.4, criterio="tir")
+
+
+def test_orcamento_maximo_limita_os_candidatos():
+    livre = otimizar_sistema(800, 1.0, 5.0, 3.0)
+    limite = livre.custo[livre.melhor] / 2
+    r = otimizar_sistema(800, 1.0, 5.0, 3.0, orcamento_maximo=limite)
+    assert r.encontrado and r.custo[r.melhor] <= limite
+    assert r.vpl[r.melhor] == r.vpl[r.custo <= limite].max()
+
+
+def test_sem_candidato_dentro_do_orcamento():
+    r = otimizar_sistema(300, 1.0, 5.0, 2.49, orcamento_maximo=1000)
+    assert r.melhor == SEM_CANDIDATO and not r.encontrado
+    assert r.resumo() is None
+    assert r.custo.min() == pytest.approx(POTENCIA_PAINEL_WP * 2.49)
+
+
+def test_lote_igual_ao_individual_e_marca_leads_sem_candidato():
+    rng = np.random.default_rng(8)
+    n = 25
+    consumo, tarifa = rng.uniform(150, 1500, n), rng.uniform(0.7, 1.3, n)
+    orcamento = np.where(np.arange(n) % 5 == 0, 500.0, np.nan)  # a cada 5 leads, orçamento abaixo de 1 painel
+    lote = otimizar_lote(consumo, tarifa, 5.0, 3.0, orcamento_maximo=orcamento, leads_por_bloco=7)
+    paralelo = otimizar_lote(consumo, tarifa, 5.0, 3.0, orcamento_maximo=orcamento, leads_por_bloco=7, processos=2)
+    for nome, valores in lote.items():
+        np.testing.assert_array_equal(valores, paralelo[nome])
+    for i in range(n):
+        individual = otimizar_sistema(consumo[i], tarifa[i], 5.0, 3.0,
+                                      orcamento_maximo=None if np.isnan(orcamento[i]) else orcamento[i])
+        if i % 5 == 0:
+            assert individual.resumo() is None
+            assert lote["numero_paineis_otimo"][i] == 0 and np.isnan(lote["vpl_otimo"][i])
+        else:
+            assert lote["numero_paineis_otimo"][i] == individual.resumo()["numero_paineis"]
+            assert lote["vpl_otimo"][i] == pytest.approx(individual.resumo()["vpl"])
+
+
+def test_lote_mascara_leads_invalidos_sem_afetar_os_demais():
+    consumo = np.array([300.0, np.nan, 400.0, 350.0, 500.0])
+    hsp = np.array([5.0, 5.0, 0.0, 5.0, 5.0])
+    minimo = np.array([50.0, 50.0, 50.0, np.nan, 50.0])
+    lote = otimizar_lote(consumo, 0.9, hsp, 2.49, minimo_kwh=minimo)
+    assert lote["numero_paineis_otimo"].tolist()[1:4] == [0, 0, 0]
+    for nome in ("potencia_kwp_otima", "custo_otimo", "vpl_otimo", "payback_descontado_meses_otimo"):
+        assert np.isnan(lote[nome][1:4]).all(), nome
+    for i in (0, 4):
+        assert lote["vpl_otimo"][i] == pytest.approx(otimizar_sistema(consumo[i], 0.9, 5.0, 2.49).resumo()["vpl"])
+
+
+def test_cli_otimizar_explica_as_linhas_invalidas(tmp_path, capsys):
+    entrada = tmp_path / "leads.csv"
+    entrada.write_text(f"consumo,tarifa,cidade,orcamento\n300,1.0,{CIDADE_PADRAO},\n400,abc,{CIDADE_PADRAO},\n"
+                       f"500,1.0,,\n600,1.0,{CIDADE_PADRAO},100\n,1.0,{CIDADE_PADRAO},\n", encoding="utf-8")
+    saida = tmp_path / "otimos.csv"
+    assert main(["otimizar", str(entrada), str(saida), "--chunksize", "3"]) == 0
+    resultado = pd.read_csv(saida, keep_default_na=False)
+    assert resultado["erro"].tolist() == ["", "entrada inválida: tarifa", "entrada inválida: cidade", "",
+                                          "entrada inválida: consumo"]
+    assert resultado["numero_paineis_otimo"].tolist()[1:] == [0, 0, 0, 0]
+    assert resultado["numero_paineis_otimo"][0] > 0
+    avisos = capsys.readouterr().err
+    assert "1 leads sem tamanho viável" in avisos and "3 linhas com entrada inválida" in avisos
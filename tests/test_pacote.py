@@ -0,0 +1,31 @@
+import importlib
+import subprocess
+import sys
+
+import pytest
+
+import solarsim
+
+
+def test_importar_o_pacote_nao_carrega_numpy_nem_interface():
+    codigo = ("import sys, solarsim; solarsim.calcular_sistema_solar(300, 1.0, 5.0, 3.4); "
+              "print(sorted(m for m in ('numpy', 'pandas', 'altair', 'streamlit') if m in sys.modules))")
+    saida = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True, check=True)
+    assert saida.stdout.strip() == "[]"
+
+
+@pytest.mark.parametrize("nome", sorted(solarsim._ATRIBUTOS_PREGUICOSOS))
+def test_atributos_preguicosos_vem_do_submodulo_declarado(nome):
+    modulo = importlib.import_module(f"solarsim.{solarsim._ATRIBUTOS_PREGUICOSOS[nome]}")
+    assert getattr(solarsim, nome) is getattr(modulo, nome)
+
+
+@pytest.mark.parametrize("nome", solarsim._SUBMODULOS)
+def test_submodulos_sob_demanda(nome):
+    assert getattr(solarsim, nome) is importlib.import_module(f"solarsim.{nome}")
+
+
+def test_nome_inexistente_da_attribute_error():
+    with pytest.raises(AttributeError):
+        solarsim.nao_existe
+    assert set(solarsim.__all__) <= set(dir(solarsim))
@@ -0,0 +1,76 @@
+import pytest
+
+from solarsim.calculos import premissas_simulacao
+from solarsim.constantes import CIDADE_PADRAO
+from solarsim.municipios import abrir_base
+from solarsim.propostas import calcular_propostas, gerar_propostas, nome_arquivo, renderizar_proposta
+
+CLIENTES = [
+    {"id": "a/b", "nome": "Ana", "consumo": 350, "tarifa": 0.95},
+    {"id": "a_b", "nome": "Bia", "consumo": 600, "tarifa": 1.05, "cidade": CIDADE_PADRAO},
+    {"id": 7, "consumo": 250, "tarifa": 0.9, "orcamento": 9000, "minimo_kwh": 100},
+    {"id": "sem_tarifa", "consumo": 300},
+]
+
+
+def test_nome_arquivo_sem_colisao():
+    assert nome_arquivo("cliente-01.a") == "cliente-01.a"
+    assert nome_arquivo(7) == "7"
+    nomes = {nome_arquivo(i) for i in ("a/b", "a_b", "a:b", "a b", "..", "", "...")}
+    assert len(nomes) == 7
+    assert nome_arquivo("a/b").startswith("a_b-") and nome_arquivo("a/b") == nome_arquivo("a/b")
+    assert all(n and "/" not in n and not n.startswith(".") for n in nomes)
+
+
+def test_contextos_e_premissas_compartilhadas():
+    contextos = calcular_propostas(CLIENTES)
+    assert isinstance(contextos[3], ValueError)
+    municipio = abrir_base().buscar(CIDADE_PADRAO)
+    primeiro = contextos[0]
+    assert primeiro["premissas"] == premissas_simulacao(
+        municipio.hsp, municipio.rotulo, municipio.custo_wp, 0.95, 50, origem_tarifa="valores informados")
+    assert "taxa mínima de 100 kWh" in contextos[2]["premissas"][7]
+    assert contextos[2]["custo_final"] == 9000
+    html = renderizar_proposta(primeiro)
+    assert "Ana" in html and "<svg" in html and primeiro["premissas"][0] in html
+
+
+@pytest.mark.parametrize("cliente, motivo", [
+    ({"consumo": -100, "tarifa": 0.9}, "consumo"),
+    ({"consumo": 0, "tarifa": 0.9}, "consumo"),
+    ({"consumo": "nan", "tarifa": 0.9}, "consumo"),
+    ({"consumo": 300, "tarifa": 0}, "tarifa"),
+    ({"consumo": 300, "tarifa": -1.0}, "tarifa"),
+    ({"consumo": 300, "tarifa": "inf"}, "tarifa"),
+    ({"consumo": 300, "tarifa": 0.9, "minimo_kwh": -30}, "minimo_kwh"),
+])
+def test_entradas_fora_da_faixa_viram_erro_do_cliente(cliente, motivo):
+    valido, invalido = calcular_propostas([{"id": 1, "consumo": 300, "tarifa": 0.9}, {"id": 2, **cliente}])
+    assert isinstance(invalido, ValueError) and str(invalido).startswith(motivo)
+    assert valido["nova_fatura"] > 0 and valido["dados"]["economia_mensal_reais"] > 0
+
+
+def test_premissas_descrevem_tarifa_e_consumo():
+    premissas = premissas_simulacao(4.5, "Cidade", 4.2, 1.0, 30, origem_tarifa="tabela X",
+                                    perfil_consumo="leituras do medidor")
+    assert "Tarifa: tabela X (" in premissas[4]
+    assert premissas[6] == "Consumo: leituras do medidor."
+    assert "taxa mínima de 30 kWh" in premissas[7]
+
+
+@pytest.mark.parametrize("processos", [None, 2])
+def test_gerar_propostas_um_arquivo_por_id(tmp_path, processos):
+    relatorio = gerar_propostas(CLIENTES + [{"nome": "sem id"}], tmp_path, processos=processos, clientes_por_tarefa=2)
+    assert relatorio.gerados == 3
+    assert {i for i, _ in relatorio.erros} == {None, "sem_tarifa"}
+    arquivos = sorted(p.name for p in tmp_path.iterdir())
+    assert arquivos == sorted(f"{nome_arquivo(i)}.html" for i in ("a/b", "a_b", 7))
+    assert "Bia" in (tmp_path / "a_b.html").read_text(encoding="utf-8")
+
+    de_novo = gerar_propostas(CLIENTES, tmp_path, clientes_por_tarefa=2)
+    assert de_novo.gerados == 0 and de_novo.pulados == 3
+
+
+def test_formato_desconhecido(tmp_path):
+    with pytest.raises(ValueError, match="Formato desconhecido"):
+        gerar_propostas(CLIENTES, tmp_path, formato="docx")
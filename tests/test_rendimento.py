@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from solarsim.cli import main
+from solarsim.horario import simular_compensacao, simular_sistema, somar_por_mes
+from solarsim.rendimento import Face, fatores_transposicao, perfil_horario_telhado, simular_faces, simular_telhado
+
+LATITUDE = -22.5
+HSP_MENSAL = (5.57, 6.09, 5.24, 5.05, 4.54, 4.43, 4.39, 5.05, 4.78, 4.9, 4.57, 5.19)
+
+
+@pytest.fixture(scope="module")
+def fatores():
+    return fatores_transposicao(LATITUDE, HSP_MENSAL)
+
+
+def test_interpolacao_nos_nos_e_na_virada_do_azimute(fatores):
+    np.testing.assert_allclose(fatores.irradiancia_plano(20, 90)[0], fatores.poa[4, 9])
+    meio = fatores.irradiancia_plano(20, 355)[0]
+    np.testing.assert_allclose(meio, (fatores.poa[4, 35] + fatores.poa[4, 0]) / 2)
+    # Plano horizontal: só difere da global no nascer/pôr do sol, onde a direta é limitada
+    np.testing.assert_allclose(fatores.irradiancia_plano(0, 123)[0].sum(axis=-1), fatores.ghi.sum(axis=-1), rtol=5e-3)
+
+
+def test_orientacao_norte_rende_mais_no_hemisferio_sul(fatores):
+    r = simular_faces(fatores, 1.0, 22, [0, 90, 180])
+    norte, leste, sul = r.geracao_anual
+    assert norte > leste > sul
+    assert 0.7 < r.taxa_desempenho[0] < 0.85
+
+
+def test_inclinacao_ou_azimute_invalidos_saem_com_nan(fatores):
+    inclinacao = np.array([20, np.nan, 20, 30])
+    azimute = np.array([0, 0, np.inf, 90])
+    r = simular_faces(fatores, 2.0, inclinacao, azimute)
+    assert np.isnan(r.geracao_mensal[1:3]).all() and np.isnan(r.perda_temperatura[1:3]).all()
+    validas = simular_faces(fatores, 2.0, inclinacao[[0, 3]], azimute[[0, 3]])
+    np.testing.assert_array_equal(r.geracao_mensal[[0, 3]], validas.geracao_mensal)
+
+
+def test_blocos_nao_mudam_o_resultado(fatores):
+    rng = np.random.default_rng(14)
+    kwp, inclinacao, azimute = rng.uniform(1, 10, 50), rng.uniform(0, 60, 50), rng.uniform(0, 360, 50)
+    inteiro = simular_faces(fatores, kwp, inclinacao, azimute)
+    picado = simular_faces(fatores, kwp, inclinacao, azimute, bloco=7)
+    np.testing.assert_array_equal(inteiro.geracao_mensal, picado.geracao_mensal)
+
+
+def test_perfil_horario_fecha_com_a_geracao_mensal_e_alimenta_a_simulacao():
+    faces = (Face(20, 90, 1.65, "Leste"), Face(20, 270, 1.1, "Oeste"))
+    perfil = perfil_horario_telhado(faces, LATITUDE, HSP_MENSAL)
+    mensal = simular_telhado(faces, LATITUDE, HSP_MENSAL).geracao_mensal.sum(axis=0)
+    np.testing.assert_allclose(somar_por_mes(perfil), mensal)
+
+    carga = np.full(8760, 0.5)
+    via_atalho = simular_sistema(None, None, 50, 1.0, carga_h=carga, geracao_h=perfil)
+    direto = simular_compensacao(perfil, carga, 50, 1.0)
+    np.testing.assert_array_equal(via_atalho.fatura, direto.fatura)
+    np.testing.assert_allclose(via_atalho.geracao, mensal)
+
+
+def test_cli_marca_linhas_invalidas(tmp_path):
+    entrada, saida = tmp_path / "telhados.csv", tmp_path / "geracao.csv"
+    entrada.write_text("id,kwp,inclinacao,azimute\n1,5,20,0\n2,5,,0\n3,5,20,abc\n4,0,10,10\n5,3,15,90\n",
+                       encoding="utf-8")
+    assert main(["rendimento", str(entrada), str(saida), "--chunksize", "2", "--manter-colunas"]) == 0
+    df = pd.read_csv(saida, keep_default_na=False, na_values=[""])
+    assert list(df["id"]) == [1, 2, 3, 4, 5]
+    assert df["erro"].fillna("").tolist() == ["", "entrada inválida: inclinacao", "entrada inválida: azimute",
+                                              "entrada inválida: kwp", ""]
+    assert df["geracao_anual_kwh"][[1, 2, 3]].isna().all() and (df["geracao_anual_kwh"][[0, 4]] > 0).all()
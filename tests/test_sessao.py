@@ -0,0 +1,92 @@
+import pytest
+
+from solarsim import cenarios as modulo_cenarios
+from solarsim.calculos import calcular_sistema_solar
+from solarsim.cenarios import ColecaoCenarios, EntradasCenario
+from solarsim.constantes import CIDADE_PADRAO
+from solarsim.sessao import (CHAVES_EXTERNAS, PARAMETRO_URL, ArmazemMemoria, ArmazemSQLite, criar_armazem,
+                             desserializar, restaurar_sessao, salvar_sessao, serializar)
+
+
+def _estado(aparelhos=None, orcamento_personalizado=False):
+    dados = calcular_sistema_solar(350, 1.05, 5.0, 3.4)
+    res = {"cidade": CIDADE_PADRAO, "hsp": 5.0, "custo_wp": 3.4, "fatores_mensais": tuple(0.9 + i / 60 for i in range(12)),
+           "consumo": 350, "tarifa": 1.05, "custo_final": dados["custo_total_estimado_site"], "dados": dados,
+           "payback": "", "minimo_kwh": 50, "saldo_kwh": 0.0, "orcamento_personalizado": orcamento_personalizado,
+           "medicao": None, "aparelhos": aparelhos, "tarifa_tabela": False}
+    colecao = ColecaoCenarios()
+    colecao.salvar("Conta de luz", EntradasCenario(350.0, 1.05, CIDADE_PADRAO, 50))
+    colecao.salvar("Instalador", EntradasCenario(350.0, 1.05, CIDADE_PADRAO, 100, orcamento=18000.0))
+    return {"res": res, "tarifas_list": [0.62, 0.41], "medicao_hash": "abc123", "cenarios": colecao}
+
+
+@pytest.mark.parametrize("aparelhos, orcamento", [(None, False), ((3, 1, 1, 0, 1), True)])
+def test_ida_e_volta(aparelhos, orcamento):
+    estado = _estado(aparelhos, orcamento)
+    restaurado = desserializar(serializar(estado))
+    assert restaurado["tarifas_list"] == estado["tarifas_list"]
+    assert restaurado["medicao_hash"] == "abc123"
+    res, original = restaurado["res"], estado["res"]
+    for chave in ("cidade", "consumo", "tarifa", "custo_final", "minimo_kwh", "orcamento_personalizado", "aparelhos"):
+        assert res[chave] == original[chave], chave
+    assert isinstance(res["consumo"], int)
+    assert res["fatores_mensais"] == pytest.approx(original["fatores_mensais"])
+    for chave in ("potencia_kwp", "numero_paineis", "geracao_mensal", "economia_mensal_reais"):
+        assert res["dados"][chave] == original["dados"][chave]
+    assert res["dados"]["custos_detalhados"] == pytest.approx(original["dados"]["custos_detalhados"])
+    assert res["saldo_kwh"] == pytest.approx(original["dados"]["geracao_mensal"] - 350)
+    assert restaurado["cenarios"].para_lista() == estado["cenarios"].para_lista()
+    assert restaurado["cenarios"].revisao == estado["cenarios"].revisao
+
+
+def test_estado_vazio_e_versao_desconhecida():
+    assert desserializar(serializar({})) == {"tarifas_list": []}
+    dados = bytearray(serializar({}))
+    dados[0] = 99
+    with pytest.raises(ValueError):
+        desserializar(bytes(dados))
+
+
+def test_colecao_restaurada_nao_recalcula_os_fluxos(monkeypatch):
+    estado = _estado()
+    esperado = estado["cenarios"].resultados()
+    registro = serializar(estado)
+
+    def proibido(*args, **kwargs):
+        raise AssertionError("fluxo de caixa recalculado ao restaurar")
+
+    monkeypatch.setattr(modulo_cenarios, "calcular_fluxo_caixa", proibido)
+    for _ in range(3):  # um rerun por iteração: a coleção é recriada do registro
+        restaurados = desserializar(registro)["cenarios"].resultados()
+        for nome, r in restaurados.items():
+            assert (r.vpl, r.custo_final) == (esperado[nome].vpl, esperado[nome].custo_final)
+
+
+@pytest.mark.parametrize("criar", [lambda tmp: ArmazemMemoria(), lambda tmp: ArmazemSQLite(tmp / "sessoes.db")])
+def test_salvar_e_restaurar_pela_url(tmp_path, criar):
+    armazem = criar(tmp_path)
+    estado, parametros = _estado(), {}
+    assert restaurar_sessao(estado, parametros, armazem) is False  # itens ainda na memória
+    sessao = parametros[PARAMETRO_URL]
+    assert salvar_sessao(estado, armazem) > 0
+    assert not any(chave in estado for chave in CHAVES_EXTERNAS)
+
+    outra_replica = {}
+    assert restaurar_sessao(outra_replica, {PARAMETRO_URL: sessao}, armazem) is True
+    assert outra_replica["_sessao_id"] == sessao
+    assert outra_replica["res"]["custo_final"] == _estado()["res"]["custo_final"]
+    assert len(armazem) == 1 and armazem.medidas.resumo()["acertos"] == 1
+
+
+def test_ttl_expira(tmp_path):
+    for armazem in (ArmazemMemoria(ttl_segundos=-1), ArmazemSQLite(tmp_path / "s.db", ttl_segundos=-1)):
+        armazem.guardar("x", b"dados")
+        assert armazem.obter("x") is None
+        assert armazem.remover_expirados() in (0, 1)
+
+
+def test_criar_armazem_valida_a_url(tmp_path):
+    assert isinstance(criar_armazem("memoria"), ArmazemMemoria)
+    assert isinstance(criar_armazem(f"sqlite:///{tmp_path / 'a.db'}"), ArmazemSQLite)
+    with pytest.raises(ValueError):
+        criar_armazem("postgres://localhost")
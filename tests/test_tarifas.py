@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from solarsim.tarifas import BANDEIRAS, carregar_tabela, meses_entre
+
+
+@pytest.fixture(scope="module")
+def tabela():
+    return carregar_tabela()
+
+
+def _conta(kwh, te_tusd, adicional, icms, pis, cofins):
+    return kwh * (te_tusd + adicional) / (1 - (pis + cofins + icms))
+
+
+def test_conta_a_mao_com_bandeira_e_faixa_de_icms(tabela):
+    conta = tabela.fatura(400, ["2025-08"], "enel rj")
+    esperado = _conta(400, 0.29110 + 0.53390, 0.07877, 0.22, 0.0091, 0.0418)  # vermelha 2, faixa > 300 kWh
+    assert conta.total[0] == pytest.approx(esperado)
+    assert conta.energia[0] + conta.bandeira[0] + conta.tributos[0] == pytest.approx(conta.total[0])
+    assert conta.tarifa_efetiva[0] == pytest.approx(esperado / 400)
+
+
+def test_limite_da_faixa_e_custo_de_disponibilidade(tabela):
+    no_limite = tabela.fatura(300, ["2025-06"], bandeira="verde")
+    assert no_limite.total[0] == pytest.approx(_conta(300, 0.825, 0.0, 0.20, 0.0091, 0.0418))
+    # Consumo abaixo do mínimo: fatura o mínimo, mas a faixa de ICMS segue o consumo (isento até 50 kWh)
+    minimo = tabela.fatura(30, ["2025-06"], minimo_kwh=50, bandeira="verde")
+    assert minimo.kwh_faturado[0] == 50
+    assert minimo.total[0] == pytest.approx(_conta(50, 0.825, 0.0, 0.0, 0.0091, 0.0418))
+
+
+def test_vigencias_antes_e_depois_das_tabelas(tabela):
+    antes = tabela.fatura(200, ["2021-06"], bandeira="verde")
+    primeira = tabela.fatura(200, ["2022-03"], bandeira="verde")
+    assert antes.energia[0] == pytest.approx(primeira.energia[0]) == pytest.approx(200 * (0.29560 + 0.43910))
+    futuro = tabela.fatura(200, ["2030-01"])
+    ultimo = tabela.fatura(200, tabela.ultimos_meses(1), bandeira="verde")
+    assert futuro.total[0] == pytest.approx(ultimo.total[0])
+    historica = tabela.fatura(200, ["2030-01"], bandeira_futura="historica")
+    assert historica.bandeira[0] == pytest.approx(200 * tabela.adicional[-1] @ tabela.frequencia_bandeiras)
+    assert tabela.frequencia_bandeiras.sum() == pytest.approx(1.0)
+
+
+def test_broadcasting_e_bandeiras_por_cenario(tabela):
+    meses = meses_entre("2024-01", "2024-12")
+    consumo = np.array([[150.0], [450.0]])
+    conta = tabela.fatura(consumo, meses, minimo_kwh=50)
+    assert conta.total.shape == (2, 12)
+    for c in range(2):
+        for m, mes in enumerate(meses):
+            assert conta.total[c, m] == pytest.approx(tabela.fatura(consumo[c, 0], [mes], minimo_kwh=50).total[0])
+    codigos = np.tile(np.arange(len(BANDEIRAS)), 3)
+    sorteada = tabela.fatura(300, meses, bandeira=codigos)
+    for m, codigo in enumerate(codigos):
+        forcada = tabela.fatura(300, [meses[m]], bandeira=BANDEIRAS[codigo])
+        assert sorteada.total[m] == pytest.approx(forcada.total[0])
+
+
+def test_tarifa_media(tabela):
+    consumo = np.array([120.0, 350.0, 900.0])
+    media = tabela.tarifa_media(consumo)
+    for c, valor in zip(consumo, media):
+        conta = tabela.fatura(c, tabela.ultimos_meses())
+        assert valor == pytest.approx(conta.total.sum() / conta.kwh_faturado.sum())
+    assert media[0] < media[1]  # faixa de ICMS mais alta
+
+
+def test_distribuidora_desconhecida_e_tabela_vazia(tabela, tmp_path):
+    with pytest.raises(KeyError, match="Enel RJ"):
+        tabela.fatura(300, ["2025-01"], "Light")
+    for nome, cabecalho in (("tarifas.csv", "distribuidora,uf,vigencia,te,tusd,pis,cofins"),
+                            ("icms.csv", "uf,vigencia,acima_de_kwh,aliquota"),
+                            ("bandeiras_valores.csv", "vigencia,amarela,vermelha_1,vermelha_2"),
+                            ("bandeiras_acionadas.csv", "mes,bandeira")):
+        (tmp_path / nome).write_text(cabecalho + "\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        carregar_tabela.__wrapped__(tmp_path)